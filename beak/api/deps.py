@@ -10,6 +10,7 @@ from strawberry.fastapi import BaseContext
 from strawberry.types.info import Info as StrawberryInfo
 from strawberry.types.info import RootValueType
 
+from beak.api.gql.loaders import Loaders
 from beak.apps.common import schemas as core_schemas  # noqa
 from beak.apps.user.entities import User
 from beak.apps.user.services import UserService
@@ -62,6 +63,11 @@ async def get_current_active_user(
 
 
 class InfoContext(BaseContext):
+    def __init__(self):
+        super().__init__()
+        # batches the related entity lookups of this request's resolvers
+        self.loaders = Loaders()
+
     async def user(self) -> User | None:
         if not self.request:
             return None
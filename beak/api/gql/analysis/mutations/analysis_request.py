@@ -1186,15 +1186,17 @@ async def publish_samples(
 
     job = await JobService().create(job_schema)
     if not settings.ENABLE_BACKGROUND_PROCESSING:
-        await impress_results(job.uid)
+        await JobService().run_inline(job.uid, impress_results)
         impressed = await SampleService().get_by_uids([s.uid for s in samples])
         return SampleListingType(
             samples=impressed, message="Samples have been impressed"
         )
 
     if final_publish:
-        for sample in final_publish:
-            await task_guard.process(uid=sample.uid, object_type=TrackableObject.SAMPLE)
+        await task_guard.process_many(
+            [sample.uid for sample in final_publish],
+            object_type=TrackableObject.SAMPLE,
+        )
 
     # TODO: clean up below - probably no longer necessary - needs checking
     # !important for frontend
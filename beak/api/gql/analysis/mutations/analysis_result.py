@@ -100,7 +100,7 @@ async def submit_analysis_results(
 
     job = await JobService().create(job_schema)
     if not settings.ENABLE_BACKGROUND_PROCESSING:
-        await submit_results(job.uid)
+        await JobService().run_inline(job.uid, submit_results)
         returns = await AnalysisResultService().get_by_uids(
             [r.uid for r in analysis_results]
         )
@@ -108,8 +108,9 @@ async def submit_analysis_results(
             results=returns, is_background=settings.ENABLE_BACKGROUND_PROCESSING
         )
 
-    for _ar in an_results:
-        await task_guard.process(uid=_ar["uid"], object_type=TrackableObject.RESULT)
+    await task_guard.process_many(
+        [_ar["uid"] for _ar in an_results], object_type=TrackableObject.RESULT
+    )
 
     if source_object == "worksheet" and source_object_uid:
         await task_guard.process(
@@ -148,14 +149,13 @@ async def verify_analysis_results(
     job = await JobService().create(job_schema)
 
     if not settings.ENABLE_BACKGROUND_PROCESSING:
-        await verify_results(job.uid)
+        await JobService().run_inline(job.uid, verify_results)
         returns = await AnalysisResultService().get_by_uids(analyses)
         return ResultOperationType(
             results=returns, is_background=settings.ENABLE_BACKGROUND_PROCESSING
         )
 
-    for uid in analyses:
-        await task_guard.process(uid=uid, object_type=TrackableObject.RESULT)
+    await task_guard.process_many(analyses, object_type=TrackableObject.RESULT)
 
     if source_object == "worksheet" and source_object_uid:
         await task_guard.process(
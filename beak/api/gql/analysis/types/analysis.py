@@ -192,7 +192,9 @@ class AnalysisRequestType:
 
     @strawberry.field
     async def samples(self, info) -> List["SampleType"]:
-        return await SampleService().get_all(analysis_request_uid=self.uid)
+        return await info.context.loaders.by_field(
+            SampleService, "analysis_request_uid"
+        ).load(self.uid)
 
     @strawberry.field
     async def client(self, info) -> ClientType | None:
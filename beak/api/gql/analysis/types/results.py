@@ -1,4 +1,5 @@
 from datetime import datetime
+from itertools import chain
 from typing import Optional
 
 import strawberry  # noqa
@@ -22,6 +23,9 @@ from beak.api.gql.user.types import UserType
 from beak.apps.instrument.services import MethodService, InstrumentService
 from beak.apps.worksheet.services import WorkSheetService
 
+# instruments and methods offered with every analysis, besides its own
+DEFAULTS = ["Manual", "Automated"]
+
 
 @strawberry.type
 class AnalysisResultType:
@@ -66,7 +70,11 @@ class AnalysisResultType:
 
     @strawberry.field
     async def worksheet_id(self, info) -> str | None:
-        ws = await WorkSheetService().get(uid=self.worksheet_uid)
+        if not self.worksheet_uid:
+            return None
+        ws = await info.context.loaders.by_uid(WorkSheetService).load(
+            self.worksheet_uid
+        )
         return ws.worksheet_id if ws else None
 
     @strawberry.field
@@ -104,17 +112,18 @@ class AnalysisResultType:
             ]
             instruments.append(instrument)
 
-        default_instruments = await InstrumentService().get_all(
-            name__in=["Manual", "Automated"]
-        )
-        analysis.instruments = instruments + default_instruments
+        loaders = info.context.loaders
+        default_instruments = await loaders.by_field(
+            InstrumentService, "name"
+        ).load_many(DEFAULTS)
+        analysis.instruments = instruments + list(chain(*default_instruments))
         analysis.methods = [
             StrawberryMapper[MethodType]().map(**method) for method in _methods
         ]
-        default_methods = await MethodService().get_all(
-            name__in=["Manual", "Automated"]
+        default_methods = await loaders.by_field(MethodService, "name").load_many(
+            DEFAULTS
         )
-        analysis.methods = analysis.methods + default_methods
+        analysis.methods = analysis.methods + list(chain(*default_methods))
         analysis.result_options = [
             StrawberryMapper[ResultOptionType]().map(**result_option)
             for result_option in _result_options
@@ -123,11 +132,6 @@ class AnalysisResultType:
             StrawberryMapper[AnalysisInterimType]().map(**interim)
             for interim in _interims
         ]
-
-        # Add defaults
-        _lab_instruments = await MethodService().get_all(
-            name__in=["Manual", "Automated"]
-        )
         return analysis
 
 
@@ -9,6 +9,8 @@ from beak.apps.analysis.entities.analysis import Sample
 from beak.apps.analysis.entities.results import AnalysisResult
 from beak.apps.analysis.enum import ResultState, SampleState
 from beak.apps.analytics import EntityAnalyticsInit
+from beak.apps.analytics.rollup import PROCESSES
+from beak.apps.analytics.sources.rollup import RollupAnalytics
 from beak.apps.guard import FAction, FObject
 from beak.apps.instrument.services import LaboratoryInstrumentService
 from beak.apps.user.services import UserService
@@ -51,7 +53,6 @@ async def get_instrument(val):
     ]
 )
 async def count_sample_group_by_status(info) -> types.GroupedCounts:
-    analytics = EntityAnalyticsInit(Sample)
     state_in = [
         SampleState.SCHEDULED,
         SampleState.EXPECTED,
@@ -59,9 +60,11 @@ async def count_sample_group_by_status(info) -> types.GroupedCounts:
         SampleState.AWAITING,
         SampleState.APPROVED,
     ]
-    results = await analytics.get_counts_group_by(
-        "status", ("", ""), ("", ""), state_in
-    )
+    results = await RollupAnalytics().get_counts("sample.status", state_in)
+    if results is None:
+        results = await EntityAnalyticsInit(Sample).get_counts_group_by(
+            "status", ("", ""), ("", ""), state_in
+        )
 
     stats = []
     for row in results:
@@ -81,14 +84,15 @@ async def count_sample_group_by_status(info) -> types.GroupedCounts:
     ]
 )
 async def count_analyte_group_by_status(info) -> types.GroupedCounts:
-    analytics = EntityAnalyticsInit(AnalysisResult)
     state_in = [
         ResultState.PENDING,
         ResultState.RESULTED,
     ]
-    results = await analytics.get_counts_group_by(
-        "status", ("", ""), ("", ""), state_in
-    )
+    results = await RollupAnalytics().get_counts("analysis_result.status", state_in)
+    if results is None:
+        results = await EntityAnalyticsInit(AnalysisResult).get_counts_group_by(
+            "status", ("", ""), ("", ""), state_in
+        )
 
     stats = []
     for row in results:
@@ -108,25 +112,33 @@ async def count_analyte_group_by_status(info) -> types.GroupedCounts:
     ]
 )
 async def count_extras_group_by_status(info) -> types.GroupedCounts:
-    sample_analytics = EntityAnalyticsInit(Sample)
+    rollups = RollupAnalytics()
     sample_states = [
         SampleState.CANCELLED,
         SampleState.REJECTED,
         SampleState.INVALIDATED,
     ]
-    sample_results = await sample_analytics.get_counts_group_by(
-        "status", ("", ""), ("", ""), sample_states
-    )
+    sample_results = await rollups.get_counts("sample.status", sample_states)
+    if sample_results is None:
+        sample_results = await EntityAnalyticsInit(Sample).get_counts_group_by(
+            "status", ("", ""), ("", ""), sample_states
+        )
 
     result_analytics = EntityAnalyticsInit(AnalysisResult)
     result_states = [
         ResultState.RETRACTED,
     ]
-    result_results = await result_analytics.get_counts_group_by(
-        "status", ("", ""), ("", ""), result_states
-    )
+    result_results = await rollups.get_counts("analysis_result.status", result_states)
+    if result_results is None:
+        result_results = await result_analytics.get_counts_group_by(
+            "status", ("", ""), ("", ""), result_states
+        )
 
-    retests = await result_analytics.count_analyses_retests(("", ""), ("", ""))
+    retests = await rollups.get_counts("analysis_result.retest")
+    if retests is None:
+        retests = await result_analytics.count_analyses_retests(("", ""), ("", ""))
+    else:
+        retests = [(sum(count for _, count in retests),)]
 
     stats = []
     for s_row in sample_results:
@@ -186,12 +198,19 @@ async def count_worksheet_group_by_status(info) -> types.GroupedCounts:
 async def count_analyte_group_by_instrument(
     info, start_date: str | None = None, end_date: str | None = None
 ) -> types.GroupedCounts:
-    analytics = EntityAnalyticsInit(AnalysisResult)
-    results = await analytics.get_counts_group_by(
-        "laboratory_instrument_uid",
-        ("date_submitted", start_date),
-        ("date_submitted", end_date),
-    )
+    rollups = RollupAnalytics()
+    if start_date or end_date:
+        results = await rollups.get_daily_counts(
+            "analysis_result.instrument", start_date, end_date
+        )
+    else:
+        results = await rollups.get_counts("analysis_result.instrument")
+    if results is None:
+        results = await EntityAnalyticsInit(AnalysisResult).get_counts_group_by(
+            "laboratory_instrument_uid",
+            ("date_submitted", start_date),
+            ("date_submitted", end_date),
+        )
 
     stats = []
     for row in results:
@@ -216,18 +235,20 @@ async def count_sample_group_by_action(
     info, start_date: str | None = None, end_date: str | None = None
 ) -> types.GroupedData:
     analytics = EntityAnalyticsInit(Sample)
-    created = await analytics.get_counts_group_by(
-        "created_by_uid", ("created_at", start_date), ("created_at", end_date)
-    )
-    submitted = await analytics.get_counts_group_by(
-        "submitted_by_uid", ("date_submitted", start_date), ("date_submitted", end_date)
-    )
-    verified = await analytics.get_counts_group_by(
-        "verified_by_uid", ("date_verified", start_date), ("date_verified", end_date)
-    )
-    published = await analytics.get_counts_group_by(
-        "published_by_uid", ("date_published", start_date), ("date_published", end_date)
-    )
+    rollups = RollupAnalytics()
+
+    async def counts(action: str, user_column: str, date_column: str):
+        rows = await rollups.get_daily_counts(f"sample.{action}", start_date, end_date)
+        if rows is None:
+            rows = await analytics.get_counts_group_by(
+                user_column, (date_column, start_date), (date_column, end_date)
+            )
+        return rows
+
+    created = await counts("registration", "created_by_uid", "created_at")
+    submitted = await counts("submission", "submitted_by_uid", "date_submitted")
+    verified = await counts("verification", "verified_by_uid", "date_verified")
+    published = await counts("publication", "published_by_uid", "date_published")
 
     stats = []
     registration = types.GroupData(group="registration", counts=[])
@@ -275,18 +296,23 @@ async def sample_process_performance(
     info, start_date: str, end_date: str
 ) -> types.ProcessStatistics:
     analytics = EntityAnalyticsInit(Sample)
-    received_to_published = await analytics.get_sample_process_performance(
-        start=("date_received", start_date), end=("date_published", end_date)
-    )
-    received_to_submitted = await analytics.get_sample_process_performance(
-        start=("date_received", start_date), end=("date_submitted", end_date)
-    )
-    submitted_to_verified = await analytics.get_sample_process_performance(
-        start=("date_submitted", start_date), end=("date_verified", end_date)
-    )
-    verified_to_published = await analytics.get_sample_process_performance(
-        start=("date_verified", start_date), end=("date_published", end_date)
-    )
+    rollups = RollupAnalytics()
+
+    async def performance(process: str):
+        rows = await rollups.get_sample_process_performance(
+            process, start_date, end_date
+        )
+        if rows is None:
+            start_column, end_column = PROCESSES[process]
+            rows = await analytics.get_sample_process_performance(
+                start=(start_column, start_date), end=(end_column, end_date)
+            )
+        return rows
+
+    received_to_published = await performance("received_to_published")
+    received_to_submitted = await performance("received_to_submitted")
+    submitted_to_verified = await performance("submitted_to_verified")
+    verified_to_published = await performance("verified_to_published")
 
     final_data = []
 
@@ -358,33 +384,18 @@ async def sample_process_performance(
 async def analysis_process_performance(
     info, process: str, start_date: str, end_date: str
 ) -> types.ProcessStatistics:
-    analytics = EntityAnalyticsInit(Sample)
-    processes = [
-        "received_to_published",
-        "received_to_submitted",
-        "submitted_to_verified",
-        "verified_to_published",
-    ]
-    if process not in processes:
+    if process not in PROCESSES:
         logger.warning(f"invalid process {process}")
         raise Exception(f"invalid process {process}")
 
-    performance = []
-    if process == "received_to_published":
-        performance = await analytics.get_analysis_process_performance(
-            start=("date_received", start_date), end=("date_published", end_date)
-        )
-    if process == "received_to_submitted":
-        performance = await analytics.get_analysis_process_performance(
-            start=("date_received", start_date), end=("date_submitted", end_date)
-        )
-    if process == "submitted_to_verified":
-        performance = await analytics.get_analysis_process_performance(
-            start=("date_submitted", start_date), end=("date_verified", end_date)
-        )
-    if process == "verified_to_published":
+    performance = await RollupAnalytics().get_analysis_process_performance(
+        process, start_date, end_date
+    )
+    if performance is None:
+        analytics = EntityAnalyticsInit(Sample)
+        start_column, end_column = PROCESSES[process]
         performance = await analytics.get_analysis_process_performance(
-            start=("date_verified", start_date), end=("date_published", end_date)
+            start=(start_column, start_date), end=(end_column, end_date)
         )
 
     final_data = []
@@ -418,8 +429,10 @@ async def analysis_process_performance(
     ]
 )
 async def sample_laggards(info) -> types.LaggardStatistics:
-    analytics = EntityAnalyticsInit(Sample)
-    not_complete, complete = await analytics.get_laggards()
+    laggards = await RollupAnalytics().get_laggards()
+    if laggards is None:
+        laggards = await EntityAnalyticsInit(Sample).get_laggards()
+    not_complete, complete = laggards
 
     final_data = []
 
@@ -38,8 +38,10 @@ class ClientType:
     updated_at: str | None = None
 
     @strawberry.field
-    async def contacts(self) -> List[ClientContactType] | None:
-        return await ClientContactService().get_all(client_uid=self.uid)
+    async def contacts(self, info) -> List[ClientContactType] | None:
+        return await info.context.loaders.by_field(
+            ClientContactService, "client_uid"
+        ).load(self.uid)
 
 
 @strawberry.type
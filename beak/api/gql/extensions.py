@@ -0,0 +1,21 @@
+"""
+Schema extensions run for every GraphQL operation
+"""
+
+from strawberry.extensions import SchemaExtension
+
+from beak.utils.encryption import plaintext_cache
+
+
+class PlaintextCacheExtension(SchemaExtension):
+    """
+    Decrypts each PII/PHI ciphertext once per operation.
+
+    A patient that turns up in many samples, results and audit entries of one
+    response is decrypted the first time only; the cache goes with the
+    operation.
+    """
+
+    def on_operation(self):
+        with plaintext_cache():
+            yield
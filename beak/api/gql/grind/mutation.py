@@ -685,7 +685,7 @@ class GrindMutations:
             )
 
             # Store file in MinIO
-            MinioClient().put_object(
+            await MinioClient().put_object(
                 bucket=MinioBucket.GRIND_MEDIA,
                 object_name=object_name,
                 data=file_bytes,
@@ -723,7 +723,9 @@ class GrindMutations:
                 bucket = MinioBucket.GRIND_MEDIA
 
                 try:
-                    MinioClient().remove_object(bucket=bucket, object_name=object_name)
+                    await MinioClient().remove_object(
+                        bucket=bucket, object_name=object_name
+                    )
                 except Exception as e:
                     logging.error(f"Failed to delete object from MinIO: {str(e)}")
                     # Continue with deletion even if MinIO fails
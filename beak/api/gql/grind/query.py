@@ -858,8 +858,8 @@ class GrindQuery:
             raise Exception("Media not found")
 
         if media.destination == "minio":
-            download_url = MinioClient().client.presigned_get_object(
-                bucket_name=MinioBucket.GRIND_MEDIA,
+            download_url = await MinioClient().presigned_get_object(
+                bucket=MinioBucket.GRIND_MEDIA,
                 object_name=media.path,
                 expires=timedelta(
                     minutes=5
@@ -888,7 +888,7 @@ class GrindQuery:
         if media.destination == "minio":
             # Get file content from MinIO
             try:
-                files = MinioClient().get_object(
+                files = await MinioClient().get_object(
                     bucket=MinioBucket.GRIND_MEDIA, object_names=[media.path]
                 )
                 if not files:
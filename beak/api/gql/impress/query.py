@@ -39,7 +39,7 @@ class ReportImpressQuery:
     ) -> BytesScalar | None:
         """Fetch Latest report given sample id"""
         if settings.OBJECT_STORAGE:
-            reports = MinioClient().get_object(
+            reports = await MinioClient().get_object(
                 MinioBucket.DIAGNOSTIC_REPORT, [f"{sid}.pdf" for sid in sample_ids]
             )
 
@@ -95,7 +95,7 @@ class ReportImpressQuery:
 
         if settings.OBJECT_STORAGE:
             sample = await SampleService().get(uid=report.sample_uid)
-            report = MinioClient().get_object(
+            report = await MinioClient().get_object(
                 MinioBucket.DIAGNOSTIC_REPORT, [f"{sample.sample_id}.pdf"]
             )
             if not report:
@@ -0,0 +1,53 @@
+"""
+Request scoped DataLoaders for resolving related entities
+
+Resolvers on a list of N objects would otherwise query once per object.
+Loading through info.context.loaders instead collects the keys asked for
+while the list resolves and fetches them in one query per loader:
+
+    await info.context.loaders.by_uid(WorkSheetService).load(self.worksheet_uid)
+    await info.context.loaders.by_field(SampleService, "analysis_request_uid").load(
+        self.uid
+    )
+
+Loaders live as long as the GraphQL context, which is built per request, so
+their caches never serve another request (or user).
+"""
+
+from collections import defaultdict
+from typing import Any, Optional, Type
+
+from strawberry.dataloader import DataLoader
+
+from beak.apps.abstract import BaseService
+
+
+class Loaders:
+    def __init__(self):
+        self._loaders: dict[tuple, DataLoader] = {}
+
+    def by_uid(self, service: Type[BaseService]) -> DataLoader[str, Optional[Any]]:
+        """Entities by uid, None for unknown uids"""
+        key = (service, "uid")
+        if key not in self._loaders:
+
+            async def load(uids: list[str]) -> list[Optional[Any]]:
+                found = {e.uid: e for e in await service().get_by_uids(uids=uids)}
+                return [found.get(uid) for uid in uids]
+
+            self._loaders[key] = DataLoader(load_fn=load)
+        return self._loaders[key]
+
+    def by_field(self, service: Type[BaseService], field: str) -> DataLoader[Any, list]:
+        """All entities whose field equals the key, e.g. samples by request uid"""
+        key = (service, field)
+        if key not in self._loaders:
+
+            async def load(values: list) -> list[list]:
+                grouped = defaultdict(list)
+                for entity in await service().get_all(**{f"{field}__in": values}):
+                    grouped[getattr(entity, field)].append(entity)
+                return [grouped[value] for value in values]
+
+            self._loaders[key] = DataLoader(load_fn=load)
+        return self._loaders[key]
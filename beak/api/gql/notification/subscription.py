@@ -4,6 +4,7 @@ from typing import AsyncGenerator
 
 import strawberry  # noqa
 
+from beak.api.gql.loaders import Loaders
 from beak.api.gql.notification.types import ActivityStreamType, ActivityProcessType
 from beak.api.gql.permissions import IsAuthenticated
 from beak.apps.common.channel import broadcast
@@ -17,7 +18,9 @@ logger = logging.getLogger(__name__)
 @strawberry.type
 class StreamSubscription:
     @strawberry.subscription(permission_classes=[IsAuthenticated])
-    async def latest_activity(self) -> AsyncGenerator[ActivityStreamType, None]:  # noqa
+    async def latest_activity(
+        self, info
+    ) -> AsyncGenerator[ActivityStreamType, None]:  # noqa
         async with broadcast.subscribe(
             channel=NotificationChannel.ACTIVITIES
         ) as subscriber:
@@ -25,6 +28,9 @@ class StreamSubscription:
             try:
                 async for event in subscriber:
                     logger.info(event)
+                    # the subscription outlives any one event, never serve
+                    # an object as it was loaded for an earlier one
+                    info.context.loaders = Loaders()
                     yield ActivityStreamType(**json.loads(event.message))
             finally:
                 logger.info("Unsubscribed from activities")
@@ -18,6 +18,14 @@ from beak.apps.user.services import UserService
 from beak.apps.worksheet.services import WorkSheetService
 
 
+ACTION_OBJECT_SERVICES = {
+    NotificationObject.SAMPLE: SampleService,
+    NotificationObject.WORKSHEET: WorkSheetService,
+    NotificationObject.ANALYSIS_RESULT: AnalysisResultService,
+    NotificationObject.REPORT: ReportMetaService,
+}
+
+
 @strawberry.type
 class UnknownObjectType:
     message: str
@@ -60,8 +68,8 @@ class ActivityStreamType:
     updated_by: UserType | None = None
 
     @strawberry.field
-    async def actor(self) -> UserType:
-        return await UserService().get(uid=self.actor_uid)
+    async def actor(self, info) -> UserType:
+        return await info.context.loaders.by_uid(UserService).load(self.actor_uid)
 
     @strawberry.field
     async def action_object(
@@ -69,25 +77,33 @@ class ActivityStreamType:
     ) -> Union[
         WorkSheetType, SampleType, AnalysisResultType, ReportMetaType, UnknownObjectType
     ]:
+        service = ACTION_OBJECT_SERVICES.get(self.action_object_type)
+        if service is None:
+            return UnknownObjectType(
+                message=f"Please provide a resolver for object of type {self.action_object_type}"
+            )
+
+        # streams resolve together, one query per object type
+        obj = await info.context.loaders.by_uid(service).load(self.action_object_uid)
+        if obj is None:
+            return UnknownObjectType(
+                message=f"{self.action_object_type} {self.action_object_uid} not found"
+            )
+
         if self.action_object_type == NotificationObject.SAMPLE:
-            sample = await SampleService().get(uid=self.action_object_uid)
             return StrawberryMapper[SampleType]().map(
-                **sample.marshal_simple(
+                **obj.marshal_simple(
                     exclude=["right", "left", "tree_id", "level", "analysis_results"]
                 ),
                 parent=None,
             )
 
         if self.action_object_type == NotificationObject.WORKSHEET:
-            ws = await WorkSheetService().get(uid=self.action_object_uid)
-            return WorkSheetType(**ws.marshal_simple())
+            return WorkSheetType(**obj.marshal_simple())
 
         if self.action_object_type == NotificationObject.ANALYSIS_RESULT:
-            result = await AnalysisResultService().get(
-                related=["sample"], uid=self.action_object_uid
-            )
             return StrawberryMapper[AnalysisResultType]().map(
-                **result.marshal_simple(
+                **obj.marshal_simple(
                     exclude=[
                         "right",
                         "left",
@@ -101,13 +117,7 @@ class ActivityStreamType:
                 parent=None,
             )
 
-        if self.action_object_type == NotificationObject.REPORT:
-            report = await ReportMetaService().get(uid=self.action_object_uid)
-            return ReportMetaType(**report.marshal_simple(exclude=[]))
-
-        return UnknownObjectType(
-            message=f"Please provide a resolver for object of type {self.action_object_type}"
-        )
+        return ReportMetaType(**obj.marshal_simple(exclude=[]))
 
 
 @strawberry.type
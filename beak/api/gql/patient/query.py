@@ -106,8 +106,23 @@ class PatientQuery:
             )
         ]
     )
-    async def patient_search(self, info, query_string: str) -> List[PatientType]:
-        return await PatientService().high_performance_search(
+    async def patient_search(
+        self,
+        info,
+        query_string: str,
+        substring: bool = False,
+        limit: int = 50,
+        after_uid: str | None = None,
+    ) -> PatientCursorPage:
+        """
+        Patients matching query_string in the search indices. With substring,
+        also those with it anywhere in their name, email or phone number:
+        a scan decrypting patients, for partial-name lookups. The scan is
+        paged: it returns at most limit patients per call and, while there
+        are patients left to search, an end cursor to pass back as after_uid.
+        """
+        patient_service = PatientService()
+        patients = await patient_service.high_performance_search(
             first_name=query_string,
             last_name=query_string,
             email=query_string,
@@ -116,6 +131,25 @@ class PatientQuery:
             client_patient_id=query_string,
             fuzzy_match=True,
         )
+        end_cursor = None
+        if substring:
+            found = {patient.uid for patient in patients}
+            scanned, end_cursor = await patient_service.substring_search(
+                query_string, limit=limit, after_uid=after_uid
+            )
+            # index hits come with the first page only
+            patients = [] if after_uid else patients
+            patients += [patient for patient in scanned if patient.uid not in found]
+
+        return PatientCursorPage(
+            total_count=len(patients),
+            items=patients,
+            page_info=PageInfo(
+                has_next_page=end_cursor is not None,
+                has_previous_page=after_uid is not None,
+                end_cursor=end_cursor,
+            ),
+        )
 
     @strawberry.field(
         extensions=[
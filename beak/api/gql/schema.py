@@ -19,6 +19,7 @@ from beak.api.gql.commune.query import CommuneQuery
 from beak.api.gql.document import document_types
 from beak.api.gql.document.mutations import DocumentMutations
 from beak.api.gql.document.query import DocumentQuery
+from beak.api.gql.extensions import PlaintextCacheExtension
 from beak.api.gql.grind import grind_types
 from beak.api.gql.grind.mutation import GrindMutations
 from beak.api.gql.grind.query import GrindQuery
@@ -153,5 +154,9 @@ class Subscription(StreamSubscription):
 
 
 schema = strawberry.Schema(
-    query=Query, mutation=Mutation, subscription=Subscription, types=types
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    types=types,
+    extensions=[PlaintextCacheExtension],
 )
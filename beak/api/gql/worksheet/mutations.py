@@ -299,7 +299,7 @@ class WorkSheetMutations:
 
         if not settings.ENABLE_BACKGROUND_PROCESSING:
             for job in jobs:
-                await populate_worksheet_plate(job.uid)
+                await JobService().run_inline(job.uid, populate_worksheet_plate)
 
         to_send = await WorkSheetService().get_by_uids([ws.uid for ws in worksheets])
         return WorksheetListingType(worksheets=to_send)
@@ -445,7 +445,7 @@ class WorkSheetMutations:
         )
         job = await JobService().create(job_schema)
         if not settings.ENABLE_BACKGROUND_PROCESSING:
-            await populate_worksheet_plate(job.uid)
+            await JobService().run_inline(job.uid, populate_worksheet_plate)
             ws = await WorkSheetService().get(uid=ws.uid)
 
         return WorkSheetType(**ws.marshal_simple())
@@ -491,7 +491,9 @@ class WorkSheetMutations:
         job = await JobService().create(job_schema)
 
         if not settings.ENABLE_BACKGROUND_PROCESSING:
-            await populate_worksheet_plate_manually(job.uid)
+            await JobService().run_inline(
+                job.uid, populate_worksheet_plate_manually
+            )
             ws = await WorkSheetService().get(uid=ws.uid)
 
         return WorkSheetType(**ws.marshal_simple())
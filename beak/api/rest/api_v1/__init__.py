@@ -5,6 +5,7 @@ from beak.api.rest.api_v1.endpoints import reports
 from beak.api.rest.api_v1.endpoints import setup
 from beak.api.rest.api_v1.endpoints import version
 from beak.api.rest.api_v1.endpoints import health
+from beak.api.rest.api_v1.endpoints import instruments
 from beak.api.rest.api_v1.fhir import r4
 
 api = APIRouter()
@@ -15,3 +16,4 @@ api.include_router(jobs.jobs)
 api.include_router(version.version)
 api.include_router(r4.fhir_v4)
 api.include_router(health.health)
+api.include_router(instruments.instruments)
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from beak.database.session import get_db
 from beak.core.config import settings
+from beak.core.events import event_bus
 
 health = APIRouter(tags=["health"], prefix="/health")
 
@@ -53,6 +54,9 @@ async def system_health(db: AsyncSession = Depends(get_db)):
         "environment": settings.ENVIRONMENT,
     }
 
+    # Event bus queue and subscriber latencies
+    system_data["events"] = event_bus.metrics()
+
     # Flag issues automatically
     warnings = []
     if system_data["cpu_percent"] > 90:
@@ -65,6 +69,8 @@ async def system_health(db: AsyncSession = Depends(get_db)):
         warnings.append("Database connection issues")
     if system_data["process_count"] > 1000:  # Adjust threshold based on your system
         warnings.append("High number of processes running")
+    if system_data["events"]["queued"] > event_bus.max_queued * 0.8:
+        warnings.append("Event queue nearly full")
 
     system_data["warnings"] = warnings
     system_data["status"] = "warning" if warnings else "healthy"
@@ -0,0 +1,70 @@
+import logging
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from beak.api.deps import get_current_user
+from beak.apps.guard import FGroup, has_group
+from beak.apps.iol.analyzer.tasks import instrument_manager
+from beak.apps.user.schemas import User
+
+instruments = APIRouter(tags=["instruments"], prefix="/instruments")
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# groups allowed to restart instrument links, besides superusers
+RESTART_GROUPS = (FGroup.ADMINISTRATOR, FGroup.LAB_MANAGER)
+
+
+def _authenticated(user: User | None) -> User:
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
+        )
+    return user
+
+
+@instruments.get("/links", response_model=None)
+async def instrument_links(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> Any:
+    """
+    Supervision state and throughput metrics of every instrument link
+    """
+    _authenticated(current_user)
+    return instrument_manager.status()
+
+
+@instruments.get("/links/{uid}", response_model=None)
+async def instrument_link(
+    uid: str, current_user: Annotated[User, Depends(get_current_user)]
+) -> Any:
+    """
+    Supervision state and throughput metrics of an instrument link
+    """
+    _authenticated(current_user)
+    status = instrument_manager.status(uid)
+    if not status:
+        raise HTTPException(status_code=404, detail="Instrument link not found")
+    return status[0]
+
+
+@instruments.post("/links/{uid}/restart", response_model=None)
+async def restart_instrument_link(
+    uid: str, current_user: Annotated[User, Depends(get_current_user)]
+) -> Any:
+    """
+    Restart an instrument link, for superusers, administrators and lab managers
+    """
+    user = _authenticated(current_user)
+    if not user.is_superuser and not any(
+        [await has_group(user.uid, group) for group in RESTART_GROUPS]
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to restart instrument links",
+        )
+    if not await instrument_manager.restart(uid):
+        raise HTTPException(status_code=404, detail="Instrument link not found")
+    return instrument_manager.status(uid)[0]
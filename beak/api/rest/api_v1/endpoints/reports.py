@@ -89,6 +89,7 @@ async def request_report_generation(
         creator_uid=current_user.uid,
         job_id=report.uid,
         status=JobState.PENDING,
+        data={"file_format": request_in.file_format},
     )
     await job_service.create(job_schema)
     return report
@@ -1,17 +1,25 @@
 import logging
+from functools import lru_cache
 from typing import Any, Dict, Type, Tuple
 
 from sqlalchemy import event, inspect
-from sqlalchemy.orm import class_mapper
-from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm import Session, SessionTransaction, class_mapper, object_session
 
 from beak.apps.common.utils.serializer import marshaller
-from beak.core.events import post_event
+from beak.core.events import post_event, post_events
 from beak.core.tenant_context import get_tenant_context
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# session.info key of the entity events waiting for their transaction to commit
+PENDING_EVENTS = "pending_entity_events"
+
+
+@lru_cache(maxsize=None)
+def _column_keys(entity_class: type) -> frozenset:
+    return frozenset(attr.key for attr in class_mapper(entity_class).column_attrs)
+
 
 class EventListenable:
     """Listen to events on model"""
@@ -29,33 +37,74 @@ class EventListenable:
             metadata=metadata,
         )
 
+    @staticmethod
+    def put_out_on_commit(
+        target: "EventListenable", action: str, metadata: Dict[str, Any]
+    ) -> None:
+        """Hold an event back until the target's transaction commits"""
+        table_name = getattr(target, "__tablename__")
+        session = object_session(target)
+        if session is None:
+            EventListenable.put_out(action, table_name, metadata)
+            return
+        session.info.setdefault(PENDING_EVENTS, []).append(
+            (
+                "entity-tracker",
+                {"action": action, "table_name": table_name, "metadata": metadata},
+            )
+        )
+
+    @staticmethod
+    def put_out_changes(
+        table_name: str, uid: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> None:
+        """
+        Put out an after-update event for a row changed outside the ORM unit of
+        work (e.g. bulk/Core updates), mirroring what handle_update emits.
+        """
+        state_before = {k: v for k, v in before.items() if after.get(k) != v}
+        state_after = {k: after[k] for k in state_before}
+        if "updated_by_uid" in after:
+            state_after["updated_by_uid"] = after["updated_by_uid"]
+            state_before.setdefault("updated_by_uid", before.get("updated_by_uid"))
+        if not any(k != "updated_by_uid" for k in state_after):
+            return
+
+        tenant_context = get_tenant_context()
+        EventListenable.put_out(
+            "after-update",
+            table_name,
+            {
+                "uid": uid,
+                "state_before": state_before,
+                "state_after": state_after,
+                "extras": tenant_context.to_dict() if tenant_context else {},
+            },
+        )
+
     @classmethod
     def __declare_last__(cls: Type["EventListenable"]) -> None:
         logger.debug(f"Setting up event listeners for {cls.__name__}")
-        event.listens_for(cls, "after_insert", cls.handle_insert)
+        event.listen(cls, "after_insert", cls.handle_insert)
         event.listen(cls, "after_update", cls.handle_update)
         event.listen(cls, "after_delete", cls.handle_delete)
 
     @staticmethod
     def handle_insert(mapper: Any, connection: Any, target: "EventListenable") -> None:
         logger.debug(f'Handling insert for {getattr(target, "__class__").__name__}')
-        target.put_out(
-            "after-insert", getattr(target, "__tablename__"), marshaller(target)
-        )
+        target.put_out_on_commit(target, "after-insert", marshaller(target))
 
     @staticmethod
     def handle_delete(mapper: Any, connection: Any, target: "EventListenable") -> None:
         logger.debug(f'Handling delete for {getattr(target, "__class__").__name__}')
-        target.put_out(
-            "after-delete", getattr(target, "__tablename__"), marshaller(target)
-        )
+        target.put_out_on_commit(target, "after-delete", marshaller(target))
 
     @staticmethod
     def handle_update(mapper: Any, connection: Any, target: "EventListenable") -> None:
         logger.debug(f'Handling update for {getattr(target, "__class__").__name__}')
         has_changes, metadata = target.get_changes(target)
         if has_changes:
-            target.put_out("after-update", getattr(target, "__tablename__"), metadata)
+            target.put_out_on_commit(target, "after-update", metadata)
 
     @staticmethod
     def get_changes(target: "EventListenable") -> Tuple[bool, Dict[str, Any]]:
@@ -63,23 +112,18 @@ class EventListenable:
         state_before: Dict[str, Any] = {}
         state_after: Dict[str, Any] = {}
         inspector = inspect(target)
-        attrs = class_mapper(getattr(target, "__class__")).column_attrs
-
-        for attr in attrs:
-            hist = getattr(inspector.attrs, attr.key).history
-            if hist.has_changes():
-                if isinstance(get_history(target, attr.key)[2], tuple):
-                    continue
-                state_before[attr.key] = get_history(target, attr.key)[2].pop()
-                state_after[attr.key] = getattr(target, attr.key)
-            else:
-                if attr.key in ["updated_by_uid", "created_by_uid"]:
-                    state_after[attr.key] = getattr(target, attr.key)
-                    try:
-                        state_before[attr.key] = get_history(target, attr.key)[2].pop()
-                    except Exception:
-                        logger.debug(f"No history for {attr.key}, using current value")
-                        state_before[attr.key] = getattr(target, attr.key)
+        columns = _column_keys(getattr(target, "__class__"))
+
+        # only attributes set since loading have a committed (loaded) value
+        for key in inspector.committed_state:
+            if key not in columns:
+                continue
+            deleted = inspector.attrs[key].history.deleted
+            if not deleted:
+                # not loaded before it was set, nothing to compare with
+                continue
+            state_before[key] = deleted[-1]
+            state_after[key] = getattr(target, key)
 
         if state_after:
             to_delete = [
@@ -111,3 +155,18 @@ class EventListenable:
             "state_after": state_after,
             "extras": extras,
         }
+
+
+@event.listens_for(Session, "after_commit")
+def post_committed_events(session: Session) -> None:
+    """Post the entity events of a transaction together once it commits"""
+    events = session.info.pop(PENDING_EVENTS, None)
+    if events:
+        post_events(events)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def drop_uncommitted_events(session: Session, transaction: SessionTransaction) -> None:
+    # a committed transaction has posted its events already
+    if transaction.parent is None:
+        session.info.pop(PENDING_EVENTS, None)
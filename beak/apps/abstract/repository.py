@@ -1,9 +1,10 @@
+import json
 import logging
 from contextlib import asynccontextmanager
 from typing import Any, Generic, List, TypeVar, Optional
 
 from sqlalchemy import inspect, or_ as sa_or_, Table, or_
-from sqlalchemy import select, update
+from sqlalchemy import select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import func
@@ -11,14 +12,36 @@ from sqlalchemy.sql.expression import bindparam, delete
 
 from beak.apps.abstract.entity import LabScopedEntity, MaybeLabScopedEntity
 from beak.core.tenant_context import get_current_lab_uid, get_current_user_uid
+from beak.database.keyset import (
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    keyset_order_by,
+    keyset_predicate,
+    keyset_values,
+    parse_keyset_order,
+)
 from beak.database.paging import EdgeNode, PageCursor, PageInfo
 from beak.database.session import async_session
+from beak.utils.hipaa_fields import bulk_decryption
 
 logger = logging.getLogger(__name__)
 
 M = TypeVar("M", bound=LabScopedEntity)
 
 
+def default_count_mode(
+    after_cursor: Optional[str], before_cursor: Optional[str]
+) -> str:
+    """
+    The count_mode paginate uses when none is given.
+
+    The first page is counted exactly. Deeper pages only need the total to
+    stay about right, so they take the planner estimate rather than running
+    a COUNT over every matching row on each page turn.
+    """
+    return "estimate" if (after_cursor or before_cursor) else "exact"
+
+
 def apply_nested_loader_options(stmt, model, path):
     """
     Applies loader options to nested relationships based on a dot-separated path.
@@ -464,6 +487,18 @@ class BaseRepository(Generic[M]):
                 await session.flush()
                 await self._commit_or_fail(session)
 
+    async def _load_all(self, session: AsyncSession, stmt) -> list[M]:
+        """
+        Execute an entity select, decrypting the PII it loads as one batch.
+
+        :param session: The session to load into.
+        :param stmt: The select statement.
+        :return: The loaded model instances.
+        """
+        async with bulk_decryption(session):
+            results = await session.execute(stmt)
+            return results.scalars().all()
+
     async def get(
             self,
             related: list[str] | None = None,
@@ -524,12 +559,10 @@ class BaseRepository(Generic[M]):
                 stmt = apply_nested_loader_options(stmt, self.model, key)
 
         if session:
-            results = await session.execute(stmt)  # stmt.distinct()
-            qs = results.scalars().all()
+            qs = await self._load_all(session, stmt)  # stmt.distinct()
         else:
             async with self.async_session() as session:
-                results = await session.execute(stmt)  # stmt.distinct()
-                qs = results.scalars().all()
+                qs = await self._load_all(session, stmt)  # stmt.distinct()
 
         # Remove duplicates (using set) instead of .distinct() to allow order by relations not in distinct selection
         return list({item: item for item in qs}.values()) if qs else []
@@ -546,13 +579,11 @@ class BaseRepository(Generic[M]):
 
         if session:
             # Use provided session (part of an existing transaction)
-            results = await session.execute(stmt)
-            return results.scalars().all()
+            return await self._load_all(session, stmt)
         else:
             # Create new session (standalone operation)
             async with self.async_session() as new_session:
-                results = await new_session.execute(stmt)
-                return results.scalars().all()
+                return await self._load_all(new_session, stmt)
 
     async def all_by_page(self, page: int = 1, limit: int = 20, **kwargs) -> dict:
         """
@@ -588,11 +619,9 @@ class BaseRepository(Generic[M]):
         stmt = self._apply_lab_filter(stmt)
 
         if session:
-            results = await session.execute(stmt.order_by(self.model.uid))
-            return results.scalars().all()
+            return await self._load_all(session, stmt.order_by(self.model.uid))
         async with self.async_session() as session:
-            results = await session.execute(stmt.order_by(self.model.uid))
-            return results.scalars().all()
+            return await self._load_all(session, stmt.order_by(self.model.uid))
 
     async def full_text_search(self, search_string, field):
         """
@@ -761,20 +790,153 @@ class BaseRepository(Generic[M]):
         """
         Paginate model instances based on the given conditions.
 
+        When every sort attribute is a plain column on the model, keyset
+        (seek) pagination is used: cursors are opaque encodings of the full
+        sort tuple (uid is appended as tie-breaker) and each page is a single
+        index range scan regardless of depth. Sorting on related attributes
+        falls back to the uid cursor.
+
         :param page_size: The number of instances per page (default: None).
         :param after_cursor: The cursor for paginating after a specific instance (default: None).
         :param before_cursor: The cursor for paginating before a specific instance (default: None).
         :param filters: A dictionary or list of dictionaries of filter conditions.
         :param sort_by: A list of attributes to sort by (default: None).
         :param kwargs: Additional keyword arguments.
+            get_related: relationships to eager load.
+            count_mode: "exact", "estimate" (planner row estimate) or "none"
+            (skip counting, total_count is -1). Defaults to "exact" for the
+            first page and "estimate" for pages reached through a cursor.
         :return: A PageCursor object containing the paginated results.
         """
         if not filters:
             filters = {}
 
-        # get total count without paging filters from cursors
-        total_count: int = await self.count_where(filters=filters)
-        total_count = total_count if total_count else 0
+        count_mode = kwargs.get("count_mode") or default_count_mode(
+            after_cursor, before_cursor
+        )
+        if count_mode not in ("exact", "estimate", "none"):
+            raise ValueError(f"Unknown count_mode: {count_mode}")
+        kwargs["count_mode"] = count_mode
+
+        order = parse_keyset_order(self.model, sort_by)
+        cursor = before_cursor or after_cursor
+        cursor_values = None
+        if order is not None and cursor:
+            cursor_values = decode_keyset_cursor(order, cursor)
+            if cursor_values is None:
+                # not a keyset cursor (legacy uid cursor): keep serving it
+                order = None
+
+        if order is None:
+            return await self._paginate_by_uid(
+                page_size, after_cursor, before_cursor, filters, sort_by, **kwargs
+            )
+
+        backward = bool(before_cursor)
+        _filters = list(filters) if isinstance(filters, list) else filters
+        stmt = self.model.smart_query(filters=_filters)
+        stmt = self._apply_lab_filter(stmt)
+
+        async with self.async_session() as session:
+            total_count = await self._count_page_total(session, stmt, count_mode)
+
+            page_stmt = stmt.order_by(None).order_by(
+                *keyset_order_by(order, reverse=backward)
+            )
+            if cursor_values is not None:
+                page_stmt = page_stmt.where(
+                    keyset_predicate(order, cursor_values, reverse=backward)
+                )
+            if kwargs.get("get_related"):
+                for key in kwargs.get("get_related"):
+                    page_stmt = apply_nested_loader_options(page_stmt, self.model, key)
+            if page_size:
+                # one extra row tells us whether another page exists
+                page_stmt = page_stmt.limit(page_size + 1)
+
+            qs = await self._load_all(session, page_stmt)
+
+        # Remove duplicates (using set) instead of .distinct() to allow joins in filters
+        items = list({item: item for item in qs}.values()) if qs else []
+        has_more = bool(page_size) and len(items) > page_size
+        if page_size:
+            items = items[:page_size]
+        if backward:
+            items.reverse()
+
+        def _cursor(item):
+            return encode_keyset_cursor(order, keyset_values(order, item))
+
+        page_info = {
+            "start_cursor": _cursor(items[0]) if items else None,
+            "end_cursor": _cursor(items[-1]) if items else None,
+        }
+        if page_size is not None:
+            page_info["has_next_page"] = True if backward else has_more
+            page_info["has_previous_page"] = has_more if backward else bool(after_cursor)
+
+        return PageCursor(
+            **{
+                "total_count": total_count,
+                "edges": [
+                    EdgeNode(**{"cursor": _cursor(item), "node": item}) for item in items
+                ],
+                "items": items,
+                "page_info": self.build_page_info(**page_info),
+            }
+        )
+
+    async def _count_page_total(self, session: AsyncSession, stmt, count_mode: str) -> int:
+        """
+        Count the rows a paging query would return, ignoring cursors and limits.
+
+        :param session: The session the page itself is read with.
+        :param stmt: The filtered (lab scoped) select statement.
+        :param count_mode: "exact", "estimate" or "none".
+        :return: The total, the planner estimate or -1 when not counted.
+        """
+        if count_mode == "none":
+            return -1
+
+        if count_mode == "estimate":
+            try:
+                compiled = stmt.compile(
+                    dialect=session.bind.dialect,
+                    compile_kwargs={"literal_binds": True},
+                )
+                # savepoint so a failed EXPLAIN does not abort the page read
+                async with session.begin_nested():
+                    res = await session.execute(
+                        text(f"EXPLAIN (FORMAT JSON) {compiled}")
+                    )
+                    plan = res.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+            except Exception as e:
+                logger.debug(f"Row estimate unavailable, counting instead: {e}")
+
+        subquery = stmt.order_by(None).subquery()
+        res = await session.execute(
+            select(func.count(subquery.c.uid)).select_from(subquery)
+        )
+        return res.scalars().one() or 0
+
+    async def _paginate_by_uid(
+            self,
+            page_size: int | None,
+            after_cursor: str | None,
+            before_cursor: str | None,
+            filters: dict | list[dict] | None,
+            sort_by: list[str] | None,
+            **kwargs,
+    ) -> PageCursor:
+        """
+        Paginate using the bare uid as cursor.
+
+        Used when sorting on related attributes that keyset paging cannot seek on.
+        """
+        count_mode = kwargs.get("count_mode", "exact")
 
         cursor_limit = {}
         if after_cursor:
@@ -788,7 +950,7 @@ class BaseRepository(Generic[M]):
         if isinstance(filters, dict):
             _filters = [{sa_or_: cursor_limit}, filters] if cursor_limit else filters
         elif isinstance(filters, list):
-            _filters = filters
+            _filters = list(filters)
             if cursor_limit:
                 _filters.append({sa_or_: cursor_limit})
 
@@ -805,9 +967,10 @@ class BaseRepository(Generic[M]):
         stmt = self._apply_lab_filter(stmt)
 
         async with self.async_session() as session:
-            res = await session.execute(stmt)  # .distinct()
-
-        qs = res.scalars().all()
+            # get total count without paging filters from cursors
+            count_stmt = self._apply_lab_filter(self.model.smart_query(filters=filters))
+            total_count = await self._count_page_total(session, count_stmt, count_mode)
+            qs = await self._load_all(session, stmt)  # .distinct()
 
         if qs is not None:
             # Remove duplicates (using set) instead of .distinct() to allow order by relations not in distinct selection
@@ -0,0 +1,285 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable
+
+import numpy as np
+
+from beak.apps.analysis.entities.results import AnalysisResult
+from beak.core.dtz import timenow_dt
+
+
+@dataclass(frozen=True)
+class Specification:
+    min_warn: Any
+    min_report: Any
+    max_warn: Any
+    max_report: Any
+    warn_values: frozenset[str] | None
+    warn_report: Any
+
+
+@dataclass(frozen=True)
+class MutationRules:
+    """The metadata_snapshot mutation rules of an analysis, compiled once.
+
+    Rules are applied in the order the result_mutator always used: correction
+    factors, specifications (min then max), detection limits and finally
+    uncertainties. Numeric results are evaluated as whole arrays per
+    instrument/method pair; text results only go through the specifications.
+    """
+
+    correction_factors: tuple[tuple[Any, Any, Any], ...]
+    specifications: tuple[Specification, ...]
+    detection_limits: tuple[tuple[Any, Any], ...]
+    uncertainties: tuple[tuple[Any, Any, Any], ...]
+
+    @property
+    def empty(self) -> bool:
+        return not (
+            self.correction_factors
+            or self.specifications
+            or self.detection_limits
+            or self.uncertainties
+        )
+
+    def factors_for(self, instrument_uid: str | None, method_uid: str | None):
+        return tuple(
+            factor
+            for cf_instrument, cf_method, factor in self.correction_factors
+            if cf_instrument == instrument_uid
+            and cf_method == method_uid
+            and factor is not None
+        )
+
+    def apply(self, results: list[AnalysisResult], now: datetime) -> list[dict]:
+        """Mutate results in place, returning the ResultMutation rows applied."""
+        numeric: dict[tuple, list[AnalysisResult]] = {}
+        mutations: list[dict] = []
+        for result in results:
+            if isinstance(result.result, int):
+                key = (result.laboratory_instrument_uid, result.method_uid)
+                numeric.setdefault(key, []).append(result)
+            elif isinstance(result.result, str):
+                mutations.extend(self._apply_text(result, now))
+
+        for (instrument_uid, method_uid), batch in numeric.items():
+            mutations.extend(
+                self._apply_numeric(
+                    batch, self.factors_for(instrument_uid, method_uid), now
+                )
+            )
+        return mutations
+
+    def _apply_text(self, result: AnalysisResult, now: datetime) -> list[dict]:
+        mutations = []
+        for spec in self.specifications:
+            if spec.warn_values is not None and result.result in spec.warn_values:
+                mutations.append(
+                    _mutation(
+                        result.uid,
+                        result.result,
+                        spec.warn_report,
+                        f"Result with specification (result ::equals:: {result.result}) must be reported as {spec.warn_report}",
+                        now,
+                    )
+                )
+                result.result = spec.warn_report
+        return mutations
+
+    def _apply_numeric(
+        self, results: list[AnalysisResult], factors: tuple, now: datetime
+    ) -> list[dict]:
+        size = len(results)
+        values = np.array([r.result for r in results], dtype=np.float64)
+        # still a number (once reported as text no numeric rule applies)
+        active = np.ones(size, dtype=bool)
+        # still an int (uncertainties only apply to ints)
+        is_int = np.ones(size, dtype=bool)
+        text: list[Any] = [None] * size
+        applied: list[list[dict]] = [[] for _ in range(size)]
+
+        def value(i: int):
+            return int(values[i]) if is_int[i] else float(values[i])
+
+        def record(mask: np.ndarray, after, message) -> None:
+            for i in np.flatnonzero(mask):
+                before = value(i) if active[i] else text[i]
+                _after = after(i) if callable(after) else after
+                applied[i].append(
+                    _mutation(results[i].uid, before, _after, message(before), now)
+                )
+
+        def report(mask: np.ndarray, reported) -> None:
+            if isinstance(reported, (int, float)) and not isinstance(reported, bool):
+                values[mask] = reported
+                is_int[mask] = isinstance(reported, int)
+            else:
+                for i in np.flatnonzero(mask):
+                    text[i] = reported
+                active[mask] = False
+
+        # Correction factor
+        for factor in factors:
+            record(
+                active,
+                lambda i, f=factor: value(i) * f,
+                lambda before, f=factor: f"Multiplied the result {before} with a correction factor of {f}",
+            )
+            values[active] *= factor
+            if not isinstance(factor, int):
+                is_int[active] = False
+
+        # Specifications: Take more priority than DL
+        for spec in self.specifications:
+            if spec.min_warn is not None:
+                mask = active & (values < spec.min_warn)
+                record(
+                    mask,
+                    spec.min_report,
+                    lambda _, s=spec: f"Result was less than the minimun warning specification {s.min_warn} and must be reported as {s.min_report}",
+                )
+                report(mask, spec.min_report)
+            if spec.max_warn is not None:
+                mask = active & (values > spec.max_warn)
+                record(
+                    mask,
+                    spec.max_report,
+                    lambda _, s=spec: f"Result was greater than the maximun warning specification {s.max_warn} and must be reported as {s.max_report}",
+                )
+                report(mask, spec.max_report)
+
+        # Detection Limit Check
+        for lower, upper in self.detection_limits:
+            if lower is not None:
+                mask = active & (values < lower)
+                record(
+                    mask,
+                    f"< {lower}",
+                    lambda _, lim=lower: f"Result fell below the Lower Detection Limit {lim} and must be reported as < {lim}",
+                )
+                report(mask, f"< {lower}")
+            if upper is not None:
+                mask = active & (values > upper)
+                record(
+                    mask,
+                    f"> {upper}",
+                    lambda _, lim=upper: f"Result fell Above the Upper Detection Limit {lim} and must be reported as > {lim}",
+                )
+                report(mask, f"> {upper}")
+
+        # uncertainty
+        for low, high, uncertainty in self.uncertainties:
+            if low is None or high is None:
+                continue
+            mask = active & is_int & (values >= low) & (values <= high)
+            record(
+                mask,
+                lambda i, u=uncertainty: f"{value(i)} +/- {u}",
+                lambda _, lo=low, hi=high, u=uncertainty: f"Result fell inside the range [{lo},{hi}]  with an un uncertainty of +/- {u}",
+            )
+            for i in np.flatnonzero(mask):
+                text[i] = f"{value(i)} +/- {uncertainty}"
+            active[mask] = False
+
+        mutations = []
+        for i, result in enumerate(results):
+            if applied[i]:
+                result.result = value(i) if active[i] else text[i]
+                mutations.extend(applied[i])
+        return mutations
+
+
+def _mutation(result_uid: str, before, after, message: str, now: datetime) -> dict:
+    return {
+        "result_uid": result_uid,
+        "before": before,
+        "after": after,
+        "mutation": message,
+        "date": now,
+    }
+
+
+def _rules_key(snapshot: dict | None) -> str:
+    snapshot = snapshot or {}
+    return json.dumps(
+        [
+            snapshot.get("correction_factors") or [],
+            snapshot.get("specifications") or [],
+            snapshot.get("detection_limits") or [],
+            snapshot.get("uncertainties") or [],
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+@lru_cache(maxsize=512)
+def _compile(key: str) -> MutationRules:
+    correction_factors, specifications, detection_limits, uncertainties = json.loads(
+        key
+    )
+    return MutationRules(
+        correction_factors=tuple(
+            (cf.get("instrument_uid"), cf.get("method_uid"), cf.get("factor"))
+            for cf in correction_factors
+        ),
+        specifications=tuple(
+            Specification(
+                min_warn=spec.get("min_warn"),
+                min_report=spec.get("min_report"),
+                max_warn=spec.get("max_warn"),
+                max_report=spec.get("max_report"),
+                warn_values=(
+                    frozenset(spec["warn_values"].split(","))
+                    if spec.get("warn_values") is not None
+                    else None
+                ),
+                warn_report=spec.get("warn_report"),
+            )
+            for spec in specifications
+        ),
+        detection_limits=tuple(
+            (dlim.get("lower_limit"), dlim.get("upper_limit"))
+            for dlim in detection_limits
+        ),
+        uncertainties=tuple(
+            (uncert.get("min"), uncert.get("max"), uncert.get("value"))
+            for uncert in uncertainties
+        ),
+    )
+
+
+def compile_rules(snapshot: dict | None) -> MutationRules:
+    """Compile (or fetch the cached compilation of) a snapshot's mutation rules"""
+    return _compile(_rules_key(snapshot))
+
+
+def mutate_results(
+    results: Iterable[AnalysisResult], now: datetime | None = None
+) -> list[dict]:
+    """Apply the metadata_snapshot rules to a batch of results in memory.
+
+    Results sharing the same rules (typically the same analysis) are evaluated
+    together. returns the ResultMutation rows describing every rule applied
+    """
+    now = now or timenow_dt()
+    groups: dict[MutationRules, list[AnalysisResult]] = {}
+    for result in results:
+        rules = compile_rules(result.metadata_snapshot)
+        if not rules.empty:
+            groups.setdefault(rules, []).append(result)
+
+    mutations: list[dict] = []
+    for rules, batch in groups.items():
+        mutations.extend(rules.apply(batch, now))
+    return mutations
+
+
+def mutate_result(result: AnalysisResult) -> list[dict]:
+    """Apply the metadata_snapshot rules to a result in memory.
+
+    returns the ResultMutation rows describing every rule applied
+    """
+    return mutate_results([result])
@@ -1,8 +1,11 @@
 from typing import List, Optional
+
+from sqlalchemy import case, false, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from beak.apps.abstract.repository import BaseRepository
 from beak.apps.analysis.entities.results import AnalysisResult, ResultMutation
+from beak.apps.analysis.enum import ResultState
 from beak.utils.encryption import encrypt_phi
 
 
@@ -15,6 +18,59 @@ class AnalysisResultRepository(BaseRepository[AnalysisResult]):
     def __init__(self) -> None:
         super().__init__(AnalysisResult)
 
+    async def assign_many(
+        self,
+        ws_uid: str,
+        positions: dict[str, int],
+        laboratory_instrument_uid: Optional[str] = None,
+        updated_by_uid: Optional[str] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> list[str]:
+        """
+        Assign results to worksheet positions with a single UPDATE statement.
+
+        Only pending and unassigned results are updated so the statement
+        re-checks the assign guard against the committed state.
+
+        :param ws_uid: The worksheet to assign to.
+        :param positions: Worksheet position keyed by analysis result uid.
+        :param laboratory_instrument_uid: Optional instrument for all results.
+        :param updated_by_uid: The user performing the assignment.
+        :return: The uids of the results that were assigned.
+        """
+        if not positions:
+            return []
+
+        values = {
+            "worksheet_uid": ws_uid,
+            "assigned": True,
+            "worksheet_position": case(positions, value=AnalysisResult.uid),
+            "laboratory_instrument_uid": laboratory_instrument_uid,
+        }
+        if updated_by_uid:
+            values["updated_by_uid"] = updated_by_uid
+
+        stmt = (
+            update(AnalysisResult)
+            .where(
+                AnalysisResult.uid.in_(list(positions)),
+                AnalysisResult.status == ResultState.PENDING,
+                AnalysisResult.assigned.is_(false()),
+            )
+            .values(**values)
+            .returning(AnalysisResult.uid)
+            .execution_options(synchronize_session=False)
+        )
+
+        if session:
+            results = await session.execute(stmt)
+            return list(results.scalars().all())
+        async with self.async_session() as session:
+            results = await session.execute(stmt)
+            assigned = list(results.scalars().all())
+            await self._commit_or_fail(session)
+        return assigned
+
     async def search_by_encrypted_result(
         self,
         result_value: str,
@@ -621,6 +621,25 @@ class SampleService(BaseService[Sample, SampleCreate, SampleUpdate]):
             post_event("sample-published", uid=uid)
         return published
 
+    async def publish_many(self, samples: list[Sample], published_by) -> list[Sample]:
+        """publish for a batch of samples, saved in a single transaction"""
+        if not samples:
+            return []
+        now = timenow_dt()
+        for sample in samples:
+            sample.status = SampleState.PUBLISHED
+            sample.published_by_uid = published_by.uid
+            sample.date_published = now
+            sample.updated_by_uid = published_by.uid  # noqa
+        published = await super().save_all(samples)
+        for sample in published:
+            await self.streamer_service.stream(
+                sample, published_by, "published", NotificationObject.SAMPLE
+            )
+            if not sample.internal_use:
+                post_event("sample-published", uid=sample.uid)
+        return published
+
     async def print(self, uid: str, printed_by):
         sample = await self.get(uid=uid)
         sample.printed = True
@@ -142,6 +142,35 @@ class AnalysisResultService(
         )
         return await super().save(analysis_result)
 
+    async def assign_many(
+            self,
+            ws_uid: str,
+            positions: dict[str, int],
+            laboratory_instrument_uid: str | None = None,
+            updated_by_uid: str | None = None,
+            session: AsyncSession | None = None,
+    ) -> list[str]:
+        """
+        Assign many results to a worksheet in one statement.
+
+        Args:
+            ws_uid: The worksheet to assign to
+            positions: Worksheet position keyed by analysis result uid
+            laboratory_instrument_uid: Optional instrument for all results
+            updated_by_uid: The user performing the assignment
+            session: Optional database session
+
+        Returns:
+            The uids of the results that were assigned
+        """
+        return await self.repository.assign_many(
+            ws_uid,
+            positions,
+            laboratory_instrument_uid=laboratory_instrument_uid,
+            updated_by_uid=updated_by_uid,
+            session=session,
+        )
+
     async def un_assign(self, uid: str):
         analysis_result = await self.get(uid=uid)
         analysis_result.worksheet_uid = None
@@ -255,10 +284,29 @@ class AnalysisResultService(
         )
 
     async def snapshot(self, analyses_results: list[AnalysisResult]) -> None:
+        if not analyses_results:
+            return None
+
+        snapshots = await self.build_snapshots(analyses_results)
+        updates = [
+            {"uid": uid, "metadata_snapshot": metadata}
+            for uid, metadata in snapshots.items()
+        ]
+
+        # Bulk update all results
+        if updates:
+            await self.bulk_update_with_mappings(updates)
+
+        return None
+
+    async def build_snapshots(
+            self, analyses_results: list[AnalysisResult]
+    ) -> dict[str, dict]:
+        """Compute metadata snapshots for many results without writing them"""
         from beak.apps.analysis.services.analysis import AnalysisService
 
         if not analyses_results:
-            return None
+            return {}
 
         analysis_relations = [
             "unit",
@@ -351,7 +399,7 @@ class AnalysisResultService(
             lab_instruments_by_instrument[lab_inst.instrument_uid].append(lab_inst)
 
         # Process each result with pre-loaded data
-        updates = []
+        snapshots = {}
         for result in analyses_results:
             analysis = analyses_map.get(result.analysis_uid)
             if not analysis:
@@ -427,16 +475,9 @@ class AnalysisResultService(
                         else None,
                     }
 
-            # Prepare bulk update data
-            updates.append(
-                {"uid": result.uid, "metadata_snapshot": marshaller(metadata, depth=4)}
-            )
+            snapshots[result.uid] = marshaller(metadata, depth=4)
 
-        # Bulk update all results
-        if updates:
-            await self.bulk_update_with_mappings(updates)
-
-        return None
+        return snapshots
 
 
 class ResultMutationService(BaseService[ResultMutation, Dummy, Dummy]):
@@ -25,7 +25,9 @@ async def submit_results(job_uid: str) -> None:
     if not job.status == JobState.PENDING:
         return
 
-    await task_guard.process(job.uid, TrackableObject.RESULT)
+    # guarded again: the guards set when queued may have expired by now
+    guarded = [job.uid] + [res["uid"] for res in job.data]
+    await task_guard.process_many(guarded, TrackableObject.RESULT)
     await job_service.change_status(job.uid, new_status=JobState.RUNNING)
 
     user = await user_service.get(uid=job.creator_uid)
@@ -33,13 +35,12 @@ async def submit_results(job_uid: str) -> None:
     try:
         await utils.results_submitter(job.data, user)
         await job_service.change_status(job.uid, new_status=JobState.FINISHED)
-        for res in job.data:
-            await task_guard.release(uid=res["uid"], object_type=TrackableObject.RESULT)
+        await task_guard.release_many(guarded, object_type=TrackableObject.RESULT)
         await notification_service.notify(
             "Your results were successfully submitted", user
         )
     except Exception as e:
-        await task_guard.release(job.uid, TrackableObject.RESULT)
+        await task_guard.release_many(guarded, TrackableObject.RESULT)
         await job_service.change_status(
             job.uid, new_status=JobState.FAILED, change_reason=str(e)
         )
@@ -63,7 +64,9 @@ async def verify_results(job_uid: str) -> None:
     if not job.status == JobState.PENDING:
         return
 
-    await task_guard.process(job.uid, TrackableObject.RESULT)
+    # guarded again: the guards set when queued may have expired by now
+    guarded = [job.uid] + list(job.data)
+    await task_guard.process_many(guarded, TrackableObject.RESULT)
     await job_service.change_status(job.uid, new_status=JobState.RUNNING)
 
     user = await user_service.get(uid=job.creator_uid)
@@ -71,14 +74,13 @@ async def verify_results(job_uid: str) -> None:
     try:
         await utils.verify_from_result_uids(job.data, user)
         await job_service.change_status(job.uid, new_status=JobState.FINISHED)
-        for res in job.data:
-            await task_guard.release(uid=res, object_type=TrackableObject.RESULT)
+        await task_guard.release_many(guarded, object_type=TrackableObject.RESULT)
         await notification_service.notify(
             "Your results were successfully verified", user
         )
     except Exception as e:
         logger.info(f"Exception ....... {e}")
-        await task_guard.release(job.uid, TrackableObject.RESULT)
+        await task_guard.release_many(guarded, TrackableObject.RESULT)
         await job_service.change_status(
             job.uid, new_status=JobState.FAILED, change_reason=str(e)
         )
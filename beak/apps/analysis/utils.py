@@ -1,12 +1,13 @@
 import logging
 from typing import List
 
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 
 from beak.apps.analysis import schemas
 from beak.apps.analysis.entities.analysis import SampleType
 from beak.apps.analysis.entities.results import AnalysisResult, result_verification
 from beak.apps.analysis.enum import SampleState
+from beak.apps.analysis.mutation import mutate_result
 from beak.apps.analysis.services.analysis import (
     AnalysisService,
     ProfileService,
@@ -18,6 +19,7 @@ from beak.apps.analysis.services.result import (
     ResultMutationService,
 )
 from beak.apps.analysis.workflow.analysis_result import AnalysisResultWorkFlow
+from beak.apps.analysis.workflow.batch import BatchResultSubmitWorkFlow
 from beak.apps.analysis.workflow.qcset import CQSetWorkFlow
 from beak.apps.analysis.workflow.sample import SampleWorkFlow
 from beak.apps.billing.enum import DiscountType, DiscountValueType
@@ -42,7 +44,7 @@ from beak.apps.user.caches import get_current_user_preferences
 from beak.apps.user.entities import User
 from beak.apps.user.services import UserService
 from beak.apps.worksheet.workflow import WorkSheetWorkFlow
-from beak.core.dtz import timenow_dt
+from beak.database.session import async_session
 from beak.utils import has_value_or_is_truthy
 
 logging.basicConfig(level=logging.INFO)
@@ -74,6 +76,23 @@ async def get_last_verificator(result_uid: str) -> User | None:
     return await user_service.get(uid=_user_uid)
 
 
+async def get_last_verificators(result_uids: list[str]) -> dict[str, User]:
+    """get_last_verificator for many results in two queries: {result_uid: user}"""
+    if not result_uids:
+        return {}
+
+    stmt = select(result_verification.c.result_uid, result_verification.c.user_uid)
+    stmt = stmt.where(result_verification.c.result_uid.in_(result_uids))
+    async with async_session() as session:
+        rows = (await session.execute(stmt)).all()
+
+    # like get_last_verificator, the last verification listed wins
+    last = {result_uid: user_uid for result_uid, user_uid in rows}
+    users = await UserService().get_by_uids(list(set(last.values())))
+    by_uid = {user.uid: user for user in users}
+    return {result_uid: by_uid.get(user_uid) for result_uid, user_uid in last.items()}
+
+
 async def sample_search(
         status: str | None = None, text: str | None = None, client_uid: str | None = None
 ) -> list[SampleType]:
@@ -150,47 +169,8 @@ async def retest_from_result_uids(
 async def results_submitter(
         analysis_results: List[dict], submitter: User
 ) -> list[AnalysisResult]:
-    sample_wf = SampleWorkFlow()
-    worksheet_wf = WorkSheetWorkFlow()
-    analysis_result_wf = AnalysisResultWorkFlow()
-    qc_set_workflow = CQSetWorkFlow()
-
-    return_results: list[AnalysisResult] = []
-
-    _skipped, _submitted = await analysis_result_wf.submit(analysis_results, submitter)
-    return_results.extend(_skipped)
-
-    for a_result in _submitted:
-        # mutate result
-        await result_mutator(a_result)
-
-        # if abx org service, dont submit sample :: pending ast testing
-        if a_result.analysis.keyword != "beak_ast_abx_organism":
-            # try to submit sample
-            try:
-                sample = await sample_wf.submit(
-                    a_result.sample_uid, submitted_by=submitter
-                )
-                if sample.qc_set_uid:
-                    await qc_set_workflow.submit(sample.qc_set_uid, submitter)
-            except Exception as e:
-                await sample_wf.revert(a_result.sample_uid, by_uid=submitter.uid)
-                logger.warning(e)
-
-            # try to submit associated worksheet
-            if a_result.worksheet_uid:
-                try:
-                    await worksheet_wf.submit(
-                        a_result.worksheet_uid, submitter=submitter
-                    )
-                except Exception as e:
-                    await worksheet_wf.revert(
-                        a_result.worksheet_uid, by_uid=submitter.uid
-                    )
-                    logger.warning(e)
-
-        return_results.append(a_result)
-    return return_results
+    """Submit results together with their samples and worksheets as one batch"""
+    return await BatchResultSubmitWorkFlow().submit(analysis_results, submitter)
 
 
 async def verify_from_result_uids(uids: list[str], user: User) -> list[AnalysisResult]:
@@ -280,118 +260,9 @@ async def result_mutator(result: AnalysisResult) -> None:
     analysis_result_service = AnalysisResultService()
 
     result_in = result.result
-
-    correction_factors = result.metadata_snapshot.get("correction_factors", [])
-    specifications = result.metadata_snapshot.get("specifications", [])
-    detection_limits = result.metadata_snapshot.get("detection_limits", [])
-    uncertainties = result.metadata_snapshot.get("uncertainties", [])
-
-    if isinstance(result.result, int):
-        # Correction factor
-        for cf in correction_factors:
-            if (
-                    cf.get("instrument_uid") == result.laboratory_instrument_uid
-                    and cf.get("method_uid") == result.method_uid
-            ):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": result.result * cf.get("factor"),
-                        "mutation": f"Multiplied the result {result.result} with a correction factor of {cf.get('factor')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = result.result * cf.get("factor")
-
-        # Specifications: Take more priority than DL
-        for spec in specifications:
-            # Min
-            if result.result < spec.get("min_warn"):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": spec.get("min_report"),
-                        "mutation": f"Result was less than the minimun warning specification {spec.get('min_warn')} and must be reported as {spec.get('min_report')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = spec.get("min_report")
-
-            elif result.result < spec.get("min"):
-                result.result = result.result
-
-            # Max
-            if result.result > spec.get("max_warn"):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": spec.get("max_report"),
-                        "mutation": f"Result was greater than the maximun warning specification {spec.get('max_warn')} and must be reported as {spec.get('max_report')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = spec.get("max_report")
-
-            elif result.result > spec.get("max"):
-                result.result = result.result
-
-        # Detection Limit Check
-        for dlim in detection_limits:
-            if result.result < dlim.get("lower_limit"):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": f"< {dlim.get('lower_limit')}",
-                        "mutation": f"Result fell below the Lower Detection Limit {dlim.get('lower_limit')} and must be reported as < {dlim.get('lower_limit')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = f"< {dlim.get('lower_limit')}"
-
-            if result.result > dlim.get("upper_limit"):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": f"> {dlim.get('upper_limit')}",
-                        "mutation": f"Result fell Above the Upper Detection Limit {dlim.get('upper_limit')} and must be reported as > {dlim.get('upper_limit')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = f"> {dlim.get('upper_limit')}"
-
-        # uncertainty
-        if isinstance(result.result, int):
-            for uncert in uncertainties:
-                if uncert.get("min") <= result.result <= uncert.get("max"):
-                    await result_mutation_service.create(
-                        c={
-                            "result_uid": result.uid,
-                            "before": result.result,
-                            "after": f"{result.result} +/- {uncert.get('value')}",
-                            "mutation": f"Result fell inside the range [{uncert.get('min')},{uncert.get('max')}]  with an un uncertainty of +/- {uncert.get('value')}",
-                            "date": timenow_dt(),
-                        }
-                    )
-                    result.result = f"{result.result} +/- {uncert.get('value')}"
-
-    elif isinstance(result.result, str):
-        for spec in specifications:
-            if result.result in spec.get("warn_values").split(","):
-                await result_mutation_service.create(
-                    c={
-                        "result_uid": result.uid,
-                        "before": result.result,
-                        "after": spec.get("warn_report"),
-                        "mutation": f"Result with specification (result ::equals:: {result.result}) must be reported as {spec.get('warn_report')}",
-                        "date": timenow_dt(),
-                    }
-                )
-                result.result = spec.get("warn_report")
+    mutations = mutate_result(result)
+    if mutations:
+        await result_mutation_service.bulk_create(mutations)
 
     if result_in != result.result:
         result = await analysis_result_service.save(result)
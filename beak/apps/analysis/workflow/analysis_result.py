@@ -57,13 +57,15 @@ class AnalysisResultWorkFlow:
         )
 
     @staticmethod
-    async def _guard_assign(analysis_result: AnalysisResult) -> bool:
-        allow = False
-        if (
+    def can_assign(analysis_result: AnalysisResult) -> bool:
+        return (
                 analysis_result.status == ResultState.PENDING
                 and analysis_result.assigned is False
-        ):
-            allow = True
+        )
+
+    @staticmethod
+    async def _guard_assign(analysis_result: AnalysisResult) -> bool:
+        allow = AnalysisResultWorkFlow.can_assign(analysis_result)
 
         if not allow:
             raise AnalysisResultWorkFlowException("Cannot assign this Result")
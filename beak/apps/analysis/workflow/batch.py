@@ -0,0 +1,388 @@
+import json
+import logging
+
+from beak.apps.abstract.entity import EventListenable
+from beak.apps.analysis.entities.results import AnalysisResult, ResultMutation
+from beak.apps.analysis.enum import ResultState, SampleState
+from beak.apps.analysis.mutation import mutate_results
+from beak.apps.analysis.services.analysis import SampleService
+from beak.apps.analysis.services.result import AnalysisResultService
+from beak.apps.analysis.workflow.qcset import CQSetWorkFlow
+from beak.apps.analysis.workflow.sample import SampleWorkFlow
+from beak.apps.common.channel import broadcast
+from beak.apps.common.utils.serializer import marshaller
+from beak.apps.notification.entities import ActivityStream
+from beak.apps.notification.enum import NotificationChannel, NotificationObject
+from beak.apps.notification.services import ActivityStreamService
+from beak.apps.user.entities import User
+from beak.apps.worksheet.enum import WorkSheetState
+from beak.apps.worksheet.services import WorkSheetService
+from beak.apps.worksheet.workflow import WorkSheetWorkFlow, WorksheetWorkFlowException
+from beak.core.dtz import timenow_dt
+from beak.core.uid_gen import get_flake_uid
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ABX_ORGANISM_KEYWORD = "beak_ast_abx_organism"
+
+
+class BatchResultSubmitWorkFlow:
+    """BatchResultSubmitWorkFlow
+    Set based counterpart of AnalysisResultWorkFlow.submit followed by the
+    sample and worksheet submissions.
+
+    Results, samples and worksheets are loaded in a handful of queries, the
+    workflow guards and result mutations are applied in memory and all state
+    changes are written with bulk UPDATE/INSERT statements in one transaction.
+    Audit events and activity broadcasts are emitted once the transaction commits.
+    """
+
+    def __init__(self):
+        self.analysis_result_service = AnalysisResultService()
+        self.sample_service = SampleService()
+        self.worksheet_service = WorkSheetService()
+        self.activity_stream_service = ActivityStreamService()
+        self.qc_set_workflow = CQSetWorkFlow()
+
+    async def submit(self, data: list[dict], submitter: User) -> list[AnalysisResult]:
+        if not data:
+            return []
+
+        data_map = {datum["uid"]: datum for datum in data}
+        results = await self.analysis_result_service.get_all(uid__in=list(data_map))
+
+        # guard and apply in memory
+        skipped: list[AnalysisResult] = []
+        submitted: list[AnalysisResult] = []
+        before: dict[str, dict] = {}
+        now = timenow_dt()
+        for result in results:
+            if result.status not in [ResultState.PENDING]:
+                skipped.append(result)
+                continue
+            before[result.uid] = self._apply_submit(
+                result, data_map[result.uid], submitter, now
+            )
+            submitted.append(result)
+
+        if not submitted:
+            return skipped
+
+        snapshots = await self.analysis_result_service.build_snapshots(submitted)
+        for result in submitted:
+            if result.uid in snapshots:
+                result.metadata_snapshot = snapshots[result.uid]
+        lab_uids = {result.uid: result.laboratory_uid for result in submitted}
+        mutations = [
+            {
+                "uid": get_flake_uid(),
+                "laboratory_uid": lab_uids[mutation["result_uid"]],
+                "created_by_uid": submitter.uid,
+                "updated_by_uid": submitter.uid,
+                **mutation,
+            }
+            for mutation in mutate_results(submitted, now)
+        ]
+
+        sample_changes = await self._resolve_samples(submitted, submitter, now)
+        worksheet_changes = await self._resolve_worksheets(submitted, submitter)
+
+        streams = self._streams(submitted, sample_changes, worksheet_changes, submitter)
+        await self._persist(
+            submitted, sample_changes, worksheet_changes, mutations, streams, submitter
+        )
+
+        await self._post_commit(
+            submitted, before, sample_changes, worksheet_changes, streams, submitter
+        )
+        return skipped + submitted
+
+    @staticmethod
+    def _apply_submit(
+            result: AnalysisResult, datum: dict, submitter: User, now
+    ) -> dict:
+        """Submit a result in memory, returning the tracked values it had before"""
+        beak_ast = "beak_ast"
+
+        laboratory_instrument_uid = datum.get("laboratory_instrument_uid")
+        if laboratory_instrument_uid == beak_ast:
+            laboratory_instrument_uid = None
+
+        method_uid = datum.get("method_uid")
+        if method_uid == beak_ast:
+            method_uid = None
+
+        before = {
+            "status": result.status,
+            "method_uid": result.method_uid,
+            "laboratory_instrument_uid": result.laboratory_instrument_uid,
+            "submitted_by_uid": result.submitted_by_uid,
+            "updated_by_uid": result.updated_by_uid,
+        }
+        result.result = datum.get("result")
+        result.updated_by_uid = submitter.uid  # noqa
+        result.submitted_by_uid = submitter.uid  # noqa
+        result.status = ResultState.RESULTED
+        result.method_uid = method_uid
+        result.laboratory_instrument_uid = laboratory_instrument_uid
+        result.date_submitted = now
+        return before
+
+    async def _resolve_samples(
+            self, submitted: list[AnalysisResult], submitter: User, now
+    ) -> dict[str, dict]:
+        """Decide the new status of every sample touched by the batch.
+
+        returns {sample_uid: {"status", "before", "submitted", "qc_set_uid"}}
+        """
+        sample_uids = list(
+            {r.sample_uid for r in submitted if r.keyword != ABX_ORGANISM_KEYWORD}
+        )
+        if not sample_uids:
+            return {}
+
+        samples = await self.sample_service.get_by_uids(sample_uids)
+        siblings = await self.analysis_result_service.get_all(sample_uid__in=sample_uids)
+
+        # overlay the in-memory statuses of what is being submitted
+        statuses = {r.uid: r.status for r in siblings}
+        statuses.update({r.uid: r.status for r in submitted})
+        by_sample: dict[str, list[str]] = {}
+        for r in siblings:
+            by_sample.setdefault(r.sample_uid, []).append(statuses[r.uid])
+
+        changes = {}
+        for sample in samples:
+            result_statuses = by_sample.get(sample.uid, [])
+            if SampleWorkFlow.can_submit(sample, result_statuses):
+                changes[sample.uid] = {
+                    "status": SampleState.AWAITING,
+                    "submitted_by_uid": submitter.uid,
+                    "date_submitted": now,
+                    "updated_by_uid": submitter.uid,
+                    "before": sample.status,
+                    "submitted": True,
+                    "qc_set_uid": sample.qc_set_uid,
+                    "laboratory_uid": sample.laboratory_uid,
+                }
+                continue
+
+            # same outcome as SampleWorkFlow.revert after a refused submission
+            to_status = SampleWorkFlow.revert_status(result_statuses)
+            if to_status != sample.status:
+                changes[sample.uid] = {
+                    "status": to_status,
+                    "submitted_by_uid": sample.submitted_by_uid,
+                    "date_submitted": sample.date_submitted,
+                    "updated_by_uid": submitter.uid,
+                    "before": sample.status,
+                    "submitted": False,
+                    "qc_set_uid": None,
+                    "laboratory_uid": sample.laboratory_uid,
+                }
+        return changes
+
+    async def _resolve_worksheets(
+            self, submitted: list[AnalysisResult], submitter: User
+    ) -> dict[str, dict]:
+        """Decide the new state of every worksheet touched by the batch.
+
+        returns {worksheet_uid: {"state", "before", "submitted"}}
+        """
+        worksheet_uids = list(
+            {
+                r.worksheet_uid
+                for r in submitted
+                if r.worksheet_uid and r.keyword != ABX_ORGANISM_KEYWORD
+            }
+        )
+        if not worksheet_uids:
+            return {}
+
+        worksheets = await self.worksheet_service.get_by_uids(worksheet_uids)
+        siblings = await self.analysis_result_service.get_all(
+            worksheet_uid__in=worksheet_uids
+        )
+
+        statuses = {r.uid: r.status for r in siblings}
+        statuses.update({r.uid: r.status for r in submitted})
+        by_worksheet: dict[str, list[str]] = {}
+        for r in siblings:
+            by_worksheet.setdefault(r.worksheet_uid, []).append(statuses[r.uid])
+
+        changes = {}
+        for worksheet in worksheets:
+            result_statuses = by_worksheet.get(worksheet.uid, [])
+            try:
+                WorkSheetWorkFlow.check_submit(worksheet, result_statuses)
+                changes[worksheet.uid] = {
+                    "state": WorkSheetState.AWAITING,
+                    "submitted_by_uid": submitter.uid,
+                    "before": worksheet.state,
+                    "submitted": True,
+                    "laboratory_uid": worksheet.laboratory_uid,
+                }
+            except WorksheetWorkFlowException as e:
+                logger.warning(e)
+                to_state = WorkSheetWorkFlow.revert_state(result_statuses)
+                if to_state != worksheet.state:
+                    changes[worksheet.uid] = {
+                        "state": to_state,
+                        "submitted_by_uid": worksheet.submitted_by_uid,
+                        "before": worksheet.state,
+                        "submitted": False,
+                        "laboratory_uid": worksheet.laboratory_uid,
+                    }
+        return changes
+
+    @staticmethod
+    def _streams(
+            submitted: list[AnalysisResult],
+            sample_changes: dict[str, dict],
+            worksheet_changes: dict[str, dict],
+            submitter: User,
+    ) -> list[dict]:
+        targets = [
+            (NotificationObject.ANALYSIS_RESULT, r.uid, r.laboratory_uid)
+            for r in submitted
+        ]
+        targets += [
+            (NotificationObject.SAMPLE, uid, change["laboratory_uid"])
+            for uid, change in sample_changes.items()
+            if change["submitted"]
+        ]
+        targets += [
+            (NotificationObject.WORKSHEET, uid, change["laboratory_uid"])
+            for uid, change in worksheet_changes.items()
+            if change["submitted"]
+        ]
+        return [
+            {
+                "uid": get_flake_uid(),
+                "laboratory_uid": laboratory_uid,
+                "actor_uid": submitter.uid,
+                "verb": "submitted",
+                "action_object_type": object_type,
+                "action_object_uid": object_uid,
+                "target_uid": None,
+                "created_by_uid": submitter.uid,
+                "updated_by_uid": submitter.uid,
+            }
+            for object_type, object_uid, laboratory_uid in targets
+        ]
+
+    async def _persist(
+            self,
+            submitted: list[AnalysisResult],
+            sample_changes: dict[str, dict],
+            worksheet_changes: dict[str, dict],
+            mutations: list[dict],
+            streams: list[dict],
+            submitter: User,
+    ) -> None:
+        result_mappings = [
+            {
+                "uid": r.uid,
+                "result": r.result,
+                "status": r.status,
+                "method_uid": r.method_uid,
+                "laboratory_instrument_uid": r.laboratory_instrument_uid,
+                "submitted_by_uid": r.submitted_by_uid,
+                "updated_by_uid": r.updated_by_uid,
+                "date_submitted": r.date_submitted,
+                "metadata_snapshot": r.metadata_snapshot,
+            }
+            for r in submitted
+        ]
+        sample_mappings = [
+            {
+                "uid": uid,
+                "status": change["status"],
+                "submitted_by_uid": change["submitted_by_uid"],
+                "date_submitted": change["date_submitted"],
+                "updated_by_uid": change["updated_by_uid"],
+            }
+            for uid, change in sample_changes.items()
+        ]
+        worksheet_mappings = [
+            {
+                "uid": uid,
+                "state": change["state"],
+                "submitted_by_uid": change["submitted_by_uid"],
+                "updated_by_uid": submitter.uid,
+            }
+            for uid, change in worksheet_changes.items()
+        ]
+
+        async with self.analysis_result_service.transaction() as session:
+            await self.analysis_result_service.bulk_update_with_mappings(
+                result_mappings, session=session
+            )
+            if sample_mappings:
+                await self.sample_service.bulk_update_with_mappings(
+                    sample_mappings, session=session
+                )
+            if worksheet_mappings:
+                await self.worksheet_service.bulk_update_with_mappings(
+                    worksheet_mappings, session=session
+                )
+            if mutations:
+                await self.analysis_result_service.table_insert(
+                    ResultMutation.__table__, mutations, session=session
+                )
+            if streams:
+                await self.activity_stream_service.table_insert(
+                    ActivityStream.__table__, streams, session=session
+                )
+
+    async def _post_commit(
+            self,
+            submitted: list[AnalysisResult],
+            before: dict[str, dict],
+            sample_changes: dict[str, dict],
+            worksheet_changes: dict[str, dict],
+            streams: list[dict],
+            submitter: User,
+    ) -> None:
+        # bulk statements bypass the mapper hooks: feed the entity tracker ourselves
+        for result in submitted:
+            _before = before.get(result.uid, {})
+            after = {key: getattr(result, key) for key in _before}
+            EventListenable.put_out_changes(
+                AnalysisResult.__tablename__, result.uid, _before, after
+            )
+        for uid, change in sample_changes.items():
+            EventListenable.put_out_changes(
+                "sample",
+                uid,
+                {"status": change["before"]},
+                {"status": change["status"], "updated_by_uid": change["updated_by_uid"]},
+            )
+        for uid, change in worksheet_changes.items():
+            EventListenable.put_out_changes(
+                "worksheet",
+                uid,
+                {"state": change["before"]},
+                {"state": change["state"], "updated_by_uid": submitter.uid},
+            )
+
+        if streams:
+            saved = await self.activity_stream_service.get_by_uids(
+                [stream["uid"] for stream in streams]
+            )
+            for stream in saved:
+                await broadcast.publish(
+                    NotificationChannel.ACTIVITIES, json.dumps(marshaller(stream))
+                )
+
+        qc_set_uids = {
+            change["qc_set_uid"]
+            for change in sample_changes.values()
+            if change["submitted"] and change["qc_set_uid"]
+        }
+        for qc_set_uid in qc_set_uids:
+            try:
+                await self.qc_set_workflow.submit(qc_set_uid, submitter)
+            except Exception as e:
+                logger.warning(e)
@@ -17,8 +17,14 @@ class SampleWorkFlow:
         self.sample_service = SampleService()
 
     async def revert(self, uid: str, by_uid: str) -> None:
-        to_status = ResultState.PENDING
         results = await self.sample_service.get_analysis_results(uid)
+        to_status = self.revert_status([result.status for result in results])
+        await self.sample_service.change_status(uid, to_status, by_uid)
+
+    @staticmethod
+    def revert_status(result_statuses: list[str]) -> str:
+        """Sample status implied by the statuses of its analysis results"""
+        to_status = ResultState.PENDING
         awaiting_satatuses = [
             ResultState.RESULTED,
             ResultState.RETRACTED,
@@ -30,15 +36,15 @@ class SampleWorkFlow:
             ResultState.CANCELLED,
         ]
 
-        if any([result.status in ResultState.PENDING for result in results]):
+        if any([status in ResultState.PENDING for status in result_statuses]):
             to_status = SampleState.RECEIVED
-        elif all([result.status == ResultState.CANCELLED for result in results]):
+        elif all([status == ResultState.CANCELLED for status in result_statuses]):
             to_status = SampleState.CANCELLED
-        elif all([result.status in awaiting_satatuses for result in results]):
+        elif all([status in awaiting_satatuses for status in result_statuses]):
             to_status = SampleState.AWAITING
-        elif all([result.status in approved_satatuses for result in results]):
+        elif all([status in approved_satatuses for status in result_statuses]):
             to_status = SampleState.APPROVED
-        await self.sample_service.change_status(uid, to_status, by_uid)
+        return to_status
 
     async def receive(self, uid, received_by):
         sample = await self.sample_service.get(uid=uid)
@@ -110,21 +116,22 @@ class SampleWorkFlow:
         return await self.sample_service.submit(sample.uid, submitted_by)
 
     async def _guard_submit(self, sample: Sample) -> bool:
-        allow = False
         analysis_results = await self.sample_service.get_analysis_results(sample.uid)
+        allow = self.can_submit(sample, [result.status for result in analysis_results])
+        if not allow:
+            raise SampleWorkFlowException("Cannot submit this Sample")
+        return True
+
+    @staticmethod
+    def can_submit(sample: Sample, result_statuses: list[str]) -> bool:
         statuses = [
             ResultState.RESULTED,
             ResultState.RETRACTED,
             ResultState.APPROVED,
             ResultState.CANCELLED,
         ]
-        match = all([(result.status in statuses) for result in analysis_results])
-        if match and sample.status == SampleState.RECEIVED:
-            allow = True
-
-        if not allow:
-            raise SampleWorkFlowException("Cannot submit this Sample")
-        return True
+        match = all([(status in statuses) for status in result_statuses])
+        return match and sample.status == SampleState.RECEIVED
 
     async def un_submit(self, uid):
         sample = await self.sample_service.get(uid=uid)
@@ -1,4 +1,13 @@
-from sqlalchemy import Column, DateTime, ForeignKey, String, Table
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Table,
+)
 from sqlalchemy.orm import relationship
 
 from beak.apps.abstract import LabScopedEntity
@@ -36,3 +45,58 @@ class ReportMeta(LabScopedEntity):
             self.status = status
             self.temp = None
             await self.save_async()
+
+
+"""
+Dashboard rollups, maintained by beak.apps.analytics.rollup
+
+department_uid "" holds the laboratory wide totals, other rows are per
+department. Counters are only ever incremented/decremented in place.
+"""
+analytics_status_count = Table(
+    "analytics_status_count",
+    LabScopedEntity.metadata,
+    Column("laboratory_uid", String, primary_key=True),
+    Column("metric", String, primary_key=True),
+    Column("department_uid", String, primary_key=True),
+    Column("group_key", String, primary_key=True),
+    Column("count", BigInteger, nullable=False, default=0),
+)
+
+analytics_daily_count = Table(
+    "analytics_daily_count",
+    LabScopedEntity.metadata,
+    Column("laboratory_uid", String, primary_key=True),
+    Column("metric", String, primary_key=True),
+    Column("department_uid", String, primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("group_key", String, primary_key=True),
+    Column("count", BigInteger, nullable=False, default=0),
+)
+
+"""
+Turnaround histogram: samples (analysis_uid "") or results per process,
+start day, end day and whole days taken
+"""
+analytics_turnaround = Table(
+    "analytics_turnaround",
+    LabScopedEntity.metadata,
+    Column("laboratory_uid", String, primary_key=True),
+    Column("process", String, primary_key=True),
+    Column("department_uid", String, primary_key=True),
+    Column("analysis_uid", String, primary_key=True),
+    Column("end_day", Date, primary_key=True),
+    Column("start_day", Date, primary_key=True),
+    Column("days", Integer, primary_key=True),
+    Column("total", BigInteger, nullable=False, default=0),
+    Column("late", BigInteger, nullable=False, default=0),
+    Column("not_late", BigInteger, nullable=False, default=0),
+    Column("late_days", BigInteger, nullable=False, default=0),
+)
+
+analytics_rollup_state = Table(
+    "analytics_rollup_state",
+    LabScopedEntity.metadata,
+    Column("name", String, primary_key=True),
+    Column("built_at", DateTime, nullable=False),
+)
@@ -9,3 +9,8 @@ class ReportState(StrEnum):
     PENDING = auto()
     FAILED = auto()
     READY = auto()
+
+
+class ReportFormat(StrEnum):
+    CSV = auto()
+    PARQUET = auto()
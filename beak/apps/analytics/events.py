@@ -0,0 +1,6 @@
+from beak.apps.analytics.rollup import rollup_writer
+from beak.core.events import subscribe
+
+
+def init_analytics_events():
+    subscribe("entity-tracker", rollup_writer.on_entity_change)
@@ -0,0 +1,199 @@
+"""
+Chunked report writers
+
+Line listings are written as they are fetched: every chunk coming off the
+server side cursor is appended to the output file and dropped, so memory use
+is bounded by the chunk size rather than by the report size. Output goes to
+"<path>.part" and is only moved into place once the last chunk is written.
+"""
+
+import csv
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from beak.apps.analytics.enum import ReportFormat
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+# SQLAlchemy column types of a report's columns, by column name
+ColumnTypes = Mapping[str, Any]
+
+
+class ReportExportError(Exception):
+    pass
+
+
+class CSVChunkWriter:
+    extension = ".csv"
+
+    def __init__(self, path: str, column_types: Optional[ColumnTypes] = None):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._header = False
+
+    def write(self, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        if not self._header:
+            self._writer.writerow(columns)
+            self._header = True
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetChunkWriter:
+    """
+    Writes one parquet row group per chunk.
+
+    The schema comes from the column types of the query where they are
+    given. Other columns are typed from the first chunk, as strings when
+    they are entirely empty there; string columns take the text of values
+    of any other type in later chunks.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, path: str, column_types: Optional[ColumnTypes] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ReportExportError("Parquet export requires pyarrow to be installed")
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.column_types = column_types or {}
+        self._schema = None
+        self._writer = None
+
+    def _arrow_type(self, column_type: Any) -> Any:
+        pa = self._pa
+        try:
+            python_type = column_type.python_type
+        except (AttributeError, NotImplementedError):
+            return None
+        return {
+            str: pa.string(),
+            int: pa.int64(),
+            float: pa.float64(),
+            Decimal: pa.float64(),
+            bool: pa.bool_(),
+            datetime: pa.timestamp("us"),
+            date: pa.date32(),
+        }.get(python_type)
+
+    def _field(self, name: str, column: Sequence[Any]) -> Any:
+        pa = self._pa
+        _type = self._arrow_type(self.column_types.get(name))
+        if _type is None:
+            _type = pa.array(column).type
+            if pa.types.is_null(_type):
+                _type = pa.string()
+        return pa.field(name, _type)
+
+    def _array(self, field: Any, column: Sequence[Any]) -> Any:
+        pa = self._pa
+        if pa.types.is_string(field.type):
+            column = [v if v is None or isinstance(v, str) else str(v) for v in column]
+        elif pa.types.is_floating(field.type):
+            column = [float(v) if isinstance(v, Decimal) else v for v in column]
+        return pa.array(column, type=field.type)
+
+    def write(self, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        pa = self._pa
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        try:
+            if self._schema is None:
+                self._schema = pa.schema(
+                    [self._field(name, column) for name, column in zip(columns, values)]
+                )
+                self._writer = self._pq.ParquetWriter(self.path, self._schema)
+            table = pa.Table.from_arrays(
+                [
+                    self._array(field, column)
+                    for column, field in zip(values, self._schema)
+                ],
+                schema=self._schema,
+            )
+            self._writer.write_table(table)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            raise ReportExportError(f"Failed to write parquet chunk: {e}") from e
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    ReportFormat.CSV: CSVChunkWriter,
+    ReportFormat.PARQUET: ParquetChunkWriter,
+}
+
+
+def file_extension(file_format: str) -> str:
+    return WRITERS.get(file_format, CSVChunkWriter).extension
+
+
+async def write_chunks(
+    chunks: AsyncIterator[tuple[Sequence[str], Sequence[Sequence[Any]]]],
+    path: str,
+    file_format: str = ReportFormat.CSV,
+    on_progress: Optional[ProgressCallback] = None,
+    column_types: Optional[ColumnTypes] = None,
+) -> int:
+    """
+    Stream (columns, rows) chunks into a file.
+
+    Args:
+        chunks: Async iterator of (columns, rows) chunks
+        path: Destination file, replaced atomically when done
+        file_format: One of ReportFormat
+        on_progress: Awaited with (rows written, chunks written) after each chunk
+        column_types: SQLAlchemy types of the columns, typing parquet output
+
+    Returns: The number of rows written
+    """
+    writer_class = WRITERS.get(file_format)
+    if writer_class is None:
+        raise ReportExportError(f"Unsupported report format: {file_format}")
+
+    part = path + ".part"
+    writer = writer_class(part, column_types)
+    written = 0
+    count = 0
+    try:
+        async for columns, rows in chunks:
+            writer.write(columns, rows)
+            written += len(rows)
+            count += 1
+            if on_progress:
+                await on_progress(written, count)
+        writer.close()
+        os.replace(part, path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        # release the cursor (and its connection) if we stopped early
+        aclose = getattr(chunks, "aclose", None)
+        if aclose:
+            await aclose()
+
+    logger.info(f"Exported {written} rows in {count} chunks to {path}")
+    return written
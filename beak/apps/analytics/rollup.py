@@ -0,0 +1,623 @@
+"""
+Dashboard rollups
+
+Per laboratory, per department counters kept up to date from sample and
+analysis result changes (entity-tracker events), so the dashboard reads a few
+rollup rows instead of aggregating the full sample/analysis_result history:
+
+- analytics_status_count: gauges (samples/results currently in a status,
+  retests, published-but-late samples by turnaround bucket)
+- analytics_daily_count: per day counters (registrations, submissions, ...
+  by user, results by instrument, incomplete samples by due date)
+- analytics_turnaround: turnaround histograms per process
+
+Events are buffered and folded per row: every ROLLUP_FLUSH_INTERVAL seconds
+the contribution of each changed row's state before the batch is subtracted
+and that of its current state added, in one upsert per table. A full rebuild
+from the base tables runs at startup and daily to backfill and heal drift
+(bulk writes that bypass the ORM, rolled back transactions). Every replica
+schedules it; a transaction scoped advisory lock lets one of them rebuild at
+a time and a rebuild younger than ROLLUP_REBUILD_FRESH is not redone.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from dateutil import parser
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from beak.apps.analysis.enum import SampleState
+from beak.apps.analytics.entities import (
+    analytics_daily_count,
+    analytics_rollup_state,
+    analytics_status_count,
+    analytics_turnaround,
+)
+from beak.core.dtz import timenow_dt
+from beak.database.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "dashboard"
+ROLLUP_FLUSH_INTERVAL = 5
+ROLLUP_BATCH_SIZE = 5000
+# "not built yet" is re-checked this often by readers
+ROLLUP_READY_TTL = 60
+# pg advisory lock key held by the replica rebuilding the rollups
+ROLLUP_REBUILD_LOCK = 0x726F6C6C
+# replicas started together schedule their rebuilds close together
+ROLLUP_REBUILD_FRESH = timedelta(hours=1)
+
+ALL_DEPARTMENTS = ""
+
+SAMPLE_ACTIONS = {
+    "registration": ("created_at", "created_by_uid"),
+    "submission": ("date_submitted", "submitted_by_uid"),
+    "verification": ("date_verified", "verified_by_uid"),
+    "publication": ("date_published", "published_by_uid"),
+}
+
+PROCESSES = {
+    "received_to_published": ("date_received", "date_published"),
+    "received_to_submitted": ("date_received", "date_submitted"),
+    "submitted_to_verified": ("date_submitted", "date_verified"),
+    "verified_to_published": ("date_verified", "date_published"),
+}
+
+INCOMPLETE_STATES = (
+    SampleState.EXPECTED,
+    SampleState.RECEIVED,
+    SampleState.AWAITING,
+    SampleState.APPROVED,
+)
+
+LAGGARD_TOTAL = "total"
+LAGGARD_BUCKETS = ("< 10", "10 - 20", "20 - 30", "> 30")
+
+SAMPLE_COLUMNS = (
+    "uid",
+    "laboratory_uid",
+    "status",
+    "created_at",
+    "created_by_uid",
+    "date_received",
+    "date_submitted",
+    "submitted_by_uid",
+    "date_verified",
+    "verified_by_uid",
+    "date_published",
+    "published_by_uid",
+    "due_date",
+)
+
+RESULT_COLUMNS = (
+    "uid",
+    "laboratory_uid",
+    "analysis_uid",
+    "status",
+    "retest",
+    "date_submitted",
+    "laboratory_instrument_uid",
+)
+
+DATE_COLUMNS = {
+    "created_at",
+    "date_received",
+    "date_submitted",
+    "date_verified",
+    "date_published",
+    "due_date",
+}
+
+TRACKED = {
+    "sample": set(SAMPLE_COLUMNS) - {"uid"},
+    "analysis_result": set(RESULT_COLUMNS) - {"uid"},
+}
+
+
+def day_part(delta: timedelta) -> int:
+    """Whole days of an interval, as postgres DATE_PART('day', ...)"""
+    return int(delta / timedelta(days=1))
+
+
+def laggard_bucket(days: int) -> str:
+    if days < 10:
+        return LAGGARD_BUCKETS[0]
+    if days < 20:
+        return LAGGARD_BUCKETS[1]
+    if days < 30:
+        return LAGGARD_BUCKETS[2]
+    return LAGGARD_BUCKETS[3]
+
+
+def normalize(values: dict | None) -> dict:
+    """Event payloads are marshalled: "" for None and iso strings for dates"""
+    out = {}
+    for key, value in (values or {}).items():
+        if value == "":
+            value = None
+        elif key in DATE_COLUMNS and isinstance(value, str):
+            value = parser.parse(value).replace(tzinfo=None)
+        elif key == "retest" and isinstance(value, str):
+            value = value == "True"
+        out[key] = value
+    return out
+
+
+class RowEvent(NamedTuple):
+    action: str
+    before: dict
+    after: dict
+
+
+class RollupDelta:
+    """Signed changes to the rollup tables, keyed by primary key"""
+
+    def __init__(self):
+        self.status: dict[tuple, int] = defaultdict(int)
+        self.daily: dict[tuple, int] = defaultdict(int)
+        self.turnaround: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0, 0])
+
+    def __bool__(self) -> bool:
+        return bool(self.status_rows() or self.daily_rows() or self.turnaround_rows())
+
+    def add_sample(
+        self,
+        row: Optional[dict],
+        departments: Iterable[str] = (),
+        results: Iterable[tuple[str, Optional[str]]] = (),
+        sign: int = 1,
+    ) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) the contribution of a sample.
+
+        Args:
+            row: Sample columns (SAMPLE_COLUMNS)
+            departments: Departments of the sample's analyses and profiles
+            results: (analysis_uid, department_uid) of each of its results
+            sign: 1 or -1
+        """
+        lab = row.get("laboratory_uid") if row else None
+        if not lab:
+            return
+        keys = [ALL_DEPARTMENTS, *sorted(set(departments) - {None, ""})]
+        status = row.get("status")
+        due_date = row.get("due_date")
+
+        laggard = []
+        published = row.get("date_published")
+        if status == SampleState.PUBLISHED and due_date and published:
+            if due_date > published:
+                laggard.append(LAGGARD_TOTAL)
+                if row.get("date_received"):
+                    days = day_part(published - row["date_received"])
+                    laggard.append(laggard_bucket(days))
+
+        for dept in keys:
+            if status:
+                self.status[(lab, "sample.status", dept, status)] += sign
+            for group in laggard:
+                self.status[(lab, "sample.laggard", dept, group)] += sign
+            for action, (date_col, user_col) in SAMPLE_ACTIONS.items():
+                when, user = row.get(date_col), row.get(user_col)
+                if when and user:
+                    key = (lab, f"sample.{action}", dept, when.date(), user)
+                    self.daily[key] += sign
+            if status in INCOMPLETE_STATES and due_date:
+                key = (lab, "sample.incomplete", dept, due_date.date(), "")
+                self.daily[key] += sign
+
+        results = list(results)
+        for process, (start_col, end_col) in PROCESSES.items():
+            start, end = row.get(start_col), row.get(end_col)
+            if not (start and end):
+                continue
+            late = due_date > end if due_date else None
+            values = (
+                1,
+                1 if late else 0,
+                1 if late is False else 0,
+                day_part(due_date - end) if late else 0,
+            )
+            tail = (end.date(), start.date(), day_part(end - start))
+            for dept in keys:
+                self._turnaround((lab, process, dept, "", *tail), values, sign)
+            for analysis_uid, department_uid in results:
+                for dept in {ALL_DEPARTMENTS, department_uid or ALL_DEPARTMENTS}:
+                    key = (lab, process, dept, analysis_uid, *tail)
+                    self._turnaround(key, values, sign)
+
+    def add_result(
+        self,
+        row: Optional[dict],
+        department_uid: Optional[str] = None,
+        sign: int = 1,
+    ) -> None:
+        """Add (sign=1) or remove (sign=-1) the contribution of an analysis result"""
+        lab = row.get("laboratory_uid") if row else None
+        if not lab:
+            return
+        keys = [ALL_DEPARTMENTS] + ([department_uid] if department_uid else [])
+        status = row.get("status")
+        instrument = row.get("laboratory_instrument_uid")
+        submitted = row.get("date_submitted")
+        for dept in keys:
+            if status:
+                self.status[(lab, "analysis_result.status", dept, status)] += sign
+            if row.get("retest"):
+                self.status[(lab, "analysis_result.retest", dept, "retest")] += sign
+            if instrument:
+                key = (lab, "analysis_result.instrument", dept, instrument)
+                self.status[key] += sign
+                if submitted:
+                    key = (
+                        lab,
+                        "analysis_result.instrument",
+                        dept,
+                        submitted.date(),
+                        instrument,
+                    )
+                    self.daily[key] += sign
+
+    def _turnaround(self, key: tuple, values: tuple, sign: int) -> None:
+        counters = self.turnaround[key]
+        for i, value in enumerate(values):
+            counters[i] += sign * value
+
+    def status_rows(self) -> list[dict]:
+        return _rows(self.status, analytics_status_count)
+
+    def daily_rows(self) -> list[dict]:
+        return _rows(self.daily, analytics_daily_count)
+
+    def turnaround_rows(self) -> list[dict]:
+        return _rows(self.turnaround, analytics_turnaround)
+
+
+def _rows(counters: dict, table) -> list[dict]:
+    keys = [c.name for c in table.primary_key]
+    values = [c.name for c in table.columns if not c.primary_key]
+    rows = []
+    for key, value in sorted(counters.items()):
+        value = value if isinstance(value, list) else [value]
+        if any(value):
+            rows.append({**dict(zip(keys, key)), **dict(zip(values, value))})
+    return rows
+
+
+def fold(
+    events: list[RowEvent], row: Optional[dict]
+) -> tuple[Optional[dict], Optional[dict]]:
+    """
+    The state of a row before and after a batch of its events.
+
+    The current row supplies the columns an event did not touch; None means
+    the row did not exist (inserted in the batch) or no longer exists.
+    """
+    updates = [e for e in events if e.action == "after-update"]
+
+    initial = None
+    if events[0].action != "after-insert":
+        deleted = next((e.before for e in events if e.action == "after-delete"), None)
+        base = row or deleted
+        if base is not None:
+            initial = dict(base)
+            for event in reversed(updates):
+                initial.update(event.before)
+
+    final = None
+    if events[-1].action != "after-delete":
+        inserted = next(
+            (e.after for e in reversed(events) if e.action == "after-insert"), None
+        )
+        base = row or inserted
+        if base is not None:
+            final = dict(base)
+            for event in updates:
+                final.update(event.after)
+
+    return initial, final
+
+
+SAMPLES_SQL = f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM sample"
+
+RESULTS_SQL = f"""
+    SELECT {', '.join('ar.' + c for c in RESULT_COLUMNS)}, an.department_uid
+    FROM analysis_result ar
+    INNER JOIN analysis an ON an.uid = ar.analysis_uid
+"""
+
+SAMPLE_DEPARTMENTS_SQL = """
+    SELECT sa.sample_uid, an.department_uid
+    FROM sample_analysis sa
+    INNER JOIN analysis an ON an.uid = sa.analysis_uid
+    WHERE sa.sample_uid = ANY(:uids) AND an.department_uid IS NOT NULL
+    UNION
+    SELECT sp.sample_uid, pr.department_uid
+    FROM sample_profile sp
+    INNER JOIN profile pr ON pr.uid = sp.profile_uid
+    WHERE sp.sample_uid = ANY(:uids) AND pr.department_uid IS NOT NULL
+"""
+
+SAMPLE_RESULTS_SQL = """
+    SELECT ar.sample_uid, ar.analysis_uid, an.department_uid
+    FROM analysis_result ar
+    INNER JOIN analysis an ON an.uid = ar.analysis_uid
+    WHERE ar.sample_uid = ANY(:uids)
+"""
+
+
+async def _load_samples(session, uids: list[str]) -> dict[str, tuple]:
+    """uid -> (row, departments, results) of existing samples"""
+    if not uids:
+        return {}
+    params = {"uids": uids}
+    rows = await session.execute(text(SAMPLES_SQL + " WHERE uid = ANY(:uids)"), params)
+    departments = defaultdict(list)
+    for sample_uid, department_uid in await session.execute(
+        text(SAMPLE_DEPARTMENTS_SQL), params
+    ):
+        departments[sample_uid].append(department_uid)
+    results = defaultdict(list)
+    for sample_uid, analysis_uid, department_uid in await session.execute(
+        text(SAMPLE_RESULTS_SQL), params
+    ):
+        results[sample_uid].append((analysis_uid, department_uid))
+    return {
+        row.uid: (dict(row._mapping), departments[row.uid], results[row.uid])
+        for row in rows
+    }
+
+
+async def _load_results(session, uids: list[str]) -> dict[str, dict]:
+    if not uids:
+        return {}
+    rows = await session.execute(
+        text(RESULTS_SQL + " WHERE ar.uid = ANY(:uids)"), {"uids": uids}
+    )
+    return {row.uid: dict(row._mapping) for row in rows}
+
+
+async def collect_delta(changes: dict[tuple[str, str], list[RowEvent]]) -> RollupDelta:
+    """Fold buffered events per row into one delta"""
+    sample_uids = [uid for table, uid in changes if table == "sample"]
+    result_uids = [uid for table, uid in changes if table == "analysis_result"]
+    async with async_session() as session:
+        samples = await _load_samples(session, sample_uids)
+        results = await _load_results(session, result_uids)
+
+    delta = RollupDelta()
+    for (table, uid), events in changes.items():
+        if table == "sample":
+            row, departments, sample_results = samples.get(uid, (None, [], []))
+            initial, final = fold(events, row)
+            delta.add_sample(initial, departments, sample_results, sign=-1)
+            delta.add_sample(final, departments, sample_results)
+        else:
+            row = results.get(uid)
+            initial, final = fold(events, row)
+            department_uid = (row or {}).get("department_uid")
+            delta.add_result(initial, department_uid, sign=-1)
+            delta.add_result(final, department_uid)
+    return delta
+
+
+def _upsert(table, rows: list[dict]):
+    stmt = insert(table).values(rows)
+    counters = [c.name for c in table.columns if not c.primary_key]
+    return stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key],
+        set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+    )
+
+
+def _batches(rows: list[dict], table) -> Iterable[list[dict]]:
+    # stay under the 32767 bind parameters of a single statement
+    size = max(1, 30000 // len(table.columns))
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+ROLLUP_TABLES = (
+    (analytics_status_count, "status_rows"),
+    (analytics_daily_count, "daily_rows"),
+    (analytics_turnaround, "turnaround_rows"),
+)
+
+
+async def apply_delta(delta: RollupDelta) -> None:
+    async with async_session() as session:
+        for table, rows in ROLLUP_TABLES:
+            for batch in _batches(getattr(delta, rows)(), table):
+                await session.execute(_upsert(table, batch))
+        await session.commit()
+
+
+async def rebuild_rollups() -> bool:
+    """
+    Recompute every rollup from the base tables in one transaction.
+
+    Returns False without touching the rollups when another replica holds the
+    rebuild lock or rebuilt them less than ROLLUP_REBUILD_FRESH ago.
+    """
+    started = time.monotonic()
+    delta = RollupDelta()
+    async with async_session() as session:
+        locked = (
+            await session.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": ROLLUP_REBUILD_LOCK},
+            )
+        ).scalar()
+        if not locked:
+            logger.info("Dashboard rollups are being rebuilt by another replica")
+            return False
+        built_at = (
+            await session.execute(
+                select(analytics_rollup_state.c.built_at).where(
+                    analytics_rollup_state.c.name == ROLLUP_NAME
+                )
+            )
+        ).scalar()
+        if built_at and timenow_dt() - built_at < ROLLUP_REBUILD_FRESH:
+            logger.info(f"Dashboard rollups were rebuilt at {built_at}, skipping")
+            _READY["built"] = True
+            return False
+
+        last = ""
+        while True:
+            page = await session.execute(
+                text(SAMPLES_SQL + " WHERE uid > :last ORDER BY uid LIMIT :limit"),
+                {"last": last, "limit": ROLLUP_BATCH_SIZE},
+            )
+            uids = [row.uid for row in page]
+            if not uids:
+                break
+            for row, departments, results in (
+                await _load_samples(session, uids)
+            ).values():
+                delta.add_sample(row, departments, results)
+            last = uids[-1]
+
+        last = ""
+        while True:
+            page = (
+                await session.execute(
+                    text(
+                        RESULTS_SQL
+                        + " WHERE ar.uid > :last ORDER BY ar.uid LIMIT :limit"
+                    ),
+                    {"last": last, "limit": ROLLUP_BATCH_SIZE},
+                )
+            ).all()
+            if not page:
+                break
+            for row in page:
+                row = dict(row._mapping)
+                delta.add_result(row, row.get("department_uid"))
+            last = page[-1].uid
+
+        for table, rows in ROLLUP_TABLES:
+            await session.execute(delete(table))
+            for batch in _batches(getattr(delta, rows)(), table):
+                await session.execute(insert(table).values(batch))
+        stmt = insert(analytics_rollup_state).values(
+            name=ROLLUP_NAME, built_at=timenow_dt()
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["name"], set_={"built_at": stmt.excluded.built_at}
+            )
+        )
+        # commit releases the rebuild lock
+        await session.commit()
+
+    _READY["built"] = True
+    logger.info(f"Dashboard rollups rebuilt in {time.monotonic() - started:.1f}s")
+    return True
+
+
+_READY = {"built": False, "checked_at": 0.0}
+
+
+async def rollups_ready() -> bool:
+    """Whether the rollups have been built (backfilled) at least once"""
+    if _READY["built"]:
+        return True
+    now = time.monotonic()
+    if now - _READY["checked_at"] < ROLLUP_READY_TTL:
+        return False
+    _READY["checked_at"] = now
+    async with async_session() as session:
+        built_at = (
+            await session.execute(
+                select(analytics_rollup_state.c.built_at).where(
+                    analytics_rollup_state.c.name == ROLLUP_NAME
+                )
+            )
+        ).scalar()
+    _READY["built"] = built_at is not None
+    return _READY["built"]
+
+
+class RollupWriter:
+    """
+    Buffers sample/analysis result changes and applies them to the rollups
+    every flush_interval seconds.
+    """
+
+    def __init__(self, flush_interval: float = ROLLUP_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending: dict[tuple[str, str], list[RowEvent]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="beak-rollups")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def on_entity_change(self, action: str, table_name: str, metadata) -> None:
+        tracked = TRACKED.get(table_name)
+        if not tracked or not metadata:
+            return
+        if action == "after-update":
+            after = metadata.get("state_after") or {}
+            if not tracked.intersection(after):
+                return
+            event = RowEvent(
+                action, normalize(metadata.get("state_before")), normalize(after)
+            )
+        elif action == "after-insert":
+            event = RowEvent(action, {}, normalize(metadata))
+        elif action == "after-delete":
+            event = RowEvent(action, normalize(metadata), {})
+        else:
+            return
+        uid = metadata.get("uid")
+        if uid:
+            self._pending.setdefault((table_name, uid), []).append(event)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._flush()
+
+    async def rebuild(self) -> None:
+        async with self._lock:
+            # apply what is buffered first, the rebuild reads committed rows
+            await self._flush()
+            try:
+                await rebuild_rollups()
+            except Exception as e:
+                logger.exception(f"Rebuilding dashboard rollups failed: {e}")
+
+    async def _flush(self) -> None:
+        changes, self._pending = self._pending, {}
+        if not changes:
+            return
+        try:
+            delta = await collect_delta(changes)
+            if delta:
+                await apply_delta(delta)
+        except Exception as e:
+            # dropped, the next rebuild reconciles the counters
+            logger.error(f"Applying {len(changes)} rollup changes failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+rollup_writer = RollupWriter()
@@ -3,7 +3,7 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 
 from beak.apps.analysis.schemas import AnalysisBasic
-from beak.apps.analytics.enum import ReportState, ReportTypes
+from beak.apps.analytics.enum import ReportFormat, ReportState, ReportTypes
 from beak.apps.user.schemas import UserBasic
 
 
@@ -52,3 +52,4 @@ class ReportRequest(BaseModel):
     date_column: str
     period_start: datetime
     period_end: datetime
+    file_format: ReportFormat = ReportFormat.CSV
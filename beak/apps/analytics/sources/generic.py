@@ -1,23 +1,77 @@
 import logging
 from datetime import datetime
-from typing import Any, Generic, List, Optional, Tuple, Type, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Collection,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from dateutil import parser
-from sqlalchemy import or_, text
+from sqlalchemy import Date, DateTime, TextClause, or_, text
 from sqlalchemy.future import select
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeEngine
 
 from beak.apps.abstract.entity import BaseEntity
-from beak.apps.analysis.entities.analysis import Analysis, Profile
+from beak.apps.analysis.entities.analysis import Analysis, AnalysisRequest, Profile
+from beak.apps.analysis.entities.results import AnalysisResult
+from beak.apps.client.entities import Client
+from beak.apps.instrument.entities import Instrument, Method
+from beak.apps.patient.entities import Patient
 from beak.apps.user.caches import get_current_user_preferences
 from beak.core.tenant_context import get_current_lab_uid
 from beak.database.session import async_session
+from beak.utils.encryption import bulk_decryptor
+from beak.utils.hipaa_fields import EncryptedPHIType, EncryptedPIIType
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 ModelType = TypeVar("ModelType", bound=BaseEntity)
 
+# rows fetched per round trip when streaming a line listing
+LINE_LISTING_CHUNK_SIZE = 5000
+
+
+async def get_department_uids() -> list[str]:
+    """Departments the current user limits analytics to (user preferences)"""
+    preferences = await get_current_user_preferences(None)
+    if not preferences or not preferences.departments:
+        return []
+
+    return [
+        department.uid
+        for department in preferences.departments
+        if department and department.uid
+    ]
+
+
+async def decrypt_rows(
+    columns: list[str], rows: list[Any], encrypted: Collection[str]
+) -> list[tuple]:
+    """Rows with their encrypted columns decrypted as one batch"""
+    positions = [i for i, column in enumerate(columns) if column in encrypted]
+    if not positions or not rows:
+        return rows
+    plaintexts = await bulk_decryptor.decrypt(
+        row[i] for row in rows for i in positions
+    )
+    decrypted = []
+    for row in rows:
+        row = list(row)
+        for i in positions:
+            # values that do not decrypt are kept as stored
+            if plaintexts.get(row[i]) is not None:
+                row[i] = plaintexts[row[i]]
+        decrypted.append(tuple(row))
+    return decrypted
+
 
 class EntityAnalyticsInit(Generic[ModelType]):
     def __init__(self, model: Type[ModelType]):
@@ -26,24 +80,73 @@ class EntityAnalyticsInit(Generic[ModelType]):
         self.alias = model.__tablename__ + "_tbl"
 
     async def _get_department_uids(self) -> list[str]:
-        preferences = await get_current_user_preferences(None)
-        if not preferences or not preferences.departments:
-            return []
+        return await get_department_uids()
+
+    def check_date_column(self, date_column: str) -> None:
+        """
+        Refuse a period column that is not a date column of the model.
 
+        The column name ends up in the line listing SQL, so anything else is
+        rejected before a query is built.
+        """
+        column = self.model.__table__.columns.get(date_column)
+        if column is None or not isinstance(column.type, (Date, DateTime)):
+            raise ValueError(f"{date_column} is not a date column of {self.table}")
+
+    def _line_listing_columns(self, date_column: str) -> list[tuple[str, str, Any]]:
+        """(heading, table alias, entity column) of each line listing column"""
+        self.check_date_column(date_column)
+        sample = self.model
         return [
-            department.uid
-            for department in preferences.departments
-            if department and department.uid
+            ("Patient Id", "pt", Patient.patient_id),
+            ("First Name", "pt", Patient.first_name),
+            ("Last Name", "pt", Patient.last_name),
+            ("Client Patient Id", "pt", Patient.client_patient_id),
+            ("Client", "cl", Client.name),
+            ("Gender", "pt", Patient.gender),
+            ("Age", "pt", Patient.age),
+            ("Date Of Birth", "pt", Patient.date_of_birth),
+            ("Age DOB Estimated", "pt", Patient.age_dob_estimated),
+            ("Client Request Id", "ar", AnalysisRequest.client_request_id),
+            ("Sample Id", "sa", sample.sample_id),
+            ("Date Received", "sa", sample.date_received),
+            ("Date Submitted", "sa", sample.date_submitted),
+            ("Date Verified", "sa", sample.date_verified),
+            ("Date Published", "sa", sample.date_published),
+            ("Date Invalidated", "sa", sample.date_invalidated),
+            ("Date Cancelled", "sa", sample.date_cancelled),
+            ("Analysis", "an", Analysis.name),
+            ("Result", "re", AnalysisResult.result),
+            ("Method", "mt", Method.name),
+            ("Instrument", "inst", Instrument.name),
+            ("Reportable", "re", AnalysisResult.reportable),
+            ("Sample Status", "sa", sample.status),
+            (f"Period Criteria - {date_column}", "sa", getattr(sample, date_column)),
         ]
 
-    async def get_line_listing(
+    def line_listing_types(self, date_column: str) -> dict[str, TypeEngine]:
+        """Column types of the line listing, by heading"""
+        return {
+            heading: column.type
+            for heading, _, column in self._line_listing_columns(date_column)
+        }
+
+    def encrypted_columns(self, date_column: str) -> set[str]:
+        """Headings of the line listing columns stored encrypted"""
+        return {
+            heading
+            for heading, column_type in self.line_listing_types(date_column).items()
+            if isinstance(column_type, (EncryptedPIIType, EncryptedPHIType))
+        }
+
+    async def _line_listing_query(
             self,
             period_start: str | datetime,
             period_end: str | datetime,
             sample_states: list[str],
             date_column: str,
             analysis_uids: List[str],
-    ) -> tuple[list[str], list[Any]]:
+    ) -> tuple[TextClause, dict]:
         department_uids = await self._get_department_uids()
         start_date = parser.parse(str(period_start))
         end_date = parser.parse(str(period_end))
@@ -64,33 +167,14 @@ class EntityAnalyticsInit(Generic[ModelType]):
             "AND an.department_uid = ANY(:department_uids)" if department_uids else ""
         )
 
+        selected = ",\n                ".join(
+            f'{alias}.{column.expression.name} AS "{heading}"'
+            for heading, alias, column in self._line_listing_columns(date_column)
+        )
         stmt = text(
             f"""
-            SELECT 
-                pt.patient_id AS "Patient Id",
-                pt.first_name AS "First Name",
-                pt.last_name AS "Last Name",
-                pt.client_patient_id AS "Client Patient Id",
-                cl.name AS "Client",
-                pt.gender AS "Gender",
-                pt.age AS "Age",
-                pt.date_of_birth AS "Date Of Birth",
-                pt.age_dob_estimated AS "Age DOB Estimated",
-                ar.client_request_id AS "Client Request Id",    
-                sa.sample_id AS "Sample Id",
-                sa.date_received AS "Date Received",
-                sa.date_submitted AS "Date Submitted",
-                sa.date_verified AS "Date Verified",
-                sa.date_published AS "Date Published",
-                sa.date_invalidated AS "Date Invalidated",
-                sa.date_cancelled AS "Date Cancelled",
-                an.name AS "Analysis",
-                re.result AS "Result",
-                mt.name AS "Method",
-                inst.name AS "Instrument",
-                re.reportable AS "Reportable",
-                sa.status AS "Sample Status",
-                sa.{date_column} AS "Period Criteria - {date_column}"
+            SELECT
+                {selected}
             FROM {self.table} sa
             INNER JOIN analysis_result re ON re.sample_uid = sa.uid
             INNER JOIN analysis_request ar ON ar.uid = sa.analysis_request_uid
@@ -111,20 +195,63 @@ class EntityAnalyticsInit(Generic[ModelType]):
             """
         )
 
+        return stmt, {
+            "sd": start_date,
+            "ed": end_date,
+            "an_uids": an_uids,
+            "statuses": statuses,
+            "lab_uids": lab_uids,
+            "department_uids": list(department_uids),
+        }
+
+    async def get_line_listing(
+            self,
+            period_start: str | datetime,
+            period_end: str | datetime,
+            sample_states: list[str],
+            date_column: str,
+            analysis_uids: List[str],
+    ) -> tuple[list[str], list[Any]]:
+        stmt, params = await self._line_listing_query(
+            period_start, period_end, sample_states, date_column, analysis_uids
+        )
         async with async_session() as session:
-            result = await session.execute(
-                stmt,
-                {
-                    "sd": start_date,
-                    "ed": end_date,
-                    "an_uids": an_uids,
-                    "statuses": statuses,
-                    "lab_uids": lab_uids,
-                    "department_uids": list(department_uids),
-                },
-            )
+            result = await session.execute(stmt, params)
 
-        return result.keys(), result.all()
+        columns = list(result.keys())
+        return columns, await decrypt_rows(
+            columns, result.all(), self.encrypted_columns(date_column)
+        )
+
+    async def stream_line_listing(
+            self,
+            period_start: str | datetime,
+            period_end: str | datetime,
+            sample_states: list[str],
+            date_column: str,
+            analysis_uids: List[str],
+            chunk_size: int = LINE_LISTING_CHUNK_SIZE,
+    ) -> AsyncIterator[tuple[list[str], list[Any]]]:
+        """
+        Same rows as get_line_listing, fetched through a server side cursor.
+
+        Yields (columns, rows) with at most chunk_size rows at a time so the
+        caller only ever holds one chunk in memory.
+        """
+        stmt, params = await self._line_listing_query(
+            period_start, period_end, sample_states, date_column, analysis_uids
+        )
+        stmt = stmt.execution_options(yield_per=chunk_size)
+        encrypted = self.encrypted_columns(date_column)
+        async with async_session() as session:
+            result = await session.stream(stmt, params)
+            columns = list(result.keys())
+            empty = True
+            async for rows in result.partitions(chunk_size):
+                empty = False
+                yield columns, await decrypt_rows(columns, rows, encrypted)
+            if empty:
+                yield columns, []
 
     async def get_line_listing_2(self):
         stmt = self.model.with_joined(
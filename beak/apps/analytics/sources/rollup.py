@@ -0,0 +1,229 @@
+import logging
+from math import floor
+from typing import Optional
+
+from dateutil import parser
+from sqlalchemy import func, select
+
+from beak.apps.analysis.entities.analysis import Analysis
+from beak.apps.analytics.entities import (
+    analytics_daily_count,
+    analytics_status_count,
+    analytics_turnaround,
+)
+from beak.apps.analytics.rollup import (
+    ALL_DEPARTMENTS,
+    LAGGARD_BUCKETS,
+    LAGGARD_TOTAL,
+    laggard_bucket,
+    rollups_ready,
+)
+from beak.apps.analytics.sources.generic import get_department_uids
+from beak.core.dtz import timenow_dt
+from beak.core.tenant_context import get_current_lab_uid
+from beak.database.session import async_session
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _day(value: Optional[str]):
+    return parser.parse(value).date() if value else None
+
+
+def _performance(total, late, not_late, days, late_days) -> tuple:
+    total, late, not_late = total or 0, late or 0, not_late or 0
+    return (
+        total,
+        late,
+        not_late,
+        floor(days / total) if total else None,
+        floor(late_days / late) if late else None,
+    )
+
+
+class RollupAnalytics:
+    """
+    Dashboard figures read from the rollup tables (see analytics.rollup).
+
+    Methods return rows shaped like their EntityAnalyticsInit counterparts, or
+    None when the rollups cannot answer and the caller should run the live
+    query: rollups not built yet, no laboratory context, or sample figures
+    for several departments (a sample in two of them would be counted twice).
+    """
+
+    async def _scope(self, per_sample: bool) -> Optional[tuple[str, list[str]]]:
+        lab_uid = get_current_lab_uid()
+        if not lab_uid or not await rollups_ready():
+            return None
+        departments = await get_department_uids()
+        if not departments:
+            return lab_uid, [ALL_DEPARTMENTS]
+        if per_sample and len(departments) > 1:
+            return None
+        return lab_uid, departments
+
+    async def get_counts(
+        self, metric: str, group_in: list[str] | None = None
+    ) -> Optional[list[tuple[str, int]]]:
+        """Current (group, count) of a gauge, e.g. sample.status"""
+        scope = await self._scope(metric.startswith("sample."))
+        if scope is None:
+            return None
+        lab_uid, departments = scope
+
+        table = analytics_status_count
+        stmt = (
+            select(table.c.group_key, func.sum(table.c.count))
+            .where(
+                table.c.laboratory_uid == lab_uid,
+                table.c.metric == metric,
+                table.c.department_uid.in_(departments),
+            )
+            .group_by(table.c.group_key)
+            .having(func.sum(table.c.count) > 0)
+        )
+        if group_in:
+            stmt = stmt.where(table.c.group_key.in_(group_in))
+
+        async with async_session() as session:
+            result = await session.execute(stmt)
+        return [(group, int(count)) for group, count in result.all()]
+
+    async def get_daily_counts(
+        self,
+        metric: str,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> Optional[list[tuple[str, int]]]:
+        """(group, count) of a daily counter summed over [start_date, end_date]"""
+        scope = await self._scope(metric.startswith("sample."))
+        if scope is None:
+            return None
+        lab_uid, departments = scope
+
+        table = analytics_daily_count
+        stmt = (
+            select(table.c.group_key, func.sum(table.c.count))
+            .where(
+                table.c.laboratory_uid == lab_uid,
+                table.c.metric == metric,
+                table.c.department_uid.in_(departments),
+            )
+            .group_by(table.c.group_key)
+            .having(func.sum(table.c.count) > 0)
+        )
+        if start_date:
+            stmt = stmt.where(table.c.day >= _day(start_date))
+        if end_date:
+            stmt = stmt.where(table.c.day <= _day(end_date))
+
+        async with async_session() as session:
+            result = await session.execute(stmt)
+        return [(group, int(count)) for group, count in result.all()]
+
+    async def get_sample_process_performance(
+        self, process: str, start_date: str, end_date: str
+    ) -> Optional[list[tuple]]:
+        """
+        :return: [(total_samples, total_late, total_not_late, process_average,
+            average_extra_days)] as EntityAnalyticsInit.get_sample_process_performance
+        """
+        scope = await self._scope(per_sample=True)
+        if scope is None:
+            return None
+        stmt = self._performance_stmt(process, start_date, end_date, *scope).where(
+            analytics_turnaround.c.analysis_uid == ""
+        )
+        async with async_session() as session:
+            row = (await session.execute(stmt)).one()
+        return [_performance(*row)]
+
+    async def get_analysis_process_performance(
+        self, process: str, start_date: str, end_date: str
+    ) -> Optional[list[tuple]]:
+        """
+        :return: [(analysis name, total_samples, total_late, ...)] as
+            EntityAnalyticsInit.get_analysis_process_performance
+        """
+        scope = await self._scope(per_sample=False)
+        if scope is None:
+            return None
+        table = analytics_turnaround
+        stmt = (
+            self._performance_stmt(process, start_date, end_date, *scope)
+            .add_columns(Analysis.name)
+            .join_from(table, Analysis, Analysis.uid == table.c.analysis_uid)
+            .where(table.c.analysis_uid != "")
+            .group_by(Analysis.name)
+        )
+        async with async_session() as session:
+            result = await session.execute(stmt)
+        return [(row[-1], *_performance(*row[:-1])) for row in result.all()]
+
+    @staticmethod
+    def _performance_stmt(
+        process: str,
+        start_date: str,
+        end_date: str,
+        lab_uid: str,
+        departments: list[str],
+    ):
+        table = analytics_turnaround
+        return select(
+            func.sum(table.c.total),
+            func.sum(table.c.late),
+            func.sum(table.c.not_late),
+            func.sum(table.c.days * table.c.total),
+            func.sum(table.c.late_days),
+        ).where(
+            table.c.laboratory_uid == lab_uid,
+            table.c.process == process,
+            table.c.department_uid.in_(departments),
+            table.c.start_day >= _day(start_date),
+            table.c.end_day <= _day(end_date),
+        )
+
+    async def get_laggards(self) -> Optional[tuple[list[tuple], list[tuple]]]:
+        """
+        :return: (incomplete, complete) rows as EntityAnalyticsInit.get_laggards.
+            Incomplete samples are delayed once their due date has passed and
+            bucketed by days overdue.
+        """
+        scope = await self._scope(per_sample=True)
+        if scope is None:
+            return None
+        lab_uid, departments = scope
+
+        complete = dict(await self.get_counts("sample.laggard") or [])
+
+        table = analytics_daily_count
+        stmt = (
+            select(table.c.day, func.sum(table.c.count))
+            .where(
+                table.c.laboratory_uid == lab_uid,
+                table.c.metric == "sample.incomplete",
+                table.c.department_uid.in_(departments),
+            )
+            .group_by(table.c.day)
+        )
+        async with async_session() as session:
+            due = (await session.execute(stmt)).all()
+
+        today = timenow_dt().date()
+        buckets = {bucket: 0 for bucket in LAGGARD_BUCKETS}
+        total = delayed = 0
+        for day, count in due:
+            total += count
+            if day < today:
+                delayed += count
+                overdue = (today - day).days
+                buckets[laggard_bucket(overdue)] += count
+
+        incomplete = (total, delayed, total - delayed, *buckets.values())
+        complete_row = (
+            complete.get(LAGGARD_TOTAL, 0),
+            *(complete.get(bucket, 0) for bucket in LAGGARD_BUCKETS),
+        )
+        return [tuple(int(v) for v in incomplete)], [complete_row]
+
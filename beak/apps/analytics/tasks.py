@@ -1,11 +1,14 @@
 import logging
 from pathlib import Path
 
-import pandas as pd
-
 from beak.apps.analysis.entities.analysis import Sample
 from beak.apps.analytics import EntityAnalyticsInit
-from beak.apps.analytics.enum import ReportState
+from beak.apps.analytics.enum import ReportFormat, ReportState
+from beak.apps.analytics.export import (
+    ReportExportError,
+    file_extension,
+    write_chunks,
+)
 from beak.apps.analytics.services import ReportMetaService
 from beak.apps.common.utils.serializer import marshaller
 from beak.apps.job.enum import JobState
@@ -37,21 +40,10 @@ async def generate_report(job_uid: str) -> bool:
         return False
 
     await job_service.change_status(job.uid, new_status=JobState.RUNNING)
-    analytics = EntityAnalyticsInit(Sample)
-    columns, lines = await analytics.get_line_listing(
-        period_start=report.period_start,
-        period_end=report.period_end,
-        sample_states=report.sample_states.split(", "),
-        date_column=report.date_column,
-        analysis_uids=[an.uid for an in report.analyses],
-    )
-
-    data_list = [line for line in lines]
-
-    df = pd.DataFrame(data_list, columns=columns)
+    file_format = (job.data or {}).get("file_format", ReportFormat.CSV)
 
     try:
-        file_name = report.temp + ".csv"
+        file_name = report.temp + file_extension(file_format)
     except Exception as e:  # noqa
         await job_service.change_status(job.uid, new_status=JobState.FAILED)
         await report_meta_service.set_final(
@@ -63,9 +55,41 @@ async def generate_report(job_uid: str) -> bool:
         )
         return False
 
+    async def on_progress(rows: int, chunks: int) -> None:
+        await job_service.set_progress(job.uid, rows=rows, chunks=chunks)
+
     logger.info(f"Saving report to {file_name}")
     file_name_with_path = get_full_path_from_relative(file_name)
-    df.to_csv(file_name_with_path, index=False)
+    analytics = EntityAnalyticsInit(Sample)
+    try:
+        # a bad period column fails the report before any query runs
+        analytics.check_date_column(report.date_column)
+        chunks = analytics.stream_line_listing(
+            period_start=report.period_start,
+            period_end=report.period_end,
+            sample_states=report.sample_states.split(", "),
+            date_column=report.date_column,
+            analysis_uids=[an.uid for an in report.analyses],
+        )
+        await write_chunks(
+            chunks,
+            file_name_with_path,
+            file_format,
+            on_progress,
+            column_types=analytics.line_listing_types(report.date_column),
+        )
+    except (ReportExportError, ValueError) as e:
+        await job_service.change_status(
+            job.uid, new_status=JobState.FAILED, change_reason=str(e)
+        )
+        await report_meta_service.set_final(
+            report.uid, location=None, status=ReportState.FAILED
+        )
+        await notification_service.notify(
+            f"Error encountered: Failed to save generated {report.report_type} report: {e}",
+            report.created_by,
+        )
+        return False
 
     file_path = Path(file_name_with_path)
     if not file_path.is_file():
@@ -1,11 +1,20 @@
 from datetime import timezone, timedelta, datetime
 
+from sqlalchemy import String
+
 from beak.apps.abstract import BaseService
 from beak.apps.app.entities import APPActivityLog
 from beak.apps.app.repositories import APPActivityLogRepository
 from beak.apps.app.schemas import APPActivityLogCreate, APPActivityLogUpdate
 from beak.apps.setup.caches import get_system_daemon
 
+# longest value of each bounded text column, longer values are cut to fit
+COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in APPActivityLog.__table__.columns
+    if isinstance(column.type, String) and column.type.length
+}
+
 
 class APPActivityLogService(
     BaseService[APPActivityLog, APPActivityLogCreate, APPActivityLogUpdate]
@@ -30,3 +39,22 @@ class APPActivityLogService(
             c.created_by_uid = system_daemon.uid
             c.updated_by_uid = system_daemon.uid
         return await super().create(c=c, related=related)
+
+    async def bulk_insert(self, logs: list[dict]) -> None:
+        """
+        Insert logs in one statement, without loading them back
+
+        Values too long for their column are truncated rather than failing
+        the whole statement.
+        """
+        if not logs:
+            return
+        system_daemon = await get_system_daemon()
+        for log in logs:
+            log["created_by_uid"] = system_daemon.uid
+            log["updated_by_uid"] = system_daemon.uid
+            for name, length in COLUMN_LENGTHS.items():
+                value = log.get(name)
+                if isinstance(value, str) and len(value) > length:
+                    log[name] = value[:length]
+        await self.repository.table_insert(APPActivityLog.__table__, logs)
@@ -0,0 +1,121 @@
+"""
+Buffered writer of API activity logs
+
+Requests hand their log row to a bounded in-process queue and return; a
+background task drains it and inserts rows in batches of up to
+ACTIVITY_LOG_BATCH_SIZE, at the latest ACTIVITY_LOG_FLUSH_INTERVAL seconds
+after the first row of a batch was queued. When the database falls behind
+and the queue is full, new rows are dropped and counted rather than holding
+up requests.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from beak.apps.app.services import APPActivityLogService
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_QUEUE_SIZE = 10_000
+ACTIVITY_LOG_BATCH_SIZE = 500
+ACTIVITY_LOG_FLUSH_INTERVAL = 2.0
+
+
+class ActivityLogWriter:
+    def __init__(
+        self,
+        max_queued: int = ACTIVITY_LOG_QUEUE_SIZE,
+        batch_size: int = ACTIVITY_LOG_BATCH_SIZE,
+        flush_interval: float = ACTIVITY_LOG_FLUSH_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_queued)
+        self._pending: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None
+
+    def log(self, entry: dict) -> bool:
+        """Queue a row without waiting, False if it was dropped"""
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Activity log queue full, {self.dropped} dropped")
+            return False
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="beak-activity-log")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._writing:
+            # a batch taken off the queue is finished, not lost
+            await asyncio.gather(self._writing, return_exceptions=True)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued"""
+        while self._pending or not self._queue.empty():
+            while len(self._pending) < self.batch_size and not self._queue.empty():
+                self._pending.append(self._queue.get_nowait())
+            batch, self._pending = self._pending, []
+            await self._write(batch)
+
+    async def _fill(self) -> None:
+        """Wait for a full batch, or flush_interval after its first row"""
+        self._pending.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            if not self._queue.empty():
+                self._pending.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return
+            try:
+                async with asyncio.timeout(timeout):
+                    entry = await self._queue.get()
+            except TimeoutError:
+                return
+            self._pending.append(entry)
+
+    async def _write(self, batch: list[dict]) -> None:
+        service = APPActivityLogService()
+        try:
+            await service.bulk_insert(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Writing an activity log failed: {e}")
+                return
+            logger.warning(f"Writing {len(batch)} activity logs failed: {e}")
+
+        # one bad row must not cost the rest of the batch
+        failed = 0
+        for entry in batch:
+            try:
+                await service.bulk_insert([entry])
+            except Exception:  # noqa
+                failed += 1
+        if failed:
+            logger.error(f"{failed}/{len(batch)} activity logs could not be written")
+
+    async def _run(self) -> None:
+        while True:
+            await self._fill()
+            batch, self._pending = self._pending, []
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+            self._writing = None
+
+
+activity_log_writer = ActivityLogWriter()
@@ -1,41 +1,154 @@
+import asyncio
+import json
 import logging
+import os
+from typing import Optional
 
 from beak.apps.auditlog.services import AuditLogService
 from beak.core.config import settings
-from beak.core.events import subscribe
+from beak.core.events import subscribe_batch
 from beak.database.mongo import MongoService, MongoCollection
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# AuditLog.action of an update
+UPDATE = 2
+# attempts at writing a batch before writing it row by row
+AUDIT_WRITE_ATTEMPTS = 3
+# seconds before the next attempt, times the attempts made
+AUDIT_RETRY_DELAY = 0.5
+# spooled entries written again per batch
+AUDIT_REPLAY_BATCH_SIZE = 500
 
-async def auditlog_tracker(action: str, table_name: str, metadata):
+
+def audit_entry(action: str, table_name: str, metadata) -> Optional[dict]:
+    """The audit log entry of an entity-tracker event, None if not audited"""
     if settings.AUDITABLE_ENTITIES and table_name not in settings.AUDITABLE_ENTITIES:
-        return
+        return None
 
     if action != "after-update" and not metadata:
-        return
+        return None
 
     if not ("state_after" in metadata and "state_before" in metadata):
-        return
+        return None
 
     if metadata["state_after"] == metadata["state_before"]:
-        return
+        return None
 
-    logger.info(f"Event fired: {action}:{table_name}  --> AuditLogEntry")
-    update = {
+    return {
         **metadata,
-        "user_uid": metadata["state_after"].get("updated_by_uid", None),
+        "action": UPDATE,
+        "user_uid": metadata["state_after"].get("updated_by_uid")
+        or (metadata.get("extras") or {}).get("user_uid"),
         "target_type": table_name,
         "target_uid": metadata.get("uid"),
     }
 
+
+async def _insert(entries: list[dict]) -> None:
     if settings.DOCUMENT_STORAGE:
-        await MongoService().create(MongoCollection.AUDIT_LOG, update)
+        # copies: insert_many sets _id on what it is given, a retry must not
+        # reuse the ids of a batch that was partly written
+        await MongoService().create_many(
+            MongoCollection.AUDIT_LOG, [dict(entry) for entry in entries]
+        )
     else:
-        del update["uid"]
-        await AuditLogService().create(update)
+        await AuditLogService().bulk_insert(entries)
+
+
+def spool(entries: list[dict]) -> None:
+    """Keep entries that could not be written in AUDIT_LOG_SPOOL"""
+    try:
+        os.makedirs(os.path.dirname(settings.AUDIT_LOG_SPOOL), exist_ok=True)
+        with open(settings.AUDIT_LOG_SPOOL, "a") as spool_file:
+            for entry in entries:
+                spool_file.write(json.dumps(entry, default=str) + "\n")
+        logger.error(
+            f"{len(entries)} audit entries spooled to {settings.AUDIT_LOG_SPOOL}"
+        )
+    except (OSError, TypeError, ValueError) as e:
+        # last resort, they are in the log
+        logger.critical(
+            f"Spooling {len(entries)} audit entries failed: {e}\n"
+            f"{json.dumps(entries, default=str)}"
+        )
+
+
+async def write_entries(entries: list[dict]) -> None:
+    """
+    Write audit log entries without losing any.
+
+    The batch is retried AUDIT_WRITE_ATTEMPTS times, then written row by row
+    so one bad entry does not cost the rest. What still fails, or was not
+    written yet when the write is cancelled at shutdown, is spooled.
+    """
+    unwritten = list(entries)
+    try:
+        for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+            try:
+                await _insert(unwritten)
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Writing {len(unwritten)} audit entries failed "
+                    f"({attempt}/{AUDIT_WRITE_ATTEMPTS}): {e}"
+                )
+            if attempt < AUDIT_WRITE_ATTEMPTS:
+                await asyncio.sleep(AUDIT_RETRY_DELAY * attempt)
+
+        failed = []
+        while len(entries) > 1 and unwritten:
+            entry = unwritten[0]
+            try:
+                await _insert([entry])
+            except Exception:  # noqa
+                failed.append(entry)
+            unwritten.pop(0)
+        unwritten += failed
+    except asyncio.CancelledError:
+        spool(unwritten)
+        raise
+    if unwritten:
+        spool(unwritten)
+
+
+async def replay_spool() -> None:
+    """Write the spooled entries, spooling again those that still fail"""
+    path = settings.AUDIT_LOG_SPOOL
+    # entries spooled while replaying go to a new spool; a replay that was
+    # interrupted is picked up again with it
+    replaying = f"{path}.replay"
+    if os.path.exists(path):
+        with open(path) as spooled, open(replaying, "a") as replay_file:
+            replay_file.write(spooled.read())
+        os.remove(path)
+    if not os.path.exists(replaying):
+        return
+    with open(replaying) as replay_file:
+        entries = [json.loads(line) for line in replay_file if line.strip()]
+
+    logger.info(f"Writing {len(entries)} spooled audit entries")
+    for i in range(0, len(entries), AUDIT_REPLAY_BATCH_SIZE):
+        await write_entries(entries[i : i + AUDIT_REPLAY_BATCH_SIZE])
+    os.remove(replaying)
+
+
+async def auditlog_tracker(events: list[dict]) -> None:
+    """
+    Write the audit log entries of committed changes.
+
+    Gets the entity-tracker events dispatched together, those of a
+    transaction or of several when the dispatcher is behind, and writes
+    their entries with one insert (see write_entries when that fails).
+    """
+    entries = [entry for event in events if (entry := audit_entry(**event))]
+    if not entries:
+        return
+
+    logger.info(f"Event fired: {len(entries)} changes --> AuditLogEntry")
+    await write_entries(entries)
 
 
 def init_auditlog_listener_events():
-    subscribe("entity-tracker", auditlog_tracker)
+    subscribe_batch("entity-tracker", auditlog_tracker)
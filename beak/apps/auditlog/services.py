@@ -13,3 +13,25 @@ class AuditLogService(BaseService[AuditLog, Dummy, Dummy]):
     async def create(self, c, related: list[str] | None = None) -> E:
         c = marshaller(c)
         return await super().create(c=c, related=related)
+
+    async def bulk_insert(self, entries: list[dict]) -> None:
+        """Insert entries in one statement, without loading them back"""
+        if not entries:
+            return
+        rows = []
+        for entry in entries:
+            entry = marshaller(entry)
+            rows.append(
+                {
+                    "user_uid": entry.get("user_uid") or None,
+                    "target_type": entry["target_type"],
+                    "target_uid": entry.get("target_uid"),
+                    "action": entry.get("action"),
+                    "state_before": entry.get("state_before"),
+                    "state_after": entry.get("state_after"),
+                    "extras": entry.get("extras"),
+                    "created_by_uid": entry.get("user_uid") or None,
+                    "updated_by_uid": entry.get("user_uid") or None,
+                }
+            )
+        await self.repository.table_insert(AuditLog.__table__, rows)
@@ -1,6 +1,8 @@
 from beak.apps.abstract.events import init_entity_tracker_events
 from beak.apps.analysis.events import init_analysis_events
+from beak.apps.analytics.events import init_analytics_events
 from beak.apps.auditlog.events import init_auditlog_listener_events
+from beak.apps.iol.analyzer.events import init_analyzer_events
 from beak.apps.user.events import init_user_events
 
 
@@ -9,3 +11,5 @@ def observe_events():
     init_auditlog_listener_events()
     init_entity_tracker_events()
     init_analysis_events()
+    init_analytics_events()
+    init_analyzer_events()
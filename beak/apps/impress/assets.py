@@ -0,0 +1,36 @@
+"""
+Images placed on impress documents, served from memory
+
+FPDF takes raster images as bytes or PIL images, so nothing here touches a
+temporary file. The logo is decoded once per process (render workers each
+hold their own copy) and rendered barcodes are kept in a bounded LRU: labels
+and reports for the same sample are often printed more than once.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+
+from barcode import Code128
+from barcode.writer import ImageWriter
+from PIL import Image
+
+from beak.utils.logo import get_logo_path
+
+# ~1KB of PNG per barcode
+BARCODE_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=1)
+def logo_image() -> Image.Image:
+    """The laboratory logo, decoded"""
+    with Image.open(get_logo_path()) as image:
+        image.load()
+        return image
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def barcode_png(data: str) -> bytes:
+    """Code128 of data as PNG bytes, without the human readable text"""
+    buffer = BytesIO()
+    Code128(data, writer=ImageWriter()).write(buffer, options={"write_text": False})
+    return buffer.getvalue()
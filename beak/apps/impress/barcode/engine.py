@@ -1,17 +1,7 @@
-import os
-from io import BytesIO
-from tempfile import NamedTemporaryFile
-
-from barcode import Code128
-from barcode.base import Barcode
-from barcode.writer import ImageWriter
 from fpdf import FPDF
 
+from beak.apps.impress.assets import barcode_png
 from beak.apps.impress.barcode.schema import BarCode
-from beak.utils.logo import get_logo_path
-
-Barcode.default_writer_options["write_text"] = False
-ImageWriter.human = " "
 
 
 class BeakBarCoder:
@@ -19,7 +9,6 @@ class BeakBarCoder:
             self, page_width=40.0, page_height=30.0, barcode_width=30, barcode_height=7.5
     ):
         assert page_width > barcode_width and page_height > barcode_height
-        self.logo_path = get_logo_path()
         self.pdf = FPDF(unit="mm", format=(page_width, page_height))
         self.pdf.set_auto_page_break(auto=False, margin=0.0)
         self.margin_left = (self.pdf.w - barcode_width) / 2
@@ -36,24 +25,18 @@ class BeakBarCoder:
         self.label_column_width = 10  # Fixed width for labels
         self.value_column_width = barcode_width - self.label_column_width  # 20mm for values
 
-    async def _make(self, data: list[BarCode]):
+    def _make(self, data: list[BarCode]):
         for _meta in data:
             self.pdf.add_page()
 
             # Barcode
-            svg_img_bytes = BytesIO()
-            Code128(_meta.barcode, writer=ImageWriter()).write(svg_img_bytes)
-            with NamedTemporaryFile(delete=False, suffix=".png") as temp:
-                temp.write(svg_img_bytes.getvalue())
-                temp_path = temp.name
             self.pdf.image(
-                temp_path,
+                barcode_png(_meta.barcode),
                 x=self.margin_left,
                 y=self.margin_top,
                 w=self.barcode_width,
                 h=self.barcode_height,
             )
-            os.unlink(temp_path)
 
             # Barcode txt
             y_next_txt = self.barcode_bottom + 1
@@ -92,6 +75,7 @@ class BeakBarCoder:
 
         return self.pdf
 
-    async def generate(self, data: list[BarCode]):
-        pdf = await self._make(data)
-        return pdf.output()
+    def generate(self, data: list[BarCode]) -> bytes:
+        """CPU bound, call through impress.render from async code"""
+        pdf = self._make(data)
+        return bytes(pdf.output())
@@ -1,6 +1,6 @@
-from beak.apps.impress.barcode.engine import BeakBarCoder
 from beak.apps.impress.barcode.schema import BarCode
+from beak.apps.impress.render import pdf_renderer
 
 
 async def impress_barcodes(bar_codes: list[BarCode]):
-    return await BeakBarCoder().generate(bar_codes)
+    return await pdf_renderer.barcodes(bar_codes)
@@ -3,10 +3,10 @@ import logging
 
 from fpdf import FPDF
 
+from beak.apps.impress.assets import logo_image
 from beak.core.config import get_settings
 from beak.core.dtz import datetime_math, format_datetime, timenow_str
 from beak.utils.helpers import get_from_nested
-from beak.utils.logo import get_logo_path
 
 settings = get_settings()
 
@@ -26,7 +26,7 @@ class PDF(FPDF):
 
 class BeakInvoice:
     def __init__(self):
-        self.logo_path = get_logo_path()
+        self.logo = logo_image()
         self.pdf = PDF(orientation="P", unit="mm", format="A4")
         self.pdf.set_font("helvetica", "", 13)
         self.pdf.set_page_background((255, 255, 255))
@@ -36,7 +36,7 @@ class BeakInvoice:
         self.margin_left = 10
         self.y_diff = 5  # space between rows
 
-    async def _make(self, meta):
+    def _make(self, meta):
         bill = get_from_nested(meta, "bill")
         laboratory = get_from_nested(meta, "laboratory")
         laboratory_settings = get_from_nested(meta, "laboratory_settings")
@@ -52,7 +52,7 @@ class BeakInvoice:
         self.pdf.rect(15.0, 15.0, 170.0, 245.0)
 
         # Logo
-        self.pdf.image(self.logo_path, 20.0, 16.0, link="", type="", w=20.0, h=20.0)
+        self.pdf.image(self.logo, 20.0, 16.0, link="", type="", w=20.0, h=20.0)
 
         # Barcode
         bill_id = get_from_nested(bill, "bill_id")
@@ -419,6 +419,7 @@ class BeakInvoice:
         #
         return self.pdf
 
-    async def generate(self, bill: dict):
-        pdf = await self._make(bill)
-        return pdf.output()
+    def generate(self, bill: dict) -> bytes:
+        """CPU bound, call through impress.render from async code"""
+        pdf = self._make(bill)
+        return bytes(pdf.output())
@@ -9,7 +9,7 @@ from beak.apps.billing.services import (
     TestBillService,
 )
 from beak.apps.common.utils.serializer import marshaller
-from beak.apps.impress.invoicing.engine import BeakInvoice
+from beak.apps.impress.render import pdf_renderer
 from beak.apps.iol.minio import MinioClient
 from beak.apps.iol.minio.enum import MinioBucket
 from beak.apps.setup.caches import get_laboratory_setting
@@ -72,7 +72,7 @@ async def impress_invoice(test_bill: TestBill):
         test_bill_uid=test_bill.uid
     )
     impress_meta["transactions"] = [marshaller(t, depth=1) for t in transactions]
-    pdf = await BeakInvoice().generate(impress_meta)
+    pdf = await pdf_renderer.invoice(impress_meta)
 
     in_i = {
         "test_bill_uid": test_bill.uid,
@@ -89,7 +89,7 @@ async def impress_invoice(test_bill: TestBill):
     await TestBillInvoiceService().create(sc_in)
 
     if settings.OBJECT_STORAGE:
-        MinioClient().put_object(
+        await MinioClient().put_object(
             bucket=MinioBucket.INVOICE,
             object_name=f"{test_bill.bill_id}.pdf",
             data=pdf,
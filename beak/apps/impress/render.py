@@ -0,0 +1,130 @@
+"""
+PDF rendering off the event loop
+
+FPDF layout and barcode rasterising are CPU bound. The engines are run in a
+pool of worker processes so that publishing a large batch of reports does not
+stall the API. Workers receive plain (picklable) metadata and send back the
+PDF bytes; the number of renders in flight is bounded so that a large batch
+queues here instead of piling its payloads into the pool.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from beak.apps.impress.barcode.engine import BeakBarCoder
+from beak.apps.impress.barcode.schema import BarCode
+from beak.apps.impress.invoicing.engine import BeakInvoice
+from beak.apps.impress.sample.engine import BeakImpress
+from beak.apps.impress.sample.schemas import SampleImpressMetadata
+from beak.apps.impress.shipment.engine import ManifetReport
+from beak.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# recycle workers now and then, fpdf/PIL do not always hand memory back
+MAX_RENDERS_PER_WORKER = 500
+
+
+# Worker entry points: module level so they can be pickled by reference
+
+
+def render_sample(sample: dict, report_state: str) -> bytes:
+    meta = SampleImpressMetadata.model_validate(sample)
+    return BeakImpress().generate(meta, report_state)
+
+
+def render_invoice(bill: dict) -> bytes:
+    return BeakInvoice().generate(bill)
+
+
+def render_manifest(data: list[dict]) -> bytes:
+    return ManifetReport().generate(data)
+
+
+def render_barcodes(bar_codes: list[dict]) -> bytes:
+    return BeakBarCoder().generate([BarCode.model_validate(b) for b in bar_codes])
+
+
+class PDFRenderer:
+    """
+    Renders impress documents in a process pool.
+
+    The pool is started on first use. With workers=0 rendering runs on the
+    default thread pool instead: the event loop stays free but renders share
+    the GIL, useful where child processes are not available.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        if workers is None:
+            workers = settings.IMPRESS_RENDER_WORKERS
+        self.workers = max(int(workers), 0)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def concurrency(self) -> int:
+        # one queued render per worker keeps them busy between results
+        return max(self.workers * 2, 1)
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=MAX_RENDERS_PER_WORKER,
+            )
+            logger.info(f"PDF render pool started ({self.workers} workers)")
+        return self._executor
+
+    def _limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._slots
+
+    async def run(self, fn: Callable[..., bytes], *args: Any) -> bytes:
+        async with self._limit():
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._pool(), fn, *args)
+            except BrokenProcessPool:
+                # a worker died (e.g. killed for memory): start afresh next time
+                logger.error("PDF render pool broke, it will be restarted")
+                self.shutdown(wait=False)
+                raise
+
+    async def sample(
+        self, sample: SampleImpressMetadata, report_state: str = "final"
+    ) -> bytes:
+        return await self.run(render_sample, sample.model_dump(), report_state)
+
+    async def samples(
+        self, reports: list[tuple[SampleImpressMetadata, str]]
+    ) -> list[bytes]:
+        """Render (metadata, report_state) pairs concurrently, in order"""
+        renders = (self.sample(meta, state) for meta, state in reports)
+        return list(await asyncio.gather(*renders))
+
+    async def invoice(self, bill: dict) -> bytes:
+        return await self.run(render_invoice, bill)
+
+    async def manifest(self, data: list[dict]) -> bytes:
+        return await self.run(render_manifest, data)
+
+    async def barcodes(self, bar_codes: list[BarCode]) -> bytes:
+        return await self.run(render_barcodes, [b.model_dump() for b in bar_codes])
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+pdf_renderer = PDFRenderer()
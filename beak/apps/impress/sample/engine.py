@@ -1,19 +1,14 @@
 # coding: utf-8
 import logging
-import os
-from io import BytesIO
-from tempfile import NamedTemporaryFile
 
-from barcode import Code128
-from barcode.writer import ImageWriter
 from fpdf import FPDF
 
 from beak.apps.analysis.enum import ResultState
+from beak.apps.impress.assets import barcode_png, logo_image
 from beak.apps.impress.sample.schemas import SampleImpressMetadata
 from beak.core.config import get_settings
 from beak.core.dtz import timenow_str
 from beak.utils.helpers import strtobool, to_text
-from beak.utils.logo import get_logo_path
 
 settings = get_settings()
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +27,7 @@ class PDF(FPDF):
 
 class BeakImpress:
     def __init__(self):
-        self.logo_path = get_logo_path()
+        self.logo = logo_image()
         self.pdf = PDF(orientation="P", unit="mm", format="A4")
         self.pdf.set_font("Helvetica")
         self.pdf.set_page_background((255, 255, 255))
@@ -42,7 +37,7 @@ class BeakImpress:
         self.margin_left = 20
         self.y_diff = 5  # space between rows
 
-    async def _make(self, sample: SampleImpressMetadata, report_state):
+    def _make(self, sample: SampleImpressMetadata, report_state):
         self.pdf.add_page()
         self.pdf.set_font("helvetica", "", 12)
 
@@ -51,7 +46,7 @@ class BeakImpress:
         self.pdf.rect(15.0, 15.0, 170.0, 245.0)
 
         # Logo
-        self.pdf.image(self.logo_path, 20.0, 16.0, link="", type="", w=15.0, h=15.0)
+        self.pdf.image(self.logo, 20.0, 16.0, link="", type="", w=15.0, h=15.0)
         # Lab Details
         self.pdf.set_font("helvetica", "B", 12)
         self.pdf.set_xy(40.0, 16)
@@ -109,15 +104,7 @@ class BeakImpress:
             border=0,
         )
         # Report BarCode
-        svg_img_bytes = BytesIO()
-        Code128(sample.sample_id, writer=ImageWriter()).write(
-            svg_img_bytes, options={"write_text": False}
-        )
-        with NamedTemporaryFile(delete=False, suffix=".png") as temp:
-            temp.write(svg_img_bytes.getvalue())
-            temp_path = temp.name
-        self.pdf.image(temp_path, x=142, y=25, w=40, h=5)
-        os.unlink(temp_path)
+        self.pdf.image(barcode_png(sample.sample_id), x=142, y=25, w=40, h=5)
 
         self.pdf.set_font("helvetica", "", 8)
         self.pdf.set_xy(143.5, 29.5)
@@ -405,6 +392,9 @@ class BeakImpress:
 
         return self.pdf
 
-    async def generate(self, sample: SampleImpressMetadata, report_state="final"):
-        pdf = await self._make(sample, report_state)
-        return pdf.output()
+    def generate(
+        self, sample: SampleImpressMetadata, report_state="final"
+    ) -> bytes:
+        """CPU bound, call through impress.render from async code"""
+        pdf = self._make(sample, report_state)
+        return bytes(pdf.output())
@@ -31,18 +31,30 @@ async def impress_results(job_uid: str):
         return
 
     await JobService().change_status(job.uid, new_status=JobState.RUNNING)  # noqa
+    # guarded again: the guards set when queued may have expired by now
+    sample_uids = [item["uid"] for item in job.data]
+    await task_guard.process_many(sample_uids, object_type=TrackableObject.SAMPLE)
 
     user = await UserService().get(uid=job.creator_uid)
 
-    await utils.impress_samples(job.data, user)
     try:
-        await JobService().change_status(job.uid, new_status=JobState.FINISHED)  # noqa
-        await task_guard.release(uid=job.uid, object_type=TrackableObject.SAMPLE)
+        timings = {}
+        impressed = await utils.impress_samples(job.data, user, timings)
+        stages = ", ".join(f"{stage} {secs}s" for stage, secs in timings.items())
+        await JobService().change_status(
+            job.uid,
+            new_status=JobState.FINISHED,
+            change_reason=f"impressed {len(impressed)}/{len(job.data)}: {stages}",
+        )  # noqa
+        await task_guard.release_many(
+            [job.uid] + sample_uids, object_type=TrackableObject.SAMPLE
+        )
         await NotificationService().notify(
             "Your results were successfully published", user
         )
     except Exception as e:
         await JobService().change_status(job.uid, new_status=JobState.FAILED)  # noqa
+        await task_guard.release_many(sample_uids, object_type=TrackableObject.SAMPLE)
         logger.info(f"Failed impress job {job_uid} with errr: {str(e)}")
         await NotificationService().notify(
             f"Failed to publish results in job with uid: {job.uid} with error: {str(e)}",
@@ -67,8 +79,9 @@ async def prepare_for_impress():
     )
 
     await JobService().create(job_schema)
-    for sample in samples:
-        await task_guard.process(uid=sample.uid, object_type=TrackableObject.SAMPLE)
+    await task_guard.process_many(
+        [s.uid for s in samples], object_type=TrackableObject.SAMPLE
+    )
 
 
 async def cleanup_jobs():
@@ -1,9 +1,12 @@
+import asyncio
 import logging
+import time
+from contextlib import contextmanager
 
 from beak.apps.analysis.enum import SampleState
 from beak.apps.analysis.services.analysis import SampleService
-from beak.apps.analysis.utils import get_last_verificator
-from beak.apps.impress.sample.engine import BeakImpress
+from beak.apps.analysis.utils import get_last_verificator, get_last_verificators
+from beak.apps.impress.render import pdf_renderer
 from beak.apps.impress.sample.helpers import _get_user_meta
 from beak.apps.impress.sample.schemas import ReportImpressCreate, SampleImpressMetadata
 from beak.apps.impress.services import ReportImpressService
@@ -20,6 +23,17 @@ from beak.utils import to_text
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# report records, uploads and publishing are written this many at a time
+IMPRESS_BATCH_SIZE = 50
+
+IMPRESSABLE_STATES = [
+    SampleState.RECEIVED,
+    SampleState.PAIRED,
+    SampleState.AWAITING,
+    SampleState.APPROVED,
+    SampleState.PUBLISHED,
+]
+
 exclude = [
     "auth",
     "preference",
@@ -33,8 +47,15 @@ exclude = [
 ]
 
 
-async def build_impress_metadata(sample: "Sample", laboratory: "Laboratory") -> dict:
-    """Build minimal metadata structure for PDF generation"""
+async def build_impress_metadata(
+    sample: "Sample", laboratory: "Laboratory", verifiers: dict | None = None
+) -> dict:
+    """
+    Build minimal metadata structure for PDF generation
+
+    verifiers maps result uids to their last verifier (get_last_verificators);
+    without it each result's verifier is looked up on its own.
+    """
     return {
         "sample_id": sample.sample_id,
         "status": sample.status,
@@ -94,7 +115,11 @@ async def build_impress_metadata(sample: "Sample", laboratory: "Laboratory") ->
                 "reportable": r.reportable,
                 "submitted_by": _get_user_meta(r.submitted_by),
                 "date_submitted": format_datetime(r.date_submitted),
-                "verified_by": _get_user_meta(await get_last_verificator(r.uid)),
+                "verified_by": _get_user_meta(
+                    verifiers.get(r.uid)
+                    if verifiers is not None
+                    else await get_last_verificator(r.uid)
+                ),
                 "date_verified": format_datetime(r.date_verified),
                 "analysis": {
                     "name": r.analysis.name if r.analysis else None,
@@ -118,97 +143,185 @@ async def build_impress_metadata(sample: "Sample", laboratory: "Laboratory") ->
     }
 
 
-async def impress_samples(sample_meta: list[dict], user):
+def _report_state(action: str | None) -> str:
+    return {
+        "publish": "Final Report",
+        "re-publish": "Final Report [Re]",
+        "pre-publish": "Preliminary Report",
+    }.get(action, "Unknown")
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[name] = round(timings.get(name, 0) + elapsed, 3)
+
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def impress_samples(
+    sample_meta: list[dict], user, timings: dict | None = None
+) -> list["Sample"]:
+    """
+    Generate, store and (unless pre-publishing) publish sample reports.
+
+    Runs as a pipeline over the whole batch: samples, laboratories and
+    verifiers are prefetched in bulk, reports are rendered concurrently in
+    the render pool, then report records, uploads and publishing go in
+    batches of IMPRESS_BATCH_SIZE. A sample whose report fails to render is
+    logged and skipped, the others carry on.
+
+    Args:
+        sample_meta: [{"uid": sample uid, "action": publish|re-publish|pre-publish}]
+        user: Who is publishing
+        timings: Filled with the seconds spent in each stage
+
+    Returns: The impressed samples
+    """
+    timings = {} if timings is None else timings
+    actions = {s_meta.get("uid"): s_meta.get("action") for s_meta in sample_meta}
+
+    with _stage(timings, "fetch"):
+        samples = await SampleService().get_all(uid__in=list(actions))
+        order = {uid: i for i, uid in enumerate(actions)}
+        samples.sort(key=lambda s: order[s.uid])
+        impressable = []
+        for sample in samples:
+            if sample.status in IMPRESSABLE_STATES:
+                impressable.append(sample)
+            else:
+                logger.info(
+                    f"sample {sample.sample_id} could not be impressed - status: {sample.status}"
+                )
+
+        laboratories = {}
+        for lab_uid in {s.laboratory_uid for s in impressable}:
+            assert lab_uid is not None
+            laboratories[lab_uid] = await get_laboratory(lab_uid=lab_uid)  # noqa
+
+        verifiers = await get_last_verificators(
+            [r.uid for s in impressable for r in s.analysis_results or []]
+        )
+
+    with _stage(timings, "metadata"):
+        reports = []
+        for sample in impressable:
+            impress_dict = await build_impress_metadata(
+                sample, laboratories[sample.laboratory_uid], verifiers
+            )
+            reports.append(
+                (
+                    sample,
+                    SampleImpressMetadata(**impress_dict),
+                    _report_state(actions[sample.uid]),
+                )
+            )
+
+    with _stage(timings, "render"):
+        logger.info(f"running impress for {len(reports)} samples ....")
+        pdfs = await asyncio.gather(
+            *(pdf_renderer.sample(meta, state) for _, meta, state in reports),
+            return_exceptions=True,
+        )
+
+    rendered = []
+    for (sample, meta, state), pdf in zip(reports, pdfs):
+        if isinstance(pdf, Exception):
+            logger.error(f"sample {sample.sample_id} failed to render: {pdf}")
+            continue
+        rendered.append((sample, meta, state, pdf))
+
     to_return = []
+    for batch in _batches(rendered, IMPRESS_BATCH_SIZE):
+        with _stage(timings, "persist"):
+            report_impresses = await ReportImpressService().bulk_create(
+                [_report_impress_in(*item, user) for item in batch]
+            )
+
+        with _stage(timings, "store"):
+            await _store_reports(batch, report_impresses)
 
-    for s_meta in sample_meta:
-        logger.info(f"sample s_meta {s_meta}")
-        sample = await SampleService().get(uid=s_meta.get("uid"))
-        assert sample.laboratory_uid is not None
-        laboratory = await get_laboratory(lab_uid=sample.laboratory_uid)  # noqa
-        logger.info(f"sample {sample} {sample.status}")
-
-        if sample.status in [
-            SampleState.RECEIVED,
-            SampleState.PAIRED,
-            SampleState.AWAITING,
-            SampleState.APPROVED,
-            SampleState.PUBLISHED,
-        ]:
-            # Build minimal metadata structure
-            impress_dict = await build_impress_metadata(sample, laboratory)
-
-            # Validate with Pydantic
-            impress_meta = SampleImpressMetadata(**impress_dict)
-
-            report_state = "Unknown"
-            action = s_meta.get("action")
-            if action == "publish":
-                report_state = "Final Report"
-            if action == "re-publish":
-                report_state = "Final Report [Re]"
-            if action == "pre-publish":
-                report_state = "Preliminary Report"
-
-            logger.info(f"report_state {report_state}: running impress ....")
-            impress_engine = BeakImpress()
-
-            # Convert to dict for PDF generation
-            sample_pdf = await impress_engine.generate(impress_meta, report_state)
-
-            ri_in = {
-                "state": report_state,
-                "sample_uid": sample.uid,
-                "email_required": False,
-                "email_sent": False,
-                "sms_required": False,
-                "sms_sent": False,
-                "generated_by_uid": user.uid,
+        with _stage(timings, "publish"):
+            to_publish = [
+                sample
+                for sample, _, _, _ in batch
+                if actions[sample.uid] != "pre-publish"
+            ]
+            published = {
+                s.uid: s
+                for s in await SampleService().publish_many(
+                    to_publish, published_by=user
+                )
             }
+            impressed = [published.get(s.uid, s) for s, _, _, _ in batch]
 
-            if not settings.OBJECT_STORAGE:
-                ri_in["pdf_content"] = sample_pdf
+            activity = ActivityStreamService()
+            for sample in impressed:
+                await activity.stream(
+                    sample, user, "published", NotificationObject.SAMPLE
+                )
+                logger.info(f"sample {sample.sample_id} has been impressed.")
+            to_return.extend(impressed)
+
+    logger.info(f"impressed {len(to_return)}/{len(sample_meta)} samples: {timings}")
+    return to_return
 
-            if not settings.DOCUMENT_STORAGE:
-                ri_in["json_content"] = impress_meta.model_dump()
 
-            sc_in = ReportImpressCreate(**ri_in)
-            report_impress = await ReportImpressService().create(sc_in)
+def _report_impress_in(
+    sample, impress_meta: SampleImpressMetadata, report_state: str, pdf: bytes, user
+) -> ReportImpressCreate:
+    ri_in = {
+        "state": report_state,
+        "sample_uid": sample.uid,
+        "email_required": False,
+        "email_sent": False,
+        "sms_required": False,
+        "sms_sent": False,
+        "generated_by_uid": user.uid,
+    }
+
+    if not settings.OBJECT_STORAGE:
+        ri_in["pdf_content"] = pdf
 
-            # save pdf to minio
-            if settings.OBJECT_STORAGE:
-                MinioClient().put_object(
+    if not settings.DOCUMENT_STORAGE:
+        ri_in["json_content"] = impress_meta.model_dump()
+
+    return ReportImpressCreate(**ri_in)
+
+
+async def _store_reports(batch: list[tuple], report_impresses: list) -> None:
+    """Upload pdfs to minio and the report json to mongodb, concurrently"""
+    minio = MinioClient() if settings.OBJECT_STORAGE else None
+    uploads = []
+    for (sample, meta, state, pdf), report_impress in zip(batch, report_impresses):
+        if settings.OBJECT_STORAGE:
+            uploads.append(
+                minio.put_object(
                     bucket=MinioBucket.DIAGNOSTIC_REPORT,
                     object_name=f"{sample.sample_id}.pdf",
-                    data=sample_pdf,
+                    data=pdf,
                     metadata={
-                        "state": report_state,
+                        "state": state,
                         "sample_uid": sample.uid,
                         "impress_meta_uid": report_impress.uid,
                     },
                     content_type="application/pdf",
                 )
+            )
 
-            # Save the minimal json to mongodb
-            if settings.DOCUMENT_STORAGE:
-                await MongoService().upsert(
+        if settings.DOCUMENT_STORAGE:
+            uploads.append(
+                MongoService().upsert(
                     collection_name=MongoCollection.DIAGNOSTIC_REPORT,
                     uid=report_impress.uid,  # noqa
-                    data=impress_meta.model_dump(),
+                    data=meta.model_dump(),
                 )
-
-            if action != "pre-publish":
-                sample = await SampleService().publish(sample.uid, published_by=user)  # noqa
-
-            logger.info(f"sample {sample.sample_id} has been impressed.")
-            to_return.append(sample)
-
-            await ActivityStreamService().stream(
-                sample, user, "published", NotificationObject.SAMPLE
-            )
-        else:
-            logger.info(
-                f"sample {sample.sample_id} could not be impressed - status: {sample.status}"
             )
-
-    return to_return
+    await asyncio.gather(*uploads)
@@ -67,7 +67,7 @@ class ManifetReport:
         self.pdf.set_text_color(0, 0, 0)
         self.pdf.set_font("Helvetica", "", 10)
 
-    async def run(self, data: list[dict]):
+    def run(self, data: list[dict]):
         self._add_page()
 
         heading_top = self.margin_top + 15
@@ -147,6 +147,7 @@ class ManifetReport:
 
         return self.pdf
 
-    async def generate(self, manifet_data: list[dict]):
-        pdf = await self.run(manifet_data)
-        return pdf.output()
+    def generate(self, manifet_data: list[dict]) -> bytes:
+        """CPU bound, call through impress.render from async code"""
+        pdf = self.run(manifet_data)
+        return bytes(pdf.output())
@@ -1,4 +1,4 @@
-from beak.apps.impress.shipment.engine import ManifetReport
+from beak.apps.impress.render import pdf_renderer
 from beak.apps.iol.minio import MinioClient
 from beak.apps.iol.minio.enum import MinioBucket
 from beak.apps.shipment.schemas import ShipmentUpdate
@@ -8,7 +8,7 @@ from beak.database.mongo import MongoService, MongoCollection
 
 
 async def gen_pdf_manifest(data, shipment):
-    manifest_pdf = await ManifetReport().generate(data)
+    manifest_pdf = await pdf_renderer.manifest(data)
     sm_in = {
         "json_content": {"data": data},
         "pdf_content": manifest_pdf,
@@ -24,7 +24,7 @@ async def gen_pdf_manifest(data, shipment):
         await ShipmentService().update(shipment.uid, update=update_in)
 
     if settings.OBJECT_STORAGE:
-        MinioClient().put_object(
+        await MinioClient().put_object(
             bucket=MinioBucket.SHIPMENT,
             object_name=f"{shipment.shipment_id}.pdf",
             data=manifest_pdf,
@@ -0,0 +1,7 @@
+from beak.apps.iol.analyzer.services.transformer import driver_cache
+from beak.core.events import subscribe
+
+
+def init_analyzer_events():
+    # drop compiled drivers as soon as an instrument driver mapping is edited
+    subscribe("entity-tracker", driver_cache.on_entity_change)
@@ -14,34 +14,29 @@ Supports:
 import logging
 from typing import Optional, List, Tuple
 
-from beak.apps.iol.analyzer.link.conf import ASTMConstants
-from beak.apps.iol.analyzer.link.utils import validate_checksum
+from beak.apps.iol.analyzer.link.base import AbstractLink
+from beak.apps.iol.analyzer.link.fsocket.stream import (
+    ASTMStreamParser,
+    StreamedMessage,
+    StreamEventKind,
+    is_header_record,
+    is_terminator_record,
+)
+from beak.apps.iol.analyzer.services.transformer import MessageAssembler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ASTM Constants
-STX = ASTMConstants.STX
-ETX = ASTMConstants.ETX
-EOT = ASTMConstants.EOT
-ENQ = ASTMConstants.ENQ
-ACK = ASTMConstants.ACK
-NAK = ASTMConstants.NAK
-ETB = ASTMConstants.ETB
-LF = ASTMConstants.LF
-CR = ASTMConstants.CR
-CRLF = ASTMConstants.CRLF
-
 
 class ASTMProtocolHandler:
     """
     Handles ASTM protocol communication.
 
     Maintains protocol state and handles:
-    - Message framing and assembly
-    - Checksum validation
+    - Incremental frame parsing and checksum validation (ASTMStreamParser)
     - Session establishment and termination
-    - Frame sequencing
+    - Record by record message assembly, a message is complete at its
+      terminator (L) record
     """
 
     def __init__(self, instrument_uid: int, instrument_name: str, emit_events=True):
@@ -51,14 +46,14 @@ class ASTMProtocolHandler:
 
         # Protocol state
         self._session_active = False
-        self._frame_number = 0
-        self._last_frame_number = 0
         self.in_transfer_state = False
         self.establishment = False
 
         # Message assembly
+        self._parser = ASTMStreamParser()
         self._received_messages: List[bytes] = []
-        self._buffer = b""
+        self._assembler: Optional[MessageAssembler] = None
+        self._completed: List[StreamedMessage] = []
 
         # Response tracking
         self.response: Optional[str] = None  # "ACK" or "NACK"
@@ -66,38 +61,14 @@ class ASTMProtocolHandler:
     def reset_session(self):
         """Reset protocol state for the new session"""
         self._session_active = False
-        self._frame_number = 0
-        self._last_frame_number = 0
         self.in_transfer_state = False
         self.establishment = False
+        self._parser.reset()
         self._received_messages = []
-        self._buffer = b""
+        self._assembler = None
+        self._completed = []
         self.response = None
 
-    def is_enq(self, data: bytes) -> bool:
-        """Check if data is ENQ (establishment request)"""
-        return data.startswith(ENQ)
-
-    def is_ack(self, data: bytes) -> bool:
-        """Check if data is ACK from the sender"""
-        return data.startswith(ACK)
-
-    def is_nak(self, data: bytes) -> bool:
-        """Check if data is NAK from the sender"""
-        return data.startswith(NAK)
-
-    def is_eot(self, data: bytes) -> bool:
-        """Check if data is EOT (end of transmission)"""
-        return data.startswith(EOT)
-
-    def is_data_frame(self, data: bytes) -> bool:
-        """Check if data is a message frame"""
-        return data.startswith(STX)
-
-    def is_custom_message(self, data: bytes) -> bool:
-        """Check if data is a custom ASTM message (H|...|L|1|N\\r format)"""
-        return b"H|" in data or (b"L|1|N\r" in data and self.in_transfer_state)
-
     async def handle_enq(self) -> str:
         """
         Handle ENQ (session establishment request).
@@ -114,7 +85,6 @@ class ASTMProtocolHandler:
         self._session_active = True
         self.in_transfer_state = True
         self.establishment = True
-        self._last_frame_number = 0
 
         return "ACK"
 
@@ -124,162 +94,60 @@ class ASTMProtocolHandler:
 
         Returns: Tuple of (response, assembled_message)
                 - response: "ACK" or "NACK"
-                - assembled_message: Combined message bytes or None
+                - assembled_message: Last completed message bytes or None
         """
         logger.info(f"ASTM {self.instrument_name}: Received EOT")
 
         self._session_active = False
         self.in_transfer_state = False
-
-        if not self._received_messages:
-            logger.info(f"ASTM {self.instrument_name}: No messages received")
-            return "ACK", None
-
-        # Combine all frame fragments into a single complete message
-        complete_message = b"".join(self._received_messages)
-        logger.info(
-            f"ASTM {self.instrument_name}: Complete message assembled "
-            f"({len(complete_message)} bytes)"
-        )
-
-        # Reset for the next session
-        self._received_messages = []
         self.establishment = False
 
-        return "ACK", complete_message
-
-    async def process_frame(self, frame: bytes) -> bool:
-        """
-        Process a single ASTM frame.
-
-        Args:
-            frame: Raw frame bytes including STX, data, ETX/ETB, checksum, CRLF
-
-        Returns: True if frame accepted, False if rejected
-        """
-        try:
-            # Validate frame structure
-            if len(frame) < 5:
-                logger.error(f"ASTM {self.instrument_name}: Frame too short")
-                return False
-
-            if not frame.startswith(STX):
-                logger.error(
-                    f"ASTM {self.instrument_name}: Frame doesn't start with STX"
-                )
-                return False
-
-            if not frame.endswith(CRLF):
-                logger.error(
-                    f"ASTM {self.instrument_name}: Frame doesn't end with CRLF"
-                )
-                return False
-
-            # Validate checksum
-            if not validate_checksum(frame):
-                logger.error(f"ASTM {self.instrument_name}: Invalid checksum")
-                return False
-
-            # Extract frame number
-            try:
-                frame_number = int(chr(frame[1]))
-            except (ValueError, IndexError):
-                logger.error(f"ASTM {self.instrument_name}: Invalid frame number")
-                return False
-
-            # Validate frame sequence
-            if len(self._received_messages) == 0:
-                # First frame - accept any frame number
-                logger.info(
-                    f"ASTM {self.instrument_name}: First frame accepted (#{frame_number})"
-                )
-                expected_frame = frame_number
-            else:
-                # Subsequent frames - expect consecutive sequence (modulo 8)
-                expected_frame = (self._last_frame_number + 1) % 8
-
-            if frame_number != expected_frame:
-                logger.error(
-                    f"ASTM {self.instrument_name}: Frame sequence error. "
-                    f"Expected {expected_frame}, got {frame_number}"
-                )
-                return False
-
-            # Extract message content (remove STX, frame number, ETX/ETB, checksum, CRLF)
-            etx_pos = frame.find(ETX)
-            etb_pos = frame.find(ETB)
-
-            if etx_pos != -1:
-                # Final frame with ETX
-                message_fragment = frame[2:etx_pos]
-            elif etb_pos != -1:
-                # Intermediate frame with ETB
-                message_fragment = frame[2:etb_pos]
-            else:
-                # Fallback
-                message_fragment = frame[2:-4]
-
-            logger.info(
-                f"ASTM {self.instrument_name}: Frame {frame_number} accepted "
-                f"({len(message_fragment)} bytes)"
-            )
-
-            # Accumulate message
-            self._received_messages.append(message_fragment)
-            self._last_frame_number = frame_number
-
-            return True
-
-        except Exception as e:
-            logger.error(f"ASTM {self.instrument_name}: Error processing frame: {e}")
-            return False
-
-    async def process_custom_message(self, message: bytes) -> bool:
-        """
-        Process custom ASTM message (H|...|L|1|N\\r format).
-
-        Args:
-            message: Raw message bytes
+        # A sender may end the transfer without a terminator record
+        if self._received_messages:
+            self._complete_message()
 
-        Returns: True if valid, False otherwise
-        """
-        try:
-            if not message.startswith(b"H|"):
-                logger.error(
-                    f"ASTM {self.instrument_name}: Custom message doesn't start with H|"
-                )
-                return False
+        if not self._completed:
+            logger.info(f"ASTM {self.instrument_name}: No messages received")
+            return "ACK", None
 
-            if not message.endswith(b"L|1|N\r"):
-                logger.error(
-                    f"ASTM {self.instrument_name}: Custom message doesn't end with L|1|N\\r"
-                )
-                return False
+        return "ACK", self._completed[-1].raw
 
-            if len(message) < 10:
-                logger.error(f"ASTM {self.instrument_name}: Custom message too short")
-                return False
+    def _on_record(self, record: bytes) -> None:
+        if is_header_record(record) and self._received_messages:
+            # new header before the previous terminator
+            self._complete_message()
 
-            logger.info(
-                f"ASTM {self.instrument_name}: Custom message validated "
-                f"({len(message)} bytes)"
-            )
+        if self._assembler is None:
+            self._assembler = MessageAssembler()
+        self._received_messages.append(record)
+        self._assembler.add(AbstractLink.decode_message(record))
 
-            # Store custom message
-            self._received_messages.append(message)
-            return True
+        if is_terminator_record(record):
+            self._complete_message()
 
-        except Exception as e:
-            logger.error(
-                f"ASTM {self.instrument_name}: Custom message validation error: {e}"
-            )
-            return False
+    def _complete_message(self) -> None:
+        assembler = self._assembler or MessageAssembler()
+        message = StreamedMessage(
+            raw=b"\r".join(self._received_messages) + b"\r",
+            parsed=assembler.message,
+            separators=assembler.separators,
+            records=len(self._received_messages),
+        )
+        logger.info(
+            f"ASTM {self.instrument_name}: Complete message assembled "
+            f"({len(message.raw)} bytes, {message.records} records)"
+        )
+        self._completed.append(message)
+        self._received_messages = []
+        self._assembler = None
 
-    async def process_data(self, data: bytes) -> str:
+    async def process_data(self, data: bytes) -> Optional[str]:
         """
         Process incoming ASTM data.
 
-        Routes data to appropriate handler based on control characters.
+        Data is fed to the stream parser and every resulting event handled in
+        order, so frames split over several reads (or several frames in one
+        read) are handled transparently.
 
         Args:
             data: Raw bytes received
@@ -289,115 +157,68 @@ class ASTMProtocolHandler:
         if data is None:
             return None
 
-        logger.info(f"ASTM {self.instrument_name}: Processing data...")
+        response = None
+        for event in self._parser.feed(data):
+            if event.kind == StreamEventKind.ENQ:
+                response = await self.handle_enq()
 
-        # Handle control characters
-        if self.is_enq(data):
-            self.response = await self.handle_enq()
-            return self.response
+            elif event.kind == StreamEventKind.ACK:
+                logger.info(f"ASTM {self.instrument_name}: Received ACK from sender")
 
-        elif self.is_ack(data):
-            logger.info(f"ASTM {self.instrument_name}: Received ACK from sender")
-            return None
+            elif event.kind == StreamEventKind.NAK:
+                logger.warning(f"ASTM {self.instrument_name}: Received NAK from sender")
 
-        elif self.is_nak(data):
-            logger.warning(f"ASTM {self.instrument_name}: Received NAK from sender")
-            return None
+            elif event.kind == StreamEventKind.EOT:
+                response, _ = await self.handle_eot()
 
-        elif self.is_eot(data):
-            response, message = await self.handle_eot()
-            self.response = response
-            return response, message
+            elif event.kind == StreamEventKind.RECORD:
+                self._on_record(event.data)
 
-        # Handle data frames
-        elif self.is_data_frame(data):
-            if not self._session_active:
-                logger.info(
-                    f"ASTM {self.instrument_name}: Auto-starting session on data receipt"
+            elif event.kind == StreamEventKind.FRAME:
+                if not self._session_active:
+                    logger.info(
+                        f"ASTM {self.instrument_name}: Auto-starting session on data receipt"
+                    )
+                    self._session_active = True
+                    self.in_transfer_state = True
+                logger.debug(
+                    f"ASTM {self.instrument_name}: Frame {event.frame_number} accepted"
                 )
-                self._session_active = True
+                response = "ACK"
+
+            elif event.kind == StreamEventKind.START:
+                # custom (unframed) H|...|L|1|N message
                 self.in_transfer_state = True
-                self._last_frame_number = 0
-
-            # Add data to buffer and extract complete frames
-            self._buffer += data
-
-            while True:
-                # Find STX
-                stx_pos = self._buffer.find(STX)
-                if stx_pos == -1:
-                    break
-
-                # Remove any data before STX
-                self._buffer = self._buffer[stx_pos:]
-
-                # Find ETX or ETB
-                etx_pos = self._buffer.find(ETX)
-                etb_pos = self._buffer.find(ETB)
-
-                end_pos = -1
-                if etx_pos != -1 and (etb_pos == -1 or etx_pos < etb_pos):
-                    end_pos = etx_pos
-                elif etb_pos != -1:
-                    end_pos = etb_pos
-
-                if end_pos == -1:
-                    # No complete frame yet
-                    break
-
-                # Extract complete frame (including checksum and CRLF)
-                frame_end = end_pos + 1
-                if frame_end + 4 <= len(self._buffer):
-                    frame_end += 4  # checksum (2) + CRLF (2)
-                elif frame_end + 3 <= len(self._buffer):
-                    frame_end += 3  # Just 1 char + CRLF or checksum
-                elif frame_end + 2 <= len(self._buffer):
-                    frame_end += 2  # Just checksum
-
-                frame = self._buffer[:frame_end]
-                self._buffer = self._buffer[frame_end:]
-
-                # Process frame
-                if not await self.process_frame(frame):
-                    self.response = "NACK"
-                    return "NACK"
-
-            self.response = "ACK"
-            return "ACK"
-
-        # Handle custom messages
-        elif self.is_custom_message(data):
-            self._buffer += data
-
-            if b"L|1|N\r" in self._buffer:
-                full_message = self._buffer
-                self._buffer = b""
+
+            elif event.kind == StreamEventKind.MESSAGE:
                 self.in_transfer_state = False
+                response = "ACK"
 
-                if await self.process_custom_message(full_message):
-                    self.response = "ACK"
-                    return "ACK"
-                else:
-                    self.response = "NACK"
-                    return "NACK"
+            elif event.kind == StreamEventKind.ERROR:
+                logger.error(
+                    f"ASTM {self.instrument_name}: {event.data.decode()}, sending NAK"
+                )
+                response = "NACK"
 
-            logger.info(
-                f"ASTM {self.instrument_name}: Custom message incomplete, waiting"
-            )
-            return None
+        if response is not None:
+            self.response = response
+        if not self._session_active:
+            # the receiver is free again once a transfer ends
+            self.response = None
+        return response
 
-        else:
-            logger.warning(
-                f"ASTM {self.instrument_name}: Unknown data format, defaulting to NACK"
-            )
-            return "NACK"
+    def pop_messages(self) -> List[StreamedMessage]:
+        """Messages completed since the last call"""
+        completed, self._completed = self._completed, []
+        return completed
 
     def get_accumulated_message(self) -> Optional[bytes]:
-        """Get accumulated message fragments"""
+        """Get the records of the message being received"""
         if self._received_messages:
-            return b"".join(self._received_messages)
+            return b"\r".join(self._received_messages) + b"\r"
         return None
 
     def clear_accumulated_message(self):
-        """Clear accumulated message fragments"""
+        """Clear the records of the message being received"""
         self._received_messages = []
+        self._assembler = None
@@ -13,8 +13,9 @@ Architecture:
 
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Optional, Union
+from typing import Awaitable, Callable, Optional, Union
 
 from beak.apps.iol.analyzer.conf import EventType
 from beak.apps.iol.analyzer.link.base import AbstractLink
@@ -26,6 +27,8 @@ from beak.apps.iol.analyzer.link.conf import (
 )
 from beak.apps.iol.analyzer.link.fsocket.astm import ASTMProtocolHandler
 from beak.apps.iol.analyzer.link.fsocket.hl7 import HL7ProtocolHandler
+from beak.apps.iol.analyzer.link.fsocket.stream import StreamedMessage
+from beak.apps.iol.analyzer.link.metrics import LinkMetrics
 from beak.apps.iol.analyzer.link.schema import InstrumentConfig
 from beak.apps.iol.analyzer.link.utils import set_keep_alive
 from beak.core.events import post_event
@@ -34,7 +37,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Connection parameters
-RECV_BUFFER = 1024
+# protocol handlers parse incrementally, a read may end anywhere in a frame
+RECV_BUFFER = 64 * 1024
 CONNECT_TIMEOUT = 10
 RECONNECT_DELAY = 5
 MAX_RECONNECT_ATTEMPTS = 5
@@ -44,6 +48,8 @@ KEEP_ALIVE_INTERVAL = 10
 MAX_MESSAGE_SIZE = 10 * 1024 * 1024  # 10 MB
 MESSAGE_TIMEOUT_SECONDS = 60  # 60 seconds
 
+MessageCallback = Callable[["SocketLink", StreamedMessage], Awaitable[None]]
+
 
 class SocketLink(AbstractLink):
     """
@@ -58,13 +64,23 @@ class SocketLink(AbstractLink):
     - Non-blocking I/O
     - Graceful shutdown
     - Multiple concurrent connections (server mode)
+
+    Completed messages, already parsed record by record, are handed to
+    on_message as soon as their last record arrives.
     """
 
-    def __init__(self, instrument_config: InstrumentConfig, emit_events=True):
+    def __init__(
+        self,
+        instrument_config: InstrumentConfig,
+        emit_events=True,
+        on_message: Optional[MessageCallback] = None,
+    ):
         self.emit_events = emit_events
+        self.on_message = on_message
 
         # Instrument configuration
         self.uid = instrument_config.uid
+        self.laboratory_instrument_uid = instrument_config.laboratory_instrument_uid
         self.name = instrument_config.name
         self.host = instrument_config.host
         self.port = instrument_config.port
@@ -81,6 +97,7 @@ class SocketLink(AbstractLink):
         # Message tracking
         self._session_start_time: Optional[datetime] = None
         self._total_message_size = 0
+        self.metrics = LinkMetrics()
 
         # Protocol handlers
         self.astm_handler = ASTMProtocolHandler(self.uid, self.name, emit_events)
@@ -435,12 +452,12 @@ class SocketLink(AbstractLink):
         Args:
             data: Raw bytes received
 
-        Returns: Response ("ACK", "NACK") or (response, message) tuple
+        Returns: Response ("ACK", "NACK") or (response, ack_message) tuple
         """
         if data is None:
             return None
 
-        logger.info(f"SocketLink {self.name}: Received {len(data)} bytes")
+        logger.debug(f"SocketLink {self.name}: Received {len(data)} bytes")
 
         # Auto-detect protocol if not specified
         if self.protocol_type is None and not self._protocol_detected:
@@ -453,15 +470,37 @@ class SocketLink(AbstractLink):
         # Route to appropriate handler
         protocol = self.protocol_type or self._detected_protocol
 
-        if protocol == ProtocolType.ASTM:
-            return await self.astm_handler.process_data(data)
-        elif protocol == ProtocolType.HL7:
-            return await self.hl7_handler.process_data(data)
+        if protocol == ProtocolType.HL7:
+            handler = self.hl7_handler
         else:
-            logger.warning(
-                f"SocketLink {self.name}: Unknown protocol, defaulting to ASTM"
-            )
-            return await self.astm_handler.process_data(data)
+            if protocol != ProtocolType.ASTM:
+                logger.warning(
+                    f"SocketLink {self.name}: Unknown protocol, defaulting to ASTM"
+                )
+            handler = self.astm_handler
+
+        started = time.perf_counter()
+        response = await handler.process_data(data)
+        self.metrics.observe_read(
+            len(data), time.perf_counter() - started, nack=_is_nack(response)
+        )
+        for message in handler.pop_messages():
+            await self._message_received(message)
+        return response
+
+    async def _message_received(self, message: StreamedMessage) -> None:
+        logger.info(
+            f"SocketLink {self.name}: Message received "
+            f"({len(message.raw)} bytes, {message.records} records)"
+        )
+        self.metrics.observe_message(message.records)
+        if not self.on_message:
+            return
+        try:
+            await self.on_message(self, message)
+        except Exception as e:
+            self.metrics.handler_errors += 1
+            logger.error(f"SocketLink {self.name}: Message handler error: {e}")
 
     def _detect_protocol(self, data: bytes) -> ProtocolType:
         """
@@ -502,3 +541,9 @@ class SocketLink(AbstractLink):
             f"SocketLink(uid={self.uid}, name={self.name}, "
             f"host={self.host}, port={self.port}, type={self.socket_type})"
         )
+
+
+def _is_nack(response) -> bool:
+    if isinstance(response, tuple):
+        response = response[0]
+    return response == "NACK"
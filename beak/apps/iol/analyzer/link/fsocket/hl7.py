@@ -14,7 +14,14 @@ import logging
 from datetime import datetime
 from typing import Optional, List, Tuple
 
+from beak.apps.iol.analyzer.link.base import AbstractLink
 from beak.apps.iol.analyzer.link.conf import HL7Constants
+from beak.apps.iol.analyzer.link.fsocket.stream import (
+    HL7StreamParser,
+    StreamedMessage,
+    StreamEventKind,
+)
+from beak.apps.iol.analyzer.services.transformer import MessageAssembler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,7 +38,7 @@ class HL7ProtocolHandler:
     Handles HL7 protocol communication with MLLP framing.
 
     Maintains protocol state and handles:
-    - MLLP frame assembly and parsing
+    - Incremental MLLP parsing (HL7StreamParser), segment by segment
     - Dynamic separator detection from MSH segment
     - Message ACK/NACK generation
     - Multi-message sessions
@@ -47,8 +54,11 @@ class HL7ProtocolHandler:
         self.establishment = False
 
         # Message assembly
-        self._buffer = b""
+        self._parser = HL7StreamParser()
+        self._segments: List[bytes] = []
+        self._assembler: Optional[MessageAssembler] = None
         self._received_messages: List[bytes] = []
+        self._completed: List[StreamedMessage] = []
 
         # Response tracking
         self.response: Optional[str] = None
@@ -58,8 +68,11 @@ class HL7ProtocolHandler:
         """Reset protocol state for new session"""
         self.in_transfer_state = False
         self.establishment = False
-        self._buffer = b""
+        self._parser.reset()
+        self._segments = []
+        self._assembler = None
         self._received_messages = []
+        self._completed = []
         self.response = None
         self.msg_id = None
 
@@ -125,12 +138,14 @@ class HL7ProtocolHandler:
         Returns: Message ID string or None
         """
         try:
-            message_str = message.decode("latin-1", errors="replace")
+            # the control id lives in the MSH segment, leave the rest alone
+            header = message.partition(HL7_CR)[0]
+            message_str = header.decode("latin-1", errors="replace")
 
             if not message_str.startswith("MSH"):
                 return None
 
-            separators = self._get_separators(message)
+            separators = self._get_separators(header)
             fields = message_str.split(separators["field"])
 
             if len(fields) > 9:
@@ -243,48 +258,64 @@ class HL7ProtocolHandler:
         """
         Process incoming HL7 data.
 
-        Handles MLLP framing and message extraction.
+        Data is fed to the MLLP stream parser; segments are assembled as they
+        arrive and every message completed by this read is acknowledged.
 
         Args:
             data: Raw bytes received
 
-        Returns: Tuple of (response, ack_message) or (None, None) if incomplete
+        Returns: Tuple of (response, ack_messages) or (None, None) if incomplete
         """
         if data is None:
             return None, None
 
-        logger.info(f"HL7 {self.instrument_name}: Processing data...")
+        response, acks = None, []
+        for event in self._parser.feed(data):
+            if event.kind == StreamEventKind.START:
+                await self.handle_message_start()
+                self._segments = []
+                self._assembler = MessageAssembler()
 
-        # Check for message start (MLLP Start Block)
-        if HL7_SB in data:
-            await self.handle_message_start()
-            self._buffer = b""
-            # Don't return yet - may have more data
+            elif event.kind == StreamEventKind.RECORD:
+                self._segments.append(event.data)
+                self._assembler.add(AbstractLink.decode_message(event.data))
 
-        # If we're in transfer state, look for complete messages
-        if self.in_transfer_state:
-            # Add incoming data to buffer
-            combined = self._buffer + data
+            elif event.kind == StreamEventKind.MESSAGE:
+                response, ack = await self._complete_message()
+                if ack:
+                    acks.append(ack)
 
-            # Split by end block or form feed
-            separator = HL7_EB if HL7_FF not in combined else HL7_FF
-            messages = combined.split(separator)
+            elif event.kind == StreamEventKind.ERROR:
+                logger.error(f"HL7 {self.instrument_name}: {event.data.decode()}")
+                response = "NACK"
 
-            # Last chunk is incomplete message - put back in buffer
-            self._buffer = messages.pop(-1)
+        if response is None:
+            return None, None
+        return response, b"".join(acks)
 
-            # Process all complete messages
-            for m in messages:
-                # Clean message
-                m = m.strip(bytes([HL7_SB]))  # Remove start block if present
+    async def _complete_message(self) -> Tuple[str, bytes]:
+        raw = HL7_CR.join(self._segments)
+        assembler = self._assembler or MessageAssembler()
+        self._segments = []
+        self._assembler = None
+        self.in_transfer_state = False
 
-                if m:
-                    response, ack = await self.process_message(m)
-                    # Return first response (usually all should be ACK)
-                    if response:
-                        return response, ack
+        response, ack = await self.process_message(raw)
+        if response == "ACK":
+            self._completed.append(
+                StreamedMessage(
+                    raw=raw,
+                    parsed=assembler.message,
+                    separators=assembler.separators,
+                    records=assembler.records,
+                )
+            )
+        return response, ack
 
-        return None, None
+    def pop_messages(self) -> List[StreamedMessage]:
+        """Messages completed since the last call"""
+        completed, self._completed = self._completed, []
+        return completed
 
     def get_accumulated_messages(self) -> List[bytes]:
         """Get all accumulated messages"""
@@ -295,9 +326,11 @@ class HL7ProtocolHandler:
         self._received_messages = []
 
     def get_current_buffer(self) -> bytes:
-        """Get current incomplete message buffer"""
-        return self._buffer
+        """Get the segments of the message being received"""
+        return HL7_CR.join(self._segments)
 
     def clear_buffer(self):
-        """Clear the buffer"""
-        self._buffer = b""
+        """Clear the message being received"""
+        self._parser.reset()
+        self._segments = []
+        self._assembler = None
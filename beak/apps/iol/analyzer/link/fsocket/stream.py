@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental frame parsers
+
+Bytes are appended to a bytearray as they come off the socket and scanned in
+place through a memoryview. Records (ASTM) and segments (HL7) are emitted as
+soon as their terminator arrives, so no handler ever re-splits a whole
+message. ASTM checksums and frame sequence numbers are validated per frame.
+"""
+
+import re
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import List, NamedTuple, Optional
+
+from beak.apps.iol.analyzer.link.conf import ASTMConstants, HL7Constants
+
+STX = ASTMConstants.STX[0]
+ETX = ASTMConstants.ETX[0]
+EOT = ASTMConstants.EOT[0]
+ENQ = ASTMConstants.ENQ[0]
+ACK = ASTMConstants.ACK[0]
+NAK = ASTMConstants.NAK[0]
+CR = ASTMConstants.CR[0]
+LF = ASTMConstants.LF[0]
+
+SB = HL7Constants.SB[0]
+EB = HL7Constants.EB[0]
+FF = HL7Constants.FF[0]
+
+ASTM_CONTROLS = {ENQ: "enq", EOT: "eot", ACK: "ack", NAK: "nak"}
+
+_FRAME_END = re.compile(rb"[\x03\x17]")
+_SEGMENT_END = re.compile(rb"[\x0d\x1c\x0c]")
+
+# frame number + trailer: checksum (2) + CRLF (2)
+FRAME_TRAILER = 4
+# ASTM frames carry at most 240 characters of text, leave room for sloppy senders
+MAX_FRAME_SIZE = 64 * 1024
+
+
+class StreamEventKind(StrEnum):
+    ENQ = "enq"
+    EOT = "eot"
+    ACK = "ack"
+    NAK = "nak"
+    FRAME = "frame"
+    RECORD = "record"
+    START = "start"
+    MESSAGE = "message"
+    ERROR = "error"
+
+
+class StreamEvent(NamedTuple):
+    kind: StreamEventKind
+    data: bytes = b""
+    frame_number: Optional[int] = None
+
+
+@dataclass
+class StreamedMessage:
+    """A complete message, parsed record by record while it was received"""
+
+    raw: bytes
+    parsed: dict = field(default_factory=dict)
+    separators: Optional[dict] = None
+    records: int = 0
+
+
+def frame_checksum(view: memoryview) -> int:
+    """ASTM checksum of the frame number, text and ETX/ETB"""
+    return sum(view) & 0xFF
+
+
+class ASTMStreamParser:
+    """
+    Incremental ASTM E1381 parser.
+
+    Handles framed transfers (STX FN text ETB|ETX C1 C2 CR LF) as well as the
+    unframed "H|...L|1|N" messages some analysers send. A record split over
+    several ETB frames is emitted once, when its CR arrives.
+    """
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._record = bytearray()
+        self._last_frame_number: Optional[int] = None
+        self._in_raw_message = False
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._record.clear()
+        self._last_frame_number = None
+        self._in_raw_message = False
+
+    @property
+    def pending(self) -> int:
+        """Bytes received but not consumed yet"""
+        return len(self._buffer) + len(self._record)
+
+    def feed(self, data: bytes) -> List[StreamEvent]:
+        """
+        Consume received bytes.
+
+        Args:
+            data: Raw bytes read from the socket
+
+        Returns: Events for every complete control char, frame and record
+        """
+        self._buffer += data
+        events: List[StreamEvent] = []
+        buffer = self._buffer
+        pos = 0
+        with memoryview(buffer) as view:
+            while pos < len(buffer):
+                byte = buffer[pos]
+
+                if byte in ASTM_CONTROLS:
+                    kind = StreamEventKind(ASTM_CONTROLS[byte])
+                    if kind in (StreamEventKind.ENQ, StreamEventKind.EOT):
+                        self._last_frame_number = None
+                        self._record.clear()
+                        self._in_raw_message = False
+                    events.append(StreamEvent(kind))
+                    pos += 1
+
+                elif byte == STX:
+                    consumed = self._read_frame(buffer, view, pos, events)
+                    if consumed == 0:
+                        break
+                    pos += consumed
+
+                elif byte in (CR, LF):
+                    pos += 1
+
+                else:
+                    consumed = self._read_raw_record(buffer, view, pos, events)
+                    if consumed == 0:
+                        break
+                    pos += consumed
+
+        del buffer[:pos]
+        if len(buffer) > self.max_frame_size:
+            buffer.clear()
+            self._record.clear()
+            events.append(StreamEvent(StreamEventKind.ERROR, b"frame too large"))
+        return events
+
+    def _read_frame(
+        self,
+        buffer: bytearray,
+        view: memoryview,
+        pos: int,
+        events: List[StreamEvent],
+    ) -> int:
+        match = _FRAME_END.search(buffer, pos + 1)
+        if match is None:
+            return 0
+        end = match.start()
+        frame_end = end + 1 + FRAME_TRAILER
+        if frame_end > len(buffer):
+            return 0
+        consumed = frame_end - pos
+
+        try:
+            checksum = int(bytes(view[end + 1 : end + 3]), 16)
+        except ValueError:
+            checksum = -1
+        if checksum != frame_checksum(view[pos + 1 : end + 1]):
+            events.append(StreamEvent(StreamEventKind.ERROR, b"invalid checksum"))
+            return consumed
+
+        frame_number = buffer[pos + 1] - 48
+        if not 0 <= frame_number <= 7:
+            events.append(StreamEvent(StreamEventKind.ERROR, b"invalid frame number"))
+            return consumed
+        if (
+            self._last_frame_number is not None
+            and frame_number != (self._last_frame_number + 1) % 8
+        ):
+            events.append(
+                StreamEvent(
+                    StreamEventKind.ERROR, b"frame sequence error", frame_number
+                )
+            )
+            return consumed
+        self._last_frame_number = frame_number
+
+        self._split_records(buffer, view, pos + 2, end, events)
+        if buffer[end] == ETX and self._record:
+            # final frame without a trailing record separator
+            events.append(StreamEvent(StreamEventKind.RECORD, bytes(self._record)))
+            self._record.clear()
+        events.append(StreamEvent(StreamEventKind.FRAME, b"", frame_number))
+        return consumed
+
+    def _split_records(
+        self,
+        buffer: bytearray,
+        view: memoryview,
+        start: int,
+        end: int,
+        events: List[StreamEvent],
+    ) -> None:
+        while start < end:
+            cr = buffer.find(b"\r", start, end)
+            if cr == -1:
+                self._record += view[start:end]
+                return
+            if self._record:
+                self._record += view[start:cr]
+                record = bytes(self._record)
+                self._record.clear()
+            else:
+                record = bytes(view[start:cr])
+            if record:
+                events.append(StreamEvent(StreamEventKind.RECORD, record))
+            start = cr + 1
+
+    def _read_raw_record(
+        self,
+        buffer: bytearray,
+        view: memoryview,
+        pos: int,
+        events: List[StreamEvent],
+    ) -> int:
+        cr = buffer.find(b"\r", pos)
+        if cr == -1:
+            return 0
+        record = bytes(view[pos:cr])
+        if not self._in_raw_message:
+            if not is_header_record(record):
+                events.append(StreamEvent(StreamEventKind.ERROR, b"unknown data"))
+                return cr + 1 - pos
+            self._in_raw_message = True
+            events.append(StreamEvent(StreamEventKind.START))
+        events.append(StreamEvent(StreamEventKind.RECORD, record))
+        if is_terminator_record(record):
+            self._in_raw_message = False
+            events.append(StreamEvent(StreamEventKind.MESSAGE))
+        return cr + 1 - pos
+
+
+class HL7StreamParser:
+    """
+    Incremental MLLP parser (SB segments... EB CR).
+
+    Segments are emitted as soon as their CR arrives and a MESSAGE event
+    closes each block. A form feed is accepted as block end, as before.
+    """
+
+    def __init__(self, max_segment_size: int = MAX_FRAME_SIZE):
+        self.max_segment_size = max_segment_size
+        self._buffer = bytearray()
+        self._in_message = False
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._in_message = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[StreamEvent]:
+        self._buffer += data
+        events: List[StreamEvent] = []
+        buffer = self._buffer
+        pos = 0
+        with memoryview(buffer) as view:
+            while pos < len(buffer):
+                if not self._in_message:
+                    start = buffer.find(HL7Constants.SB, pos)
+                    if start == -1:
+                        # noise between blocks
+                        pos = len(buffer)
+                        break
+                    self._in_message = True
+                    events.append(StreamEvent(StreamEventKind.START))
+                    pos = start + 1
+                    continue
+
+                match = _SEGMENT_END.search(buffer, pos)
+                if match is None:
+                    break
+                end = match.start()
+                if end > pos:
+                    segment = bytes(view[pos:end]).strip(b"\n")
+                    if segment:
+                        events.append(StreamEvent(StreamEventKind.RECORD, segment))
+                pos = end + 1
+                if buffer[end] in (EB, FF):
+                    self._in_message = False
+                    events.append(StreamEvent(StreamEventKind.MESSAGE))
+
+        del buffer[:pos]
+        if len(buffer) > self.max_segment_size:
+            buffer.clear()
+            self._in_message = False
+            events.append(StreamEvent(StreamEventKind.ERROR, b"segment too large"))
+        return events
+
+
+def is_header_record(record: bytes) -> bool:
+    return len(record) > 1 and record[:1] == b"H" and not record[1:2].isalnum()
+
+
+def is_terminator_record(record: bytes) -> bool:
+    return len(record) > 1 and record[:1] == b"L" and not record[1:2].isalnum()
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class LinkMetrics:
+    """Throughput and error counters of one instrument link."""
+
+    reads: int = 0
+    bytes: int = 0
+    messages: int = 0
+    records: int = 0
+    nacks: int = 0
+    handler_errors: int = 0
+    parse_seconds: float = 0.0
+    max_parse_seconds: float = 0.0
+    last_message_at: Optional[datetime] = None
+    started_at: datetime = field(default_factory=datetime.now)
+
+    def observe_read(self, size: int, seconds: float, nack: bool) -> None:
+        self.reads += 1
+        self.bytes += size
+        self.parse_seconds += seconds
+        self.max_parse_seconds = max(self.max_parse_seconds, seconds)
+        if nack:
+            self.nacks += 1
+
+    def observe_message(self, records: int) -> None:
+        self.messages += 1
+        self.records += records
+        self.last_message_at = datetime.now()
+
+    def as_dict(self) -> dict:
+        uptime = (datetime.now() - self.started_at).total_seconds()
+        return {
+            "reads": self.reads,
+            "bytes": self.bytes,
+            "messages": self.messages,
+            "records": self.records,
+            "nacks": self.nacks,
+            "handler_errors": self.handler_errors,
+            "error_rate": round(self.nacks / self.reads, 4) if self.reads else 0.0,
+            "avg_parse_ms": (
+                round(self.parse_seconds / self.reads * 1000, 3) if self.reads else 0.0
+            ),
+            "max_parse_ms": round(self.max_parse_seconds * 1000, 3),
+            "messages_per_minute": (
+                round(self.messages / uptime * 60, 2) if uptime > 0 else 0.0
+            ),
+            "bytes_per_second": round(self.bytes / uptime, 2) if uptime > 0 else 0.0,
+            "last_message_at": self.last_message_at,
+            "started_at": self.started_at,
+        }
@@ -7,6 +7,7 @@ from .conf import ProtocolType, SocketType, ConnectionType
 
 class InstrumentConfig(BaseModel):
     uid: int
+    laboratory_instrument_uid: Union[str, None] = None
     name: str
     code: Union[str, None] = None
     host: Union[str, None] = None
@@ -3,7 +3,7 @@ import logging
 from beak.apps.instrument.entities import InstrumentInterface
 from beak.apps.instrument.services import InstrumentInterfaceService
 from beak.apps.iol.analyzer.link.base import AbstractLink
-from beak.apps.iol.analyzer.link.fsocket.conn import SocketLink
+from beak.apps.iol.analyzer.link.fsocket.conn import MessageCallback, SocketLink
 from beak.apps.iol.analyzer.link.schema import InstrumentConfig
 
 logging.basicConfig(level=logging.INFO)
@@ -22,28 +22,36 @@ class ConnectionService:
         """Initialize connection service."""
         self.ii_service = InstrumentInterfaceService()
 
-    async def get_links(self):
+    async def get_links(self, on_message: MessageCallback | None = None):
         """
         Get all connection links for active interfacing instruments (async version).
 
         For use in async contexts where the event loop is already running.
 
+        Args:
+            on_message: Optional callback receiving every completed message
+
         Returns: List of SocketLink instances for all active interfacing instruments
         """
         insts_interfaces = await self.ii_service.all()
-        return [self._get_link(inst) for inst in insts_interfaces if inst.is_active]
+        return [
+            self._get_link(inst, on_message)
+            for inst in insts_interfaces
+            if inst.is_active
+        ]
 
-    async def get_link_for(self, uid: int):
+    async def get_link_for(self, uid: int, on_message: MessageCallback | None = None):
         """
         Get connection link for specific instrument (async version).
 
         Args:
             uid: Unique identifier of the instrument
+            on_message: Optional callback receiving every completed message
 
         Returns: SocketLink instance for the instrument
         """
         i_interface = await self.ii_service.get(uid=uid)
-        return self._get_link(i_interface)
+        return self._get_link(i_interface, on_message)
 
     async def connect(self, link: AbstractLink):
         """
@@ -54,12 +62,17 @@ class ConnectionService:
         logger.info(f"Starting async server for {link}")
         await link.start_server()
 
-    def _get_link(self, iinterface: InstrumentInterface) -> AbstractLink:
+    def _get_link(
+        self,
+        iinterface: InstrumentInterface,
+        on_message: MessageCallback | None = None,
+    ) -> AbstractLink:
         """
         Create socket link for instrument.
 
         Args:
             instrument: LaboratoryInstrument entity
+            on_message: Optional callback receiving every completed message
 
         Returns: SocketLink with async implementation
 
@@ -69,6 +82,7 @@ class ConnectionService:
         _config = InstrumentConfig(
             **{
                 "uid": iinterface.uid,
+                "laboratory_instrument_uid": iinterface.laboratory_instrument_uid,
                 "name": iinterface.laboratory_instrument.lab_name,
                 "host": iinterface.host,
                 "port": iinterface.port,
@@ -78,4 +92,4 @@ class ConnectionService:
             }
         )
 
-        return SocketLink(_config)
+        return SocketLink(_config, on_message=on_message)
@@ -1,9 +1,200 @@
 # -*- coding: utf-8 -*-
+import json
 import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+
+from beak.core.tenant_context import get_current_lab_uid
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Safety net for replicas that did not see a driver edit
+DRIVER_CACHE_TTL = 300
+
+
+@dataclass(frozen=True)
+class FieldPath:
+    """Precomputed segment/field/repeat/component/subcomponent lookup."""
+
+    segment: str | None
+    field: str | None
+    repeat: int = 0
+    component: str | None = None
+    subcomponent: str | None = None
+
+    @classmethod
+    def from_config(cls, config: dict | None, segment: str | None = None):
+        if config is None:
+            return None
+        field = config.get("field")
+        component = config.get("component")
+        subcomponent = config.get("subcomponent")
+        return cls(
+            segment=segment or config.get("segment"),
+            field=str(field) if field is not None else None,
+            repeat=config.get("repeat", 0),
+            component=str(component) if component is not None else None,
+            subcomponent=str(subcomponent) if subcomponent is not None else None,
+        )
+
+    def extract(self, segment: dict) -> str | None:
+        """Same walk as MessageTransformer._navigate_parsed_message on one segment."""
+        field_data = (segment.get("fields") or {}).get(self.field)
+        if field_data is None:
+            return None
+
+        # Handle simple scalar field
+        repeats = field_data.get("repeats")
+        if repeats is None:
+            return field_data.get("raw")
+        if self.repeat >= len(repeats):
+            return None
+
+        repeat_data = repeats[self.repeat]
+        components = repeat_data.get("components")
+        if self.component is None or components is None:
+            return repeat_data.get("raw")
+
+        comp_data = components.get(self.component)
+        if comp_data is None:
+            return None
+        subcomponents = comp_data.get("subcomponents")
+        if self.subcomponent is None or subcomponents is None:
+            return comp_data.get("raw")
+        return subcomponents.get(self.subcomponent)
+
+    def first(self, parsed_message: dict) -> str | None:
+        segments = parsed_message.get(self.segment)
+        if not segments:
+            return None
+        return self.extract(segments[0])
+
+
+@dataclass(frozen=True)
+class CompiledDriver:
+    """A driver_mapping interpreted once into field paths."""
+
+    sample_id: FieldPath | None
+    instrument: FieldPath | None
+    result_segment: str | None
+    keyword: FieldPath | None
+    result: FieldPath | None
+    units: FieldPath | None
+    result_date: FieldPath | None
+    result_status: FieldPath | None
+    final_value: str = "F"
+
+    def extract(self, parsed_message: dict) -> dict:
+        results = []
+        for segment in parsed_message.get(self.result_segment) or []:
+            result_obj = {}
+            if self.keyword:
+                keyword = self.keyword.extract(segment)
+                if keyword:
+                    result_obj["keyword"] = keyword
+            if self.result:
+                result_obj["result"] = self.result.extract(segment)
+            if self.units:
+                result_obj["units"] = self.units.extract(segment) or None
+            if self.result_date:
+                result_obj["result_date"] = self.result_date.extract(segment)
+            if self.result_status:
+                marker_value = self.result_status.extract(segment)
+                result_obj["is_final"] = (
+                    marker_value == self.final_value if marker_value else False
+                )
+            results.append(result_obj)
+
+        return {
+            "sample_id": (
+                self.sample_id.first(parsed_message) if self.sample_id else None
+            ),
+            "instrument": (
+                self.instrument.first(parsed_message) if self.instrument else None
+            ),
+            "results": results,
+        }
+
+
+@lru_cache(maxsize=128)
+def _compile_driver(key: str) -> CompiledDriver:
+    driver = json.loads(key)
+    result_segment = (driver.get("result") or {}).get("segment")
+    status = driver.get("result_status")
+    return CompiledDriver(
+        sample_id=FieldPath.from_config(driver.get("sample_id")),
+        instrument=FieldPath.from_config(driver.get("instrument")),
+        result_segment=result_segment,
+        # per result fields are always read from the result segment
+        keyword=FieldPath.from_config(driver.get("keyword"), result_segment),
+        result=FieldPath.from_config(driver.get("result"), result_segment),
+        units=FieldPath.from_config(driver.get("units"), result_segment),
+        result_date=FieldPath.from_config(driver.get("result_date"), result_segment),
+        result_status=FieldPath.from_config(status, result_segment),
+        final_value=(status or {}).get("final_value", "F"),
+    )
+
+
+def compile_driver(driver: dict) -> CompiledDriver:
+    """Compile (or fetch the cached compilation of) a driver mapping"""
+    return _compile_driver(json.dumps(driver, sort_keys=True, default=str))
+
+
+class DriverCache:
+    """
+    Compiled drivers keyed by (laboratory, laboratory instrument).
+
+    Entries are dropped whenever an instrument driver mapping is edited
+    (entity-tracker events) and expire after DRIVER_CACHE_TTL seconds.
+    """
+
+    def __init__(self, ttl: float = DRIVER_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[tuple, tuple[float, CompiledDriver]] = {}
+        self._lock = Lock()
+
+    def get(self, laboratory_instrument_uid: str) -> CompiledDriver | None:
+        key = (get_current_lab_uid(), laboratory_instrument_uid)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, driver = entry
+        if expires < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return driver
+
+    def set(self, laboratory_instrument_uid: str, driver: CompiledDriver) -> None:
+        key = (get_current_lab_uid(), laboratory_instrument_uid)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, driver)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def on_entity_change(self, action: str, table_name: str, metadata) -> None:
+        if table_name not in (
+            "instrument",
+            "laboratory_instrument",
+            "instrument_interface",
+        ):
+            return
+        # new instruments cannot be cached yet
+        if action == "after-insert":
+            return
+        if action == "after-update":
+            changed = (metadata or {}).get("state_after") or {}
+            if "driver_mapping" not in changed and "instrument_uid" not in changed:
+                return
+        self.clear()
+
+
+driver_cache = DriverCache()
+
 
 class MessageTransformer:
     def _get_separators(self, raw_message: str) -> dict:
@@ -116,6 +307,31 @@ class MessageTransformer:
         raw_message = raw_message.replace("\\r", "\r")
 
         sep = self._get_separators(raw_message)
+
+        lines = [
+            line.strip() for line in raw_message.strip().splitlines() if line.strip()
+        ]
+        if not lines:
+            return {}, sep
+
+        assembler = MessageAssembler(self, separators=sep)
+        for line in lines:
+            assembler.add(line)
+
+        logger.debug(f"Parsed message: {assembler.message}")
+        return assembler.message, sep
+
+    def parse_segment(self, line: str, sep: dict) -> tuple[str, dict]:
+        """
+        Parses a single HL7 segment or ASTM record into its parse_message form.
+
+        Args:
+            line (str): The segment/record, without its terminator.
+            sep (dict): Separators as returned by _get_separators().
+
+        Returns:
+            tuple: (segment_id, {"raw": line, "fields": {...}})
+        """
         f_sep, c_sep, r_sep, s_sep = (
             sep["field"],
             sep["component"],
@@ -123,66 +339,54 @@ class MessageTransformer:
             sep["subcomponent"],
         )
 
-        lines = [
-            line.strip() for line in raw_message.strip().splitlines() if line.strip()
-        ]
-        if not lines:
-            return {}
+        seg_name = (
+            line[:1] if line[0] in "HOPRA" else line[:3]
+        )  # ASTM usually 1 char, HL7 3 char
+        fields = line.split(f_sep)
 
-        message = {}
+        seg_obj = {"raw": line, "fields": {}}
 
-        for line in lines:
-            seg_name = (
-                line[:1] if line[0] in "HOPRA" else line[:3]
-            )  # ASTM usually 1 char, HL7 3 char
-            fields = line.split(f_sep)
+        for idx, field in enumerate(fields[1:], start=1):
+            # Determine if we need a repeat structure
+            need_repeat = (
+                    r_sep in field or c_sep in field or (s_sep and s_sep in field)
+            )
+            if need_repeat:
+                field_dict = {"raw": field, "repeats": []}
+                logger.debug(
+                    f"Field {field} contains repeats, need_repeat={need_repeat}  :: r_sep: {r_sep} "
+                )
+                repeats = field.split(r_sep) if r_sep in field else [field]
+                logger.debug(f"repeats: {repeats} ")
 
-            seg_obj = {"raw": line, "fields": {}}
+                for repeat in repeats:
+                    repeat_dict = {"raw": repeat}
 
-            for idx, field in enumerate(fields[1:], start=1):
-                # Determine if we need a repeat structure
-                need_repeat = (
-                        r_sep in field or c_sep in field or (s_sep and s_sep in field)
-                )
-                if need_repeat:
-                    field_dict = {"raw": field, "repeats": []}
-                    logger.info(
-                        f"Field {field} contains repeats, need_repeat={need_repeat}  :: r_sep: {r_sep} "
-                    )
-                    repeats = field.split(r_sep) if r_sep in field else [field]
-                    logger.info(f"repeats: {repeats} ")
-
-                    for repeat in repeats:
-                        repeat_dict = {"raw": repeat}
-
-                        # Determine if we need components
-                        if c_sep in repeat or (s_sep and s_sep in repeat):
-                            repeat_dict["components"] = {}
-                            components = repeat.split(c_sep)
-                            for c_idx, comp in enumerate(components, start=1):
-                                # Determine if we need subcomponents
-                                if s_sep and s_sep in comp:
-                                    comp_dict = {"raw": comp, "subcomponents": {}}
-                                    subcomponents = comp.split(s_sep)
-                                    for s_idx, sub in enumerate(subcomponents, start=1):
-                                        comp_dict["subcomponents"][str(s_idx)] = sub
-                                else:
-                                    comp_dict = {"raw": comp}
-
-                                repeat_dict["components"][str(c_idx)] = comp_dict
-
-                        field_dict["repeats"].append(repeat_dict)
-
-                else:
-                    # Simple scalar field, just store raw
-                    field_dict = {"raw": field}
-
-                seg_obj["fields"][str(idx)] = field_dict
-
-            message.setdefault(seg_name, []).append(seg_obj)
-
-        logger.info(f"Parsed message: {message}")
-        return message, sep
+                    # Determine if we need components
+                    if c_sep in repeat or (s_sep and s_sep in repeat):
+                        repeat_dict["components"] = {}
+                        components = repeat.split(c_sep)
+                        for c_idx, comp in enumerate(components, start=1):
+                            # Determine if we need subcomponents
+                            if s_sep and s_sep in comp:
+                                comp_dict = {"raw": comp, "subcomponents": {}}
+                                subcomponents = comp.split(s_sep)
+                                for s_idx, sub in enumerate(subcomponents, start=1):
+                                    comp_dict["subcomponents"][str(s_idx)] = sub
+                            else:
+                                comp_dict = {"raw": comp}
+
+                            repeat_dict["components"][str(c_idx)] = comp_dict
+
+                    field_dict["repeats"].append(repeat_dict)
+
+            else:
+                # Simple scalar field, just store raw
+                field_dict = {"raw": field}
+
+            seg_obj["fields"][str(idx)] = field_dict
+
+        return seg_name, seg_obj
 
     def _navigate_parsed_message(
             self,
@@ -341,7 +545,7 @@ class MessageTransformer:
                     ]
                 }
         """
-        logger.info(
+        logger.debug(
             f"extract_fields called with driver type: {type(driver)}, driver: {driver}"
         )
 
@@ -360,121 +564,7 @@ class MessageTransformer:
             parsed_message = message
 
         try:
-            # Extract sample_id (typically once from first segment)
-            sample_id = None
-            if "sample_id" in driver:
-                sample_id_config = driver["sample_id"]
-                sample_id = self._navigate_parsed_message(
-                    parsed_message,
-                    sample_id_config.get("segment"),
-                    sample_id_config.get("field"),
-                    sample_id_config.get("repeat", 0),
-                    sample_id_config.get("component"),
-                    sample_id_config.get("subcomponent"),
-                )
-
-            # Extract instrument
-            instrument = None
-            if "instrument" in driver:
-                instrument_config = driver["instrument"]
-                instrument = self._navigate_parsed_message(
-                    parsed_message,
-                    instrument_config.get("segment"),
-                    instrument_config.get("field"),
-                    instrument_config.get("repeat", 0),
-                    instrument_config.get("component"),
-                    instrument_config.get("subcomponent"),
-                )
-
-            # Extract multiple results from result segments (typically OBX, R)
-            results = []
-            result_segment_id = driver.get("result", {}).get("segment")
-
-            if result_segment_id in parsed_message:
-                result_segments = parsed_message[result_segment_id]
-
-                for segment_idx, segment in enumerate(result_segments):
-                    result_obj = {}
-
-                    # Extract test_keyword (optional)
-                    if "keyword" in driver:
-                        keyword_config = driver["keyword"]
-                        keyword = self._navigate_parsed_message(
-                            {result_segment_id: [segment]},
-                            result_segment_id,
-                            keyword_config.get("field"),
-                            keyword_config.get("repeat", 0),
-                            keyword_config.get("component"),
-                            keyword_config.get("subcomponent"),
-                        )
-                        logger.info(
-                            f"Extracted keyword: config={keyword_config}, result='{keyword}'"
-                        )
-                        if keyword:
-                            result_obj["keyword"] = keyword
-
-                    # Extract result value
-                    if "result" in driver:
-                        result_config = driver["result"]
-                        result_value = self._navigate_parsed_message(
-                            {result_segment_id: [segment]},
-                            result_segment_id,
-                            result_config.get("field"),
-                            result_config.get("repeat", 0),
-                            result_config.get("component"),
-                            result_config.get("subcomponent"),
-                        )
-                        result_obj["result"] = result_value
-
-                    # Extract unit (optional)
-                    if "units" in driver:
-                        unit_config = driver["units"]
-                        units = self._navigate_parsed_message(
-                            {result_segment_id: [segment]},
-                            result_segment_id,
-                            unit_config.get("field"),
-                            unit_config.get("repeat", 0),
-                            unit_config.get("component"),
-                            unit_config.get("subcomponent"),
-                        )
-                        result_obj["units"] = units if units else None
-
-                    # Extract result_date
-                    if "result_date" in driver:
-                        date_config = driver["result_date"]
-                        result_date = self._navigate_parsed_message(
-                            {result_segment_id: [segment]},
-                            result_segment_id,
-                            date_config.get("field"),
-                            date_config.get("repeat", 0),
-                            date_config.get("component"),
-                            date_config.get("subcomponent"),
-                        )
-                        result_obj["result_date"] = result_date
-
-                    # Extract is_final marker
-                    if "result_status" in driver:
-                        marker_config = driver["result_status"]
-                        marker_value = self._navigate_parsed_message(
-                            {result_segment_id: [segment]},
-                            result_segment_id,
-                            marker_config.get("field"),
-                            marker_config.get("repeat", 0),
-                            marker_config.get("component"),
-                            marker_config.get("subcomponent"),
-                        )
-                        final_value = marker_config.get("final_value", "F")
-                        result_obj["is_final"] = (
-                            marker_value == final_value if marker_value else False
-                        )
-
-                    results.append(result_obj)
-
-            return {
-                "sample_id": sample_id,
-                "instrument": instrument,
-                "results": results,
-            }
+            return compile_driver(driver).extract(parsed_message)
 
         except Exception as e:
             logger.error(f"Error extracting fields with driver: {e}", exc_info=True)
@@ -517,7 +607,9 @@ class MessageTransformer:
 
         try:
             # Fetch laboratory instrument
-            lab_instrument = await lab_instrument_service.get(laboratory_instrument_uid)
+            lab_instrument = await lab_instrument_service.get(
+                uid=laboratory_instrument_uid
+            )
             if not lab_instrument:
                 logger.warning(
                     f"Laboratory instrument {laboratory_instrument_uid} not found"
@@ -525,7 +617,7 @@ class MessageTransformer:
                 return None
 
             # Check for lab-specific driver override
-            if lab_instrument.driver_mapping:
+            if getattr(lab_instrument, "driver_mapping", None):
                 logger.info(
                     f"Using lab-specific driver for {laboratory_instrument_uid}"
                 )
@@ -541,7 +633,12 @@ class MessageTransformer:
                 )
                 return None
 
-            instrument = await instrument_service.get(lab_instrument.instrument_uid)
+            # instrument is selectin loaded with the laboratory instrument
+            instrument = getattr(lab_instrument, "instrument", None)
+            if instrument is None:
+                instrument = await instrument_service.get(
+                    uid=lab_instrument.instrument_uid
+                )
             if not instrument or not instrument.driver_mapping:
                 logger.warning(
                     f"No driver found for instrument {lab_instrument.instrument_uid}"
@@ -560,6 +657,42 @@ class MessageTransformer:
             )
             return None
 
+    async def get_compiled_driver(
+            self,
+            laboratory_instrument_uid: str,
+            lab_instrument_service=None,
+            instrument_service=None,
+    ) -> CompiledDriver | None:
+        """
+        Get the compiled driver for a laboratory instrument.
+
+        Drivers are resolved through get_driver once and then served from
+        driver_cache until the mapping is edited or the entry expires.
+
+        Args:
+            laboratory_instrument_uid (str): UID of the laboratory instrument
+            lab_instrument_service: LaboratoryInstrumentService instance (injected dependency)
+            instrument_service: InstrumentService instance (injected dependency)
+
+        Returns:
+            CompiledDriver | None: Compiled driver, or None if no driver exists
+        """
+        compiled = driver_cache.get(laboratory_instrument_uid)
+        if compiled is not None:
+            return compiled
+
+        driver = await self.get_driver(
+            laboratory_instrument_uid,
+            lab_instrument_service=lab_instrument_service,
+            instrument_service=instrument_service,
+        )
+        if not driver or not isinstance(driver, dict):
+            return None
+
+        compiled = compile_driver(driver)
+        driver_cache.set(laboratory_instrument_uid, compiled)
+        return compiled
+
     async def transform_message(
             self,
             raw_message: str,
@@ -625,14 +758,14 @@ class MessageTransformer:
                 logger.error(result["error"])
                 return result
 
-            # Step 1: Get driver with fallback logic
-            driver = await self.get_driver(
+            # Step 1: Get the compiled driver, cached per laboratory instrument
+            compiled = await self.get_compiled_driver(
                 laboratory_instrument_uid,
                 lab_instrument_service=lab_instrument_service,
                 instrument_service=instrument_service,
             )
 
-            if not driver:
+            if not compiled:
                 result["error"] = (
                     f"No driver found for laboratory instrument {laboratory_instrument_uid}"
                 )
@@ -641,7 +774,7 @@ class MessageTransformer:
 
             # Step 2: Parse raw message
             try:
-                parsed_message = self.parse_message(raw_message)
+                parsed_message, _ = self.parse_message(raw_message)
                 result["parsed_message"] = parsed_message
                 logger.debug(
                     f"Successfully parsed message with {len(parsed_message)} segments"
@@ -652,23 +785,105 @@ class MessageTransformer:
                 return result
 
             # Step 3: Extract fields using driver
-            try:
-                extracted = self.extract_fields(parsed_message, driver)
-                result["sample_id"] = extracted.get("sample_id")
-                result["results"] = extracted.get("results", [])
-                result["success"] = True
-                logger.info(
-                    f"Successfully transformed message: sample_id={result['sample_id']}, "
-                    f"{len(result['results'])} results extracted"
+            return self._extract_into(result, compiled, parsed_message)
+
+        except Exception as e:
+            result["error"] = f"Unexpected error during transformation: {str(e)}"
+            logger.error(result["error"], exc_info=True)
+            return result
+
+    async def transform_parsed(
+            self,
+            parsed_message: dict,
+            laboratory_instrument_uid: str,
+            lab_instrument_service=None,
+            instrument_service=None,
+    ) -> dict:
+        """
+        Transform an already parsed message, e.g. one built record by record
+        with a MessageAssembler while it streamed in.
+
+        Args:
+            parsed_message (dict): Parsed message as returned by parse_message()
+            laboratory_instrument_uid (str): UID of the laboratory instrument that received the message
+            lab_instrument_service: LaboratoryInstrumentService instance (injected dependency)
+            instrument_service: InstrumentService instance (injected dependency)
+
+        Returns:
+            dict: Same structure as transform_message()
+        """
+        result = {
+            "success": False,
+            "error": None,
+            "sample_id": None,
+            "results": [],
+            "parsed_message": parsed_message,
+        }
+
+        try:
+            compiled = await self.get_compiled_driver(
+                laboratory_instrument_uid,
+                lab_instrument_service=lab_instrument_service,
+                instrument_service=instrument_service,
+            )
+            if not compiled:
+                result["error"] = (
+                    f"No driver found for laboratory instrument {laboratory_instrument_uid}"
                 )
-            except Exception as extract_error:
-                result["error"] = f"Failed to extract fields: {str(extract_error)}"
-                logger.error(result["error"], exc_info=True)
+                logger.error(result["error"])
                 return result
 
-            return result
+            return self._extract_into(result, compiled, parsed_message)
 
         except Exception as e:
             result["error"] = f"Unexpected error during transformation: {str(e)}"
             logger.error(result["error"], exc_info=True)
             return result
+
+    @staticmethod
+    def _extract_into(
+            result: dict, compiled: CompiledDriver, parsed_message: dict
+    ) -> dict:
+        try:
+            extracted = compiled.extract(parsed_message)
+            result["sample_id"] = extracted.get("sample_id")
+            result["results"] = extracted.get("results", [])
+            result["success"] = True
+            logger.info(
+                f"Successfully transformed message: sample_id={result['sample_id']}, "
+                f"{len(result['results'])} results extracted"
+            )
+        except Exception as extract_error:
+            result["error"] = f"Failed to extract fields: {str(extract_error)}"
+            logger.error(result["error"], exc_info=True)
+        return result
+
+
+class MessageAssembler:
+    """
+    Builds the parse_message() structure one record at a time.
+
+    Links feed records as they come off the wire so that a complete message
+    is already parsed when its last record arrives. Separators are taken
+    from the first (header) record.
+    """
+
+    def __init__(
+        self,
+        transformer: MessageTransformer | None = None,
+        separators: dict | None = None,
+    ):
+        self.transformer = transformer or MessageTransformer()
+        self.separators = separators
+        self.message: dict = {}
+        self.records = 0
+
+    def add(self, record: str) -> None:
+        line = record.strip()
+        if not line:
+            return
+        if self.separators is None:
+            self.separators = self.transformer._get_separators(line)
+        seg_name, seg_obj = self.transformer.parse_segment(line, self.separators)
+        self.message.setdefault(seg_name, []).append(seg_obj)
+        self.records += 1
@@ -1,113 +1,290 @@
-# import asyncio
-# import traceback
-
-
-# class InstrumentTaskManager:
-#     def __init__(self):
-#         # instrument_uid → asyncio.Task
-#         self.tasks = {}
-
-#     async def start_connection(self, instrument_uid):
-#         """Start a connection if not already running."""
-#         if uid_task := self.tasks.get(instrument_uid):
-#             if not uid_task.done():
-#                 print(f"[{instrument_uid}] already running.")
-#                 return
-
-#         print(f"[{instrument_uid}] Starting connection task...")
-#         task = asyncio.create_task(self.run_connection(instrument_uid))
-#         self.tasks[instrument_uid] = task
-
-#     async def run_connection(self, instrument_uid):
-#         """The actual connection loop for one instrument."""
-#         while True:
-#             try:
-#                 print(f"[{instrument_uid}] Connecting...")
-#                 # Example: Simulate your socket link
-#                 await self.simulate_instrument_loop(instrument_uid)
-#             except Exception as e:
-#                 print(f"[{instrument_uid}] crashed: {e}")
-#                 traceback.print_exc()
-#                 await asyncio.sleep(5)  # wait before restarting
-#             else:
-#                 print(f"[{instrument_uid}] stopped gracefully, restarting...")
-#                 await asyncio.sleep(2)  # optional delay before reconnect
-
-#     async def simulate_instrument_loop(self, instrument_uid):
-#         """Placeholder for your actual I/O loop (TCP, ASTM, etc.)."""
-#         while True:
-#             print(f"[{instrument_uid}] working...")
-#             await asyncio.sleep(2)
-#             # Example random failure
-#             # raise RuntimeError("simulated crash")
-
-#     async def stop_connection(self, instrument_uid):
-#         """Cancel and stop one connection."""
-#         task = self.tasks.get(instrument_uid)
-#         if task and not task.done():
-#             task.cancel()
-#             await asyncio.gather(task, return_exceptions=True)
-#             print(f"[{instrument_uid}] stopped.")
-
-#     async def monitor(self):
-#         """Optional periodic monitor to restart crashed tasks."""
-#         while True:
-#             for uid, task in list(self.tasks.items()):
-#                 if task.done():
-#                     print(f"[{uid}] restarting crashed task...")
-#                     await self.start_connection(uid)
-#             await asyncio.sleep(10)
-
-
-# async def main():
-#     manager = InstrumentTaskManager()
-
-#     # Start multiple instruments
-#     await manager.start_connection("ROCHE_X800")
-#     await manager.start_connection("SYSMEX_XN1000")
-
-#     # Optional background monitor
-#     asyncio.create_task(manager.monitor())
-
-#     # Keep running forever
-#     await asyncio.Event().wait()
-
-
-# if __name__ == "__main__":
-#     asyncio.run(main())
-
-# from fastapi import FastAPI
-# import asyncio
-
-# from your_module import InstrumentTaskManager  # your class from earlier
-
-# app = FastAPI()
-# manager = InstrumentTaskManager()
-
-
-# @app.on_event("startup")
-# async def start_instrument_manager():
-#     # Start instrument connections
-#     await manager.start_connection("ROCHE_X800")
-#     await manager.start_connection("SYSMEX_XN1000")
-
-#     # Launch background monitor (auto-restarts crashed tasks)
-#     asyncio.create_task(manager.monitor())
-
-#     print("InstrumentTaskManager started in background.")
-
-
-# @app.on_event("shutdown")
-# async def stop_instrument_manager():
-#     # Gracefully stop all instrument connections
-#     for uid in list(manager.tasks.keys()):
-#         await manager.stop_connection(uid)
-#     print("InstrumentTaskManager stopped.")
-
-
-# @app.get("/status")
-# async def status():
-#     return {
-#         uid: not task.done()
-#         for uid, task in manager.tasks.items()
-#     }
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from beak.apps.instrument.services import (
+    InstrumentRawDataService,
+    InstrumentService,
+    LaboratoryInstrumentService,
+)
+from beak.apps.iol.analyzer.link.fsocket.conn import MessageCallback, SocketLink
+from beak.apps.iol.analyzer.link.fsocket.stream import StreamedMessage
+from beak.apps.iol.analyzer.services.connection import ConnectionService
+from beak.apps.iol.analyzer.services.transformer import MessageTransformer
+from beak.core.dtz import timenow_dt
+from beak.core.events import subscribe, unsubscribe
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# restart backoff: RESTART_DELAY * 2^failures, capped, with jitter
+RESTART_DELAY = 2
+MAX_RESTART_DELAY = 300
+# a link that ran this long before dying starts over at RESTART_DELAY
+STABLE_AFTER = 60
+# safety net for interface edits made on other replicas
+RECONCILE_INTERVAL = 60
+# let the interface edit commit before reloading
+REFRESH_DEBOUNCE = 2
+
+INTERFACE_TABLES = ("instrument_interface", "laboratory_instrument")
+
+
+class LinkState:
+    RUNNING = "running"
+    BACKOFF = "backoff"
+    STOPPED = "stopped"
+
+
+@dataclass
+class SupervisedLink:
+    link: SocketLink
+    task: Optional[asyncio.Task] = None
+    state: str = LinkState.STOPPED
+    restarts: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_exit_at: Optional[datetime] = None
+    next_start_at: Optional[datetime] = None
+
+
+def link_fingerprint(link: SocketLink) -> tuple:
+    """The connection settings that require a restart when changed"""
+    return (
+        link.name,
+        link.host,
+        link.port,
+        link.socket_type,
+        link.protocol_type,
+        link.auto_reconnect,
+    )
+
+
+def backoff_delay(failures: int, base: float, cap: float) -> float:
+    delay = min(cap, base * (2 ** min(failures, 16)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class InstrumentTaskManager:
+    """
+    Supervises one asyncio task per active instrument interface.
+
+    A link whose start_server returns or raises is restarted with exponential
+    backoff. Interfaces are reconciled against the database when an
+    instrument interface changes (entity-tracker) and every
+    RECONCILE_INTERVAL seconds: new links are started, removed or
+    deactivated ones stopped and links whose connection settings changed
+    restarted.
+    """
+
+    def __init__(
+        self,
+        connection_service: ConnectionService | None = None,
+        on_message: MessageCallback | None = None,
+        restart_delay: float = RESTART_DELAY,
+        max_restart_delay: float = MAX_RESTART_DELAY,
+        reconcile_interval: float = RECONCILE_INTERVAL,
+    ):
+        self.connection_service = connection_service or ConnectionService()
+        self.on_message = on_message
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.reconcile_interval = reconcile_interval
+
+        self.links: dict[str, SupervisedLink] = {}
+        self._lock = asyncio.Lock()
+        self._monitor: Optional[asyncio.Task] = None
+        self._pending_refresh: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.refresh()
+        subscribe("entity-tracker", self.on_entity_change)
+        self._monitor = asyncio.create_task(self._reconcile(), name="beak-links")
+        logger.info(f"Instrument task manager started ({len(self.links)} links)")
+
+    async def stop(self) -> None:
+        unsubscribe("entity-tracker", self.on_entity_change)
+        for task in (self._monitor, self._pending_refresh):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._monitor = self._pending_refresh = None
+        async with self._lock:
+            for uid in list(self.links):
+                await self._stop_link(uid)
+        logger.info("Instrument task manager stopped")
+
+    async def refresh(self) -> None:
+        """Reconcile running links with the active instrument interfaces"""
+        links = await self.connection_service.get_links(on_message=self.on_message)
+        wanted = {str(link.uid): link for link in links}
+
+        async with self._lock:
+            for uid in list(self.links):
+                if uid not in wanted:
+                    logger.info(f"Instrument link {uid} removed")
+                    await self._stop_link(uid)
+
+            for uid, link in wanted.items():
+                current = self.links.get(uid)
+                restarts = 0
+                if current:
+                    if current.task and not current.task.done():
+                        if link_fingerprint(current.link) == link_fingerprint(link):
+                            continue
+                        logger.info(f"Instrument link {uid} settings changed")
+                    restarts = (await self._stop_link(uid)).restarts
+                self._start_link(uid, link, restarts)
+
+    async def add(self, link: SocketLink) -> None:
+        async with self._lock:
+            uid = str(link.uid)
+            if uid in self.links:
+                await self._stop_link(uid)
+            self._start_link(uid, link)
+
+    async def remove(self, uid: str) -> None:
+        async with self._lock:
+            await self._stop_link(str(uid))
+
+    async def restart(self, uid: str) -> bool:
+        async with self._lock:
+            supervised = await self._stop_link(str(uid))
+            if not supervised:
+                return False
+            self._start_link(str(uid), supervised.link, supervised.restarts + 1)
+            return True
+
+    def status(self, uid: str | None = None) -> list[dict]:
+        return [
+            _describe(_uid, supervised)
+            for _uid, supervised in self.links.items()
+            if uid is None or _uid == str(uid)
+        ]
+
+    async def on_entity_change(self, action: str, table_name: str, metadata) -> None:
+        if table_name not in INTERFACE_TABLES:
+            return
+        if self._pending_refresh and not self._pending_refresh.done():
+            return
+        self._pending_refresh = asyncio.create_task(self._debounced_refresh())
+
+    async def _debounced_refresh(self) -> None:
+        await asyncio.sleep(REFRESH_DEBOUNCE)
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Refreshing instrument links failed: {e}")
+
+    async def _reconcile(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Reconciling instrument links failed: {e}")
+
+    def _start_link(self, uid: str, link: SocketLink, restarts: int = 0) -> None:
+        supervised = SupervisedLink(link=link, restarts=restarts)
+        supervised.task = asyncio.create_task(
+            self._supervise(supervised), name=f"instrument-{uid}"
+        )
+        self.links[uid] = supervised
+
+    async def _stop_link(self, uid: str) -> Optional[SupervisedLink]:
+        supervised = self.links.pop(uid, None)
+        if not supervised:
+            return None
+        if supervised.task:
+            supervised.task.cancel()
+            await asyncio.gather(supervised.task, return_exceptions=True)
+        supervised.state = LinkState.STOPPED
+        return supervised
+
+    async def _supervise(self, supervised: SupervisedLink) -> None:
+        link = supervised.link
+        while True:
+            supervised.state = LinkState.RUNNING
+            supervised.next_start_at = None
+            started = time.monotonic()
+            try:
+                await link.start_server()
+                supervised.last_error = "link stopped"
+            except Exception as e:
+                supervised.last_error = str(e)
+                logger.exception(f"Instrument link {link.name} crashed: {e}")
+
+            # server mode swallows the cancellation, honour it here
+            if asyncio.current_task().cancelling():
+                raise asyncio.CancelledError()
+
+            supervised.last_exit_at = datetime.now()
+            if time.monotonic() - started >= STABLE_AFTER:
+                supervised.failures = 0
+            delay = backoff_delay(
+                supervised.failures, self.restart_delay, self.max_restart_delay
+            )
+            supervised.failures += 1
+            supervised.restarts += 1
+            supervised.state = LinkState.BACKOFF
+            supervised.next_start_at = datetime.fromtimestamp(time.time() + delay)
+            logger.warning(
+                f"Instrument link {link.name} exited, restarting in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+def _describe(uid: str, supervised: SupervisedLink) -> dict:
+    link = supervised.link
+    return {
+        "uid": uid,
+        "laboratory_instrument_uid": link.laboratory_instrument_uid,
+        "name": link.name,
+        "host": link.host,
+        "port": link.port,
+        "socket_type": link.socket_type,
+        "protocol_type": link.protocol_type,
+        "state": supervised.state,
+        "restarts": supervised.restarts,
+        "last_error": supervised.last_error,
+        "last_exit_at": supervised.last_exit_at,
+        "next_start_at": supervised.next_start_at,
+        "metrics": link.metrics.as_dict(),
+    }
+
+
+async def store_message(link: SocketLink, message: StreamedMessage) -> None:
+    """
+    on_message of the supervised links.
+
+    The records were parsed while they streamed in, so the message goes
+    straight through the instrument driver with transform_parsed. The raw
+    message is stored with the outcome of that first transformation attempt.
+    """
+    result = await MessageTransformer().transform_parsed(
+        message.parsed,
+        link.laboratory_instrument_uid,
+        lab_instrument_service=LaboratoryInstrumentService(),
+        instrument_service=InstrumentService(),
+    )
+    await InstrumentRawDataService().create(
+        {
+            "laboratory_instrument_uid": link.laboratory_instrument_uid,
+            "content": link.decode_message(message.raw),
+            "is_transformed": result["success"],
+            "transformation_attempts": 1,
+            "last_transformation_attempt": timenow_dt(),
+            "transformation_error": result["error"],
+        }
+    )
+    logger.info(
+        f"Instrument link {link.name}: stored message for sample "
+        f"{result['sample_id']} ({len(result['results'])} results)"
+    )
+
+
+instrument_manager = InstrumentTaskManager(on_message=store_message)
@@ -1,4 +1,4 @@
-from .client import MinioClient
+from .client import MinioClient, close_clients
 
 
-__all__ = ["MinioClient"]
+__all__ = ["MinioClient", "close_clients"]
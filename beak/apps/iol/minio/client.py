@@ -1,7 +1,12 @@
+import asyncio
 import io
 import logging
-from typing import BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import AsyncIterator, BinaryIO, Optional
 
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 
@@ -11,64 +16,203 @@ from .enum import MinioBucket
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The SDK blocks: calls run on this many shared threads, each with a pooled
+# connection
+MAX_CONNECTIONS = 16
+# Part size of multipart uploads of unknown length, and of download chunks
+PART_SIZE = 8 * 1024 * 1024
 
-class MinioClient:
-    def __init__(self):
-        self.client = Minio(
-            endpoint=settings.MINIO_SERVER,
-            access_key=settings.MINIO_ACCESS,
-            secret_key=settings.MINIO_SECRET,
-            secure=False,
+_BUCKET_EXISTS = ("BucketAlreadyOwnedByYou", "BucketAlreadyExists")
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_CONNECTIONS, thread_name_prefix="beak-minio"
         )
+    return _executor
+
+
+class _Backend:
+    """An SDK client with its connection pool and known buckets"""
+
+    def __init__(self, client: Minio):
+        self.client = client
+        self.buckets: set[str] = set()
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool(), partial(fn, *args, **kwargs))
+
+
+_backends: dict[tuple, _Backend] = {}
+
+
+def _shared_backend(endpoint: str, access_key: str, secret_key: str, secure: bool):
+    key = (endpoint, access_key, secret_key, secure)
+    if key not in _backends:
+        http_client = urllib3.PoolManager(
+            maxsize=MAX_CONNECTIONS,
+            timeout=urllib3.Timeout(connect=10, read=300),
+            retries=urllib3.Retry(
+                total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        )
+        _backends[key] = _Backend(
+            Minio(
+                endpoint=endpoint,
+                access_key=access_key,
+                secret_key=secret_key,
+                secure=secure,
+                http_client=http_client,
+            )
+        )
+    return _backends[key]
+
+
+def close_clients() -> None:
+    """Stop the worker threads of all clients, at shutdown"""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    _backends.clear()
+
 
-    def bucket_exists(self, bucket: MinioBucket):
-        return self.client.bucket_exists(bucket)
+class MinioClient:
+    """
+    Async object storage on top of the minio SDK.
+
+    Clients for the same server share one SDK client, so one urllib3
+    connection pool, and remember the buckets known to exist so uploads skip
+    the bucket_exists round trip. All clients run their calls on one thread
+    pool. Any S3 compatible
+    server can be used by passing its endpoint and credentials, or an
+    SDK-like client.
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        secure: bool = False,
+        client: Optional[Minio] = None,
+    ):
+        if client is not None:
+            self._backend = _Backend(client)
+        else:
+            self._backend = _shared_backend(
+                endpoint or settings.MINIO_SERVER,
+                access_key or settings.MINIO_ACCESS,
+                secret_key or settings.MINIO_SECRET,
+                secure,
+            )
+        self.client = self._backend.client
+
+    async def bucket_exists(self, bucket: MinioBucket) -> bool:
+        return await self._backend.run(self.client.bucket_exists, bucket)
 
-    def make_bucket(self, bucket: MinioBucket):
-        logger.info(f"minio -- add {bucket} bucket --")
-        if not self.bucket_exists(bucket):
-            self.client.make_bucket(bucket)
+    async def make_bucket(self, bucket: MinioBucket) -> None:
+        if bucket in self._backend.buckets:
+            return
+        if not await self.bucket_exists(bucket):
+            logger.info(f"minio -- add {bucket} bucket --")
+            try:
+                await self._backend.run(self.client.make_bucket, bucket)
+            except S3Error as e:
+                # created concurrently
+                if e.code not in _BUCKET_EXISTS:
+                    raise
+        self._backend.buckets.add(bucket)
 
-    def put_object(
+    async def put_object(
         self,
         bucket: MinioBucket,
         object_name: str,
-        data,
-        metadata,
+        data: bytes | BinaryIO,
+        metadata: Optional[dict] = None,
         content_type="application/pdf",
+        length: Optional[int] = None,
     ):
+        """
+        Upload bytes or a binary stream.
+
+        A stream of unknown length is sent as a multipart upload in PART_SIZE
+        parts, without reading it into memory first.
+        """
         logger.info(f"minio -- put {bucket} object --")
-        self.make_bucket(bucket)
+        await self.make_bucket(bucket)
 
-        if not isinstance(data, BinaryIO):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            length = len(data)
             data = io.BytesIO(data)
+        elif length is None:
+            length = -1
 
         try:
-            return self.client.put_object(
+            return await self._backend.run(
+                self.client.put_object,
                 bucket_name=bucket,
                 object_name=f"{object_name}",
                 data=data,
-                length=len(data.getvalue()),
+                length=length,
                 content_type=content_type,
                 metadata=metadata,
+                part_size=PART_SIZE if length == -1 else 0,
             )
         except S3Error as e:
             raise Exception(f"Failed to upload file: {str(e)}")
 
-    def get_object(self, bucket: MinioBucket, object_names: list[str]):
-        logger.info(f"minio -- get {bucket} object --")
-        objects = []
+    async def stream_object(
+        self, bucket: MinioBucket, object_name: str, chunk_size: int = PART_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Download an object chunk by chunk"""
+        run = self._backend.run
         try:
-            for obj_name in object_names:
-                obj = self.client.get_object(bucket, f"{obj_name}")
-                objects.append(obj.read())
-            return objects
+            response = await run(self.client.get_object, bucket, f"{object_name}")
         except S3Error as e:
             raise Exception(f"File not found: {str(e)}")
+        try:
+            while chunk := await run(response.read, chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
 
-    def remove_object(self, bucket: MinioBucket, object_name: str):
+    async def _read(self, bucket: MinioBucket, object_name: str) -> bytes:
+        chunks = [chunk async for chunk in self.stream_object(bucket, object_name)]
+        return b"".join(chunks)
+
+    async def get_object(
+        self, bucket: MinioBucket, object_names: list[str]
+    ) -> list[bytes]:
+        """Fetch objects concurrently, in the order named"""
+        logger.info(f"minio -- get {bucket} object --")
+        return list(
+            await asyncio.gather(*(self._read(bucket, name) for name in object_names))
+        )
+
+    async def remove_object(self, bucket: MinioBucket, object_name: str) -> None:
         logger.info(f"minio -- removing {bucket} object --")
         try:
-            self.client.remove_object(bucket, f"{object_name}")
+            await self._backend.run(self.client.remove_object, bucket, f"{object_name}")
         except S3Error as e:
             raise Exception(f"Failed to remove file: {str(e)}")
+
+    async def presigned_get_object(
+        self,
+        bucket: MinioBucket,
+        object_name: str,
+        expires: timedelta = timedelta(minutes=5),
+    ) -> str:
+        return await self._backend.run(
+            self.client.presigned_get_object,
+            bucket_name=bucket,
+            object_name=object_name,
+            expires=expires,
+        )
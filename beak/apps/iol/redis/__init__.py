@@ -1,8 +1,15 @@
-from .client import create_redis_pool, create_redis_client
+from .client import (
+    close_redis_pool,
+    create_redis_client,
+    create_redis_pool,
+    get_redis_client,
+)
 from .tracking import task_guard
 
 __all__ = [
+    "close_redis_pool",
     "create_redis_pool",
     "create_redis_client",
+    "get_redis_client",
     "task_guard",
 ]
@@ -1,16 +1,53 @@
+"""
+Redis clients
+
+get_redis_client hands out clients over one connection pool per process, so
+callers share a bounded set of connections instead of opening their own.
+The pool is created with the first client and its connections are closed by
+close_redis_pool in the app lifespan.
+"""
+
+from typing import Optional
+
 from redis import asyncio as aioredis
 
 from beak.core.config import settings
 
+_pool: Optional[aioredis.BlockingConnectionPool] = None
+
 
 def create_redis_pool():
     return aioredis.ConnectionPool.from_url(settings.REDIS_SERVER)
 
 
+def get_redis_pool() -> aioredis.ConnectionPool:
+    """The process wide connection pool"""
+    global _pool
+    if _pool is None:
+        # callers wait for a free connection rather than fail when all are busy
+        _pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_SERVER,
+            decode_responses=True,
+            max_connections=int(settings.REDIS_MAX_CONNECTIONS),
+        )
+    return _pool
+
+
+def get_redis_client() -> aioredis.Redis:
+    """A client over the shared pool, cheap to create and nothing to close"""
+    return aioredis.Redis(connection_pool=get_redis_pool())
+
+
+async def close_redis_pool() -> None:
+    """Close the connections of the shared pool, later commands reconnect"""
+    if _pool is not None:
+        await _pool.disconnect()
+
+
 async def create_redis_pool_client():
     pool = create_redis_pool()
     return aioredis.Redis.from_pool(pool)
 
 
 async def create_redis_client():
-    return aioredis.from_url(settings.REDIS_SERVER, decode_responses=True)
+    return get_redis_client()
@@ -0,0 +1,210 @@
+"""
+Sliding window rate limiting across several scopes in one Redis round trip
+
+Every limit is a sliding window counter: the count of the current fixed
+window plus the count of the previous one weighted by how much of it still
+overlaps the sliding window. All limits of a request (IP, user, lab, org,
+each per minute/hour/day) are checked and, only if none is exceeded,
+incremented together by a single Lua script, so concurrent requests cannot
+overshoot. When Redis cannot be reached the same algorithm runs in process.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# KEYS: per limit, its current window key then its previous window key
+# ARGV: now (ms), then per limit: window (ms), limit
+# Returns the 1-based index of the first exceeded limit (0 if none), then per
+# limit the requests counted in its sliding window (including this one when
+# allowed) and the ms until its current window ends.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n = #KEYS / 2
+local used = {}
+local resets = {}
+local denied = 0
+for i = 1, n do
+    local window = tonumber(ARGV[2 * i])
+    local limit = tonumber(ARGV[2 * i + 1])
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local elapsed = now % window
+    local count = math.floor(previous * (window - elapsed) / window) + current
+    if denied == 0 and count + 1 > limit then
+        denied = i
+    end
+    used[i] = count
+    resets[i] = window - elapsed
+end
+if denied == 0 then
+    for i = 1, n do
+        redis.call('INCR', KEYS[2 * i - 1])
+        redis.call('PEXPIRE', KEYS[2 * i - 1], 2 * tonumber(ARGV[2 * i]))
+        used[i] = used[i] + 1
+    end
+end
+local reply = {denied}
+for i = 1, n do
+    reply[#reply + 1] = used[i]
+    reply[#reply + 1] = resets[i]
+end
+return reply
+"""
+
+PERIODS = {"Minute": 60, "Hour": 3600, "Day": 86400}
+
+
+@dataclass(frozen=True)
+class Limit:
+    scope: str  # IP, User, Lab, Org
+    subject: str  # the ip address / uid being limited
+    period: str  # Minute, Hour, Day
+    limit: int
+
+    @property
+    def window(self) -> int:
+        return PERIODS[self.period]
+
+    def keys(self, now: float) -> tuple[str, str]:
+        index = int(now // self.window)
+        prefix = f"ratelimit:{self.scope.lower()}:{self.subject}:{self.period.lower()}"
+        return f"{prefix}:{index}", f"{prefix}:{index - 1}"
+
+
+@dataclass(frozen=True)
+class Usage:
+    limit: Limit
+    used: int
+    reset: float  # seconds until the current window ends
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit.limit - self.used)
+
+
+@dataclass(frozen=True)
+class Decision:
+    usages: list[Usage]
+    denied: Optional[Usage] = None
+
+    @property
+    def allowed(self) -> bool:
+        return self.denied is None
+
+    def headers(self) -> dict[str, str]:
+        headers = {}
+        for usage in self.usages:
+            name = f"{usage.limit.scope}-%s-{usage.limit.period}"
+            headers[f"X-RateLimit-{name % 'Limit'}"] = str(usage.limit.limit)
+            headers[f"X-RateLimit-{name % 'Remaining'}"] = str(usage.remaining)
+        if self.denied:
+            limit = self.denied.limit
+            headers["Retry-After"] = str(max(1, math.ceil(self.denied.reset)))
+            headers["X-RateLimit-Type"] = f"{limit.scope}-{limit.period}"
+        return headers
+
+
+def _script_args(limits: list[Limit], now: float) -> tuple[list[str], list[int]]:
+    keys, args = [], [int(now * 1000)]
+    for limit in limits:
+        keys.extend(limit.keys(now))
+        args.extend([limit.window * 1000, limit.limit])
+    return keys, args
+
+
+def _decide(limits: list[Limit], reply: list) -> Decision:
+    denied, counts = int(reply[0]), reply[1:]
+    usages = [
+        Usage(limit=limit, used=int(counts[2 * i]), reset=int(counts[2 * i + 1]) / 1000)
+        for i, limit in enumerate(limits)
+    ]
+    return Decision(usages=usages, denied=usages[denied - 1] if denied else None)
+
+
+class LocalRateLimiter:
+    """The sliding window script, per process: the fallback without Redis"""
+
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+
+    def hit(self, limits: list[Limit], now: Optional[float] = None) -> Decision:
+        now = time.time() if now is None else now
+        keys, args = _script_args(limits, now)
+
+        denied, used, resets = 0, [], []
+        for i, limit in enumerate(limits):
+            window = args[2 * i + 1]
+            elapsed = args[0] % window
+            current = self._counts.get(keys[2 * i], 0)
+            previous = self._counts.get(keys[2 * i + 1], 0)
+            count = previous * (window - elapsed) // window + current
+            if not denied and count + 1 > limit.limit:
+                denied = i + 1
+            used.append(count)
+            resets.append(window - elapsed)
+        if not denied:
+            for i in range(len(limits)):
+                self._counts[keys[2 * i]] = self._counts.get(keys[2 * i], 0) + 1
+                used[i] += 1
+            self._expire(now)
+
+        reply = [denied]
+        for count, reset in zip(used, resets):
+            reply.extend([count, reset])
+        return _decide(limits, reply)
+
+    def _expire(self, now: float) -> None:
+        if len(self._counts) < 10_000:
+            return
+        # drop windows older than the previous one
+        for key in list(self._counts):
+            period = key.split(":")[-2].capitalize()
+            if int(key.rsplit(":", 1)[1]) < now // PERIODS[period] - 1:
+                del self._counts[key]
+
+
+class RateLimiter:
+    """
+    Checks and counts a request against all its limits atomically.
+
+    Uses the Lua script on Redis when a client is given, falling back to a
+    process local LocalRateLimiter while Redis errors.
+    """
+
+    def __init__(self, redis_client: Optional[Redis] = None):
+        self.redis_client = redis_client
+        self.local = LocalRateLimiter()
+        self._script = None
+        if redis_client is not None:
+            self._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._degraded = False
+
+    async def hit(self, limits: list[Limit]) -> Decision:
+        if not limits:
+            return Decision(usages=[])
+        if self._script is None:
+            return self.local.hit(limits)
+
+        now = time.time()
+        keys, args = _script_args(limits, now)
+        try:
+            reply = await self._script(keys=keys, args=args)
+        except (RedisError, OSError) as e:
+            if not self._degraded:
+                logger.warning(f"Rate limiting locally, Redis unavailable: {e}")
+                self._degraded = True
+            return self.local.hit(limits, now)
+
+        if self._degraded:
+            logger.info("Rate limiting on Redis again")
+            self._degraded = False
+        return _decide(limits, reply)
@@ -1,9 +1,11 @@
 import json
+import time
+from typing import Dict, Iterable, Optional
 
 from beak.apps.common.channel import broadcast
 from beak.apps.notification.enum import NotificationChannel
 from beak.core.config import settings
-from .client import create_redis_client
+from .client import get_redis_client
 
 
 class TaskGuard:
@@ -14,53 +16,72 @@ class TaskGuard:
     Note: Easiest implementation is by using Job service.
     Reason is that all bg tasks go through job - samples, worksheets :)
     However for minute objects like Result actions we might action on the specific implementations :)
+
+    Guards expire after ttl seconds (TASK_GUARD_TTL), a job that crashed
+    before releasing its objects does not keep them locked. Guarding an
+    object again restarts its ttl: jobs guard their objects again when they
+    start, however long they waited in the queue. The *_many methods guard
+    or release many objects in one Redis round trip.
     """
 
-    def __init__(self):
-        self._store = {}
+    key_prefix = "task-guard:"
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl
+        # uid -> (object_type, expires at)
+        self._store: Dict[str, tuple[str, float]] = {}
 
     @property
     def _has_redis(self):
         return bool(settings.REDIS_SERVER)
 
+    @property
+    def _ttl(self) -> int:
+        return int(self.ttl or settings.TASK_GUARD_TTL)
+
     @staticmethod
-    async def connect():
-        return await create_redis_client()
+    def connect():
+        return get_redis_client()
+
+    def _key(self, uid: str) -> str:
+        return f"{self.key_prefix}{uid}"
 
     async def process(self, uid: str, object_type: str):
+        await self.process_many([uid], object_type)
+
+    async def release(self, uid: str, object_type: str):
+        await self.release_many([uid], object_type)
+
+    async def process_many(self, uids: Iterable[str], object_type: str):
+        uids = list(dict.fromkeys(uids))
+        if not uids:
+            return
         if self._has_redis:
-            redis = await self.connect()
-            await redis.hset(
-                f"{uid}", "status", "processing"
-            )  # Updated for hset instead of hmset
+            async with self.connect().pipeline(transaction=False) as pipe:
+                for uid in uids:
+                    pipe.set(self._key(uid), str(object_type), ex=self._ttl)
+                await pipe.execute()
         else:
-            self._store[uid] = {"status": "processing"}
+            expires_at = time.monotonic() + self._ttl
+            for uid in uids:
+                self._store[uid] = (str(object_type), expires_at)
 
-        await broadcast.publish(
-            NotificationChannel.PROCESSING,
-            json.dumps(
-                {"uid": uid, "object_type": object_type, "status": "processing"}
-            ),
-        )
+        await self._publish(uids, object_type, "processing")
 
-    async def release(self, uid: str, object_type: str):
+    async def release_many(self, uids: Iterable[str], object_type: str):
+        uids = list(dict.fromkeys(uids))
+        if not uids:
+            return
         if self._has_redis:
-            redis = await self.connect()
-            await redis.delete(uid)
+            await self.connect().delete(*[self._key(uid) for uid in uids])
         else:
-            self._store.pop(uid, None)
+            for uid in uids:
+                self._store.pop(uid, None)
 
-        await broadcast.publish(
-            NotificationChannel.PROCESSING,
-            json.dumps({"uid": uid, "object_type": object_type, "status": "released"}),
-        )
+        await self._publish(uids, object_type, "released")
 
     async def is_processing(self, uid: str, object_type: str):
-        if self._has_redis:
-            redis = await self.connect()
-            exists = await redis.exists(uid)
-        else:
-            exists = uid in self._store
+        exists = (await self.remaining([uid]))[uid] is not None
 
         await broadcast.publish(
             NotificationChannel.PROCESSING,
@@ -70,5 +91,53 @@ class TaskGuard:
         )
         return exists
 
+    async def remaining(self, uids: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Seconds until the guard of each uid expires, None if not guarded"""
+        uids = list(dict.fromkeys(uids))
+        if not uids:
+            return {}
+        if self._has_redis:
+            async with self.connect().pipeline(transaction=False) as pipe:
+                for uid in uids:
+                    pipe.ttl(self._key(uid))
+                ttls = await pipe.execute()
+            # -2: no such key
+            return {uid: ttl if ttl != -2 else None for uid, ttl in zip(uids, ttls)}
+
+        now = time.monotonic()
+        remaining = {}
+        for uid in uids:
+            _, expires_at = self._store.get(uid, (None, 0.0))
+            if expires_at <= now:
+                self._store.pop(uid, None)
+                remaining[uid] = None
+            else:
+                remaining[uid] = int(expires_at - now)
+        return remaining
+
+    async def clear_legacy(self) -> int:
+        """
+        Delete the guards left by releases before key_prefix: hashes of
+        {"status": "processing"} under the bare uid, that never expire.
+        Returns how many were deleted.
+        """
+        if not self._has_redis:
+            return 0
+        redis = self.connect()
+        deleted = 0
+        async for key in redis.scan_iter(count=1000, _type="HASH"):
+            if key.startswith(self.key_prefix) or await redis.ttl(key) != -1:
+                continue
+            if await redis.hgetall(key) == {"status": "processing"}:
+                deleted += await redis.delete(key)
+        return deleted
+
+    async def _publish(self, uids: list[str], object_type: str, status: str):
+        for uid in uids:
+            await broadcast.publish(
+                NotificationChannel.PROCESSING,
+                json.dumps({"uid": uid, "object_type": object_type, "status": status}),
+            )
+
 
 task_guard = TaskGuard()
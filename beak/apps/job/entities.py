@@ -18,6 +18,9 @@ class Job(BaseEntity):
     reason = Column(String)
     next_try = Column(DateTime, nullable=True)
     retries = Column(Integer, default=1)
+    # set while a worker is executing the job, see JobRepository.claim
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
 
     @property
     def is_ready_for_execution(self):
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from beak.apps.job.enum import JobCategory, JobPriority, JobState
+from beak.apps.job.repository import JobRepository
+from beak.database.session import async_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# postgres channel the job table trigger notifies on (payload: job category)
+JOB_CHANNEL = "beak_jobs"
+
+JobHandler = Callable[[str], Awaitable[None]]
+DispatchTable = dict[str, dict[str, JobHandler]]
+
+
+@dataclass
+class Lane:
+    """Concurrency budget of a job category.
+
+    slots run jobs of any priority, highest first; reserved slots only run
+    HIGH priority jobs so urgent work never queues behind a long report.
+    """
+
+    slots: int = 1
+    reserved: int = 1
+
+
+DEFAULT_LANES: dict[str, Lane] = {
+    JobCategory.RESULT: Lane(slots=4, reserved=1),
+    JobCategory.WORKSHEET: Lane(slots=2, reserved=1),
+    JobCategory.SHIPMENT: Lane(slots=2, reserved=1),
+    JobCategory.IMPRESS: Lane(slots=2, reserved=1),
+    JobCategory.REPORT: Lane(slots=1, reserved=1),
+    JobCategory.BILLING: Lane(slots=1, reserved=1),
+}
+
+
+class JobExecutor:
+    """
+    Drains the job table concurrently.
+
+    Jobs are claimed per category with FOR UPDATE SKIP LOCKED, so any number
+    of executors (one per api replica) can share the queue. The executor
+    wakes on NOTIFY from the job table and falls back to polling every
+    poll_interval seconds for scheduled retries or when LISTEN is unavailable.
+    """
+
+    def __init__(
+        self,
+        dispatch: DispatchTable,
+        lanes: dict[str, Lane] | None = None,
+        poll_interval: float = 10,
+    ):
+        self.dispatch = dispatch
+        self.lanes = {
+            category: (lanes or DEFAULT_LANES).get(category, Lane())
+            for category in dispatch
+        }
+        self.poll_interval = poll_interval
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.repository = JobRepository()
+
+        self._running: dict[tuple[str, bool], int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+        self._listener = None
+
+    async def start(self) -> None:
+        await self._listen()
+        self._loop_task = asyncio.create_task(self._loop(), name="beak-jobs")
+        logger.info(f"Job executor {self.worker} started")
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        # let in-flight jobs finish, their claims are released as they do
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._unlisten()
+        logger.info(f"Job executor {self.worker} stopped")
+
+    def wake(self, *_) -> None:
+        self._wakeup.set()
+
+    async def _listen(self) -> None:
+        try:
+            connection = await async_engine.connect()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.add_listener(JOB_CHANNEL, self.wake)
+            self._listener = connection
+        except Exception as e:
+            logger.warning(f"LISTEN {JOB_CHANNEL} unavailable, polling only: {e}")
+
+    async def _unlisten(self) -> None:
+        if not self._listener:
+            return
+        try:
+            raw = await self._listener.get_raw_connection()
+            await raw.driver_connection.remove_listener(JOB_CHANNEL, self.wake)
+        finally:
+            await self._listener.close()
+            self._listener = None
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._fill()
+            except Exception as e:
+                logger.exception(f"Claiming jobs failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fill(self) -> None:
+        for category, lane in self.lanes.items():
+            for reserved, capacity, min_priority in (
+                (True, lane.reserved, JobPriority.HIGH),
+                (False, lane.slots, None),
+            ):
+                free = capacity - self._running.get((category, reserved), 0)
+                if free <= 0:
+                    continue
+                claimed = await self.repository.claim(
+                    category, self.worker, limit=free, min_priority=min_priority
+                )
+                for uid, action in claimed:
+                    self._spawn(category, reserved, uid, action)
+
+    def _spawn(self, category: str, reserved: bool, uid: str, action: str) -> None:
+        key = (category, reserved)
+        self._running[key] = self._running.get(key, 0) + 1
+        task = asyncio.create_task(self._run(key, uid, action), name=f"job-{uid}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: tuple[str, bool], uid: str, action: str) -> None:
+        category, _ = key
+        handler = self.dispatch.get(category, {}).get(action)
+        try:
+            if handler is None:
+                logger.warning(f"Unknown job action: {action}")
+                await self.repository.update(
+                    uid,
+                    status=JobState.FAILED,
+                    reason=f"Unknown job action: {action}",
+                )
+            else:
+                logger.info(f"Running Task: {action} ({uid})")
+                await handler(uid)
+        except Exception as e:
+            logger.exception(f"Job {uid} ({action}) failed: {e}")
+        finally:
+            try:
+                await self.repository.release(uid, self.worker)
+            except Exception as e:
+                logger.exception(f"Releasing job {uid} failed: {e}")
+            self._running[key] -= 1
+            # a slot just freed up
+            self.wake()
@@ -1,5 +1,11 @@
+from datetime import timedelta
+
+from sqlalchemy import and_, case, or_, select, update
+
 from beak.apps.abstract.repository import BaseRepository
 from beak.apps.job.entities import Job
+from beak.apps.job.enum import JobState
+from beak.core.dtz import timenow_dt
 
 
 class JobRepository(BaseRepository[Job]):
@@ -15,3 +21,126 @@ class JobRepository(BaseRepository[Job]):
             results = await session.execute(stmt)
             jobs = results.scalars().all()
         return list(filter(lambda job: job.is_ready_for_execution, jobs))
+
+    async def claim(
+        self,
+        category: str,
+        worker: str,
+        limit: int,
+        min_priority: int | None = None,
+        lease: timedelta = timedelta(minutes=30),
+    ) -> list[tuple[str, str]]:
+        """
+        Claim up to limit runnable jobs of a category for a worker.
+
+        Candidate rows are locked with FOR UPDATE SKIP LOCKED so concurrent
+        workers (e.g. several api replicas) never claim the same job. Claims
+        older than lease are considered abandoned and can be taken over.
+
+        :param category: The job category to claim from.
+        :param worker: Identifier of the claiming worker.
+        :param limit: Maximum number of jobs to claim.
+        :param min_priority: Only claim jobs with at least this priority.
+        :param lease: How long a claim is honoured.
+        :return: The claimed (uid, action) pairs, highest priority first.
+        """
+        now = timenow_dt()
+        job = Job.__table__
+        candidates = (
+            select(job.c.uid)
+            .where(
+                job.c.category == category,
+                job.c.status == JobState.PENDING,
+                or_(job.c.next_try.is_(None), job.c.next_try <= now),
+                or_(job.c.claimed_by.is_(None), job.c.claimed_at < now - lease),
+            )
+            .order_by(job.c.priority.desc().nulls_last(), job.c.uid)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if min_priority is not None:
+            candidates = candidates.where(job.c.priority >= min_priority)
+
+        stmt = (
+            update(job)
+            .where(job.c.uid.in_(candidates.scalar_subquery()))
+            .values(claimed_by=worker, claimed_at=now)
+            .returning(job.c.uid, job.c.action, job.c.priority)
+        )
+        async with self.async_session() as session:
+            results = await session.execute(stmt)
+            claimed = results.all()
+            await self._commit_or_fail(session)
+
+        claimed.sort(key=lambda row: (-(row.priority or 0), row.uid))
+        return [(row.uid, row.action) for row in claimed]
+
+    async def claim_one(
+        self, uid: str, worker: str, lease: timedelta = timedelta(minutes=30)
+    ) -> bool:
+        """
+        Claim a given pending job for a worker, e.g. to run it inline.
+
+        The claim is a single conditional UPDATE, so of an inline runner and
+        the job executors racing for the same job exactly one wins.
+
+        :param uid: The job uid.
+        :param worker: Identifier of the claiming worker.
+        :param lease: How long a claim is honoured.
+        :return: Whether the job was claimed.
+        """
+        now = timenow_dt()
+        job = Job.__table__
+        stmt = (
+            update(job)
+            .where(
+                job.c.uid == uid,
+                job.c.status == JobState.PENDING,
+                or_(job.c.claimed_by.is_(None), job.c.claimed_at < now - lease),
+            )
+            .values(claimed_by=worker, claimed_at=now)
+            .returning(job.c.uid)
+        )
+        async with self.async_session() as session:
+            results = await session.execute(stmt)
+            claimed = results.first() is not None
+            await self._commit_or_fail(session)
+        return claimed
+
+    async def release(
+        self, uid: str, worker: str, retry_delay: timedelta = timedelta(seconds=10)
+    ) -> None:
+        """
+        Release a worker's claim on a job.
+
+        A job that is still pending and not scheduled for later (the task
+        returned without finishing or backing it off) is delayed by retry_delay
+        so it is not picked straight back up.
+
+        :param uid: The job uid.
+        :param worker: Identifier of the worker holding the claim.
+        :param retry_delay: Delay applied to jobs left pending.
+        """
+        now = timenow_dt()
+        job = Job.__table__
+        stmt = (
+            update(job)
+            .where(job.c.uid == uid, job.c.claimed_by == worker)
+            .values(
+                claimed_by=None,
+                claimed_at=None,
+                next_try=case(
+                    (
+                        and_(
+                            job.c.status == JobState.PENDING,
+                            or_(job.c.next_try.is_(None), job.c.next_try <= now),
+                        ),
+                        now + retry_delay,
+                    ),
+                    else_=job.c.next_try,
+                ),
+            )
+        )
+        async with self.async_session() as session:
+            await session.execute(stmt)
+            await self._commit_or_fail(session)
@@ -1,18 +1,20 @@
 import logging
+from datetime import datetime
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from beak.apps.analysis.tasks import submit_results, verify_results
+from beak.apps.analytics.rollup import rollup_writer
 from beak.apps.analytics.tasks import generate_report
 from beak.apps.impress.sample.tasks import (
     impress_results,
     prepare_for_impress,
     cleanup_jobs,
 )
-from beak.apps.iol.analyzer.services.connection import ConnectionService
+from beak.apps.iol.analyzer.tasks import instrument_manager
 from beak.apps.job.enum import JobAction, JobCategory
-from beak.apps.job.services import JobService
+from beak.apps.job.executor import JobExecutor
 from beak.apps.shipment.tasks import (
     dispatch_shipment,
     populate_shipment_manually,
@@ -24,6 +26,7 @@ from beak.apps.worksheet.tasks import (
     populate_worksheet_plate,
     populate_worksheet_plate_manually,
 )
+from beak.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,55 +38,38 @@ log.setLevel(logging.WARNING)
 scheduler = AsyncIOScheduler()
 
 
-async def run_jobs_if_exists():
-    async def unknown_action(action):
-        logging.warning(f"Unknown job action: {action}")
+JOB_DISPATCH_TABLE = {
+    JobCategory.WORKSHEET: {
+        JobAction.WORKSHEET_ASSIGN: populate_worksheet_plate,
+        JobAction.WORKSHEET_MANUAL_ASSIGN: populate_worksheet_plate_manually,
+    },
+    JobCategory.REPORT: {
+        JobAction.GENERATE_REPORT: generate_report,
+    },
+    JobCategory.IMPRESS: {
+        JobAction.IMPRESS_REPORT: impress_results,
+    },
+    JobCategory.RESULT: {
+        JobAction.RESULT_SUBMIT: submit_results,
+        JobAction.RESULT_APPROVE: verify_results,
+    },
+    JobCategory.SHIPMENT: {
+        JobAction.SHIPMENT_MANUAL_ASSIGN: populate_shipment_manually,
+        JobAction.SHIPMENT_DISPATCH: dispatch_shipment,
+        JobAction.SHIPMENT_RECEIVE: shipment_receive,
+        JobAction.SHIPPED_REPORT: return_shipped_report,
+        JobAction.DIAGNOSTIC_REPORT: process_shipped_report,
+    },
+}
 
-    jobs = await JobService().fetch_sorted()
-
-    # logging.info(f"There are {len(jobs)} Jobs pending running.")
-
-    if len(jobs) == 0:
-        # beak_pause_workforce()
-        pass
-    else:
-        job_dispatch_table = {
-            JobCategory.WORKSHEET: {
-                JobAction.WORKSHEET_ASSIGN: populate_worksheet_plate,
-                JobAction.WORKSHEET_MANUAL_ASSIGN: populate_worksheet_plate_manually,
-            },
-            JobCategory.REPORT: {
-                JobAction.GENERATE_REPORT: generate_report,
-            },
-            JobCategory.IMPRESS: {
-                JobAction.IMPRESS_REPORT: impress_results,
-            },
-            JobCategory.RESULT: {
-                JobAction.RESULT_SUBMIT: submit_results,
-                JobAction.RESULT_APPROVE: verify_results,
-            },
-            JobCategory.SHIPMENT: {
-                JobAction.SHIPMENT_MANUAL_ASSIGN: populate_shipment_manually,
-                JobAction.SHIPMENT_DISPATCH: dispatch_shipment,
-                JobAction.SHIPMENT_RECEIVE: shipment_receive,
-                JobAction.SHIPPED_REPORT: return_shipped_report,
-                JobAction.DIAGNOSTIC_REPORT: process_shipped_report,
-            },
-        }
-
-        for job in jobs:
-            action_function = job_dispatch_table.get(job.category, {}).get(
-                job.action, unknown_action
-            )
-            logging.warning(f"Running Task: {job.action}")
-            await action_function(job.uid)
+job_executor = JobExecutor(
+    JOB_DISPATCH_TABLE, poll_interval=settings.JOB_POLL_INTERVAL
+)
 
 
 async def beak_workforce_init():
     logging.info("Initialising beak workforce ...")
-    scheduler.add_job(
-        func=run_jobs_if_exists, trigger=IntervalTrigger(seconds=10), id="beak_wf"
-    )
+    await job_executor.start()
     scheduler.add_job(
         func=prepare_for_impress,
         trigger=IntervalTrigger(seconds=60 * 60),
@@ -95,17 +81,24 @@ async def beak_workforce_init():
         id="beak_jobs_clean",
     )
 
-    # Instrument connections
-    conn_service = ConnectionService()
-    connections = await conn_service.get_links()
-    for _conn in connections:
-        # Each instrument gets its own persistent job that runs forever
-        scheduler.add_job(
-            _conn.start_server,
-            args=[_conn],
-            id=f"instrument_{_conn.uid}",
-            replace_existing=True,
-        )
+    # Dashboard rollups: backfill now, then reconcile daily
+    await rollup_writer.start()
+    scheduler.add_job(
+        func=rollup_writer.rebuild,
+        trigger=IntervalTrigger(seconds=60 * 60 * 24),
+        next_run_time=datetime.now(),
+        id="beak_rollups",
+    )
+
+    # Instrument connections, supervised and restarted on failure
+    await instrument_manager.start()
 
     # Start scheduler
     scheduler.start()
+
+
+async def beak_workforce_shutdown():
+    logging.info("Stopping beak workforce ...")
+    await job_executor.stop()
+    await instrument_manager.stop()
+    await rollup_writer.stop()
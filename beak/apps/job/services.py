@@ -1,4 +1,7 @@
+import os
+import socket
 from datetime import timedelta
+from typing import Awaitable, Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -22,9 +25,10 @@ class JobService(BaseService[Job, JobCreate, JobUpdate]):
         commit: bool = True,
         session: AsyncSession | None = None,
     ):
-        # By default, auto delay by a minute to execute any job
-        # labs which don't need background processing can execute jobs instantly without waiting
-        next_try = timenow_dt() + timedelta(minutes=1)
+        # Runnable straight away: the job executor is woken by the insert
+        # (LISTEN/NOTIFY) and claims the job once this transaction commits.
+        # Callers running the job themselves must go through run_inline.
+        next_try = timenow_dt()
         if isinstance(c, dict):
             c["next_try"] = next_try
         else:
@@ -32,6 +36,24 @@ class JobService(BaseService[Job, JobCreate, JobUpdate]):
 
         return await super().create(c, related, commit, session)
 
+    async def run_inline(
+        self, uid: str, handler: Callable[[str], Awaitable[None]]
+    ) -> bool:
+        """
+        Run a job in the calling request when background processing is off.
+
+        The job is claimed first like the job executor does, so the two never
+        both run it. Returns False if the executor got to it first.
+        """
+        worker = f"inline:{socket.gethostname()}:{os.getpid()}"
+        if not await self.repository.claim_one(uid, worker):
+            return False
+        try:
+            await handler(uid)
+        finally:
+            await self.repository.release(uid, worker)
+        return True
+
     async def backoff(self, uid: str, minutes: int = 5, max_retries: int = 5):
         job = await self.get(uid=uid)
         bck = minutes * job.retries
@@ -64,6 +86,12 @@ class JobService(BaseService[Job, JobCreate, JobUpdate]):
         job.reason = change_reason
         await self.save(job)
 
+    async def set_progress(self, uid: str, **progress):
+        """Record progress of a running job under data["progress"]"""
+        job = await self.get(uid=uid)
+        job.data = {**(job.data or {}), "progress": progress}
+        await self.save(job)
+
     async def increase_priority(self, uid: str):
         job = await self.get(uid=uid)
         if job.priority < JobPriority.HIGH:
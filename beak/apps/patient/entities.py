@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, relationship
@@ -47,7 +49,7 @@ class Patient(LabScopedEntity):
     gender = Column(String, nullable=False)  # Keep unencrypted for analytics
     age = Column(Integer, nullable=True)
     # HIPAA: Encrypt date of birth as it's PII that can identify individuals
-    date_of_birth = Column(EncryptedPII(500), nullable=True)
+    date_of_birth = Column(EncryptedPII(500, value_type=datetime), nullable=True)
     age_dob_estimated = Column(Boolean(), default=False)
     # Contact - HIPAA: Encrypt contact information
     phone_mobile = Column(EncryptedPII(500), nullable=True)
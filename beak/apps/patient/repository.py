@@ -1,5 +1,6 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from beak.apps.abstract.repository import BaseRepository
@@ -10,6 +11,39 @@ from beak.apps.patient.entities import (
 )
 from beak.utils.encryption import encrypt_pii
 
+# Most patients an index search returns, best matches first
+SEARCH_LIMIT = 100
+# Patients decrypted per query by the substring scan
+SCAN_BATCH_SIZE = 500
+# Most patients the substring scan reads per call before handing back a cursor
+SCAN_MAX_ROWS = 5000
+
+
+def _digits(value: str) -> str:
+    return "".join(filter(str.isdigit, value))
+
+
+def _row_matches(row, terms: dict, match_any: bool) -> bool:
+    """Whether the decrypted values of a row contain the search terms"""
+    found = []
+    for field, term in terms.items():
+        value = getattr(row, field)
+        if not value:
+            # a patient without the value is not excluded by it
+            found.append(None)
+            continue
+        if field == "phone_mobile":
+            digits = _digits(term)
+            found.append(digits in _digits(value) if digits else None)
+        elif field == "date_of_birth":
+            value = value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else value
+            found.append(term in str(value))
+        else:
+            found.append(term.lower() in value.lower())
+    if match_any:
+        return any(found)
+    return all(f is not False for f in found)
+
 
 class PatientRepository(BaseRepository[Patient]):
     def __init__(self) -> None:
@@ -22,15 +56,17 @@ class PatientRepository(BaseRepository[Patient]):
         email: Optional[str] = None,
         phone_mobile: Optional[str] = None,
         date_of_birth: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
         session: Optional[AsyncSession] = None,
     ) -> List[Patient]:
         """
         HIPAA-compliant search for patients using encrypted fields.
 
-        Since encrypted fields cannot be directly searched in the database,
-        this method retrieves all patients and performs decryption and
-        filtering in application memory. For production use, consider
-        implementing searchable encryption or maintaining encrypted search indices.
+        Answered from the searchable encryption indices, so the cost does not
+        grow with the number of patients: names and emails match exactly or
+        on their first 3 to 5 characters, phone numbers in full or on their
+        last four digits, dates of birth exactly. For a match anywhere inside
+        a value use scan_encrypted_fields.
 
         Args:
             first_name: First name to search for
@@ -38,57 +74,103 @@ class PatientRepository(BaseRepository[Patient]):
             email: Email to search for
             phone_mobile: Mobile phone to search for
             date_of_birth: Date of birth to search for (format: YYYY-MM-DD)
+            limit: Maximum number of patients returned, best matches first
             session: Optional database session
 
         Returns:
-            List of matching patients
+            List of matching active patients
         """
-        # Get all active patients (or implement pagination for large datasets)
-        all_patients = await self.get_all(active=True, session=session)
-
-        matching_patients = []
-
-        for patient in all_patients:
-            match = True
-
-            # Check first name match
-            if first_name and patient.first_name:
-                if first_name.lower() not in patient.first_name.lower():
-                    match = False
-
-            # Check last name match
-            if last_name and patient.last_name:
-                if last_name.lower() not in patient.last_name.lower():
-                    match = False
-
-            # Check email match
-            if email and patient.email:
-                if email.lower() not in patient.email.lower():
-                    match = False
-
-            # Check phone match
-            if phone_mobile and patient.phone_mobile:
-                # Remove formatting for phone comparison
-                search_phone = "".join(filter(str.isdigit, phone_mobile))
-                patient_phone = "".join(filter(str.isdigit, patient.phone_mobile))
-                if search_phone not in patient_phone:
-                    match = False
-
-            # Check date of birth match
-            if date_of_birth and patient.date_of_birth:
-                # Convert datetime to string for comparison if needed
-                patient_dob_str = (
-                    patient.date_of_birth.strftime("%Y-%m-%d")
-                    if hasattr(patient.date_of_birth, "strftime")
-                    else str(patient.date_of_birth)
-                )
-                if date_of_birth not in patient_dob_str:
-                    match = False
-
-            if match:
-                matching_patients.append(patient)
-
-        return matching_patients
+        patients = await self.search_by_encrypted_indices(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone_mobile=phone_mobile,
+            date_of_birth=date_of_birth,
+            limit=limit,
+            session=session,
+        )
+        return [patient for patient in patients if patient.active]
+
+    async def scan_encrypted_fields(
+        self,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        phone_mobile: Optional[str] = None,
+        date_of_birth: Optional[str] = None,
+        match_any: bool = False,
+        after_uid: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
+        max_rows: int = SCAN_MAX_ROWS,
+        batch_size: int = SCAN_BATCH_SIZE,
+    ) -> Tuple[List[Patient], Optional[str]]:
+        """
+        Find active patients with a value containing the search terms.
+
+        The substring search the indices cannot answer: patients are read in
+        uid order batch_size at a time, decrypting only the searched columns.
+        Costs a scan of the table, so a call stops at limit matches or after
+        reading max_rows patients, whichever comes first, and returns the uid
+        to resume from (after_uid) with the next call.
+
+        Args:
+            first_name: Text to find in the first name
+            last_name: Text to find in the last name
+            email: Text to find in the email
+            phone_mobile: Digits to find in the mobile phone number
+            date_of_birth: Text to find in the date of birth (YYYY-MM-DD)
+            match_any: Match patients with any term found, rather than all
+            after_uid: Start after this patient uid
+            limit: Maximum number of patients returned
+            max_rows: Maximum number of patients read
+            batch_size: Patients decrypted per query
+
+        Returns:
+            Matching patients in uid order, and the uid to resume after
+            (None once every patient has been read)
+        """
+        terms = {
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "phone_mobile": phone_mobile,
+            "date_of_birth": date_of_birth,
+        }
+        terms = {field: term for field, term in terms.items() if term}
+        if not terms:
+            return [], None
+
+        columns = [self.model.uid] + [getattr(self.model, field) for field in terms]
+        found: List[Patient] = []
+        scanned = 0
+        while scanned < max_rows:
+            size = min(batch_size, max_rows - scanned)
+            stmt = select(*columns).where(self.model.active.is_(True))
+            if after_uid:
+                stmt = stmt.where(self.model.uid > after_uid)
+            stmt = stmt.order_by(self.model.uid).limit(size)
+            stmt = self._apply_lab_filter(stmt)
+            async with self.async_session() as session:
+                rows = (await session.execute(stmt)).all()
+            scanned += len(rows)
+
+            matched = [
+                row.uid for row in rows if _row_matches(row, terms, match_any)
+            ]
+            if len(found) + len(matched) >= limit:
+                # a full page: resume right after its last patient
+                matched = matched[: limit - len(found)]
+                found += await self._sorted_by_uid(matched)
+                return found, matched[-1]
+            if matched:
+                found += await self._sorted_by_uid(matched)
+            if len(rows) < size:
+                return found, None
+            after_uid = rows[-1].uid
+        return found, after_uid
+
+    async def _sorted_by_uid(self, uids: List[str]) -> List[Patient]:
+        return sorted(await self.get_by_uids(uids), key=lambda p: p.uid)
 
     async def find_by_exact_encrypted_field(
         self, field_name: str, value: str, session: Optional[AsyncSession] = None
@@ -123,6 +205,7 @@ class PatientRepository(BaseRepository[Patient]):
         fuzzy_match: bool = False,
         session: Optional[AsyncSession] = None,
         return_uids=False,
+        limit: Optional[int] = None,
     ) -> List[Patient | str]:
         """
         High-performance HIPAA-compliant search using searchable encryption indices.
@@ -139,6 +222,7 @@ class PatientRepository(BaseRepository[Patient]):
             date_of_birth: Date of birth to search for (format: YYYY-MM-DD)
             fuzzy_match: Enable phonetic/fuzzy matching
             session: Optional database session
+            limit: Maximum number of matches, best first
 
         Returns:
             List of matching patients
@@ -153,35 +237,37 @@ class PatientRepository(BaseRepository[Patient]):
 
             search_service = SearchableEncryptionService()
 
-            # Get patient UIDs using searchable indices
-            matching_uids = await search_service.search_by_indices(
+            # Get ranked patient UIDs using searchable indices (single query)
+            ranked = await search_service.search_ranked(
                 first_name=first_name,
                 last_name=last_name,
                 email=email,
                 phone=phone_mobile,
                 date_of_birth=date_of_birth,
                 fuzzy_match=fuzzy_match,
+                limit=limit,
                 session=session,
             )
 
-            if not matching_uids:
+            if not ranked:
                 return []
 
             # Retrieve patients by UIDs (much more efficient than loading all)
+            matching_uids = [patient_uid for patient_uid, _ in ranked]
             if return_uids:
-                return list(matching_uids)
-            return await self.get_by_uids(list(matching_uids), session=session)
+                return matching_uids
+            patients = await self.get_by_uids(matching_uids, session=session)
+            # get_by_uids orders by uid, restore the match ranking
+            rank = {patient_uid: i for i, patient_uid in enumerate(matching_uids)}
+            return sorted(patients, key=lambda p: rank[p.uid])
 
-        except Exception:
-            # Fallback to memory-based search if indices are not available
-            return await self.search_by_encrypted_fields(
-                first_name=first_name,
-                last_name=last_name,
-                email=email,
-                phone_mobile=phone_mobile,
-                date_of_birth=date_of_birth,
-                session=session,
-            )
+        except Exception as e:
+            # No decrypting scan of every patient behind the caller's back,
+            # scan_encrypted_fields is there for explicit substring searches
+            from beak.utils.exception_logger import log_exception
+
+            log_exception(e)
+            return []
 
     async def create_search_indices(
         self, patient: Patient, session: Optional[AsyncSession] = None
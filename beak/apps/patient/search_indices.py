@@ -45,13 +45,39 @@ class PatientSearchIndex(BaseEntity):
     # Metadata for search optimization
     value_length = Column(String, nullable=True)  # Encrypted length for range queries
 
-    # Create composite indices for efficient searching
+    # Create composite indices for efficient searching, covering patient_uid
+    # so ranked searches are answered from the index alone
     __table_args__ = (
-        Index("idx_patient_field_hash", "field_name", "search_hash"),
-        Index("idx_patient_partial_3", "field_name", "partial_hash_3"),
-        Index("idx_patient_partial_4", "field_name", "partial_hash_4"),
-        Index("idx_patient_partial_5", "field_name", "partial_hash_5"),
-        Index("idx_patient_phonetic", "field_name", "phonetic_hash"),
+        Index(
+            "idx_patient_field_hash",
+            "field_name",
+            "search_hash",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_patient_partial_3",
+            "field_name",
+            "partial_hash_3",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_patient_partial_4",
+            "field_name",
+            "partial_hash_4",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_patient_partial_5",
+            "field_name",
+            "partial_hash_5",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_patient_phonetic",
+            "field_name",
+            "phonetic_hash",
+            postgresql_include=["patient_uid"],
+        ),
     )
 
 
@@ -81,11 +107,27 @@ class PhoneSearchIndex(BaseEntity):
     # Area code hash for regional searches
     area_code_hash = Column(String, nullable=True, index=True)
 
-    # Create composite indices
+    # Create composite indices, hash first since phone searches span all
+    # phone fields, covering patient_uid for index-only lookups
     __table_args__ = (
-        Index("idx_phone_normalized", "field_name", "normalized_hash"),
-        Index("idx_phone_last_four", "field_name", "last_four_hash"),
-        Index("idx_phone_area_code", "field_name", "area_code_hash"),
+        Index(
+            "idx_phone_normalized",
+            "normalized_hash",
+            "field_name",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_phone_last_four",
+            "last_four_hash",
+            "field_name",
+            postgresql_include=["patient_uid"],
+        ),
+        Index(
+            "idx_phone_area_code",
+            "area_code_hash",
+            "field_name",
+            postgresql_include=["patient_uid"],
+        ),
     )
 
 
@@ -123,7 +165,12 @@ class DateSearchIndex(BaseEntity):
 
     # Create composite indices
     __table_args__ = (
-        Index("idx_date_full", "field_name", "date_hash"),
+        Index(
+            "idx_date_full",
+            "field_name",
+            "date_hash",
+            postgresql_include=["patient_uid"],
+        ),
         Index("idx_date_year", "field_name", "year_hash"),
         Index("idx_date_month", "field_name", "month_hash"),
         Index("idx_date_age_range", "field_name", "age_range_hash"),
@@ -5,12 +5,25 @@ This service manages searchable encryption indices for patient data,
 enabling efficient searching without compromising data security.
 """
 
+import asyncio
 import hashlib
 import hmac
+import os
 import re
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import Optional, Set
-
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import (
+    Integer,
+    Table,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from beak.apps.abstract.repository import BaseRepository
@@ -21,8 +34,62 @@ from beak.apps.patient.search_indices import (
     DateSearchIndex,
 )
 from beak.core.config import settings
+from beak.core.uid_gen import get_flake_uid
 from beak.utils.exception_logger import log_exception
 
+TEXT_INDEX_FIELDS = ("first_name", "middle_name", "last_name", "email")
+PHONE_INDEX_FIELDS = ("phone_mobile", "phone_home")
+DATE_INDEX_FIELDS = ("date_of_birth",)
+INDEXED_FIELDS = TEXT_INDEX_FIELDS + PHONE_INDEX_FIELDS + DATE_INDEX_FIELDS
+
+INDEX_TABLES = {
+    PatientSearchIndex.__tablename__: PatientSearchIndex.__table__,
+    PhoneSearchIndex.__tablename__: PhoneSearchIndex.__table__,
+    DateSearchIndex.__tablename__: DateSearchIndex.__table__,
+}
+
+# Hash columns written per index table, used to diff rows on update
+INDEX_HASH_COLUMNS = {
+    PatientSearchIndex.__tablename__: (
+        "search_hash",
+        "partial_hash_3",
+        "partial_hash_4",
+        "partial_hash_5",
+        "phonetic_hash",
+    ),
+    PhoneSearchIndex.__tablename__: (
+        "normalized_hash",
+        "last_four_hash",
+        "area_code_hash",
+    ),
+    DateSearchIndex.__tablename__: (
+        "year_hash",
+        "month_hash",
+        "day_hash",
+        "date_hash",
+        "age_range_hash",
+    ),
+}
+
+# Rows per multi-row INSERT, kept well below the bind parameter limit
+INSERT_CHUNK_SIZE = 1000
+# Below this many patients hashing inline beats shipping work to a pool
+POOL_MIN_BATCH = 200
+
+# Ranking weight of each kind of index hit: exact matches outrank prefixes,
+# longer prefixes outrank shorter ones and phonetic/area code hits rank last.
+MATCH_WEIGHTS = {
+    "search_hash": 10,
+    "partial_hash_5": 5,
+    "partial_hash_4": 4,
+    "partial_hash_3": 3,
+    "phonetic_hash": 2,
+    "normalized_hash": 10,
+    "last_four_hash": 4,
+    "area_code_hash": 1,
+    "date_hash": 8,
+}
+
 
 class SearchableEncryptionService:
     """
@@ -32,8 +99,8 @@ class SearchableEncryptionService:
     efficient searching of encrypted patient data without exposing plaintext.
     """
 
-    def __init__(self):
-        self.search_key = self._get_search_key()
+    def __init__(self, search_key: Optional[bytes] = None):
+        self.search_key = search_key or self._get_search_key()
         self.patient_index_repo = BaseRepository(PatientSearchIndex)
         self.phone_index_repo = BaseRepository(PhoneSearchIndex)
         self.date_index_repo = BaseRepository(DateSearchIndex)
@@ -177,6 +244,130 @@ class SearchableEncryptionService:
             "age_range_hash": self._create_search_hash(age_range),
         }
 
+    def build_index_rows(self, values: dict) -> Dict[str, List[dict]]:
+        """
+        Compute the index rows for a patient without touching the database.
+
+        Args:
+            values: Plaintext values keyed by field name plus the patient "uid"
+
+        Returns:
+            Index rows (without uid) keyed by index table name
+        """
+        patient_uid = values["uid"]
+        rows = {name: [] for name in INDEX_TABLES}
+
+        for field_name in TEXT_INDEX_FIELDS:
+            field_value = values.get(field_name)
+            if not field_value:
+                continue
+            rows[PatientSearchIndex.__tablename__].append(
+                {
+                    **dict.fromkeys(
+                        INDEX_HASH_COLUMNS[PatientSearchIndex.__tablename__]
+                    ),
+                    "patient_uid": patient_uid,
+                    "field_name": field_name,
+                    "search_hash": self._create_search_hash(field_value),
+                    "phonetic_hash": self._create_phonetic_hash(field_value),
+                    **self._create_partial_hashes(field_value),
+                }
+            )
+
+        for field_name in PHONE_INDEX_FIELDS:
+            field_value = values.get(field_name)
+            phone_hashes = self._create_phone_hashes(field_value) if field_value else {}
+            # numbers too short to normalize cannot be indexed
+            if not phone_hashes.get("normalized_hash"):
+                continue
+            rows[PhoneSearchIndex.__tablename__].append(
+                {
+                    **dict.fromkeys(INDEX_HASH_COLUMNS[PhoneSearchIndex.__tablename__]),
+                    "patient_uid": patient_uid,
+                    "field_name": field_name,
+                    **phone_hashes,
+                }
+            )
+
+        for field_name in DATE_INDEX_FIELDS:
+            # Convert string to datetime if needed
+            dob = values.get(field_name)
+            if isinstance(dob, str):
+                try:
+                    dob = datetime.fromisoformat(dob.replace("Z", "+00:00"))
+                except (ValueError, TypeError):
+                    dob = None
+            if not dob:
+                continue
+            rows[DateSearchIndex.__tablename__].append(
+                {
+                    "patient_uid": patient_uid,
+                    "field_name": field_name,
+                    **self._create_date_hashes(dob),
+                }
+            )
+
+        return rows
+
+    async def compute_index_rows(
+        self, payloads: List[dict], executor: Optional[Executor] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Compute index rows for many patients, fanning HMAC work out to a pool.
+
+        Args:
+            payloads: Plaintext values per patient (see patient_index_values)
+            executor: Optional process pool; rows are computed inline without one
+
+        Returns:
+            Index rows keyed by index table name
+        """
+        if executor is None or len(payloads) < POOL_MIN_BATCH:
+            return build_index_rows_batch(self.search_key, payloads)
+
+        workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+        size = -(-len(payloads) // workers)
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor,
+                    build_index_rows_batch,
+                    self.search_key,
+                    payloads[i : i + size],
+                )
+                for i in range(0, len(payloads), size)
+            )
+        )
+
+        rows = {name: [] for name in INDEX_TABLES}
+        for part in parts:
+            for name, part_rows in part.items():
+                rows[name].extend(part_rows)
+        return rows
+
+    @staticmethod
+    async def _insert_index_rows(
+        rows: Dict[str, List[dict]], session: AsyncSession
+    ) -> None:
+        """Write index rows with multi-row INSERT statements."""
+        for name, table_rows in rows.items():
+            table = INDEX_TABLES[name]
+            for i in range(0, len(table_rows), INSERT_CHUNK_SIZE):
+                chunk = [
+                    {"uid": get_flake_uid(), **row}
+                    for row in table_rows[i : i + INSERT_CHUNK_SIZE]
+                ]
+                await session.execute(insert(table).values(chunk))
+
+    async def _in_session(self, work, session: Optional[AsyncSession] = None):
+        if session:
+            await work(session)
+            await session.flush()
+            return
+        async with self.patient_index_repo.transaction() as _session:
+            await work(_session)
+
     async def create_patient_indices(
         self, patient: Patient, session: Optional[AsyncSession] = None
     ) -> None:
@@ -187,62 +378,29 @@ class SearchableEncryptionService:
             patient: Patient entity to index
             session: Optional database session
         """
+        await self.bulk_create_indices([patient_index_values(patient)], session=session)
+
+    async def bulk_create_indices(
+        self,
+        payloads: List[dict],
+        session: Optional[AsyncSession] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Create searchable indices for many patients at once.
+
+        Args:
+            payloads: Plaintext values per patient (see patient_index_values)
+            session: Optional database session
+            executor: Optional process pool for computing hashes
+        """
         try:
-            # Create text field indices
-            text_fields = {
-                "first_name": patient.first_name,
-                "middle_name": patient.middle_name,
-                "last_name": patient.last_name,
-                "email": patient.email,
-            }
-
-            for field_name, field_value in text_fields.items():
-                if field_value:
-                    # Create main search index
-                    search_data = {
-                        "patient_uid": patient.uid,
-                        "field_name": field_name,
-                        "search_hash": self._create_search_hash(field_value),
-                        "phonetic_hash": self._create_phonetic_hash(field_value),
-                        **self._create_partial_hashes(field_value),
-                    }
-
-                    await self.patient_index_repo.create(session=session, **search_data)
-
-            # Create phone indices
-            phone_fields = {
-                "phone_mobile": patient.phone_mobile,
-                "phone_home": patient.phone_home,
-            }
-
-            for field_name, field_value in phone_fields.items():
-                if field_value:
-                    phone_data = {
-                        "patient_uid": patient.uid,
-                        "field_name": field_name,
-                        **self._create_phone_hashes(field_value),
-                    }
-
-                    await self.phone_index_repo.create(session=session, **phone_data)
-
-            # Create date indices
-            if patient.date_of_birth:
-                # Convert string to datetime if needed
-                dob = patient.date_of_birth
-                if isinstance(dob, str):
-                    try:
-                        dob = datetime.fromisoformat(dob.replace("Z", "+00:00"))
-                    except (ValueError, TypeError):
-                        dob = None
-
-                if dob:
-                    date_data = {
-                        "patient_uid": patient.uid,
-                        "field_name": "date_of_birth",
-                        **self._create_date_hashes(dob),
-                    }
-
-                    await self.date_index_repo.create(session=session, **date_data)
+            rows = await self.compute_index_rows(payloads, executor)
+
+            async def _work(_session: AsyncSession):
+                await self._insert_index_rows(rows, _session)
+
+            await self._in_session(_work, session)
 
         except Exception as e:
             log_exception(e)
@@ -254,16 +412,53 @@ class SearchableEncryptionService:
         """
         Update searchable indices for a patient.
 
+        Only the fields whose hashes changed are rewritten; unchanged index
+        rows are left in place.
+
         Args:
             patient: Patient entity to update indices for
             session: Optional database session
         """
         try:
-            # Delete existing indices
-            await self.delete_patient_indices(patient.uid, session)
+            wanted = self.build_index_rows(patient_index_values(patient))
+
+            async def _work(_session: AsyncSession):
+                for name, table in INDEX_TABLES.items():
+                    hash_columns = INDEX_HASH_COLUMNS[name]
+                    res = await _session.execute(
+                        select(
+                            table.c.field_name, *(table.c[c] for c in hash_columns)
+                        ).where(table.c.patient_uid == patient.uid)
+                    )
+                    existing = {}
+                    for row in res.all():
+                        existing.setdefault(row.field_name, []).append(
+                            tuple(getattr(row, c) for c in hash_columns)
+                        )
+                    target = {row["field_name"]: row for row in wanted[name]}
+
+                    stale = [
+                        field_name
+                        for field_name, hashes in existing.items()
+                        if field_name not in target
+                        or hashes
+                        != [tuple(target[field_name][c] for c in hash_columns)]
+                    ]
+                    if stale:
+                        await _session.execute(
+                            delete(table).where(
+                                table.c.patient_uid == patient.uid,
+                                table.c.field_name.in_(stale),
+                            )
+                        )
+                    fresh = [
+                        row
+                        for field_name, row in target.items()
+                        if field_name not in existing or field_name in stale
+                    ]
+                    await self._insert_index_rows({name: fresh}, _session)
 
-            # Create new indices
-            await self.create_patient_indices(patient, session)
+            await self._in_session(_work, session)
 
         except Exception as e:
             log_exception(e)
@@ -294,6 +489,221 @@ class SearchableEncryptionService:
             log_exception(e)
             raise
 
+    async def reindex(
+        self,
+        chunk_size: int = 1000,
+        after_uid: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        on_chunk: Optional[Callable[[str, int], None]] = None,
+    ) -> int:
+        """
+        Rebuild the indices of every patient in uid order, one chunk at a time.
+
+        Each chunk is rebuilt in its own short transaction touching only that
+        chunk's index rows, so the tables stay available while a backfill or
+        key rotation runs. Pass the last reported uid as after_uid to resume.
+
+        Args:
+            chunk_size: Number of patients rebuilt per transaction
+            after_uid: Resume after this patient uid
+            executor: Optional process pool for computing hashes
+            on_chunk: Called with (last patient uid, patients done) after each chunk
+
+        Returns:
+            Number of patients reindexed
+        """
+        columns = [Patient.uid] + [
+            getattr(Patient, field_name) for field_name in INDEXED_FIELDS
+        ]
+        done = 0
+        while True:
+            stmt = select(*columns).order_by(Patient.uid).limit(chunk_size)
+            if after_uid:
+                stmt = stmt.where(Patient.uid > after_uid)
+            async with self.patient_index_repo.async_session() as session:
+                res = await session.execute(stmt)
+                payloads = [row._asdict() for row in res.all()]
+            if not payloads:
+                break
+
+            rows = await self.compute_index_rows(payloads, executor)
+            patient_uids = [payload["uid"] for payload in payloads]
+            async with self.patient_index_repo.transaction() as session:
+                for table in INDEX_TABLES.values():
+                    await session.execute(
+                        delete(table).where(table.c.patient_uid.in_(patient_uids))
+                    )
+                await self._insert_index_rows(rows, session)
+
+            after_uid = patient_uids[-1]
+            done += len(payloads)
+            if on_chunk:
+                on_chunk(after_uid, done)
+
+        return done
+
+    def _search_terms(
+        self,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+        date_of_birth: Optional[str] = None,
+        fuzzy_match: bool = False,
+    ) -> List[Tuple[Table, Optional[str], str, str, int]]:
+        """
+        Compute every search hash up front.
+
+        Returns:
+            (index table, field_name or None, hash column, hash value, weight) terms
+        """
+        terms = []
+
+        text_searches = {
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+        }
+        for field_name, search_value in text_searches.items():
+            if not search_value:
+                continue
+            terms.append(
+                (
+                    PatientSearchIndex.__table__,
+                    field_name,
+                    "search_hash",
+                    self._create_search_hash(search_value),
+                    MATCH_WEIGHTS["search_hash"],
+                )
+            )
+            if len(search_value) >= 3:
+                for partial_field, partial_hash in self._create_partial_hashes(
+                    search_value
+                ).items():
+                    if partial_hash:
+                        terms.append(
+                            (
+                                PatientSearchIndex.__table__,
+                                field_name,
+                                partial_field,
+                                partial_hash,
+                                MATCH_WEIGHTS[partial_field],
+                            )
+                        )
+            if fuzzy_match:
+                phonetic_hash = self._create_phonetic_hash(search_value)
+                if phonetic_hash:
+                    terms.append(
+                        (
+                            PatientSearchIndex.__table__,
+                            field_name,
+                            "phonetic_hash",
+                            phonetic_hash,
+                            MATCH_WEIGHTS["phonetic_hash"],
+                        )
+                    )
+
+        if phone:
+            for hash_field, hash_value in self._create_phone_hashes(phone).items():
+                if hash_value:
+                    terms.append(
+                        (
+                            PhoneSearchIndex.__table__,
+                            None,
+                            hash_field,
+                            hash_value,
+                            MATCH_WEIGHTS[hash_field],
+                        )
+                    )
+
+        if date_of_birth:
+            try:
+                dob = datetime.strptime(date_of_birth, "%Y-%m-%d")
+            except ValueError:
+                # Invalid date format, skip date search
+                dob = None
+            if dob:
+                terms.append(
+                    (
+                        DateSearchIndex.__table__,
+                        "date_of_birth",
+                        "date_hash",
+                        self._create_date_hashes(dob)["date_hash"],
+                        MATCH_WEIGHTS["date_hash"],
+                    )
+                )
+
+        return terms
+
+    async def search_ranked(
+        self,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+        date_of_birth: Optional[str] = None,
+        fuzzy_match: bool = False,
+        limit: Optional[int] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        Resolve candidate patients for all search terms in a single query.
+
+        Every hash lookup becomes one branch of a UNION ALL over the index
+        tables; candidates are ranked by the summed weight of the terms they
+        matched (exact > longer prefix > phonetic) so the best matches come first.
+
+        Args:
+            first_name: First name to search for
+            last_name: Last name to search for
+            email: Email to search for
+            phone: Phone number to search for
+            date_of_birth: Date of birth to search for (YYYY-MM-DD format)
+            fuzzy_match: Whether to use phonetic matching
+            limit: Maximum number of candidates to return
+            session: Optional database session
+
+        Returns:
+            (patient_uid, score) pairs ordered by descending score
+        """
+        terms = self._search_terms(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone,
+            date_of_birth=date_of_birth,
+            fuzzy_match=fuzzy_match,
+        )
+        if not terms:
+            return []
+
+        branches = []
+        for table, field_name, column, value, weight in terms:
+            branch = select(
+                table.c.patient_uid.label("patient_uid"),
+                literal_column(str(weight), Integer).label("score"),
+            ).where(table.c[column] == value)
+            if field_name:
+                branch = branch.where(table.c.field_name == field_name)
+            branches.append(branch)
+
+        matches = union_all(*branches).subquery("matches")
+        score = func.sum(matches.c.score).label("score")
+        stmt = (
+            select(matches.c.patient_uid, score)
+            .group_by(matches.c.patient_uid)
+            .order_by(score.desc(), matches.c.patient_uid)
+        )
+        if limit:
+            stmt = stmt.limit(limit)
+
+        if session:
+            res = await session.execute(stmt)
+            return [(row.patient_uid, row.score) for row in res.all()]
+        async with self.patient_index_repo.async_session() as _session:
+            res = await _session.execute(stmt)
+            return [(row.patient_uid, row.score) for row in res.all()]
+
     async def search_by_indices(
         self,
         first_name: Optional[str] = None,
@@ -320,96 +730,41 @@ class SearchableEncryptionService:
             Set of patient UIDs matching the search criteria
         """
         try:
-            matching_uids = set()
-
-            # Search text fields
-            text_searches = {
-                "first_name": first_name,
-                "last_name": last_name,
-                "email": email,
-            }
-
-            for field_name, search_value in text_searches.items():
-                if search_value:
-                    field_uids = set()
-
-                    # Exact hash match
-                    search_hash = self._create_search_hash(search_value)
-                    exact_matches = await self.patient_index_repo.get_all(
-                        field_name=field_name, search_hash=search_hash, session=session
-                    )
-                    field_uids.update(idx.patient_uid for idx in exact_matches)
-
-                    # Partial matches for substring search
-                    if len(search_value) >= 3:
-                        partial_hashes = self._create_partial_hashes(search_value)
-                        for partial_field, partial_hash in partial_hashes.items():
-                            if partial_hash:
-                                partial_matches = await self.patient_index_repo.get_all(
-                                    field_name=field_name,
-                                    **{partial_field: partial_hash},
-                                    session=session,
-                                )
-                                field_uids.update(
-                                    idx.patient_uid for idx in partial_matches
-                                )
-
-                    # Phonetic match if enabled
-                    if fuzzy_match:
-                        phonetic_hash = self._create_phonetic_hash(search_value)
-                        if phonetic_hash:
-                            phonetic_matches = await self.patient_index_repo.get_all(
-                                field_name=field_name,
-                                phonetic_hash=phonetic_hash,
-                                session=session,
-                            )
-                            field_uids.update(
-                                idx.patient_uid for idx in phonetic_matches
-                            )
-
-                    # Intersect or union results
-                    matching_uids.update(field_uids)
+            ranked = await self.search_ranked(
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+                phone=phone,
+                date_of_birth=date_of_birth,
+                fuzzy_match=fuzzy_match,
+                session=session,
+            )
+            return {patient_uid for patient_uid, _ in ranked}
 
-            # Search phone numbers
-            if phone:
-                phone_hashes = self._create_phone_hashes(phone)
-                phone_uids = set()
+        except Exception as e:
+            log_exception(e)
+            return set()
 
-                for hash_field, hash_value in phone_hashes.items():
-                    if hash_value:
-                        phone_matches = await self.phone_index_repo.get_all(
-                            **{hash_field: hash_value}, session=session
-                        )
-                        phone_uids.update(idx.patient_uid for idx in phone_matches)
 
-                if phone_uids:
-                    matching_uids.update(phone_uids)
+def patient_index_values(patient: Patient) -> dict:
+    """Plaintext values of the indexed fields of a patient."""
+    return {
+        "uid": patient.uid,
+        **{field_name: getattr(patient, field_name) for field_name in INDEXED_FIELDS},
+    }
 
-            # Search dates
-            if date_of_birth:
-                try:
-                    dob = datetime.strptime(date_of_birth, "%Y-%m-%d")
-                    date_hashes = self._create_date_hashes(dob)
-                    date_uids = set()
-
-                    # Use exact date hash for precise matching
-                    if date_hashes.get("date_hash"):
-                        date_matches = await self.date_index_repo.get_all(
-                            field_name="date_of_birth",
-                            date_hash=date_hashes["date_hash"],
-                            session=session,
-                        )
-                        date_uids.update(idx.patient_uid for idx in date_matches)
 
-                    if date_uids:
-                        matching_uids.update(date_uids)
-
-                except ValueError:
-                    # Invalid date format, skip date search
-                    pass
-
-            return matching_uids
+def build_index_rows_batch(
+    search_key: bytes, payloads: List[dict]
+) -> Dict[str, List[dict]]:
+    """
+    Compute index rows for a batch of patients.
 
-        except Exception as e:
-            log_exception(e)
-            return set()
+    Module level so it can be shipped to a process pool.
+    """
+    service = SearchableEncryptionService(search_key=search_key)
+    rows = {name: [] for name in INDEX_TABLES}
+    for payload in payloads:
+        for name, table_rows in service.build_index_rows(payload).items():
+            rows[name].extend(table_rows)
+    return rows
@@ -1,6 +1,6 @@
 import base64
 import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,6 +14,7 @@ from beak.apps.patient.entities import (
     PatientIdentification,
 )
 from beak.apps.patient.repository import (
+    SCAN_MAX_ROWS,
     IdentificationRepository,
     PatientIdentificationRepository,
     PatientRepository,
@@ -76,8 +77,9 @@ class PatientService(BaseService[Patient, PatientCreate, PatientUpdate]):
         HIPAA-compliant patient search.
 
         For encrypted fields (first_name, last_name, phone_mobile, etc.),
-        uses specialized repository methods that decrypt data for searching.
-        For non-encrypted fields, uses standard database search.
+        uses the searchable encryption indices, see
+        PatientRepository.search_by_encrypted_fields. For non-encrypted
+        fields, uses standard database search.
 
         Args:
             query_string: Search term to match across patient fields
@@ -184,6 +186,44 @@ class PatientService(BaseService[Patient, PatientCreate, PatientUpdate]):
 
         return unique_results
 
+    async def substring_search(
+        self,
+        text: str,
+        limit: int = 50,
+        after_uid: Optional[str] = None,
+        max_rows: int = SCAN_MAX_ROWS,
+    ) -> Tuple[List[Patient], Optional[str]]:
+        """
+        Patients with text anywhere in their name, email or phone number.
+
+        Unlike the index backed searches this decrypts patients, batch by
+        batch in uid order, until limit matches are found or max_rows
+        patients were read. Pass the returned uid as after_uid to get the
+        next page.
+
+        Args:
+            text: Text to find
+            limit: Maximum number of patients returned
+            after_uid: Continue after this patient uid
+            max_rows: Maximum number of patients read by this call
+
+        Returns:
+            Matching patients in uid order, and the uid to continue after
+            (None when there are no more patients to search)
+        """
+        if not text:
+            return [], None
+        return await self.repository.scan_encrypted_fields(
+            first_name=text,
+            last_name=text,
+            email=text,
+            phone_mobile=text,
+            match_any=True,
+            after_uid=after_uid,
+            limit=max(limit, 1),
+            max_rows=max_rows,
+        )
+
     async def high_performance_search(
         self,
         first_name: Optional[str] = None,
@@ -139,10 +139,14 @@ async def receive_shipment(job_uid: str):
         logger.warning(f"Failed to acquire Shipment {shipment_uid}")
         return
 
+    # guarded again: the guard set when queued may have expired by now
+    await task_guard.process(uid=shipment.uid, object_type=TrackableObject.SHIPMENT)
     await shipment_receive(shipment.uid)
 
     await job_service.change_status(job.uid, new_status=JobState.FINISHED)
-    await task_guard.release(uid=job.uid, object_type=TrackableObject.SHIPMENT)
+    await task_guard.release_many(
+        [job.uid, shipment.uid], object_type=TrackableObject.SHIPMENT
+    )
     logger.info(f"Done !! Job {job_uid} was executed successfully :)")
 
 
@@ -1,9 +1,14 @@
 import time
+from dataclasses import dataclass
 from typing import Optional
 
-from beak.apps.user.entities import UserPreference
+from sqlalchemy import exists, select, true
+
+from beak.apps.setup.entities.setup import Laboratory
+from beak.apps.user.entities import User, UserPreference, laboratory_user
 from beak.apps.user.services import UserPreferenceService
 from beak.core.tenant_context import get_current_user_uid
+from beak.database.session import async_session
 
 _PREFERENCE_TTL_SECONDS = 300
 _PREFERENCES_CACHE: dict[str, tuple[float, UserPreference]] = {}
@@ -39,3 +44,96 @@ async def get_current_user_preferences(
         _PREFERENCES_CACHE.pop(user_uid, None)
 
     return preference
+
+
+# Laboratory access, checked by TenantContextMiddleware on every request.
+# Entries are dropped when the user, the laboratory or the membership changes
+# on this process; the TTL bounds staleness for changes made on other replicas.
+_LAB_ACCESS_TTL_SECONDS = 60
+_LAB_ACCESS_MAX_ENTRIES = 10_000
+_LAB_ACCESS_CACHE: dict[tuple[str, str], tuple[float, "LabAccess"]] = {}
+
+
+@dataclass(frozen=True)
+class LabAccess:
+    # why the user may not work in the laboratory, None if they may
+    denied: Optional[str] = None
+    organization_uid: Optional[str] = None
+
+
+async def _load_lab_access(user_uid: str, laboratory_uid: str) -> LabAccess:
+    """user, membership and laboratory in a single query"""
+    laboratory = (
+        select(Laboratory.uid, Laboratory.organization_uid)
+        .where(Laboratory.uid == laboratory_uid)
+        .subquery()
+    )
+    member = exists().where(
+        laboratory_user.c.user_uid == User.uid,
+        laboratory_user.c.laboratory_uid == laboratory_uid,
+    )
+    stmt = (
+        select(
+            User.is_superuser,
+            member.label("member"),
+            laboratory.c.uid,
+            laboratory.c.organization_uid,
+        )
+        .outerjoin(laboratory, true())
+        .where(User.uid == user_uid)
+    )
+    async with async_session() as session:
+        row = (await session.execute(stmt)).first()
+
+    if row is None:
+        return LabAccess(denied="User not found for laboratory context")
+    is_superuser, is_member, lab_uid, organization_uid = row
+    if not is_superuser and not is_member:
+        return LabAccess(denied="User not assigned to the requested laboratory")
+    if lab_uid is None:
+        return LabAccess(denied="Requested laboratory does not exist")
+    return LabAccess(organization_uid=organization_uid)
+
+
+async def get_lab_access(user_uid: str, laboratory_uid: str) -> LabAccess:
+    key = (user_uid, laboratory_uid)
+    now = time.monotonic()
+    cached = _LAB_ACCESS_CACHE.get(key)
+    if cached and now - cached[0] < _LAB_ACCESS_TTL_SECONDS:
+        return cached[1]
+
+    access = await _load_lab_access(user_uid, laboratory_uid)
+    if len(_LAB_ACCESS_CACHE) >= _LAB_ACCESS_MAX_ENTRIES:
+        # oldest first
+        _LAB_ACCESS_CACHE.pop(next(iter(_LAB_ACCESS_CACHE)))
+    _LAB_ACCESS_CACHE.pop(key, None)
+    _LAB_ACCESS_CACHE[key] = (now, access)
+    return access
+
+
+def invalidate_lab_access(
+    user_uid: Optional[str] = None, laboratory_uid: Optional[str] = None
+) -> None:
+    """Drop cached access of a user and/or a laboratory, everything if neither"""
+    if not user_uid and not laboratory_uid:
+        _LAB_ACCESS_CACHE.clear()
+        return
+    for key in list(_LAB_ACCESS_CACHE):
+        if key[0] == user_uid or key[1] == laboratory_uid:
+            _LAB_ACCESS_CACHE.pop(key, None)
+
+
+def lab_access_tracker(action: str, table_name: str, metadata) -> None:
+    """entity-tracker subscriber: users and laboratories changing"""
+    if table_name not in ("user", "laboratory"):
+        return
+    uid = (metadata or {}).get("uid")
+    if table_name == "user":
+        invalidate_lab_access(user_uid=uid)
+    else:
+        invalidate_lab_access(laboratory_uid=uid)
+
+
+def lab_membership_tracker(user_uid: str, laboratory_uid: str, **kwargs) -> None:
+    """laboratory-membership subscriber: users added to or removed from a lab"""
+    invalidate_lab_access(user_uid=user_uid)
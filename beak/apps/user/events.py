@@ -1,3 +1,4 @@
+from beak.apps.user.caches import lab_access_tracker, lab_membership_tracker
 from beak.core.config import get_settings
 from beak.core.events import subscribe
 from beak.utils.email.email import send_new_account_email, send_reset_password_email
@@ -20,3 +21,6 @@ def password_reset(user, token):
 def init_user_events():
     subscribe("new-account-created", new_account_created)
     subscribe("password-reset", password_reset)
+    # tenant access cache
+    subscribe("entity-tracker", lab_access_tracker)
+    subscribe("laboratory-membership", lab_membership_tracker)
@@ -2,6 +2,7 @@ from beak.apps.abstract.repository import BaseRepository
 from beak.apps.user.entities import Group, Permission, User, UserPreference
 from beak.apps.user.entities import laboratory_user
 from beak.apps.user.entities import permission_groups
+from beak.core.events import post_event
 
 
 class UserRepository(BaseRepository[User]):
@@ -42,6 +43,11 @@ class UserRepository(BaseRepository[User]):
                     )
                 )
                 await session.commit()
+            post_event(
+                "laboratory-membership",
+                user_uid=user_uid,
+                laboratory_uid=laboratory_uid,
+            )
 
     async def remove_user_from_laboratory(
         self, user_uid: str, laboratory_uid: str
@@ -56,6 +62,9 @@ class UserRepository(BaseRepository[User]):
                 )
             )
             await session.commit()
+        post_event(
+            "laboratory-membership", user_uid=user_uid, laboratory_uid=laboratory_uid
+        )
 
     async def search_users(
         self, text: str, laboratory_uid: str = None, limit: int = 10
@@ -0,0 +1,182 @@
+import logging
+from typing import Iterable
+
+from beak.apps.abstract.entity import EventListenable
+from beak.apps.analysis.entities.results import AnalysisResult
+from beak.apps.analysis.services.result import AnalysisResultService
+from beak.apps.analysis.workflow.analysis_result import (
+    AnalysisResultWorkFlow,
+    AnalysisResultWorkFlowException,
+)
+from beak.apps.worksheet.entities import WorkSheet
+from beak.apps.worksheet.enum import WorkSheetState
+from beak.apps.worksheet.services import WorkSheetService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def plan_positions(
+    count: int,
+    reserved: Iterable[int],
+    occupied: Iterable[int] = (),
+    limit: int | None = None,
+) -> list[int]:
+    """
+    Pick the first free plate positions, skipping reserved (qc) and occupied ones.
+
+    :param count: Number of positions wanted.
+    :param reserved: Positions kept for qc samples.
+    :param occupied: Positions already holding a result.
+    :param limit: Last usable position, unbounded if None.
+    :return: Up to count positions in ascending order.
+    """
+    taken = {int(p) for p in reserved} | {int(p) for p in occupied if p is not None}
+    positions = []
+    position = 1
+    while len(positions) < count and (limit is None or position <= limit):
+        if position not in taken:
+            positions.append(position)
+        position += 1
+    return positions
+
+
+class WorkSheetPopulator:
+    """
+    Fill a worksheet plate in one go.
+
+    The position map is computed in memory, the assign guard is checked for
+    every result up front and all assignments plus the worksheet counters are
+    written in a single transaction.
+    """
+
+    def __init__(self):
+        self.analysis_result_service = AnalysisResultService()
+        self.worksheet_service = WorkSheetService()
+
+    async def populate(
+        self,
+        ws: WorkSheet,
+        results: list[AnalysisResult],
+        reserved: Iterable[int],
+        limit: int | None = None,
+        updated_by_uid: str | None = None,
+    ) -> dict[str, int]:
+        """
+        Assign results to the free positions of a worksheet.
+
+        :param ws: The worksheet to populate.
+        :param results: Candidate results, assigned in descending uid order.
+        :param reserved: Positions kept for qc samples.
+        :param limit: Last usable position when the plate already has results.
+        :param updated_by_uid: The user on whose behalf the plate is filled.
+        :return: The assigned worksheet position keyed by result uid.
+        :raises AnalysisResultWorkFlowException: If a result cannot be assigned.
+        """
+        existing, qc_existing = await self.worksheet_service.get_analysis_results(
+            ws.uid
+        )
+        occupied = [r.worksheet_position for r in existing + qc_existing]
+
+        ordered = sorted(results, key=lambda r: r.uid, reverse=True)
+        positions = plan_positions(
+            len(ordered), reserved, occupied, limit if occupied else None
+        )
+        # balance sample count to the free positions
+        ordered = ordered[: len(positions)]
+
+        blocked = [r.uid for r in ordered if not AnalysisResultWorkFlow.can_assign(r)]
+        if blocked:
+            raise AnalysisResultWorkFlowException(
+                f"Cannot assign results: {', '.join(blocked)}"
+            )
+
+        assignments = {r.uid: position for r, position in zip(ordered, positions)}
+        assigned_count = len(existing) + len(assignments)
+        state = WorkSheetState.PENDING if assigned_count else WorkSheetState.EMPTY
+
+        async with self.analysis_result_service.transaction() as session:
+            assigned = await self.analysis_result_service.assign_many(
+                ws.uid, assignments, updated_by_uid=updated_by_uid, session=session
+            )
+            if len(assigned) != len(assignments):
+                # someone assigned or processed a result since we loaded it
+                raise AnalysisResultWorkFlowException(
+                    "Results changed while populating worksheet, nothing was assigned"
+                )
+            await self.worksheet_service.bulk_update_with_mappings(
+                [
+                    {
+                        "uid": ws.uid,
+                        "assigned_count": assigned_count,
+                        "state": state,
+                        "updated_by_uid": updated_by_uid or ws.updated_by_uid,
+                    }
+                ],
+                session=session,
+            )
+
+        self._track(ws, ordered, assignments, assigned_count, state, updated_by_uid)
+        return assignments
+
+    async def assign_qc(
+        self,
+        ws: WorkSheet,
+        positions: dict[str, int],
+        updated_by_uid: str | None = None,
+    ) -> None:
+        """Assign freshly created qc results to their reserved positions."""
+        if not positions:
+            return
+        assigned = await self.analysis_result_service.assign_many(
+            ws.uid, positions, updated_by_uid=updated_by_uid
+        )
+        for uid in assigned:
+            EventListenable.put_out_changes(
+                AnalysisResult.__tablename__,
+                uid,
+                {"worksheet_uid": None, "assigned": False, "worksheet_position": None},
+                {
+                    "worksheet_uid": ws.uid,
+                    "assigned": True,
+                    "worksheet_position": positions[uid],
+                },
+            )
+
+    @staticmethod
+    def _track(
+        ws: WorkSheet,
+        results: list[AnalysisResult],
+        assignments: dict[str, int],
+        assigned_count: int,
+        state: str,
+        updated_by_uid: str | None,
+    ) -> None:
+        # bulk statements bypass the mapper hooks: feed the entity tracker ourselves
+        for result in results:
+            EventListenable.put_out_changes(
+                AnalysisResult.__tablename__,
+                result.uid,
+                {
+                    "worksheet_uid": result.worksheet_uid,
+                    "assigned": result.assigned,
+                    "worksheet_position": result.worksheet_position,
+                    "laboratory_instrument_uid": result.laboratory_instrument_uid,
+                },
+                {
+                    "worksheet_uid": ws.uid,
+                    "assigned": True,
+                    "worksheet_position": assignments[result.uid],
+                    "laboratory_instrument_uid": None,
+                },
+            )
+        EventListenable.put_out_changes(
+            WorkSheet.__tablename__,
+            ws.uid,
+            {"assigned_count": ws.assigned_count, "state": ws.state},
+            {
+                "assigned_count": assigned_count,
+                "state": state,
+                **({"updated_by_uid": updated_by_uid} if updated_by_uid else {}),
+            },
+        )
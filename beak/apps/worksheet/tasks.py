@@ -1,5 +1,4 @@
 import logging
-import time
 
 from beak.apps.analysis.enum import ResultState, SampleState
 from beak.apps.analysis.schemas import (
@@ -14,13 +13,16 @@ from beak.apps.analysis.services.quality_control import (
 )
 from beak.apps.analysis.services.result import AnalysisResultService
 from beak.apps.analysis.utils import get_qc_sample_type
-from beak.apps.analysis.workflow.analysis_result import AnalysisResultWorkFlow
+from beak.apps.analysis.workflow.analysis_result import (
+    AnalysisResultWorkFlowException,
+)
 from beak.apps.iol.redis import task_guard
 from beak.apps.iol.redis.enum import TrackableObject
 from beak.apps.job.enum import JobState
 from beak.apps.job.services import JobService
 from beak.apps.worksheet.entities import WorkSheet
 from beak.apps.worksheet.enum import WorkSheetState
+from beak.apps.worksheet.population import WorkSheetPopulator
 from beak.apps.worksheet.services import WorkSheetService
 
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +34,6 @@ async def populate_worksheet_plate(job_uid: str):
     job_service = JobService()
     worksheet_service = WorkSheetService()
     analysis_result_service = AnalysisResultService()
-    analysis_result_wf = AnalysisResultWorkFlow()
 
     job = await job_service.get(uid=job_uid)
     if not job:
@@ -113,44 +114,20 @@ async def populate_worksheet_plate(job_uid: str):
 
     reserved = [int(r) for r in list(ws.reserved.keys())]
 
-    if ws.assigned_count == 0:
-        position = 1
-        for key, sample in enumerate(
-            sorted(samples, key=lambda s: s.uid, reverse=True)
-        ):
-            while position in reserved:
-                # skip reserved ?qc positions
-                position += 1
-
-            await analysis_result_wf.assign(sample.uid, ws.uid, position, None)
-            position += 1
-
-    else:  # populate worksheet using an empty position filling strategy if not empty
-        assigned_positions = [
-            assigned_anal.worksheet_position for assigned_anal in ws.analysis_results
-        ]
-        empty_positions = [
-            pos
-            for pos in range(1, ws.number_of_samples + 1)
-            if pos not in reserved and pos not in assigned_positions
-        ]
-
-        samples = sorted(samples, key=lambda s: s.uid, reverse=True)
-        # balance sample count to avoid a key error
-        samples = samples[: len(empty_positions)]
-
-        for key in list(range(len(samples))):
-            await analysis_result_wf.assign(
-                samples[key].uid, ws.uid, empty_positions[key], None
-            )
-
-    time.sleep(1)
-
-    await worksheet_service.reset_assigned_count(ws.uid)
-    if ws.assigned_count > 0 and not ws.state == WorkSheetState.PENDING:
-        await worksheet_service.change_state(
-            ws.uid, state=WorkSheetState.PENDING, updated_by_uid=job.creator_uid
+    try:
+        await WorkSheetPopulator().populate(
+            ws,
+            samples,
+            reserved,
+            limit=ws.number_of_samples,
+            updated_by_uid=job.creator_uid,
         )
+    except AnalysisResultWorkFlowException as e:
+        await job_service.change_status(
+            job.uid, new_status=JobState.FAILED, change_reason=str(e)
+        )
+        logger.warning(f"WorkSheet {ws_uid} - {e}")
+        return
 
     if True:  # ?? maybe allow user to choose whether to add qc samples or not
         await setup_ws_quality_control(ws)
@@ -175,7 +152,7 @@ async def setup_ws_quality_control(ws: WorkSheet):
     analysis_result_service = AnalysisResultService()
     qc_set_service = QCSetService()
     sample_service = SampleService()
-    analysis_result_wf = AnalysisResultWorkFlow()
+    qc_positions: dict[str, int] = {}
 
     reserved_pos = ws.reserved
     if ws.template.qc_levels:
@@ -227,8 +204,9 @@ async def setup_ws_quality_control(ws: WorkSheet):
                 }
                 a_result_schema = AnalysisResultCreate(**a_result_in)
                 ar = await analysis_result_service.create(a_result_schema)
-                position = get_sample_position(reserved_pos, level.uid)
-                await analysis_result_wf.assign(ar.uid, ws.uid, position, None)
+                qc_positions[ar.uid] = get_sample_position(reserved_pos, level.uid)
+
+        await WorkSheetPopulator().assign_qc(ws, qc_positions)
 
 
 async def setup_ws_quality_control_manually(ws: WorkSheet, qc_template_uid):
@@ -236,7 +214,7 @@ async def setup_ws_quality_control_manually(ws: WorkSheet, qc_template_uid):
     analysis_result_service = AnalysisResultService()
     qc_set_service = QCSetService()
     sample_service = SampleService()
-    analysis_result_wf = AnalysisResultWorkFlow()
+    qc_positions: dict[str, int] = {}
 
     qc_template = None
     reserved_pos = None
@@ -304,8 +282,9 @@ async def setup_ws_quality_control_manually(ws: WorkSheet, qc_template_uid):
                 }
                 a_result_schema = AnalysisResultCreate(**a_result_in)
                 ar = await analysis_result_service.create(a_result_schema)
-                position = get_sample_position(reserved_pos, level.uid)
-                await analysis_result_wf.assign(ar.uid, ws.uid, position, None)
+                qc_positions[ar.uid] = get_sample_position(reserved_pos, level.uid)
+
+        await WorkSheetPopulator().assign_qc(ws, qc_positions)
 
 
 async def populate_worksheet_plate_manually(job_uid: str):
@@ -314,7 +293,6 @@ async def populate_worksheet_plate_manually(job_uid: str):
     worksheet_service = WorkSheetService()
     analysis_result_service = AnalysisResultService()
     qc_template_service = QCTemplateService()
-    analysis_result_wf = AnalysisResultWorkFlow()
 
     job = await job_service.get(uid=job_uid)
     if not job:
@@ -375,61 +353,20 @@ async def populate_worksheet_plate_manually(job_uid: str):
             qc_template = await qc_template_service.get(uid=data["qc_template_uid"])
             reserved = list(range(1, len(qc_template.qc_levels) + 1))
 
-    if ws.assigned_count == 0:
-        position = 1
-        for key, sample in enumerate(
-            sorted(samples, key=lambda s: s.uid, reverse=True)
-        ):
-            while position in reserved:
-                # skip reserved ?qc positions
-                position += 1
-
-            await analysis_result_wf.assign(sample.uid, ws.uid, position, None)
-            position += 1
-
-    else:  # populate worksheet using an empty position filling strategy if not empty
-        total_count = len(ws.analysis_results) + len(samples)
-
-        assigned_positions = []
-        empty_positions = []
-        for assigned_anal in ws.analysis_results:
-            assigned_positions.append(assigned_anal.worksheet_position)
-
-        logger.info(f"reserved : {reserved}")
-        logger.info(f"pos array : {list(range(1, total_count + 1))}")
-        for pos in list(range(1, total_count + 1)):
-            # skip reserved positions
-            if pos in reserved:
-                continue
-
-            # track empty positions
-            if pos not in assigned_positions:
-                empty_positions.append(pos)
-
-        # fill in empty positions
-        empty_positions = sorted(empty_positions)
-        samples = sorted(samples, key=lambda s: s.uid, reverse=True)
-
-        logger.info(f"samples: {samples}")
-        logger.info(f"assigned_positions: {assigned_positions}")
-        logger.info(f"empty_positions: {empty_positions}")
-
-        # balance sample count to avoid a key error
-        samples = samples[: len(empty_positions)]
-
-        for key in list(range(len(samples))):
-            await analysis_result_wf.assign(
-                samples[key].uid, ws.uid, empty_positions[key], None
-            )
-
-    time.sleep(1)
-
-    await worksheet_service.reset_assigned_count(ws.uid)
-    if ws.assigned_count > 0:
-        if not ws.state == WorkSheetState.PENDING:
-            await worksheet_service.change_state(
-                ws.uid, state=WorkSheetState.PENDING, updated_by_uid=job.creator_uid
-            )
+    try:
+        await WorkSheetPopulator().populate(
+            ws,
+            samples,
+            reserved,
+            limit=len(ws.analysis_results) + len(samples),
+            updated_by_uid=job.creator_uid,
+        )
+    except AnalysisResultWorkFlowException as e:
+        await job_service.change_status(
+            job.uid, new_status=JobState.FAILED, change_reason=str(e)
+        )
+        logger.warning(f"WorkSheet {ws_uid} - {e}")
+        return
 
     if True:  # ?? maybe allow user to choose whether to add qc samples or not
         await setup_ws_quality_control_manually(ws, data["qc_template_uid"])
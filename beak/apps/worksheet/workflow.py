@@ -16,43 +16,43 @@ class WorkSheetWorkFlow:
         self.worksheet_service = WorkSheetService()
 
     async def revert(self, uid: str, by_uid: str):
-        to_status = WorkSheetState.PENDING
         _results, qc_results = await self.worksheet_service.get_analysis_results(uid)
         results = _results + qc_results
+        to_status = self.revert_state([ar.status for ar in results])
+        await self.worksheet_service.change_state(uid, to_status, by_uid)
 
+    @staticmethod
+    def revert_state(result_statuses: list[str]) -> str:
+        """Worksheet state implied by the statuses of its analysis results"""
         awaiting_states = [ResultState.RESULTED, ResultState.RETRACTED]
-        if all([(ar.status in awaiting_states) for ar in results]):
-            to_status = WorkSheetState.AWAITING
-        await self.worksheet_service.change_state(uid, to_status, by_uid)
+        if all([(status in awaiting_states) for status in result_statuses]):
+            return WorkSheetState.AWAITING
+        return WorkSheetState.PENDING
 
     async def submit(self, uid, submitter):
         worksheet = await self.worksheet_service.get(uid=uid)
         await self._guard_submit(worksheet)
-        return self.worksheet_service.submit(worksheet.uid, submitter)
+        return await self.worksheet_service.submit(worksheet.uid, submitter)
 
     async def _guard_submit(self, worksheet: WorkSheet) -> bool:
+        results, qc_results = await self.worksheet_service.get_analysis_results(
+            worksheet.uid
+        )
+        self.check_submit(worksheet, [ar.status for ar in results + qc_results])
+        return True
+
+    @staticmethod
+    def check_submit(worksheet: WorkSheet, result_statuses: list[str]) -> None:
         if worksheet.state not in [WorkSheetState.PENDING, WorkSheetState.SUBMITTING]:
             raise WorksheetWorkFlowException(
                 f"Cannot submit a {worksheet.state} WorkSheet"
             )
 
         result_states = [ResultState.PENDING]
-
-        results, qc_results = await self.worksheet_service.get_analysis_results(
-            worksheet.uid
-        )
-        if (
-            len(
-                list(
-                    filter(lambda ar: ar.status in result_states, results + qc_results)
-                )
-            )
-            > 0
-        ):
+        if len(list(filter(lambda s: s in result_states, result_statuses))) > 0:
             raise WorksheetWorkFlowException(
                 "Cannot submit a Worksheet with pending results"
             )
-        return True
 
     async def approve(self, uid, approved_by):
         worksheet = await self.worksheet_service.get(uid=uid)
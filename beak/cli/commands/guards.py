@@ -0,0 +1,18 @@
+import typer
+
+from beak.apps.iol.redis.client import close_redis_pool
+from beak.apps.iol.redis.tracking import task_guard
+from beak.cli.libs import AsyncTyper
+
+app = AsyncTyper()
+
+
+@app.command()
+async def clear_legacy() -> None:
+    """Delete task guards stored without expiry by earlier releases"""
+    typer.echo("Clearing legacy task guards...")
+    try:
+        deleted = await task_guard.clear_legacy()
+    finally:
+        await close_redis_pool()
+    typer.echo(f"Done clearing {deleted} task guards :)")
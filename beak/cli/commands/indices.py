@@ -0,0 +1,37 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import typer
+
+from beak.apps.patient.search_service import SearchableEncryptionService
+from beak.cli.libs import AsyncTyper
+
+app = AsyncTyper()
+
+
+@app.command()
+async def reindex(
+        chunk_size: int = typer.Option(1000, help="Patients rebuilt per transaction"),
+        after: str = typer.Option(None, help="Resume after this patient uid"),
+        processes: int = typer.Option(
+            os.cpu_count() or 1, help="Worker processes used to compute hashes"
+        ),
+) -> None:
+    """Rebuild patient search indices e.g. after rotating SEARCH_ENCRYPTION_KEY"""
+    typer.echo("Rebuilding patient search indices...")
+
+    def progress(last_uid: str, done: int) -> None:
+        typer.echo(f"{done} patients reindexed, resume with --after {last_uid}")
+
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        done = await SearchableEncryptionService().reindex(
+            chunk_size=chunk_size,
+            after_uid=after,
+            executor=executor,
+            on_chunk=progress,
+        )
+    finally:
+        if executor:
+            executor.shutdown()
+    typer.echo(f"Done reindexing {done} patients :)")
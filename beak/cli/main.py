@@ -1,7 +1,7 @@
 import typer
 
 from beak.main import beak  # noqa required to load modules
-from .commands import server, db, snapshot, seed
+from .commands import server, db, snapshot, seed, indices, guards
 
 app = typer.Typer()
 
@@ -10,6 +10,8 @@ app.add_typer(server.app, name="server")
 app.add_typer(db.app, name="db")
 app.add_typer(snapshot.app, name="snapshot")
 app.add_typer(seed.app, name="seed")
+app.add_typer(indices.app, name="indices")
+app.add_typer(guards.app, name="guards")
 
 
 def main() -> None:
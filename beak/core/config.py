@@ -131,13 +131,34 @@ class Settings(BaseSettings):
     ENABLE_BACKGROUND_PROCESSING: bool = getenv_boolean(
         "ENABLE_BACKGROUND_PROCESSING", False
     )
+    # Fallback job queue sweep (seconds), new jobs wake workers via LISTEN/NOTIFY
+    JOB_POLL_INTERVAL: int = getenv_value("JOB_POLL_INTERVAL", 10)
+    # PDF rendering processes (impress.render); 0 renders on a thread instead
+    IMPRESS_RENDER_WORKERS: int = getenv_value("IMPRESS_RENDER_WORKERS", 2)
     OTLP_SPAN_EXPORT_URL: str = getenv_value("OTLP_SPAN_EXPORT_URL", None)  # xxx:4317
     SENTRY_DSN: str | None = getenv_value("SENTRY_DSN", None)
     RUN_OPEN_TRACING: bool = bool(OTLP_SPAN_EXPORT_URL)
     REDIS_SERVER: str | None = getenv_value("REDIS_SERVER", None)
+    # connections of the process wide Redis pool (iol.redis.client)
+    REDIS_MAX_CONNECTIONS: int = getenv_value("REDIS_MAX_CONNECTIONS", 50)
+    # seconds a TaskGuard lock outlives a job that never released it
+    TASK_GUARD_TTL: int = getenv_value("TASK_GUARD_TTL", 3600)
     RATE_LIMIT: bool = getenv_boolean("RATE_LIMIT", True)
     RATE_LIMIT_PER_MINUTE: int = getenv_value("RATE_LIMIT_PER_MINUTE", 100)
     RATE_LIMIT_PER_HOUR: int = getenv_value("RATE_LIMIT_PER_HOUR", 2000)
+    # the tenant aware RateLimitMiddleware (per IP, user, lab and org), opt-in
+    RATE_LIMIT_MIDDLEWARE: bool = getenv_boolean("RATE_LIMIT_MIDDLEWARE", False)
+    RATE_LIMIT_USER_PER_MINUTE: int = getenv_value("RATE_LIMIT_USER_PER_MINUTE", 200)
+    RATE_LIMIT_USER_PER_HOUR: int = getenv_value("RATE_LIMIT_USER_PER_HOUR", 5000)
+    # reverse proxies (addresses or networks, JSON list) whose X-Forwarded-For
+    # gives the client address limits are counted by, e.g. ["10.0.0.0/8"]
+    RATE_LIMIT_TRUSTED_PROXIES: list[str] = []
+    # API activity log bodies: kept up to this many characters, for this share
+    # of requests (errors always); ACTIVITY_LOG_SAMPLING is a JSON map of path
+    # prefix or GraphQL operation name to its own share, e.g. {"/health": 0}
+    ACTIVITY_LOG_BODY_LIMIT: int = getenv_value("ACTIVITY_LOG_BODY_LIMIT", 4096)
+    ACTIVITY_LOG_SAMPLE_RATE: float = getenv_value("ACTIVITY_LOG_SAMPLE_RATE", 1.0)
+    ACTIVITY_LOG_SAMPLING: dict[str, float] = {}
     MONGODB_SERVER: str | None = getenv_value("MONGODB_SERVER", None)
     MONGODB_USER: str = getenv_value("MONGODB_USER", "beak")
     MONGODB_PASS: str = getenv_value("MONGODB_PASS", "beak")
@@ -160,6 +181,10 @@ class Settings(BaseSettings):
         "client",
         "patient",
     ]
+    # audit log entries that could not be written, written again on startup
+    AUDIT_LOG_SPOOL: str = getenv_value(
+        "AUDIT_LOG_SPOOL", os.path.join(BASE_DIR, "spool", "auditlog.jsonl")
+    )
     # Document Editor
     DEFAULT_DOCUMENT_EDITOR: str = "umo"
     # SMS
@@ -171,6 +196,9 @@ class Settings(BaseSettings):
     # HIPAA Compliance
     HIPAA_ENCRYPTION_KEY: str | None = getenv_value("HIPAA_ENCRYPTION_KEY", None)
     SEARCH_ENCRYPTION_KEY: str | None = getenv_value("SEARCH_ENCRYPTION_KEY", None)
+    # Processes decrypting large result sets (encryption.bulk_decryptor);
+    # 0 decrypts on a thread instead
+    HIPAA_DECRYPT_WORKERS: int = getenv_value("HIPAA_DECRYPT_WORKERS", 0)
 
     # git personal access token
     GITHUB_PAT: str | None = getenv_value("GITHUB_PAT", None)
@@ -1,36 +1,415 @@
+"""
+In-process events
+
+Subscribers register for an event type with subscribe, post_event hands an
+event to event_bus and returns. One dispatcher task starts the subscribers
+of every event: coroutine functions as tasks of their own, plain functions
+on the bus' thread pool, so a slow subscriber holds up neither the code
+posting nor the other subscribers. Subscribers run in a copy of the
+context the event was posted from (tenant, user) and are not awaited by
+it, apost_event included; the subscribers of successive events may run
+concurrently.
+
+Events wait in a bounded queue. Posts from async code and other threads
+wait for room; plain calls on the event loop cannot, and what does not fit
+is dropped and counted, except for LOSSLESS_EVENTS (entity changes, which
+the audit log is written from): those wait for room in a task of their
+own. Entity changes are posted once per committed
+transaction (see EventListenable) and repeated updates of a row in one
+transaction reach subscribers as a single change. subscribe_batch
+subscribers get the events of their type dispatched together in one call:
+a transaction's, or several transactions' of the same tenant when the
+dispatcher is behind.
+"""
+
 import asyncio
+import contextvars
 import inspect
 import logging
+import time
 import traceback
-from asyncio import create_task, gather, Lock as ALock
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from asyncio import Lock as ALock
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from threading import Lock
-from typing import Callable, List, Dict, Any, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from beak.core.tenant_context import get_tenant_context
 
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# transactions (or single events) waiting for the dispatcher
+EVENT_QUEUE_SIZE = 10_000
+# threads running plain function subscribers
+EVENT_HANDLER_THREADS = 4
+# subscriber tasks running at once before the dispatcher waits for one
+EVENT_HANDLER_TASKS = 100
+# events the dispatcher takes off the queue at once when it falls behind
+DISPATCH_BATCH_SIZE = 1000
+# event types never dropped when the queue is full
+LOSSLESS_EVENTS = ("entity-tracker",)
+# seconds stop waits for queued events and running subscribers
+EVENT_STOP_TIMEOUT = 30
+
+Event = Tuple[str, Dict[str, Any]]
+# events posted together and the context they were posted from
+Batch = Tuple[List[Event], contextvars.Context]
+Call = Tuple[Callable[..., Any], Dict[str, Any]]
+
 subscribers: Dict[str, List[Callable[..., Any]]] = {}
+# called once per dispatch with events=[kwargs of each event of the type]
+batch_subscribers: Dict[str, List[Callable[..., Any]]] = {}
 sync_lock = Lock()  # Synchronous lock
 async_lock = ALock()  # Asynchronous lock
 
+# set while subscribers run, their own events must not wait on the dispatcher
+_dispatching: ContextVar[bool] = ContextVar("dispatching_events", default=False)
+
+
+def coalesce(events: List[Event]) -> List[Event]:
+    """Fold repeated entity-tracker updates of a row into the first one"""
+    coalesced: List[Event] = []
+    updates: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for event_type, kwargs in events:
+        metadata = kwargs.get("metadata") or {}
+        if (
+            event_type != "entity-tracker"
+            or kwargs.get("action") != "after-update"
+            or not metadata.get("uid")
+        ):
+            coalesced.append((event_type, kwargs))
+            continue
+
+        key = (kwargs.get("table_name"), metadata["uid"])
+        if key in updates:
+            first = updates[key]
+            for field, value in metadata.get("state_before", {}).items():
+                first["state_before"].setdefault(field, value)
+            first["state_after"].update(metadata.get("state_after", {}))
+            continue
+        metadata = {
+            **metadata,
+            "state_before": dict(metadata.get("state_before", {})),
+            "state_after": dict(metadata.get("state_after", {})),
+        }
+        updates[key] = metadata
+        coalesced.append((event_type, {**kwargs, "metadata": metadata}))
+    return coalesced
+
+
+class EventBus:
+    """
+    Queue and dispatcher of posted events.
+
+    The dispatcher starts with the first event posted on an event loop (or
+    with start) and lives until stop. Posts that find no event loop at all,
+    in scripts, run their subscribers in place.
+    """
+
+    def __init__(
+        self,
+        max_queued: int = EVENT_QUEUE_SIZE,
+        threads: int = EVENT_HANDLER_THREADS,
+        max_tasks: int = EVENT_HANDLER_TASKS,
+        lossless: Tuple[str, ...] = LOSSLESS_EVENTS,
+    ):
+        self.max_queued = max_queued
+        self.threads = threads
+        self.max_tasks = max_tasks
+        self.lossless = set(lossless)
+        self.dropped = 0
+        self.overflowed = 0
+        self.max_depth = 0
+        self.handlers: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # running subscriber tasks, at most max_tasks while the bus runs
+        self._handlers: set[asyncio.Task] = set()
+        # lossless batches waiting for room in the queue
+        self._overflow: set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and not self._loop.is_closed()
+        )
+
+    def start(self) -> None:
+        """Start the dispatcher on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._slots = asyncio.Semaphore(self.max_tasks)
+        # not the context of whoever happened to post first
+        self._task = self._loop.create_task(
+            self._run(), name="beak-event-bus", context=contextvars.Context()
+        )
+
+    async def stop(self, timeout: float = EVENT_STOP_TIMEOUT) -> None:
+        """
+        Dispatch what is queued and wait for its subscribers, then stop.
 
-def partition_functions(
-    functions: List[Callable[..., Any]],
-) -> Tuple[List[Callable[..., Any]], List[Callable[..., Any]]]:
-    async_funcs = [fn for fn in functions if inspect.iscoroutinefunction(fn)]
-    sync_funcs = [fn for fn in functions if not inspect.iscoroutinefunction(fn)]
-    return async_funcs, sync_funcs
+        Gives up after timeout seconds (e.g. the database is down): running
+        subscribers are cancelled and what is still queued is not dispatched.
+        """
+        timed_out = False
+        if self.running:
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._drain()
+            except TimeoutError:
+                timed_out = True
+                logger.error(
+                    f"Event bus stopped after {timeout}s: "
+                    f"{self._queue.qsize() + len(self._overflow)} batches not "
+                    f"dispatched, {len(self._handlers)} subscribers cancelled"
+                )
+            tasks = [self._task, *self._handlers, *self._overflow]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=not timed_out, cancel_futures=timed_out)
+            self._executor = None
 
+    async def _drain(self) -> None:
+        # subscribers may post events of their own
+        while True:
+            if self._overflow:
+                await asyncio.gather(*self._overflow, return_exceptions=True)
+            await self._queue.join()
+            if not self._handlers and not self._overflow:
+                break
+            await self._join_handlers()
 
-def get_or_create_event_loop() -> asyncio.AbstractEventLoop:
-    try:
-        return asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop
+    def post(self, events: List[Event]) -> None:
+        """Queue events to be dispatched together, from any thread"""
+        if not events:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and not self.running:
+            self.start()
+        batch = (events, contextvars.copy_context())
+        if not self.running:
+            # no event loop to dispatch on
+            asyncio.run(self._dispatch_in_place(batch))
+            return
+
+        if loop is not self._loop:
+            if loop is None and not _dispatching.get():
+                # another thread: wait for room
+                asyncio.run_coroutine_threadsafe(
+                    self._queue.put(batch), self._loop
+                ).result()
+            else:
+                self._loop.call_soon_threadsafe(self._put_nowait, batch)
+        elif in_greenlet() and not _dispatching.get():
+            # committing through an async session: the commit waits for room
+            await_only(self._queue.put(batch))
+        else:
+            self._put_nowait(batch)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def apost(self, events: List[Event]) -> None:
+        """Queue events, waiting for room but not for their subscribers"""
+        if not self.running:
+            self.start()
+        batch = (events, contextvars.copy_context())
+        if _dispatching.get():
+            self._put_nowait(batch)
+        else:
+            await self._queue.put(batch)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and per subscriber call counts and latencies"""
+        with self._stats_lock:
+            handlers = {name: dict(stats) for name, stats in self.handlers.items()}
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self.running else 0,
+            "max_queued": self.max_queued,
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "overflowed": self.overflowed,
+            "running_handlers": len(self._handlers),
+            "handlers": handlers,
+        }
+
+    def _put_nowait(self, batch: Batch) -> None:
+        try:
+            self._queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            if any(event_type in self.lossless for event_type, _ in batch[0]):
+                # not to be dropped: wait for room without holding up the caller
+                self.overflowed += len(batch[0])
+                task = self._loop.create_task(self._queue.put(batch))
+                self._overflow.add(task)
+                task.add_done_callback(self._overflow.discard)
+                return
+            self.dropped += len(batch[0])
+            if self.dropped % 1000 < len(batch[0]):
+                logger.warning(f"Event queue full, {self.dropped} events dropped")
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="beak-events"
+            )
+        return self._executor
+
+    def _record(self, fn: Callable[..., Any], started: float, failed: bool) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        name = getattr(fn, "__qualname__", repr(fn))
+        with self._stats_lock:
+            stats = self.handlers.setdefault(
+                name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    async def _call(self, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        failed = False
+        try:
+            await fn(**kwargs)
+        except Exception as e:
+            failed = True
+            logger.error(
+                f"Error in event subscriber {fn.__name__}: {e}\n"
+                f"{traceback.format_exc()}"
+            )
+        self._record(fn, started, failed)
+
+    def _call_all(self, calls: List[Call]) -> None:
+        # on a pool thread, its events must not wait on the dispatcher either
+        _dispatching.set(True)
+        for fn, kwargs in calls:
+            started = time.perf_counter()
+            failed = False
+            try:
+                fn(**kwargs)
+            except Exception as e:
+                failed = True
+                logger.error(
+                    f"Error in event subscriber {fn.__name__}: {e}\n"
+                    f"{traceback.format_exc()}"
+                )
+            self._record(fn, started, failed)
+
+    async def _call_plain(self, calls: List[Call]) -> None:
+        loop = asyncio.get_running_loop()
+        # one hop to the pool for all of the batch, in the task's context
+        context = contextvars.copy_context()
+        await loop.run_in_executor(self._pool(), context.run, self._call_all, calls)
+
+    async def _spawn(self, handler, ctx: contextvars.Context) -> None:
+        """Run handler as a task in a copy of ctx, waiting for a free slot"""
+        slots = self._slots if self.running else None
+        if slots is not None:
+            await slots.acquire()
+        context = ctx.copy()
+        context.run(_dispatching.set, True)
+        task = asyncio.get_running_loop().create_task(handler, context=context)
+        self._handlers.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._handlers.discard(task)
+            if slots is not None:
+                slots.release()
+
+        task.add_done_callback(done)
+
+    async def _join_handlers(self) -> None:
+        while self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    @staticmethod
+    def _tenant_runs(batches: Tuple[Batch, ...]) -> List[List[Batch]]:
+        """Consecutive batches posted by the same tenant"""
+        runs: List[List[Batch]] = []
+        tenant = None
+        for batch in batches:
+            batch_tenant = batch[1].run(get_tenant_context)
+            if not runs or batch_tenant != tenant:
+                runs.append([])
+            runs[-1].append(batch)
+            tenant = batch_tenant
+        return runs
+
+    async def _dispatch(self, *batches: Batch) -> None:
+        """Start the subscribers of posted batches, each coalesced on its own"""
+        for run in self._tenant_runs(batches):
+            grouped = defaultdict(list)
+            for events, ctx in run:
+                plain = []
+                for event_type, kwargs in coalesce(events):
+                    grouped[event_type].append(kwargs)
+                    with sync_lock:
+                        current_subscribers = list(subscribers.get(event_type, []))
+                    for fn in current_subscribers:
+                        if inspect.iscoroutinefunction(fn):
+                            await self._spawn(self._call(fn, kwargs), ctx)
+                        else:
+                            plain.append((fn, kwargs))
+                if plain:
+                    await self._spawn(self._call_plain(plain), ctx)
+
+            # the run's transactions together, in the context of its first
+            ctx = run[0][1]
+            plain = []
+            for event_type, events in grouped.items():
+                with sync_lock:
+                    current_subscribers = list(batch_subscribers.get(event_type, []))
+                for fn in current_subscribers:
+                    if inspect.iscoroutinefunction(fn):
+                        await self._spawn(self._call(fn, {"events": events}), ctx)
+                    else:
+                        plain.append((fn, {"events": events}))
+            if plain:
+                await self._spawn(self._call_plain(plain), ctx)
+
+    async def _dispatch_in_place(self, batch: Batch) -> None:
+        await self._dispatch(batch)
+        await self._join_handlers()
+
+    async def _run(self) -> None:
+        while True:
+            batches = [await self._queue.get()]
+            size = len(batches[0][0])
+            # behind: take what else is queued, batch subscribers get it at once
+            while size < DISPATCH_BATCH_SIZE and not self._queue.empty():
+                batches.append(self._queue.get_nowait())
+                size += len(batches[-1][0])
+            try:
+                await self._dispatch(*batches)
+            except Exception as e:
+                logger.error(f"Dispatching {size} events failed: {e}")
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+
+
+event_bus = EventBus()
 
 
 # Synchronous Event System
@@ -50,41 +429,26 @@ def unsubscribe(event_type: str, fn: Callable[..., Any]) -> None:
                 )
 
 
-def post_event(event_type: str, **kwargs: Any) -> None:
+def subscribe_batch(event_type: str, fn: Callable[..., Any]) -> None:
+    """Have fn(events=[...]) called with the events of a type dispatched together"""
     with sync_lock:
-        current_subscribers = subscribers.get(event_type, [])
+        batch_subscribers.setdefault(event_type, []).append(fn)
 
-    # Separate sync from async functions
-    async_funcs, sync_funcs = partition_functions(current_subscribers)
 
-    # Handle async functions
-    loop = get_or_create_event_loop()
-    for fn in async_funcs:
-        if loop.is_running():
-            loop.create_task(fn(**kwargs))
-        else:
-            asyncio.run(fn(**kwargs))
+def unsubscribe_batch(event_type: str, fn: Callable[..., Any]) -> None:
+    with sync_lock:
+        if fn in batch_subscribers.get(event_type, []):
+            batch_subscribers[event_type].remove(fn)
 
-    # Handle sync functions
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(safe_execute, fn, **kwargs) for fn in sync_funcs]
 
-        for future in as_completed(futures):
-            try:
-                future.result()  # Re-raise any exception from the executed function
-            except Exception as e:
-                logger.error(
-                    f"Error executing event handler: {e}\n{traceback.format_exc()}"
-                )
+def post_event(event_type: str, **kwargs: Any) -> None:
+    """Queue an event, its subscribers run later in a copy of this context"""
+    event_bus.post([(event_type, kwargs)])
 
 
-def safe_execute(fn: Callable[..., Any], **kwargs: Any) -> None:
-    try:
-        fn(**kwargs)
-    except Exception as e:
-        logger.error(
-            f"Error in event subscriber {fn.__name__}: {e}\n{traceback.format_exc()}"
-        )
+def post_events(events: List[Event]) -> None:
+    """Post (event_type, kwargs) pairs to be dispatched together"""
+    event_bus.post(events)
 
 
 # Asynchronous Event System
@@ -105,20 +469,10 @@ async def aunsubscribe(event_type: str, fn: Callable[..., Any]) -> None:
 
 
 async def apost_event(event_type: str, **kwargs: Any) -> None:
-    async with async_lock:
-        current_subscribers = subscribers.get(event_type, [])
-
-    tasks = [create_task(asafe_execute(fn, **kwargs)) for fn in current_subscribers]
-    await gather(*tasks)
+    """
+    Queue an event, waiting for room in the queue.
 
-
-async def asafe_execute(fn: Callable[..., Any], **kwargs: Any) -> None:
-    try:
-        if inspect.iscoroutinefunction(fn):
-            await fn(**kwargs)
-        else:
-            fn(**kwargs)
-    except Exception as e:
-        logger.error(
-            f"Error in event subscriber {fn.__name__}: {e}\n{traceback.format_exc()}"
-        )
+    Returns once the event is queued: like post_event, it does not wait for
+    the subscribers, which run later in a copy of this context.
+    """
+    await event_bus.apost([(event_type, kwargs)])
@@ -0,0 +1,158 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, List, Tuple
+
+from sqlalchemy import and_, false, inspect, or_, true
+
+# A keyset is the ordered list of (column attribute, descending) pairs that
+# uniquely orders a result set. uid is always appended as the tie-breaker.
+KeysetOrder = List[Tuple[Any, bool]]
+
+_TIEBREAKER = "uid"
+
+
+def parse_keyset_order(model, sort_by: list[str] | None) -> KeysetOrder | None:
+    """
+    Resolve sort_by (smart_query style: ``name``, ``-created_at``) into a keyset order.
+
+    :param model: The mapped model class being paginated.
+    :param sort_by: The requested sort attributes.
+    :return: The keyset order or None when a sort key is not a plain column
+        on the model (e.g. ``analysis___name``) and keyset paging cannot apply.
+    """
+    columns = inspect(model).columns
+    order: KeysetOrder = []
+    seen = set()
+    for attr in sort_by or []:
+        if not attr:
+            continue
+        descending = attr.startswith("-")
+        name = attr[1:] if descending else attr
+        if "___" in name or name not in columns:
+            return None
+        if name in seen:
+            continue
+        seen.add(name)
+        order.append((getattr(model, name), descending))
+
+    if _TIEBREAKER not in seen:
+        # follow the direction of the leading key so "-created_at" pages stay stable
+        order.append((getattr(model, _TIEBREAKER), order[0][1] if order else False))
+    return order
+
+
+def keyset_names(order: KeysetOrder) -> list[str]:
+    return [("-" if desc else "") + column.key for column, desc in order]
+
+
+def keyset_order_by(order: KeysetOrder, reverse: bool = False) -> list:
+    """
+    Build ORDER BY clauses for a keyset, optionally flipped for backward paging.
+    Null placement follows the postgres defaults (NULLS LAST asc, NULLS FIRST desc)
+    so that a flipped order is the exact mirror of the forward order.
+    """
+    clauses = []
+    for column, desc in order:
+        if desc != reverse:
+            clauses.append(column.desc())
+        else:
+            clauses.append(column.asc())
+    return clauses
+
+
+def _after(column, desc: bool, value: Any):
+    """Rows that come strictly after value in the given direction."""
+    if desc:
+        # nulls sort first when descending
+        return column.isnot(None) if value is None else column < value
+    # nulls sort last when ascending
+    if value is None:
+        return false()
+    if not getattr(column.expression, "nullable", True):
+        return column > value
+    return or_(column > value, column.is_(None))
+
+
+def _equal(column, value: Any):
+    return column.is_(None) if value is None else column == value
+
+
+def keyset_predicate(order: KeysetOrder, values: list, reverse: bool = False):
+    """
+    Build the WHERE clause selecting rows after (or before when reverse) a cursor.
+
+    Expands the row comparison into the OR-of-ANDs form so mixed asc/desc keys
+    and nullable columns are handled, e.g. for (a asc, b desc):
+    ``a > :a OR (a = :a AND b < :b)``.
+    """
+    if len(values) != len(order):
+        raise ValueError("Cursor does not match the requested sort order")
+
+    branches = []
+    prefix = []
+    for (column, desc), value in zip(order, values):
+        branches.append(and_(*prefix, _after(column, desc != reverse, value)))
+        prefix.append(_equal(column, value))
+    return or_(*branches) if branches else true()
+
+
+def keyset_values(order: KeysetOrder, item: Any) -> list:
+    return [getattr(item, column.key) for column, _ in order]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, time):
+        return {"$t": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    if hasattr(value, "value") and not isinstance(value, (str, int, float, bool)):
+        # enums
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and len(value) == 1:
+        (tag, raw), = value.items()
+        if tag == "$dt":
+            return datetime.fromisoformat(raw)
+        if tag == "$d":
+            return date.fromisoformat(raw)
+        if tag == "$t":
+            return time.fromisoformat(raw)
+        if tag == "$dec":
+            return Decimal(raw)
+    return value
+
+
+def encode_keyset_cursor(order: KeysetOrder, values: list) -> str:
+    """Encode the full sort tuple of a row into an opaque, url-safe cursor."""
+    payload = {"k": keyset_names(order), "v": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_keyset_cursor(order: KeysetOrder, cursor: str) -> list | None:
+    """
+    Decode a cursor produced by encode_keyset_cursor.
+
+    :return: The sort tuple or None if the cursor is not a keyset cursor
+        (e.g. a bare uid handed out before keyset paging existed).
+    :raises ValueError: If the cursor was issued for a different sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        names, values = payload["k"], payload["v"]
+    except Exception:
+        return None
+
+    if names != keyset_names(order):
+        raise ValueError("Cursor does not match the requested sort order")
+    return [_decode_value(v) for v in values]
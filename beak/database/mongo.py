@@ -34,6 +34,15 @@ class MongoService:
         created = await collection.insert_one(data)
         return await collection.find_one({"_id": created.inserted_id})
 
+    async def create_many(
+            self, collection_name: MongoCollection, data: list[dict]
+    ) -> int:
+        """Insert documents in one round trip, without reading them back"""
+        logger.info(f"mongodb -- create_many:{collection_name} --")
+        collection = self.db.get_collection(collection_name)
+        created = await collection.insert_many(data, ordered=False)
+        return len(created.inserted_ids)
+
     async def upsert(
             self, collection_name: MongoCollection, uid: str, data: dict
     ) -> Optional[dict]:
@@ -22,11 +22,16 @@ from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_P
 from beak.api.deps import get_gql_context
 from beak.api.gql.schema import schema
 from beak.api.rest.api_v1 import api
+from beak.apps.app.writer import activity_log_writer
+from beak.apps.auditlog.events import replay_spool
 from beak.apps.common.channel import broadcast
 from beak.apps.events import observe_events
-from beak.apps.iol.redis.client import create_redis_client
-from beak.apps.job.sched import beak_workforce_init
+from beak.apps.impress.render import pdf_renderer
+from beak.apps.iol.minio import close_clients
+from beak.apps.iol.redis.client import close_redis_pool, get_redis_client
+from beak.apps.job.sched import beak_workforce_init, beak_workforce_shutdown
 from beak.core.config import settings
+from beak.core.events import event_bus
 from beak.database.session import async_engine
 from beak.lims.gql_router import FelGraphQLRouter
 from beak.lims.middleware import TenantContextMiddleware
@@ -34,32 +39,34 @@ from beak.lims.middleware.appactivity import APIActivityLogMiddleware
 from beak.lims.middleware.ratelimit import RateLimitMiddleware
 from beak.lims.seeds import initialize_beak
 from beak.logconf import LOGGING_CONFIG
+from beak.utils.encryption import bulk_decryptor
 from beak.views import setup_webapp
 
-redis_client = None
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[Any, None]:
-    global redis_client
-    if settings.REDIS_SERVER:
-        redis_client = await create_redis_client()
     if settings.LOAD_SETUP_DATA:
         await initialize_beak()
     await beak_workforce_init()
     observe_events()
+    event_bus.start()
+    # audit entries that could not be written before
+    await replay_spool()
+    await activity_log_writer.start()
     await broadcast.connect()
 
     # Startup complete
     yield
 
     # Shutdown cleanup
+    await beak_workforce_shutdown()
+    await activity_log_writer.stop()
+    await event_bus.stop()
+    pdf_renderer.shutdown()
+    bulk_decryptor.shutdown()
+    close_clients()
     await broadcast.disconnect()
-    if redis_client:
-        await redis_client.close()  # closes connections
-        await (
-            redis_client.connection_pool.disconnect()
-        )  # ensures the pool is cleaned up
+    if settings.REDIS_SERVER:
+        await close_redis_pool()
 
 
 def register_middlewares(app: FastAPI) -> None:
@@ -70,20 +77,25 @@ def register_middlewares(app: FastAPI) -> None:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    # Add tenant context middleware - should be early in the chain
-    app.add_middleware(TenantContextMiddleware)  # noqa
-    # app.add_middleware(RequireTenantMiddleware)  # noqa
-    app.add_middleware(APIActivityLogMiddleware)  # noqa
-    if redis_client and settings.RATE_LIMIT:
-        print(f"Connected to Redis at {settings.REDIS_SERVER}")
-        # Register the rate limit middleware with the app
+    if settings.RATE_LIMIT_MIDDLEWARE:
+        # Added before (so running inside) the tenant context middleware: its
+        # user, lab and org limits need the tenant context. The client shares
+        # the process wide pool, which connects lazily on the first request;
+        # without Redis requests are counted per process
         app.add_middleware(
             RateLimitMiddleware,  # noqa
-            redis_client=redis_client,
-            minute_limit=settings.RATE_LIMIT_PER_MINUTE,
-            hour_limit=settings.RATE_LIMIT_PER_HOUR,
+            redis_client=get_redis_client() if settings.REDIS_SERVER else None,
+            ip_minute_limit=settings.RATE_LIMIT_PER_MINUTE,
+            ip_hour_limit=settings.RATE_LIMIT_PER_HOUR,
+            user_minute_limit=settings.RATE_LIMIT_USER_PER_MINUTE,
+            user_hour_limit=settings.RATE_LIMIT_USER_PER_HOUR,
             exclude_paths=["/docs", "/redoc", "/openapi.json"],
+            trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
         )
+    # Add tenant context middleware - should be early in the chain
+    app.add_middleware(TenantContextMiddleware)  # noqa
+    # app.add_middleware(RequireTenantMiddleware)  # noqa
+    app.add_middleware(APIActivityLogMiddleware)  # noqa
 
 
 def register_rate_limit(app: FastAPI) -> None:
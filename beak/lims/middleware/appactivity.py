@@ -1,27 +1,73 @@
 import json
+import random
+import re
 import time
-from typing import Callable, Dict, Any, Optional
+from typing import AsyncIterator, Callable, Dict, Any, Optional
 
 from fastapi import Request, Response
 from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
-from beak.apps.app.schemas import APPActivityLogCreate
-from beak.apps.app.services import APPActivityLogService
+from beak.apps.app.writer import activity_log_writer
+from beak.core.config import get_settings
 from beak.core.tenant_context import get_tenant_context
 
+settings = get_settings()
+
+TEXT_CONTENT_TYPES = (
+    "application/json",
+    "text/",
+    "application/xml",
+    "application/graphql",
+)
+
+SENSITIVE_KEYS = [
+    "token",
+    "refresh",
+    "password",
+    "secret",
+    "key",
+    "credential",
+    "accesstoken",
+    "refreshtoken",
+]
+
+# for responses cut short of valid JSON
+SENSITIVE_VALUE = re.compile(
+    r'("(?:%s)"\s*:\s*)"[^"]*"?' % "|".join(SENSITIVE_KEYS), re.IGNORECASE
+)
+
 
 class APIActivityLogMiddleware(BaseHTTPMiddleware):
+    """
+    Logs every API call without holding it up.
+
+    Responses stream through untouched while up to body_limit bytes of text
+    bodies are kept aside; binary ones (PDFs, images, exports) are only
+    counted. Once the response is sent the row is queued on the
+    activity_log_writer, which inserts rows in batches. Bodies are recorded
+    for a sample_rate share of requests, per path prefix or GraphQL
+    operation name in sampling, and always for error responses.
+    """
+
     def __init__(
         self,
         app: ASGIApp,
         auth_header: str = "Authorization",
         graphql_path: str = "/beak-gql",
+        body_limit: int = settings.ACTIVITY_LOG_BODY_LIMIT,
+        sample_rate: float = settings.ACTIVITY_LOG_SAMPLE_RATE,
+        sampling: Optional[Dict[str, float]] = None,
     ):
         super().__init__(app)
         self.auth_header = auth_header
         self.graphql_path = graphql_path
+        self.body_limit = body_limit
+        self.sample_rate = sample_rate
+        self.sampling = (
+            settings.ACTIVITY_LOG_SAMPLING if sampling is None else sampling
+        )
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Skip logging for static assets to avoid binary decoding issues
@@ -48,270 +94,272 @@ class APIActivityLogMiddleware(BaseHTTPMiddleware):
         is_graphql = request.url.path == self.graphql_path
 
         try:
-            request_body_bytes = await request.body()
-            # Store original body for later reuse
-            request._body = request_body_bytes
-            if request_body_bytes:
-                request_body = request_body_bytes.decode("utf-8")
-
-                # Parse GraphQL specific data if this is a GraphQL endpoint
-                if is_graphql and request.method == "POST":
-                    try:
-                        graphql_data = json.loads(request_body)
-                        graphql_operation = {
-                            "query": graphql_data.get("query", ""),
-                            "operationName": graphql_data.get("operationName", ""),
-                            "variables": graphql_data.get("variables", {}),
-                        }
-                    except json.JSONDecodeError:
-                        print("Failed to parse GraphQL request body as JSON")
+            request_body = await self._read_request_body(request)
+            # Parse GraphQL specific data if this is a GraphQL endpoint
+            if request_body and is_graphql and request.method == "POST":
+                try:
+                    graphql_data = json.loads(request_body)
+                    graphql_operation = {
+                        "query": graphql_data.get("query", ""),
+                        "operationName": graphql_data.get("operationName", ""),
+                        "variables": graphql_data.get("variables", {}),
+                    }
+                except json.JSONDecodeError:
+                    print("Failed to parse GraphQL request body as JSON")
         except Exception as e:
             print(f"Error reading request body: {e}")
 
         # Process the request through the application
         response = await call_next(request)
 
-        # Calculate request duration
-        duration = time.time() - start_time
-
         # Skip logging if response is None
         if response is None:
             print("Warning: Response is None, skipping logging")
             # Since the response is None, we need to return something to avoid the TypeError
             return Response(status_code=500, content="Internal Server Error")
 
-        # Get response body
-        response_body = None
-        original_response_body = b""
-
-        # Create a new response to capture the response body
-        try:
-            # Check if response has body_iterator attribute
-            if hasattr(response, "body_iterator"):
-                async for chunk in response.body_iterator:
-                    original_response_body += chunk
-
-                # Only decode if content type is text-based
-                content_type = response.headers.get("content-type", "")
-                is_text_content = any(
-                    ct in content_type.lower()
-                    for ct in ["application/json", "text/", "application/xml", "application/graphql"]
+        def finish(response_body: Optional[str]) -> None:
+            # Log the API activity once the response is sent
+            try:
+                activity_log_writer.log(
+                    self._log_entry(
+                        request=request,
+                        response=response,
+                        token=token,
+                        tenant_context=tenant_context,
+                        request_body=request_body,
+                        response_body=response_body,
+                        graphql_operation=graphql_operation,
+                        duration=time.time() - start_time,
+                    )
                 )
+            except Exception as e:
+                print(f"Error logging API activity: {e}")
 
-                if original_response_body and is_text_content:
-                    try:
-                        response_body = original_response_body.decode("utf-8")
-                    except UnicodeDecodeError:
-                        # If decoding fails, skip response body logging
-                        response_body = None
-
-                    # Parse GraphQL response if applicable
-                    if is_graphql:
-                        ...
-
-                # Reconstruct the response with the captured body
-                response = Response(
-                    content=original_response_body,
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                    media_type=response.media_type,
-                )
-            else:
-                print(
-                    f"Response does not have body_iterator attribute: {type(response)}"
-                )
-        except Exception as e:
-            print(f"Error reading response body: {e}")
-            # In case of an error capturing the body, return the original response
+        if not hasattr(response, "body_iterator"):
+            finish(None)
             return response
 
-        # Log the API activity
-        try:
-            # Build enhanced log for GraphQL
-            enhanced_body = request_body
-            enhanced_response = response_body
-
-            if is_graphql and graphql_operation:
-                # Check if this is an authentication operation
-                operation_name = graphql_operation.get("operationName", "")
-                query = graphql_operation.get("query", "")
-                variables = graphql_operation.get("variables", {})
-
-                # More detailed detection of auth requests
-                is_auth_request = (
-                    operation_name in ["AuthenticateUser", "Login", "SignIn"]
-                    or "password" in variables
-                    or "authenticateUser" in query
-                    or "login" in query
-                    or "signIn" in query
-                    or "password" in query
-                )
+        # Only text content is kept for the log
+        content_type = response.headers.get("content-type", "")
+        response.body_iterator = self._relay(
+            response.body_iterator, self._is_text(content_type), finish
+        )
+        return response
 
-                # Redact sensitive information for auth requests
-                if is_auth_request:
-                    # Create a safe copy with redacted credentials
-                    safe_variables = {}
-                    for key, value in variables.items():
-                        if key.lower() in [
-                            "password",
-                            "token",
-                            "secret",
-                            "key",
-                            "credential",
-                        ]:
-                            safe_variables[key] = "********"
-                        else:
-                            safe_variables[key] = value
-
-                    # Format the GraphQL operation with redacted variables
-                    enhanced_body = json.dumps(
-                        {
-                            "operationType": self._detect_operation_type(
-                                graphql_operation.get("query", "")
-                            ),
-                            "operationName": operation_name,
-                            "query": "[REDACTED FOR SECURITY]",
-                            "variables": safe_variables,
-                            # 🆕 TENANT CONTEXT
-                            "tenantContext": {
-                                "user_uid": tenant_context.user_uid
-                                if tenant_context
-                                else None,
-                                "laboratory_uid": tenant_context.laboratory_uid
-                                if tenant_context
-                                else None,
-                                "organization_uid": tenant_context.organization_uid
-                                if tenant_context
-                                else None,
-                                "request_id": tenant_context.request_id
-                                if tenant_context
-                                else None,
-                            },
-                        },
-                        indent=2,
-                    )
-                else:
-                    # Format the GraphQL operation in a more readable way for non-auth requests
-                    enhanced_body = json.dumps(
-                        {
-                            "operationType": self._detect_operation_type(
-                                graphql_operation.get("query", "")
-                            ),
-                            "operationName": operation_name,
-                            "query": graphql_operation.get("query", ""),
-                            "variables": variables,
-                            # 🆕 TENANT CONTEXT
-                            "tenantContext": {
-                                "user_uid": tenant_context.user_uid
-                                if tenant_context
-                                else None,
-                                "laboratory_uid": tenant_context.laboratory_uid
-                                if tenant_context
-                                else None,
-                                "organization_uid": tenant_context.organization_uid
-                                if tenant_context
-                                else None,
-                                "request_id": tenant_context.request_id
-                                if tenant_context
-                                else None,
-                            },
-                        },
-                        indent=2,
-                    )
+    async def _read_request_body(self, request: Request) -> Optional[str]:
+        content_type = request.headers.get("content-type", "")
+        if not self._is_text(content_type):
+            # uploads stream on to the endpoint, only their size is logged
+            length = request.headers.get("content-length")
+            return f"[{content_type} body, {length} bytes]" if length else None
+
+        request_body_bytes = await request.body()
+        # Store original body for later reuse
+        request._body = request_body_bytes
+        return request_body_bytes.decode("utf-8") if request_body_bytes else None
 
-            # Process response body to redact sensitive information
-            if is_graphql and enhanced_response:
+    async def _relay(
+        self,
+        body_iterator: AsyncIterator[bytes],
+        keep: bool,
+        finish: Callable[[Optional[str]], None],
+    ) -> AsyncIterator[bytes]:
+        """Pass the response on chunk by chunk, keeping up to body_limit bytes"""
+        kept = bytearray()
+        size = 0
+        try:
+            async for chunk in body_iterator:
+                size += len(chunk)
+                if keep and len(kept) < self.body_limit:
+                    kept += chunk[: self.body_limit - len(kept)]
+                yield chunk
+        finally:
+            response_body = None
+            if kept:
+                # a cut may split a character
+                errors = "ignore" if size > len(kept) else "strict"
                 try:
-                    response_json = json.loads(enhanced_response)
-
-                    # If there's token/auth data in the response, redact it
-                    if "token" in str(response_json) or "refresh" in str(response_json):
-                        # Recursively redact sensitive fields
-                        def redact_sensitive(obj):
-                            if isinstance(obj, dict):
-                                for key in list(obj.keys()):
-                                    if key.lower() in [
-                                        "token",
-                                        "refresh",
-                                        "password",
-                                        "secret",
-                                        "key",
-                                        "credential",
-                                        "accesstoken",
-                                        "refreshtoken",
-                                    ]:
-                                        obj[key] = "[REDACTED]"
-                                    else:
-                                        obj[key] = redact_sensitive(obj[key])
-                            elif isinstance(obj, list):
-                                obj = [redact_sensitive(item) for item in obj]
-                            return obj
-
-                        redacted_response = redact_sensitive(response_json)
-                        enhanced_response = json.dumps(redacted_response)
-                except Exception:
-                    # If anything fails, just use the response as is
-                    pass
-
-            # Create a more detailed path for GraphQL operations
-            log_path = str(request.url.path)
-
-            # 🆕 ENHANCED PATH WITH TENANT INFO
-            if tenant_context and tenant_context.laboratory_uid:
-                log_path = f"[LAB:{tenant_context.laboratory_uid}] {log_path}"
-
-            if is_graphql and graphql_operation:
-                operation_name = graphql_operation.get("operationName", "")
-                if operation_name:
-                    log_path = f"{log_path}/{operation_name}"
-
-            # Create a log entry in the database
-            ac_in = APPActivityLogCreate(
-                token_identifier=token,
-                path=log_path,
-                method="GraphQL" if is_graphql else request.method,
-                query_params=str(request.query_params),
-                # Don't log full headers as they may contain auth data
-                headers=self._redact_sensitive_headers(request.headers),
-                body=enhanced_body if enhanced_body else "No body",
-                response_body=enhanced_response
-                if enhanced_response
-                else "No response body",
-                response_code=int(response.status_code)
-                if response and response.status_code
-                else 0,
-                ip_address=request.client.host if request.client else None,
-                user_agent=request.headers.get("user-agent"),
-                duration=duration,
-                user_uid=tenant_context.user_uid if tenant_context else None,
-                laboratory_uid=tenant_context.laboratory_uid
+                    response_body = self._truncate(kept.decode("utf-8", errors), size)
+                except UnicodeDecodeError:
+                    # If decoding fails, skip response body logging
+                    response_body = None
+            elif size and not keep:
+                response_body = f"[binary body, {size} bytes]"
+            finish(response_body)
+
+    def _log_entry(
+        self,
+        request: Request,
+        response: Response,
+        token: str,
+        tenant_context,
+        request_body: Optional[str],
+        response_body: Optional[str],
+        graphql_operation: Optional[Dict[str, Any]],
+        duration: float,
+    ) -> dict:
+        is_graphql = request.url.path == self.graphql_path
+        operation_name = ""
+
+        # Build enhanced log for GraphQL
+        enhanced_body = request_body
+        enhanced_response = response_body
+
+        if is_graphql and graphql_operation:
+            # Check if this is an authentication operation
+            operation_name = graphql_operation.get("operationName", "") or ""
+            query = graphql_operation.get("query", "")
+            variables = graphql_operation.get("variables", {}) or {}
+
+            # More detailed detection of auth requests
+            is_auth_request = (
+                operation_name in ["AuthenticateUser", "Login", "SignIn"]
+                or "password" in variables
+                or "authenticateUser" in query
+                or "login" in query
+                or "signIn" in query
+                or "password" in query
+            )
+
+            # 🆕 TENANT CONTEXT
+            tenant = {
+                "user_uid": tenant_context.user_uid if tenant_context else None,
+                "laboratory_uid": tenant_context.laboratory_uid
                 if tenant_context
                 else None,
-                organization_uid=tenant_context.organization_uid
+                "organization_uid": tenant_context.organization_uid
                 if tenant_context
                 else None,
-                request_id=tenant_context.request_id if tenant_context else None,
-            )
-            # Add try/except specifically around the service call
-            try:
-                await APPActivityLogService().create(ac_in)
-
-                # Additional tenant-aware logging
-                if tenant_context:
-                    print(
-                        f"📊 Activity Log - User: {tenant_context.user_uid}, "
-                        f"Lab: {tenant_context.laboratory_uid}, "
-                        f"Path: {log_path}, "
-                        f"Status: {response.status_code}, "
-                        f"Duration: {duration:.3f}s"
-                    )
-
-            except Exception as e:
-                print(f"Error creating log entry: {e}")
-        except Exception as e:
-            print(f"Error logging API activity: {e}")
+                "request_id": tenant_context.request_id if tenant_context else None,
+            }
+
+            # Redact sensitive information for auth requests
+            if is_auth_request:
+                # Create a safe copy with redacted credentials
+                safe_variables = {}
+                for key, value in variables.items():
+                    if key.lower() in [
+                        "password",
+                        "token",
+                        "secret",
+                        "key",
+                        "credential",
+                    ]:
+                        safe_variables[key] = "********"
+                    else:
+                        safe_variables[key] = value
+
+                # Format the GraphQL operation with redacted variables
+                enhanced_body = json.dumps(
+                    {
+                        "operationType": self._detect_operation_type(query),
+                        "operationName": operation_name,
+                        "query": "[REDACTED FOR SECURITY]",
+                        "variables": safe_variables,
+                        "tenantContext": tenant,
+                    },
+                    indent=2,
+                )
+            else:
+                # Format the GraphQL operation in a more readable way for non-auth requests
+                enhanced_body = json.dumps(
+                    {
+                        "operationType": self._detect_operation_type(query),
+                        "operationName": operation_name,
+                        "query": query,
+                        "variables": variables,
+                        "tenantContext": tenant,
+                    },
+                    indent=2,
+                )
 
-        return response
+        # Process response body to redact sensitive information
+        if is_graphql and enhanced_response:
+            enhanced_response = self._redact_response(enhanced_response)
+
+        # Create a more detailed path for GraphQL operations
+        path = str(request.url.path)
+        log_path = path
+
+        # 🆕 ENHANCED PATH WITH TENANT INFO
+        if tenant_context and tenant_context.laboratory_uid:
+            log_path = f"[LAB:{tenant_context.laboratory_uid}] {log_path}"
+
+        if operation_name:
+            log_path = f"{log_path}/{operation_name}"
+
+        status_code = int(response.status_code) if response.status_code else 0
+        if status_code < 400 and random.random() >= self._sample_rate(
+            path, operation_name
+        ):
+            enhanced_body = enhanced_response = "Not sampled"
+
+        return {
+            "token_identifier": token,
+            "path": log_path,
+            "method": "GraphQL" if is_graphql else request.method,
+            "query_params": str(request.query_params),
+            # Don't log full headers as they may contain auth data
+            "headers": self._redact_sensitive_headers(request.headers),
+            "body": self._truncate(enhanced_body) if enhanced_body else "No body",
+            "response_body": enhanced_response
+            if enhanced_response
+            else "No response body",
+            "response_code": status_code,
+            "ip_address": request.client.host if request.client else None,
+            "user_agent": request.headers.get("user-agent"),
+            "duration": duration,
+            "user_uid": tenant_context.user_uid if tenant_context else None,
+            "laboratory_uid": tenant_context.laboratory_uid
+            if tenant_context
+            else None,
+            "organization_uid": tenant_context.organization_uid
+            if tenant_context
+            else None,
+            "request_id": tenant_context.request_id if tenant_context else None,
+        }
+
+    def _sample_rate(self, path: str, operation_name: str) -> float:
+        """The share of requests whose bodies are logged"""
+        if operation_name in self.sampling:
+            return self.sampling[operation_name]
+        prefixes = [prefix for prefix in self.sampling if path.startswith(prefix)]
+        if prefixes:
+            return self.sampling[max(prefixes, key=len)]
+        return self.sample_rate
+
+    def _truncate(self, text: str, size: Optional[int] = None) -> str:
+        size = len(text) if size is None else size
+        if size <= self.body_limit:
+            return text
+        return f"{text[: self.body_limit]}... [truncated, {size} in total]"
+
+    def _redact_response(self, response_body: str) -> str:
+        if "token" not in response_body and "refresh" not in response_body:
+            return response_body
+        try:
+            response_json = json.loads(response_body)
+        except ValueError:
+            # truncated, redact the values in place
+            return SENSITIVE_VALUE.sub(r'\1"[REDACTED]"', response_body)
+
+        # Recursively redact sensitive fields
+        def redact_sensitive(obj):
+            if isinstance(obj, dict):
+                for key in list(obj.keys()):
+                    if key.lower() in SENSITIVE_KEYS:
+                        obj[key] = "[REDACTED]"
+                    else:
+                        obj[key] = redact_sensitive(obj[key])
+            elif isinstance(obj, list):
+                obj = [redact_sensitive(item) for item in obj]
+            return obj
+
+        return json.dumps(redact_sensitive(response_json))
+
+    def _is_text(self, content_type: str) -> bool:
+        return any(ct in content_type.lower() for ct in TEXT_CONTENT_TYPES)
 
     def _detect_operation_type(self, query: str) -> str:
         """Detect the GraphQL operation type from the query string."""
@@ -13,7 +13,7 @@ from fastapi.responses import JSONResponse
 from jose import jwt, JWTError
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from beak.apps.setup.services import LaboratoryService
+from beak.apps.user.caches import get_lab_access
 from beak.apps.user.services import UserService
 from beak.core.config import get_settings
 from beak.core.tenant_context import TenantContext, set_tenant_context
@@ -120,22 +120,14 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
         if not context.user_uid:
             raise PermissionError("Laboratory context requires authentication")
 
-        user = await UserService().get(uid=context.user_uid)
-        if not user:
-            raise PermissionError("User not found for laboratory context")
-
-        if not user.is_superuser:
-            lab_uids = await UserService().get_laboratories_by_user(context.user_uid)
-            if laboratory_uid not in (lab_uids or []):
-                raise PermissionError("User not assigned to the requested laboratory")
-
-        laboratory = await LaboratoryService().get(uid=laboratory_uid)
-        if not laboratory:
-            raise PermissionError("Requested laboratory does not exist")
+        # cached: no database round trip for a user already seen in this lab
+        access = await get_lab_access(context.user_uid, laboratory_uid)
+        if access.denied:
+            raise PermissionError(access.denied)
 
         if (
                 context.organization_uid
-                and laboratory.organization_uid != context.organization_uid
+                and access.organization_uid != context.organization_uid
         ):
             raise PermissionError("Laboratory does not belong to your organization")
 
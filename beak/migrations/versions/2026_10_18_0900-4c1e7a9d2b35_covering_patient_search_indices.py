@@ -0,0 +1,42 @@
+"""covering patient search indices
+
+Revision ID: 4c1e7a9d2b35
+Revises: bf2a10490c6f
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7a9d2b35'
+down_revision = 'bf2a10490c6f'
+branch_labels = None
+depends_on = None
+
+
+# (index, table, old columns, new columns)
+INDICES = [
+    ('idx_patient_field_hash', 'patient_search_index', ['field_name', 'search_hash'], ['field_name', 'search_hash']),
+    ('idx_patient_partial_3', 'patient_search_index', ['field_name', 'partial_hash_3'], ['field_name', 'partial_hash_3']),
+    ('idx_patient_partial_4', 'patient_search_index', ['field_name', 'partial_hash_4'], ['field_name', 'partial_hash_4']),
+    ('idx_patient_partial_5', 'patient_search_index', ['field_name', 'partial_hash_5'], ['field_name', 'partial_hash_5']),
+    ('idx_patient_phonetic', 'patient_search_index', ['field_name', 'phonetic_hash'], ['field_name', 'phonetic_hash']),
+    ('idx_phone_normalized', 'phone_search_index', ['field_name', 'normalized_hash'], ['normalized_hash', 'field_name']),
+    ('idx_phone_last_four', 'phone_search_index', ['field_name', 'last_four_hash'], ['last_four_hash', 'field_name']),
+    ('idx_phone_area_code', 'phone_search_index', ['field_name', 'area_code_hash'], ['area_code_hash', 'field_name']),
+    ('idx_date_full', 'date_search_index', ['field_name', 'date_hash'], ['field_name', 'date_hash']),
+]
+
+
+def upgrade():
+    for name, table, _, columns in INDICES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, unique=False, postgresql_include=['patient_uid'])
+
+
+def downgrade():
+    for name, table, columns, _ in INDICES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, unique=False)
@@ -0,0 +1,53 @@
+"""job claiming and notify
+
+Revision ID: 7d2f0b6c9e41
+Revises: 4c1e7a9d2b35
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f0b6c9e41'
+down_revision = '4c1e7a9d2b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('job', sa.Column('claimed_by', sa.String(), nullable=True))
+    op.add_column('job', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'idx_job_claim', 'job', ['category', 'priority', 'uid'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    # wake job executors (LISTEN beak_jobs) when a job becomes runnable
+    op.execute("""
+        CREATE OR REPLACE FUNCTION beak_notify_job() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('beak_jobs', COALESCE(NEW.category, ''));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER job_notify_insert AFTER INSERT ON job
+        FOR EACH ROW WHEN (NEW.status = 'pending')
+        EXECUTE FUNCTION beak_notify_job();
+    """)
+    op.execute("""
+        CREATE TRIGGER job_notify_update AFTER UPDATE OF status ON job
+        FOR EACH ROW WHEN (NEW.status = 'pending' AND OLD.status IS DISTINCT FROM NEW.status)
+        EXECUTE FUNCTION beak_notify_job();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS job_notify_update ON job")
+    op.execute("DROP TRIGGER IF EXISTS job_notify_insert ON job")
+    op.execute("DROP FUNCTION IF EXISTS beak_notify_job()")
+    op.drop_index('idx_job_claim', table_name='job')
+    op.drop_column('job', 'claimed_at')
+    op.drop_column('job', 'claimed_by')
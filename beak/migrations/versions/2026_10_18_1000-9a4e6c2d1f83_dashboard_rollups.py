@@ -0,0 +1,73 @@
+"""dashboard rollups
+
+Revision ID: 9a4e6c2d1f83
+Revises: 7d2f0b6c9e41
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4e6c2d1f83'
+down_revision = '7d2f0b6c9e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analytics_status_count',
+        sa.Column('laboratory_uid', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('department_uid', sa.String(), nullable=False),
+        sa.Column('group_key', sa.String(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            'laboratory_uid', 'metric', 'department_uid', 'group_key'
+        ),
+    )
+    op.create_table(
+        'analytics_daily_count',
+        sa.Column('laboratory_uid', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('department_uid', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('group_key', sa.String(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            'laboratory_uid', 'metric', 'department_uid', 'day', 'group_key'
+        ),
+    )
+    op.create_table(
+        'analytics_turnaround',
+        sa.Column('laboratory_uid', sa.String(), nullable=False),
+        sa.Column('process', sa.String(), nullable=False),
+        sa.Column('department_uid', sa.String(), nullable=False),
+        sa.Column('analysis_uid', sa.String(), nullable=False),
+        sa.Column('end_day', sa.Date(), nullable=False),
+        sa.Column('start_day', sa.Date(), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('total', sa.BigInteger(), nullable=False),
+        sa.Column('late', sa.BigInteger(), nullable=False),
+        sa.Column('not_late', sa.BigInteger(), nullable=False),
+        sa.Column('late_days', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            'laboratory_uid', 'process', 'department_uid', 'analysis_uid',
+            'end_day', 'start_day', 'days',
+        ),
+    )
+    op.create_table(
+        'analytics_rollup_state',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('analytics_rollup_state')
+    op.drop_table('analytics_turnaround')
+    op.drop_table('analytics_daily_count')
+    op.drop_table('analytics_status_count')
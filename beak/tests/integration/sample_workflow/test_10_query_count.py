@@ -0,0 +1,99 @@
+import logging
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from beak.database.session import async_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# a page may reach loaders its first item does not
+LOADER_SLACK = 3
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _statements(app_gql, auth_data, query, field, page_size):
+    with count_statements() as statements:
+        response = await app_gql.post(
+            "/beak-gql",
+            json={"query": query, "variables": {"pageSize": page_size}},
+            headers=auth_data["headers"],
+        )
+    _data = response.json()["data"][field]
+    logger.info(f"{field} x{len(_data['items'])}: {len(statements)} statements")
+    return len(_data["items"]), len(statements)
+
+
+async def _assert_constant(app_gql, auth_data, query, field):
+    """A page of everything costs no more statements than a page of one"""
+    one, one_count = await _statements(app_gql, auth_data, query, field, 1)
+    _, many_count = await _statements(app_gql, auth_data, query, field, 100)
+    assert one == 1
+    assert many_count <= one_count + LOADER_SLACK
+
+
+@pytest.mark.asyncio
+@pytest.mark.order(110)
+async def test_sample_listing_query_count(app_gql, auth_data):
+    query = """
+      query Samples ($pageSize: Int) {
+        sampleAll(pageSize: $pageSize) {
+          items {
+            uid
+            analysisRequest { uid patient { uid } client { uid } }
+            analysisResults {
+              uid
+              worksheetId
+              analysis { uid instruments { uid } methods { uid } }
+            }
+          }
+        }
+      }
+    """
+    await _assert_constant(app_gql, auth_data, query, "sampleAll")
+
+
+@pytest.mark.asyncio
+@pytest.mark.order(111)
+async def test_analysis_request_listing_query_count(app_gql, auth_data):
+    query = """
+      query AnalysisRequests ($pageSize: Int) {
+        analysisRequestAll(pageSize: $pageSize) {
+          items {
+            uid
+            patient { uid }
+            samples { uid sampleId }
+          }
+        }
+      }
+    """
+    await _assert_constant(app_gql, auth_data, query, "analysisRequestAll")
+
+
+@pytest.mark.asyncio
+@pytest.mark.order(112)
+async def test_client_listing_query_count(app_gql, auth_data):
+    query = """
+      query Clients ($pageSize: Int) {
+        clientAll(pageSize: $pageSize) {
+          items { uid contacts { uid } }
+        }
+      }
+    """
+    await _assert_constant(app_gql, auth_data, query, "clientAll")
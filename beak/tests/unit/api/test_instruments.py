@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import beak.lims  # noqa: F401 the endpoints import in app order
+from beak.api.deps import get_current_user
+from beak.api.rest.api_v1.endpoints import instruments as endpoints
+
+
+def _client(user):
+    app = FastAPI()
+    app.include_router(endpoints.instruments)
+    app.dependency_overrides[get_current_user] = lambda: user
+    return TestClient(app)
+
+
+def _user(**kwargs):
+    return SimpleNamespace(
+        **{"uid": "u1", "is_active": True, "is_superuser": False, **kwargs}
+    )
+
+
+def test_links_need_an_authenticated_user(monkeypatch):
+    monkeypatch.setattr(endpoints.instrument_manager, "status", lambda uid=None: [])
+
+    assert _client(None).get("/instruments/links").status_code == 401
+    assert _client(_user(is_active=False)).get("/instruments/links").status_code == 401
+    assert _client(_user()).get("/instruments/links").status_code == 200
+
+
+def test_restart_is_for_administrators(monkeypatch):
+    restarted = []
+
+    async def restart(uid):
+        restarted.append(uid)
+        return True
+
+    async def has_group(user_uid, group):
+        return group in groups
+
+    groups = []
+    monkeypatch.setattr(endpoints.instrument_manager, "restart", restart)
+    monkeypatch.setattr(
+        endpoints.instrument_manager, "status", lambda uid=None: [{"uid": uid}]
+    )
+    monkeypatch.setattr(endpoints, "has_group", has_group)
+
+    client = _client(_user())
+    assert client.post("/instruments/links/l1/restart").status_code == 403
+    assert restarted == []
+
+    groups.append(endpoints.FGroup.LAB_MANAGER)
+    response = client.post("/instruments/links/l1/restart")
+    assert response.status_code == 200 and response.json() == {"uid": "l1"}
+    assert restarted == ["l1"]
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from beak.api.gql.loaders import Loaders
+from beak.api.gql.notification.types import ActivityStreamType, UnknownObjectType
+from beak.apps.analytics.services import ReportMetaService
+
+SAMPLES = [
+    SimpleNamespace(uid=f"s{i}", analysis_request_uid=f"ar{i % 3}") for i in range(9)
+]
+
+
+class _SampleService:
+    calls: list[tuple] = []
+
+    async def get_by_uids(self, uids):
+        self.calls.append(("get_by_uids", sorted(uids)))
+        return [sample for sample in SAMPLES if sample.uid in uids]
+
+    async def get_all(self, **kwargs):
+        self.calls.append(("get_all", kwargs))
+        ((field, values),) = kwargs.items()
+        field = field.removesuffix("__in")
+        return [sample for sample in SAMPLES if getattr(sample, field) in values]
+
+
+async def test_lookups_of_one_request_are_batched():
+    _SampleService.calls = []
+    loaders = Loaders()
+    by_uid = loaders.by_uid(_SampleService)
+
+    found = await asyncio.gather(*(by_uid.load(uid) for uid in ["s2", "s0", "x", "s2"]))
+    assert [s.uid if s else None for s in found] == ["s2", "s0", None, "s2"]
+
+    by_request = loaders.by_field(_SampleService, "analysis_request_uid")
+    grouped = await asyncio.gather(*(by_request.load(f"ar{i}") for i in range(4)))
+    assert [[s.uid for s in samples] for samples in grouped] == [
+        ["s0", "s3", "s6"],
+        ["s1", "s4", "s7"],
+        ["s2", "s5", "s8"],
+        [],
+    ]
+    assert loaders.by_uid(_SampleService) is by_uid
+    assert [call[0] for call in _SampleService.calls] == ["get_by_uids", "get_all"]
+
+    # cached for the rest of the request
+    await by_uid.load("s0")
+    assert len(_SampleService.calls) == 2
+
+
+async def test_stream_action_objects_load_in_one_query(monkeypatch):
+    calls = []
+
+    def _report(uid):
+        values = {
+            "uid": uid,
+            "period_start": datetime(2025, 1, 1),
+            "period_end": datetime(2025, 1, 31),
+            "date_column": "date_received",
+            "report_type": "line_listing",
+        }
+        return SimpleNamespace(uid=uid, marshal_simple=lambda exclude: values)
+
+    async def get_by_uids(self, uids, session=None):
+        calls.append(sorted(uids))
+        return [_report(uid) for uid in uids if uid != "gone"]
+
+    monkeypatch.setattr(ReportMetaService, "get_by_uids", get_by_uids)
+    info = SimpleNamespace(context=SimpleNamespace(loaders=Loaders()))
+    streams = [
+        ActivityStreamType(uid=f"a{i}", action_object_type=kind, action_object_uid=uid)
+        for i, (kind, uid) in enumerate(
+            [("report", "r1"), ("report", "r2"), ("report", "gone"), ("shipment", "x")]
+        )
+    ]
+
+    objects = await asyncio.gather(
+        *(ActivityStreamType.action_object(stream, info) for stream in streams)
+    )
+    assert [obj.uid for obj in objects[:2]] == ["r1", "r2"]
+    assert isinstance(objects[2], UnknownObjectType)
+    assert objects[2].message == "report gone not found"
+    assert isinstance(objects[3], UnknownObjectType)
+    assert calls == [["gone", "r1", "r2"]]
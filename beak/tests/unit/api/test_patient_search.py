@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from beak.api.gql.patient.query import PatientQuery
+from beak.apps.patient.services import PatientService
+
+
+async def test_substring_matches_follow_the_index_hits(monkeypatch):
+    scanned = []
+
+    async def high_performance_search(self, **kwargs):
+        return [SimpleNamespace(uid="p1")]
+
+    async def substring_search(self, text, limit=50, after_uid=None):
+        scanned.append((text, limit, after_uid))
+        if after_uid:
+            return [SimpleNamespace(uid="p1"), SimpleNamespace(uid="p3")], None
+        return [SimpleNamespace(uid="p2"), SimpleNamespace(uid="p1")], "p2"
+
+    monkeypatch.setattr(
+        PatientService, "high_performance_search", high_performance_search
+    )
+    monkeypatch.setattr(PatientService, "substring_search", substring_search)
+    search = PatientQuery.patient_search
+
+    page = await search(None, None, "nath")
+    assert [p.uid for p in page.items] == ["p1"]
+    assert not page.page_info.has_next_page
+    assert scanned == []
+
+    page = await search(None, None, "nath", substring=True, limit=2)
+    assert [p.uid for p in page.items] == ["p1", "p2"]
+    assert page.page_info.has_next_page and page.page_info.end_cursor == "p2"
+    assert scanned == [("nath", 2, None)]
+
+    # the next page only has the scan matches, still without the index hits
+    page = await search(None, None, "nath", substring=True, limit=2, after_uid="p2")
+    assert [p.uid for p in page.items] == ["p3"]
+    assert not page.page_info.has_next_page
+    assert page.page_info.end_cursor is None
+    assert scanned[-1] == ("nath", 2, "p2")
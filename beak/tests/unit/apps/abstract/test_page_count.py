@@ -0,0 +1,109 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import Column, String, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy_mixins import SmartQueryMixin
+from sqlalchemy_mixins.utils import classproperty
+
+from beak.apps.abstract.repository import BaseRepository
+
+PLAN_ROWS = 42
+
+
+class CountBase(DeclarativeBase, SmartQueryMixin):
+    __abstract__ = True
+
+    query = classproperty(lambda cls: select(cls))
+
+
+class CountModel(CountBase):
+    __tablename__ = "count_model"
+    uid = Column(String, primary_key=True)
+    name = Column(String)
+
+
+class CountRepository(BaseRepository[CountModel]):
+    def __init__(self):
+        super().__init__(CountModel)
+
+
+@pytest_asyncio.fixture
+async def statements(monkeypatch):
+    """Page CountModel rows on sqlite, recording the SQL each page runs"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    executed = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute", retval=True)
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+        if statement.startswith("EXPLAIN (FORMAT JSON)"):
+            # answer the estimate the way Postgres' planner would
+            statement = f"SELECT '[{{\"Plan\": {{\"Plan Rows\": {PLAN_ROWS}}}}}]'"
+        return statement, parameters
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(CountBase.metadata.create_all)
+            await conn.execute(
+                CountModel.__table__.insert(),
+                [{"uid": f"{i:03d}", "name": f"n{i:03d}"} for i in range(10)],
+            )
+        monkeypatch.setattr(
+            BaseRepository,
+            "async_session",
+            async_sessionmaker(engine, expire_on_commit=False),
+        )
+        yield executed
+    finally:
+        await engine.dispose()
+
+
+def _counted(executed):
+    return any("count(" in statement.lower() for statement in executed)
+
+
+def _estimated(executed):
+    return any(statement.startswith("EXPLAIN") for statement in executed)
+
+
+@pytest.mark.parametrize("sort_by", [["name"], ["uid"]])
+async def test_first_page_is_counted_exactly(statements, sort_by):
+    page = await CountRepository().paginate(3, None, None, None, sort_by)
+    assert page.total_count == 10
+    assert _counted(statements) and not _estimated(statements)
+
+
+@pytest.mark.parametrize("sort_by", [["name"], ["uid"]])
+async def test_deeper_pages_skip_the_count(statements, sort_by):
+    repository = CountRepository()
+    first = await repository.paginate(3, None, None, None, sort_by)
+    statements.clear()
+
+    page = await repository.paginate(
+        3, first.page_info.end_cursor, None, None, sort_by
+    )
+    assert [item.uid for item in page.items] == ["003", "004", "005"]
+    assert page.total_count == PLAN_ROWS
+    assert _estimated(statements) and not _counted(statements)
+
+
+async def test_legacy_uid_cursor_pages_skip_the_count(statements):
+    # cursors handed out before keyset paging are bare uids
+    page = await CountRepository().paginate(3, "002", None, None, ["uid"])
+    assert [item.uid for item in page.items] == ["003", "004", "005"]
+    assert page.total_count == PLAN_ROWS
+    assert _estimated(statements) and not _counted(statements)
+
+
+async def test_count_mode_argument_wins(statements):
+    repository = CountRepository()
+    page = await repository.paginate(3, None, None, None, ["name"], count_mode="none")
+    assert page.total_count == -1
+    assert not _counted(statements) and not _estimated(statements)
+
+    page = await repository.paginate(
+        3, page.page_info.end_cursor, None, None, ["name"], count_mode="exact"
+    )
+    assert page.total_count == 10
+    assert _counted(statements)
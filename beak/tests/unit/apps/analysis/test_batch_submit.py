@@ -0,0 +1,457 @@
+import copy
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from beak.apps.abstract.entity import EventListenable
+from beak.apps.analysis.enum import ResultState, SampleState
+from beak.apps.analysis.workflow import batch as batch_module
+from beak.apps.analysis.workflow.analysis_result import AnalysisResultWorkFlow
+from beak.apps.analysis.workflow.batch import (
+    ABX_ORGANISM_KEYWORD,
+    BatchResultSubmitWorkFlow,
+)
+from beak.apps.analysis.workflow.sample import SampleWorkFlow
+from beak.apps.notification.enum import NotificationObject
+from beak.apps.worksheet.enum import WorkSheetState
+from beak.apps.worksheet.workflow import WorkSheetWorkFlow
+
+SNAPSHOT = {"detection_limits": [{"lower_limit": 1, "upper_limit": 1000}]}
+SUBMITTER = SimpleNamespace(uid="user-1")
+
+
+class Store:
+    """In-memory tables shared by the fake services.
+
+    Reads hand out copies so that only what the workflow writes back (bulk
+    mappings or per-row saves) ends up in the store.
+    """
+
+    def __init__(self, results, samples, worksheets):
+        self.results = {r.uid: r for r in results}
+        self.samples = {s.uid: s for s in samples}
+        self.worksheets = {w.uid: w for w in worksheets}
+        self.statements: list[tuple[str, str, list[dict]]] = []
+        self.transactions = 0
+
+    @staticmethod
+    def apply(rows: dict, mappings: list[dict]) -> None:
+        for mapping in mappings:
+            for key, value in mapping.items():
+                setattr(rows[mapping["uid"]], key, value)
+
+
+class FakeResultService:
+    def __init__(self, store: Store):
+        self.store = store
+
+    async def get(self, uid):
+        return copy.copy(self.store.results[uid])
+
+    async def get_all(self, **filters):
+        rows = list(self.store.results.values())
+        for key, value in filters.items():
+            attr, _, op = key.partition("__")
+            if op == "in":
+                rows = [r for r in rows if getattr(r, attr) in value]
+            else:
+                rows = [r for r in rows if getattr(r, attr) == value]
+        return [copy.copy(r) for r in rows]
+
+    async def build_snapshots(self, results):
+        return {r.uid: SNAPSHOT for r in results}
+
+    async def snapshot(self, results):
+        for r in results:
+            self.store.results[r.uid].metadata_snapshot = SNAPSHOT
+
+    async def submit(self, uid, datum, submitter):
+        result = self.store.results[uid]
+        BatchResultSubmitWorkFlow._apply_submit(result, datum, submitter, "now")
+        return copy.copy(result)
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.store.transactions += 1
+        yield "session"
+
+    async def bulk_update_with_mappings(self, mappings, session=None):
+        assert session == "session"
+        self.store.statements.append(("analysis_result", "update", mappings))
+        self.store.apply(self.store.results, mappings)
+
+    async def table_insert(self, table, mappings, session=None):
+        assert session == "session"
+        self.store.statements.append((table.name, "insert", mappings))
+
+
+class FakeSampleService:
+    def __init__(self, store: Store, result_service: FakeResultService):
+        self.store = store
+        self.result_service = result_service
+
+    async def get(self, uid):
+        return copy.copy(self.store.samples[uid])
+
+    async def get_by_uids(self, uids):
+        return [copy.copy(self.store.samples[uid]) for uid in uids]
+
+    async def get_analysis_results(self, uid):
+        return await self.result_service.get_all(sample_uid=uid)
+
+    async def submit(self, uid, submitted_by):
+        sample = self.store.samples[uid]
+        sample.status = SampleState.AWAITING
+        sample.submitted_by_uid = submitted_by.uid
+        sample.updated_by_uid = submitted_by.uid
+        return copy.copy(sample)
+
+    async def change_status(self, uid, status, updated_by_uid=None):
+        self.store.samples[uid].status = status
+
+    async def bulk_update_with_mappings(self, mappings, session=None):
+        assert session == "session"
+        self.store.statements.append(("sample", "update", mappings))
+        self.store.apply(self.store.samples, mappings)
+
+
+class FakeWorksheetService:
+    def __init__(self, store: Store, result_service: FakeResultService):
+        self.store = store
+        self.result_service = result_service
+
+    async def get(self, uid):
+        return copy.copy(self.store.worksheets[uid])
+
+    async def get_by_uids(self, uids):
+        return [copy.copy(self.store.worksheets[uid]) for uid in uids]
+
+    async def get_analysis_results(self, uid):
+        return await self.result_service.get_all(worksheet_uid=uid), []
+
+    async def submit(self, uid, submitter):
+        worksheet = self.store.worksheets[uid]
+        worksheet.state = WorkSheetState.AWAITING
+        worksheet.submitted_by_uid = submitter.uid
+        return copy.copy(worksheet)
+
+    async def change_state(self, uid, state, updated_by_uid):
+        self.store.worksheets[uid].state = state
+
+    async def bulk_update_with_mappings(self, mappings, session=None):
+        assert session == "session"
+        self.store.statements.append(("worksheet", "update", mappings))
+        self.store.apply(self.store.worksheets, mappings)
+
+
+def _result(
+    uid, sample_uid, status=ResultState.PENDING, worksheet_uid=None, keyword="glu"
+):
+    return SimpleNamespace(
+        uid=uid,
+        sample_uid=sample_uid,
+        worksheet_uid=worksheet_uid,
+        keyword=keyword,
+        status=status,
+        result=None,
+        method_uid=None,
+        laboratory_instrument_uid=None,
+        submitted_by_uid=None,
+        updated_by_uid=None,
+        date_submitted=None,
+        metadata_snapshot=None,
+        laboratory_uid="lab-1",
+        sample=SimpleNamespace(sample_type=SimpleNamespace(name="Blood")),
+    )
+
+
+def _sample(uid, status=SampleState.RECEIVED, qc_set_uid=None):
+    return SimpleNamespace(
+        uid=uid,
+        status=status,
+        qc_set_uid=qc_set_uid,
+        laboratory_uid="lab-1",
+        submitted_by_uid=None,
+        date_submitted=None,
+        updated_by_uid=None,
+    )
+
+
+def _worksheet(uid, state=WorkSheetState.PENDING):
+    return SimpleNamespace(
+        uid=uid, state=state, submitted_by_uid=None, laboratory_uid="lab-1"
+    )
+
+
+def mixed_store() -> Store:
+    """
+    s1: both results submitted -> awaiting, on worksheet w1 -> awaiting, qc set
+    s2: one of two results submitted -> stays received, w2 stays pending
+    s3: already resulted result -> skipped, untouched
+    s4: abx organism result -> result submitted, sample left alone
+    s5: remaining result cancelled -> awaiting, w3 already awaiting
+    """
+    return Store(
+        results=[
+            _result("r1", "s1", worksheet_uid="w1"),
+            _result("r2", "s1", worksheet_uid="w1"),
+            _result("r3", "s2", worksheet_uid="w2"),
+            _result("r4", "s2", worksheet_uid="w2"),
+            _result("r5", "s3", status=ResultState.RESULTED),
+            _result("r6", "s4", keyword=ABX_ORGANISM_KEYWORD),
+            _result("r7", "s5", worksheet_uid="w3"),
+            _result("r8", "s5", status=ResultState.CANCELLED),
+            _result("r9", "s6", status=ResultState.RESULTED, worksheet_uid="w3"),
+        ],
+        samples=[
+            _sample("s1", qc_set_uid="qc-1"),
+            _sample("s2", qc_set_uid="qc-2"),
+            _sample("s3"),
+            _sample("s4"),
+            _sample("s5"),
+            _sample("s6", status=SampleState.AWAITING),
+        ],
+        worksheets=[
+            _worksheet("w1"),
+            _worksheet("w2"),
+            _worksheet("w3", state=WorkSheetState.AWAITING),
+        ],
+    )
+
+
+DATA = [
+    {"uid": "r1", "result": 0},
+    {"uid": "r2", "result": 5, "method_uid": "beak_ast"},
+    {"uid": "r3", "result": 5},
+    {"uid": "r5", "result": 5},
+    {"uid": "r6", "result": "E. coli"},
+    {"uid": "r7", "result": 5, "laboratory_instrument_uid": "inst-1"},
+]
+
+
+@pytest.fixture
+def events(monkeypatch):
+    tracked = []
+    published = []
+
+    async def publish(channel, message):
+        published.append(channel)
+
+    monkeypatch.setattr(
+        EventListenable,
+        "put_out_changes",
+        staticmethod(lambda *args: tracked.append(args)),
+    )
+    monkeypatch.setattr(batch_module.broadcast, "publish", publish)
+    return SimpleNamespace(tracked=tracked, published=published)
+
+
+def _batch_workflow(store: Store) -> tuple[BatchResultSubmitWorkFlow, list]:
+    result_service = FakeResultService(store)
+    qc_sets = []
+
+    async def qc_submit(uid, submitter):
+        qc_sets.append(uid)
+
+    async def saved_streams(uids):
+        return []
+
+    workflow = BatchResultSubmitWorkFlow()
+    workflow.analysis_result_service = result_service
+    workflow.sample_service = FakeSampleService(store, result_service)
+    workflow.worksheet_service = FakeWorksheetService(store, result_service)
+    workflow.activity_stream_service = SimpleNamespace(
+        table_insert=result_service.table_insert, get_by_uids=saved_streams
+    )
+    workflow.qc_set_workflow = SimpleNamespace(submit=qc_submit)
+    return workflow, qc_sets
+
+
+async def _per_row_submit(store: Store, data: list[dict]) -> None:
+    """The per-row results_submitter the batch workflow replaced"""
+    result_service = FakeResultService(store)
+    result_wf = AnalysisResultWorkFlow()
+    result_wf.analysis_result_service = result_service
+    sample_wf = SampleWorkFlow()
+    sample_wf.sample_service = FakeSampleService(store, result_service)
+    worksheet_wf = WorkSheetWorkFlow()
+    worksheet_wf.worksheet_service = FakeWorksheetService(store, result_service)
+
+    _skipped, submitted = await result_wf.submit(data, SUBMITTER)
+    for result in submitted:
+        if result.keyword == ABX_ORGANISM_KEYWORD:
+            continue
+        try:
+            await sample_wf.submit(result.sample_uid, submitted_by=SUBMITTER)
+        except Exception:
+            await sample_wf.revert(result.sample_uid, by_uid=SUBMITTER.uid)
+        if result.worksheet_uid:
+            try:
+                await worksheet_wf.submit(result.worksheet_uid, submitter=SUBMITTER)
+            except Exception:
+                await worksheet_wf.revert(result.worksheet_uid, by_uid=SUBMITTER.uid)
+
+
+def _states(store: Store) -> dict:
+    return {
+        "results": {
+            uid: (
+                r.status,
+                r.submitted_by_uid,
+                r.method_uid,
+                r.laboratory_instrument_uid,
+            )
+            for uid, r in store.results.items()
+        },
+        "samples": {uid: s.status for uid, s in store.samples.items()},
+        "worksheets": {uid: w.state for uid, w in store.worksheets.items()},
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_writes_a_mixed_batch_with_one_statement_per_table(events):
+    store = mixed_store()
+    workflow, qc_sets = _batch_workflow(store)
+
+    returned = await workflow.submit(DATA, SUBMITTER)
+
+    # skipped results come first, untouched
+    assert [r.uid for r in returned] == ["r5", "r1", "r2", "r3", "r6", "r7"]
+    assert returned[0].status == ResultState.RESULTED
+
+    assert store.transactions == 1
+    assert [(table, kind) for table, kind, _ in store.statements] == [
+        ("analysis_result", "update"),
+        ("sample", "update"),
+        ("worksheet", "update"),
+        ("result_mutation", "insert"),
+        ("activity_stream", "insert"),
+    ]
+    results, samples, worksheets, mutations, streams = [
+        mappings for _, _, mappings in store.statements
+    ]
+
+    assert [m["uid"] for m in results] == ["r1", "r2", "r3", "r6", "r7"]
+    assert all(m["status"] == ResultState.RESULTED for m in results)
+    assert all(m["submitted_by_uid"] == SUBMITTER.uid for m in results)
+    assert all(m["metadata_snapshot"] == SNAPSHOT for m in results)
+    by_uid = {m["uid"]: m for m in results}
+    assert by_uid["r1"]["result"] == "< 1"
+    assert by_uid["r2"]["method_uid"] is None
+    assert by_uid["r7"]["laboratory_instrument_uid"] == "inst-1"
+
+    # s2 still has a pending result and s3/s4 are not rolled up
+    assert {m["uid"]: m["status"] for m in samples} == {
+        "s1": SampleState.AWAITING,
+        "s5": SampleState.AWAITING,
+    }
+    assert all(m["submitted_by_uid"] == SUBMITTER.uid for m in samples)
+    # w2 keeps a pending result, w3 was already awaiting
+    assert [(m["uid"], m["state"]) for m in worksheets] == [
+        ("w1", WorkSheetState.AWAITING)
+    ]
+
+    assert [(m["result_uid"], m["before"], m["after"]) for m in mutations] == [
+        ("r1", 0, "< 1")
+    ]
+    assert mutations[0]["created_by_uid"] == SUBMITTER.uid
+
+    assert sorted(
+        (m["action_object_type"], m["action_object_uid"]) for m in streams
+    ) == sorted(
+        [(NotificationObject.ANALYSIS_RESULT, uid) for uid in by_uid]
+        + [(NotificationObject.SAMPLE, "s1"), (NotificationObject.SAMPLE, "s5")]
+        + [(NotificationObject.WORKSHEET, "w1")]
+    )
+    assert all(m["verb"] == "submitted" for m in streams)
+
+    # only the submitted sample's qc set follows, after commit
+    assert qc_sets == ["qc-1"]
+    assert sorted((table, uid) for table, uid, *_ in events.tracked) == sorted(
+        [("analysis_result", uid) for uid in by_uid]
+        + [("sample", "s1"), ("sample", "s5"), ("worksheet", "w1")]
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_matches_the_per_row_workflow(events):
+    batch_store = mixed_store()
+    workflow, _ = _batch_workflow(batch_store)
+    await workflow.submit(DATA, SUBMITTER)
+
+    per_row_store = mixed_store()
+    await _per_row_submit(per_row_store, DATA)
+
+    assert _states(batch_store) == _states(per_row_store)
+
+
+@pytest.mark.asyncio
+async def test_samples_roll_up_once_every_result_is_in(events):
+    store = mixed_store()
+    workflow, _ = _batch_workflow(store)
+
+    await workflow.submit([{"uid": "r3", "result": 1}], SUBMITTER)
+    assert store.samples["s2"].status == SampleState.RECEIVED
+    assert store.worksheets["w2"].state == WorkSheetState.PENDING
+
+    store.statements.clear()
+    await workflow.submit([{"uid": "r4", "result": 1}], SUBMITTER)
+    assert store.samples["s2"].status == SampleState.AWAITING
+    assert store.worksheets["w2"].state == WorkSheetState.AWAITING
+    assert [m["uid"] for m in store.statements[1][2]] == ["s2"]
+
+    # the same batch submitted twice is skipped as a whole
+    store.statements.clear()
+    returned = await workflow.submit([{"uid": "r4", "result": 1}], SUBMITTER)
+    assert [r.uid for r in returned] == ["r4"]
+    assert store.statements == []
+
+
+@pytest.mark.asyncio
+async def test_refused_sample_and_worksheet_revert_to_their_implied_state(events):
+    store = Store(
+        results=[
+            _result("r1", "s1", worksheet_uid="w1"),
+            _result("r2", "s1", status=ResultState.RETRACTED),
+            _result("r3", "s2", status=ResultState.APPROVED, worksheet_uid="w1"),
+        ],
+        # a sample that cannot be submitted, on a worksheet that cannot either
+        samples=[_sample("s1", status=SampleState.EXPECTED), _sample("s2")],
+        worksheets=[_worksheet("w1", state=WorkSheetState.APPROVED)],
+    )
+    workflow, qc_sets = _batch_workflow(store)
+
+    await workflow.submit([{"uid": "r1", "result": 5}], SUBMITTER)
+
+    samples = next(m for table, _, m in store.statements if table == "sample")
+    worksheets = next(m for table, _, m in store.statements if table == "worksheet")
+    assert samples == [
+        {
+            "uid": "s1",
+            "status": SampleState.AWAITING,
+            "submitted_by_uid": None,
+            "date_submitted": None,
+            "updated_by_uid": SUBMITTER.uid,
+        }
+    ]
+    assert [(m["uid"], m["state"]) for m in worksheets] == [
+        ("w1", WorkSheetState.PENDING)
+    ]
+    streams = next(m for table, _, m in store.statements if table == "activity_stream")
+    assert [m["action_object_type"] for m in streams] == [
+        NotificationObject.ANALYSIS_RESULT
+    ]
+    assert qc_sets == []
+
+    per_row_store = Store(
+        results=[
+            _result("r1", "s1", worksheet_uid="w1"),
+            _result("r2", "s1", status=ResultState.RETRACTED),
+            _result("r3", "s2", status=ResultState.APPROVED, worksheet_uid="w1"),
+        ],
+        samples=[_sample("s1", status=SampleState.EXPECTED), _sample("s2")],
+        worksheets=[_worksheet("w1", state=WorkSheetState.APPROVED)],
+    )
+    await _per_row_submit(per_row_store, [{"uid": "r1", "result": 5}])
+    assert _states(store) == _states(per_row_store)
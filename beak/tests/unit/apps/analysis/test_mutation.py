@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+from beak.apps.analysis.mutation import compile_rules, mutate_results
+
+SNAPSHOT = {
+    "correction_factors": [
+        {"instrument_uid": "inst-1", "method_uid": "meth-1", "factor": 2}
+    ],
+    "specifications": [
+        {
+            "min_warn": 5,
+            "min_report": 0,
+            "min": 1,
+            "max": 90,
+            "max_warn": 100,
+            "max_report": 100,
+            "warn_values": "positive,reactive",
+            "warn_report": "REACTIVE",
+        }
+    ],
+    "detection_limits": [{"lower_limit": 1, "upper_limit": 1000}],
+    "uncertainties": [{"min": 10, "max": 50, "value": 2}],
+}
+
+
+def _result(uid, value, instrument_uid="inst-1"):
+    return SimpleNamespace(
+        uid=uid,
+        result=value,
+        metadata_snapshot=SNAPSHOT,
+        laboratory_instrument_uid=instrument_uid,
+        method_uid="meth-1",
+    )
+
+
+def test_rules_are_compiled_once():
+    assert compile_rules(dict(SNAPSHOT)) is compile_rules(SNAPSHOT)
+
+
+def test_batch_applies_rules_in_order():
+    results = [
+        _result("a", 10),  # x2 -> 20 -> uncertainty
+        _result("b", 80),  # x2 -> 160 -> max warn
+        _result("c", 1),  # x2 -> 2 -> min warn -> 0 -> below detection limit
+        _result("d", 80, instrument_uid="inst-2"),  # no correction factor
+        _result("e", "positive"),
+        _result("f", "negative"),
+    ]
+    mutations = mutate_results(results)
+
+    assert [r.result for r in results] == [
+        "20 +/- 2",
+        100,
+        "< 1",
+        80,
+        "REACTIVE",
+        "negative",
+    ]
+    by_result = {}
+    for mutation in mutations:
+        by_result.setdefault(mutation["result_uid"], []).append(
+            (mutation["before"], mutation["after"])
+        )
+    assert by_result == {
+        "a": [(10, 20), (20, "20 +/- 2")],
+        "b": [(80, 160), (160, 100)],
+        "c": [(1, 2), (2, 0), (0, "< 1")],
+        "e": [("positive", "REACTIVE")],
+    }
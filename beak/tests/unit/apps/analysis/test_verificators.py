@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from beak.apps.analysis import utils
+from beak.apps.user.services import UserService
+
+
+class _Session:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+async def test_last_listed_verification_wins(monkeypatch):
+    rows = [("r1", "u1"), ("r2", "u2"), ("r1", "u3"), ("r3", "gone")]
+    looked_up = []
+
+    async def get_by_uids(self, uids):
+        looked_up.append(sorted(uids))
+        return [SimpleNamespace(uid=uid) for uid in uids if uid != "gone"]
+
+    monkeypatch.setattr(utils, "async_session", lambda: _Session(rows))
+    monkeypatch.setattr(UserService, "get_by_uids", get_by_uids)
+
+    verifiers = await utils.get_last_verificators(["r1", "r2", "r3", "r4"])
+
+    assert {uid: user and user.uid for uid, user in verifiers.items()} == {
+        "r1": "u3",
+        "r2": "u2",
+        "r3": None,
+    }
+    # the users of all results are fetched at once
+    assert looked_up == [["gone", "u2", "u3"]]
+    assert await utils.get_last_verificators([]) == {}
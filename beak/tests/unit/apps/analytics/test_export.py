@@ -0,0 +1,110 @@
+import csv
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import DateTime, Integer, String
+
+from beak.apps.analytics.enum import ReportFormat
+from beak.apps.analytics.export import ReportExportError, write_chunks
+from beak.utils.hipaa_fields import EncryptedPHI
+
+COLUMNS = ["Sample Id", "Result", "Date Received"]
+
+
+async def _chunks(*chunks):
+    for rows in chunks:
+        yield COLUMNS, rows
+
+
+async def test_csv_chunks_are_appended_under_one_header(tmp_path):
+    path = str(tmp_path / "report.csv")
+    progress = []
+
+    async def on_progress(rows, chunks):
+        progress.append((rows, chunks))
+
+    written = await write_chunks(
+        _chunks(
+            [("S-1", "12", datetime(2025, 1, 1, 8, 30))],
+            [("S-2", None, None), ("S-3", "< 40", None)],
+        ),
+        path,
+        on_progress=on_progress,
+    )
+
+    with open(path, newline="") as f:
+        lines = list(csv.reader(f))
+    assert written == 3
+    assert progress == [(1, 1), (3, 2)]
+    assert lines == [
+        COLUMNS,
+        ["S-1", "12", "2025-01-01 08:30:00"],
+        ["S-2", "", ""],
+        ["S-3", "< 40", ""],
+    ]
+
+
+async def test_failed_export_leaves_no_file(tmp_path):
+    path = str(tmp_path / "report.csv")
+
+    async def failing():
+        yield COLUMNS, [("S-1", "12", None)]
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        await write_chunks(failing(), path)
+    assert os.listdir(tmp_path) == []
+
+
+async def test_parquet_types_come_from_the_query_columns(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "report.parquet")
+    columns = ["Sample Id", "Result", "Age", "Date Received", "Legacy"]
+
+    async def chunks():
+        # every typed column is empty in the first chunk
+        yield columns, [("S-1", None, None, None, None)]
+        yield columns, [
+            ("S-2", "12", 40, datetime(2025, 1, 1, 8, 30), 7),
+            ("S-3", "< 40", None, None, None),
+        ]
+
+    written = await write_chunks(
+        chunks(),
+        path,
+        ReportFormat.PARQUET,
+        column_types={
+            "Sample Id": String(),
+            "Result": EncryptedPHI(1000),
+            "Age": Integer(),
+            "Date Received": DateTime(),
+        },
+    )
+
+    table = pq.read_table(path)
+    assert written == 3 and table.num_rows == 3
+    assert [str(field.type) for field in table.schema] == [
+        "string",
+        "string",
+        "int64",
+        "timestamp[us]",
+        "string",
+    ]
+    assert table.column("Date Received").to_pylist()[1] == datetime(2025, 1, 1, 8, 30)
+    # untyped columns empty in the first chunk take later values as text
+    assert table.column("Legacy").to_pylist() == [None, "7", None]
+
+
+async def test_parquet_values_that_do_not_fit_fail_the_export(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "report.parquet")
+
+    with pytest.raises(ReportExportError):
+        await write_chunks(
+            _chunks([("S-1", "12", "not a date")]),
+            path,
+            ReportFormat.PARQUET,
+            column_types={"Date Received": DateTime()},
+        )
+    assert os.listdir(tmp_path) == []
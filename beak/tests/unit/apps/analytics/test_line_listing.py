@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+from beak.apps.analysis.entities.analysis import Sample
+from beak.apps.analytics import EntityAnalyticsInit, tasks
+from beak.apps.analytics.enum import ReportState
+from beak.apps.analytics.sources import generic
+from beak.apps.job.enum import JobState
+from beak.utils import encryption
+from beak.utils.encryption import encrypt_phi, encrypt_pii
+
+
+def test_encrypted_columns_follow_the_column_types():
+    analytics = EntityAnalyticsInit(Sample)
+
+    assert analytics.encrypted_columns("date_received") == {
+        "First Name",
+        "Last Name",
+        "Date Of Birth",
+        "Result",
+    }
+
+
+async def test_rows_keep_values_stored_before_encryption(monkeypatch):
+    logged = []
+    monkeypatch.setattr(encryption, "log_exception", logged.append)
+    columns = ["Sample Id", "First Name", "Result"]
+    rows = [
+        ("S-1", encrypt_pii("Jane"), encrypt_phi("12")),
+        ("S-2", "Old", "< 40"),
+        ("S-3", None, encrypt_phi("12")),
+    ]
+
+    decrypted = await generic.decrypt_rows(columns, rows, {"First Name", "Result"})
+
+    assert decrypted == [
+        ("S-1", "Jane", "12"),
+        ("S-2", "Old", "< 40"),
+        ("S-3", None, "12"),
+    ]
+    # legacy plaintext is not mistaken for a corrupt ciphertext
+    assert logged == []
+
+
+def test_period_column_must_be_a_date_column():
+    analytics = EntityAnalyticsInit(Sample)
+    analytics.check_date_column("date_published")
+
+    for column in ("date_publishd", "sample_id", "date_received; --"):
+        with pytest.raises(ValueError):
+            analytics.check_date_column(column)
+        with pytest.raises(ValueError):
+            analytics.line_listing_types(column)
+
+
+async def test_report_with_a_bad_period_column_fails(monkeypatch):
+    calls = []
+    report = SimpleNamespace(
+        uid="r1",
+        status=ReportState.PENDING,
+        report_type="line_listing",
+        temp="reports/r1",
+        period_start="2025-01-01",
+        period_end="2025-01-31",
+        sample_states="received",
+        date_column="date_publishd",
+        analyses=[],
+        created_by="user",
+    )
+
+    class Recorder:
+        def __getattr__(self, name):
+            async def record(*args, **kwargs):
+                calls.append((name, args, kwargs))
+                if name == "get":
+                    return SimpleNamespace(uid="j1", job_id="r1", data={})
+
+            return record
+
+    class Reports(Recorder):
+        async def get(self, **kwargs):
+            return report
+
+    async def stream(*args, **kwargs):
+        raise AssertionError("queried with an invalid column")
+        yield
+
+    monkeypatch.setattr(tasks, "JobService", Recorder)
+    monkeypatch.setattr(tasks, "ReportMetaService", Reports)
+    monkeypatch.setattr(tasks, "NotificationService", Recorder)
+    monkeypatch.setattr(tasks, "ActivityStreamService", Recorder)
+    monkeypatch.setattr(EntityAnalyticsInit, "stream_line_listing", stream)
+
+    assert await tasks.generate_report("j1") is False
+
+    statuses = [kwargs for name, _, kwargs in calls if name == "change_status"]
+    assert statuses[0]["new_status"] == JobState.RUNNING
+    assert statuses[-1]["new_status"] == JobState.FAILED
+    assert "date_publishd" in statuses[-1]["change_reason"]
+    [(_, _, final)] = [call for call in calls if call[0] == "set_final"]
+    assert final == {"location": None, "status": ReportState.FAILED}
+    assert [call[0] for call in calls][-1] == "notify"
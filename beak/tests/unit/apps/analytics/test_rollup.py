@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from beak.apps.analytics import rollup
+from beak.apps.analytics.rollup import RollupDelta, RowEvent, fold, normalize
+
+LAB = "lab-1"
+
+
+def _sample(**values):
+    return {
+        "uid": "s-1",
+        "laboratory_uid": LAB,
+        "status": "received",
+        "created_at": datetime(2025, 3, 1, 9, 0),
+        "created_by_uid": "u-1",
+        "date_received": datetime(2025, 3, 1, 10, 0),
+        "due_date": datetime(2025, 3, 20, 0, 0),
+        **values,
+    }
+
+
+def test_published_sample_contributions():
+    delta = RollupDelta()
+    delta.add_sample(
+        _sample(
+            status="published",
+            due_date=datetime(2025, 3, 20),
+            date_published=datetime(2025, 3, 13, 9, 0),
+            published_by_uid="u-2",
+        ),
+        departments=["dep-1"],
+        results=[("an-1", "dep-1"), ("an-2", None)],
+    )
+
+    assert delta.status[(LAB, "sample.status", "", "published")] == 1
+    assert delta.status[(LAB, "sample.status", "dep-1", "published")] == 1
+    publication = (LAB, "sample.publication", "", date(2025, 3, 13), "u-2")
+    assert delta.daily[publication] == 1
+    # "late" as the live dashboard queries define it: due_date > date_published
+    assert delta.status[(LAB, "sample.laggard", "dep-1", "total")] == 1
+    assert delta.status[(LAB, "sample.laggard", "dep-1", "10 - 20")] == 1
+
+    # 11 days 23 hours: 11 whole days, 6 days to the due date
+    tail = (date(2025, 3, 13), date(2025, 3, 1), 11)
+    key = (LAB, "received_to_published", "", "", *tail)
+    assert delta.turnaround[key] == [1, 1, 0, 6]
+    for dept, analysis_uid in (("", "an-1"), ("dep-1", "an-1"), ("", "an-2")):
+        key = (LAB, "received_to_published", dept, analysis_uid, *tail)
+        assert delta.turnaround[key] == [1, 1, 0, 6]
+    assert (LAB, "received_to_published", "dep-1", "an-2", *tail) not in (
+        delta.turnaround
+    )
+
+
+def test_batch_of_events_folds_to_one_transition():
+    row = _sample(status="awaiting", date_submitted=datetime(2025, 3, 2))
+    events = [
+        RowEvent("after-update", {"status": "received"}, {"status": "awaiting"}),
+        RowEvent(
+            "after-update",
+            {"date_submitted": None},
+            {"date_submitted": datetime(2025, 3, 2)},
+        ),
+    ]
+    initial, final = fold(events, row)
+    assert initial["status"] == "received" and initial["date_submitted"] is None
+    assert final == row
+
+    delta = RollupDelta()
+    delta.add_sample(initial, ["dep-1"], sign=-1)
+    delta.add_sample(final, ["dep-1"])
+    rows = delta.status_rows()
+    assert {(r["department_uid"], r["group_key"], r["count"]) for r in rows} == {
+        ("", "awaiting", 1),
+        ("", "received", -1),
+        ("dep-1", "awaiting", 1),
+        ("dep-1", "received", -1),
+    }
+    # registration did not change: its -1/+1 pair cancels out
+    assert delta.daily_rows() == []
+
+
+def test_inserted_then_updated_row_is_counted_once():
+    # insert payloads are marshalled
+    inserted = normalize(
+        {
+            **_sample(status="expected"),
+            "created_at": "2025-03-01T09:00:00",
+            "due_date": "",
+        }
+    )
+    events = [
+        RowEvent("after-insert", {}, inserted),
+        RowEvent("after-update", {"status": "expected"}, {"status": "received"}),
+    ]
+    initial, final = fold(events, row=None)
+    assert initial is None
+    assert final["status"] == "received" and final["due_date"] is None
+    assert final["created_at"] == datetime(2025, 3, 1, 9, 0)
+
+
+class _RollupSession:
+    """Answers the rebuild lock and built_at lookups, refuses the rebuild"""
+
+    def __init__(self, locked, built_at=None):
+        self.locked = locked
+        self.built_at = built_at
+        self.statements = []
+        self.committed = False
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql)
+        if "pg_try_advisory_xact_lock" in sql:
+            assert params == {"key": rollup.ROLLUP_REBUILD_LOCK}
+            return SimpleNamespace(scalar=lambda: self.locked)
+        if "analytics_rollup_state.built_at" in sql:
+            return SimpleNamespace(scalar=lambda: self.built_at)
+        raise AssertionError(f"rebuilt the rollups: {sql}")
+
+    async def commit(self):
+        self.committed = True
+
+
+def _use_session(monkeypatch, session):
+    @asynccontextmanager
+    async def async_session():
+        yield session
+
+    monkeypatch.setattr(rollup, "async_session", async_session)
+    monkeypatch.setitem(rollup._READY, "built", False)
+
+
+async def test_rebuild_skips_while_another_replica_holds_the_lock(monkeypatch):
+    session = _RollupSession(locked=False)
+    _use_session(monkeypatch, session)
+
+    assert await rollup.rebuild_rollups() is False
+    assert len(session.statements) == 1
+    assert not session.committed
+
+
+async def test_rebuild_skips_rollups_rebuilt_moments_ago(monkeypatch):
+    built_at = rollup.timenow_dt() - timedelta(minutes=5)
+    session = _RollupSession(locked=True, built_at=built_at)
+    _use_session(monkeypatch, session)
+
+    assert await rollup.rebuild_rollups() is False
+    assert len(session.statements) == 2
+    assert not session.committed
+    assert await rollup.rollups_ready()
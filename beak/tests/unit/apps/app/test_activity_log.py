@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from beak.apps.app import services, writer
+from beak.apps.app.services import APPActivityLogService
+from beak.apps.app.writer import ActivityLogWriter
+from beak.lims.middleware import appactivity
+from beak.lims.middleware.appactivity import APIActivityLogMiddleware
+
+
+class _Service:
+    batches: list[list[dict]] = []
+
+    async def bulk_insert(self, logs):
+        self.batches.append(list(logs))
+
+
+async def test_rows_are_written_in_batches(monkeypatch):
+    _Service.batches = []
+    monkeypatch.setattr(writer, "APPActivityLogService", _Service)
+    log_writer = ActivityLogWriter(max_queued=10, batch_size=4, flush_interval=0.05)
+
+    await log_writer.start()
+    accepted = [log_writer.log({"path": f"/{i}"}) for i in range(12)]
+    await asyncio.sleep(0.1)
+    await log_writer.stop()
+
+    # the queue holds 10, the two beyond are dropped rather than waited for
+    assert accepted.count(False) == log_writer.dropped == 2
+    assert [len(batch) for batch in _Service.batches] == [4, 4, 2]
+
+
+async def test_bad_rows_do_not_cost_the_batch(monkeypatch):
+    written = []
+
+    class _Failing:
+        async def bulk_insert(self, logs):
+            if any(log.get("bad") for log in logs):
+                raise ValueError("value too long")
+            written.extend(log["path"] for log in logs)
+
+    monkeypatch.setattr(writer, "APPActivityLogService", _Failing)
+    await ActivityLogWriter()._write(
+        [{"path": "/1"}, {"path": "/2", "bad": True}, {"path": "/3"}]
+    )
+
+    assert written == ["/1", "/3"]
+
+
+async def test_long_values_are_cut_to_their_columns(monkeypatch):
+    inserted = []
+
+    async def get_system_daemon():
+        return type("User", (), {"uid": "daemon"})
+
+    async def table_insert(table, rows):
+        inserted.extend(rows)
+
+    monkeypatch.setattr(services, "get_system_daemon", get_system_daemon)
+    service = APPActivityLogService()
+    monkeypatch.setattr(service.repository, "table_insert", table_insert)
+
+    await service.bulk_insert(
+        [{"path": "/" + "p" * 300, "user_agent": "a" * 600, "body": "b" * 1000}]
+    )
+
+    (row,) = inserted
+    assert (len(row["path"]), len(row["user_agent"])) == (255, 512)
+    assert len(row["body"]) == 1000 and row["created_by_uid"] == "daemon"
+
+
+def _app(**options):
+    app = FastAPI()
+    app.add_middleware(APIActivityLogMiddleware, body_limit=16, **options)
+
+    @app.get("/report")
+    async def report():
+        chunks = (b"%PDF-1.4" + bytes(1024) for _ in range(64))
+        return StreamingResponse(chunks, media_type="application/pdf")
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    return app
+
+
+async def _call(monkeypatch, app, method, path, **kwargs):
+    logged = []
+    monkeypatch.setattr(
+        appactivity, "activity_log_writer", type("W", (), {"log": logged.append})
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        response = await client.request(method, path, **kwargs)
+    return response, logged
+
+
+async def test_binary_responses_stream_through_uncaptured(monkeypatch):
+    response, logged = await _call(monkeypatch, _app(), "GET", "/report")
+
+    assert len(response.content) == 64 * 1032
+    assert logged[0]["response_body"] == f"[binary body, {64 * 1032} bytes]"
+
+
+async def test_bodies_are_truncated_and_sampled(monkeypatch):
+    payload = {"name": "x" * 100}
+    response, logged = await _call(
+        monkeypatch, _app(), "POST", "/echo", json=payload
+    )
+    assert response.json() == payload
+    assert logged[0]["body"].startswith('{"name":"xxxxxxx... [truncated')
+    assert logged[0]["response_body"].endswith("[truncated, 111 in total]")
+
+    _, logged = await _call(
+        monkeypatch, _app(sampling={"/echo": 0}), "POST", "/echo", json=payload
+    )
+    assert logged[0]["body"] == logged[0]["response_body"] == "Not sampled"
+    assert logged[0]["response_code"] == 200
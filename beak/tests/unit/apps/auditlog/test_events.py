@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from beak.apps.auditlog import events
+from beak.apps.auditlog.services import AuditLogService
+
+
+def _update(uid, before, after, user_uid=None):
+    return {
+        "action": "after-update",
+        "table_name": "analysis_result",
+        "metadata": {
+            "uid": uid,
+            "state_before": before,
+            "state_after": after,
+            "extras": {"user_uid": user_uid},
+        },
+    }
+
+
+async def test_changes_of_a_dispatch_are_written_with_one_insert(monkeypatch):
+    monkeypatch.setattr(events.settings, "DOCUMENT_STORAGE", False)
+    monkeypatch.setattr(events.settings, "AUDITABLE_ENTITIES", [])
+    inserts = []
+
+    async def bulk_insert(self, entries):
+        inserts.append(entries)
+
+    monkeypatch.setattr(AuditLogService, "bulk_insert", bulk_insert)
+
+    await events.auditlog_tracker(
+        [
+            _update("r1", {"result": "1"}, {"result": "2"}, user_uid="u1"),
+            _update("r2", {"result": "1"}, {"result": "1"}),
+            {"action": "after-insert", "table_name": "sample", "metadata": {"uid": "s"}},
+            _update("r3", {"updated_by_uid": "u1"}, {"updated_by_uid": "u2"}),
+        ]
+    )
+
+    assert len(inserts) == 1
+    entries = inserts[0]
+    assert [e["target_uid"] for e in entries] == ["r1", "r3"]
+    assert [e["user_uid"] for e in entries] == ["u1", "u2"]
+    assert {e["action"] for e in entries} == {events.UPDATE}
+
+
+async def test_nothing_to_audit_writes_nothing(monkeypatch):
+    async def bulk_insert(self, entries):
+        raise AssertionError("wrote an empty batch")
+
+    monkeypatch.setattr(AuditLogService, "bulk_insert", bulk_insert)
+    await events.auditlog_tracker([_update("r1", {"a": 1}, {"a": 1})])
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """bulk_insert recording what it wrote, failing for entries in fail"""
+    monkeypatch.setattr(events.settings, "DOCUMENT_STORAGE", False)
+    monkeypatch.setattr(events.settings, "AUDITABLE_ENTITIES", [])
+    monkeypatch.setattr(
+        events.settings, "AUDIT_LOG_SPOOL", str(tmp_path / "spool" / "audit.jsonl")
+    )
+    monkeypatch.setattr(events, "AUDIT_RETRY_DELAY", 0)
+    written, attempts, fail = [], [], set()
+
+    async def bulk_insert(self, entries):
+        attempts.append([e["target_uid"] for e in entries])
+        if fail & {e["target_uid"] for e in entries}:
+            raise ValueError("cannot insert")
+        written.extend(e["target_uid"] for e in entries)
+
+    monkeypatch.setattr(AuditLogService, "bulk_insert", bulk_insert)
+    return written, attempts, fail
+
+
+def _spooled():
+    try:
+        with open(events.settings.AUDIT_LOG_SPOOL) as spool_file:
+            return [json.loads(line)["target_uid"] for line in spool_file]
+    except FileNotFoundError:
+        return []
+
+
+async def test_a_failing_batch_is_retried_then_written_row_by_row(store):
+    written, attempts, fail = store
+    fail.add("r2")
+
+    await events.auditlog_tracker(
+        [_update(uid, {"result": "1"}, {"result": "2"}) for uid in ["r1", "r2", "r3"]]
+    )
+
+    assert attempts[:3] == [["r1", "r2", "r3"]] * events.AUDIT_WRITE_ATTEMPTS
+    assert written == ["r1", "r3"]
+    # what still fails is kept, then written once it can be
+    assert _spooled() == ["r2"]
+    fail.clear()
+    await events.replay_spool()
+    assert written == ["r1", "r3", "r2"]
+    assert _spooled() == []
+    assert not os.path.exists(events.settings.AUDIT_LOG_SPOOL + ".replay")
+
+
+async def test_a_transient_failure_loses_nothing(store, monkeypatch):
+    written, attempts, fail = store
+    fail.add("r1")
+
+    async def recover(delay):
+        fail.clear()
+
+    # the database is back by the next attempt
+    monkeypatch.setattr(events.asyncio, "sleep", recover)
+    await events.write_entries([{"target_uid": "r1"}, {"target_uid": "r2"}])
+
+    assert len(attempts) == 2 and written == ["r1", "r2"]
+    assert _spooled() == []
+
+
+async def test_a_write_cancelled_at_shutdown_is_spooled(store, monkeypatch):
+    started = asyncio.Event()
+
+    async def bulk_insert(self, entries):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(AuditLogService, "bulk_insert", bulk_insert)
+    task = asyncio.create_task(events.write_entries([{"target_uid": "r1"}]))
+    await started.wait()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert _spooled() == ["r1"]
@@ -0,0 +1,25 @@
+import tempfile
+
+from beak.apps.impress.assets import barcode_png, logo_image
+from beak.apps.impress.barcode.engine import BeakBarCoder
+from beak.apps.impress.barcode.schema import BarCode
+
+
+def test_barcodes_are_rendered_once():
+    barcode_png.cache_clear()
+
+    png = barcode_png("S-0001")
+    assert png.startswith(b"\x89PNG")
+    assert barcode_png("S-0001") is png
+    assert barcode_png.cache_info().hits == 1
+
+
+def test_labels_are_built_from_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    labels = [BarCode(barcode=f"S-{i}", metadata=[]) for i in range(3)]
+
+    pdf = BeakBarCoder().generate(labels)
+
+    assert pdf.startswith(b"%PDF")
+    assert logo_image() is logo_image()
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+
+import pytest
+
+from beak.apps.analysis.enum import SampleState
+from beak.apps.analysis.services import analysis
+from beak.apps.analysis.services.analysis import SampleService
+from beak.apps.impress.sample import utils
+from beak.apps.impress.services import ReportImpressService
+from beak.apps.notification.services import ActivityStreamService
+
+USER = SimpleNamespace(uid="u1")
+
+
+def _sample(uid, status=SampleState.APPROVED, internal_use=False):
+    return SimpleNamespace(
+        uid=uid,
+        sample_id=f"S-{uid}",
+        status=status,
+        laboratory_uid="lab-1",
+        analysis_results=[SimpleNamespace(uid=f"r-{uid}")],
+        internal_use=internal_use,
+    )
+
+
+class _Meta:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def model_dump(self):
+        return self.kwargs
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """impress_samples with its services replaced, recording what they get"""
+    calls = {"verifiers": [], "bulk_create": [], "uploads": [], "publish": []}
+    samples = {}
+
+    async def get_all(self, uid__in):
+        return [samples[uid] for uid in reversed(uid__in) if uid in samples]
+
+    async def get_laboratory(lab_uid):
+        return SimpleNamespace(uid=lab_uid)
+
+    async def get_last_verificators(result_uids):
+        calls["verifiers"].append(result_uids)
+        return {}
+
+    async def build_impress_metadata(sample, laboratory, verifiers):
+        return {"sample_id": sample.sample_id}
+
+    async def render(meta, state):
+        if meta.kwargs["sample_id"] == "S-bad":
+            raise RuntimeError("render failed")
+        return f"pdf {meta.kwargs['sample_id']}".encode()
+
+    async def bulk_create(self, items):
+        calls["bulk_create"].append(items)
+        return [SimpleNamespace(uid=f"ri-{item.sample_uid}") for item in items]
+
+    class Minio:
+        async def put_object(self, **kwargs):
+            calls["uploads"].append(kwargs)
+
+    async def publish_many(self, to_publish, published_by):
+        calls["publish"].append([s.uid for s in to_publish])
+        return to_publish
+
+    async def stream(self, *args, **kwargs):
+        pass
+
+    monkeypatch.setattr(SampleService, "get_all", get_all)
+    monkeypatch.setattr(SampleService, "publish_many", publish_many)
+    monkeypatch.setattr(utils, "get_laboratory", get_laboratory)
+    monkeypatch.setattr(utils, "get_last_verificators", get_last_verificators)
+    monkeypatch.setattr(utils, "build_impress_metadata", build_impress_metadata)
+    monkeypatch.setattr(utils, "SampleImpressMetadata", _Meta)
+    monkeypatch.setattr(utils.pdf_renderer, "sample", render)
+    monkeypatch.setattr(ReportImpressService, "bulk_create", bulk_create)
+    monkeypatch.setattr(utils, "MinioClient", Minio)
+    monkeypatch.setattr(ActivityStreamService, "stream", stream)
+    monkeypatch.setattr(utils.settings, "OBJECT_STORAGE", True)
+    monkeypatch.setattr(utils.settings, "DOCUMENT_STORAGE", False)
+    return samples, calls
+
+
+async def test_samples_are_published_in_batches(pipeline, monkeypatch):
+    samples, calls = pipeline
+    monkeypatch.setattr(utils, "IMPRESS_BATCH_SIZE", 2)
+    for uid in ["a", "b", "c", "d"]:
+        samples[uid] = _sample(uid)
+    samples["e"] = _sample("e", status=SampleState.CANCELLED)
+
+    impressed = await utils.impress_samples(
+        [
+            {"uid": "a", "action": "publish"},
+            {"uid": "b", "action": "pre-publish"},
+            {"uid": "c", "action": "publish"},
+            {"uid": "d", "action": "re-publish"},
+            {"uid": "e", "action": "publish"},
+        ],
+        USER,
+    )
+
+    assert [s.uid for s in impressed] == ["a", "b", "c", "d"]
+    # one verifier lookup for all results, one insert and publish per batch
+    assert calls["verifiers"] == [["r-a", "r-b", "r-c", "r-d"]]
+    assert [len(items) for items in calls["bulk_create"]] == [2, 2]
+    assert calls["publish"] == [["a"], ["c", "d"]]
+    states = [item.state for items in calls["bulk_create"] for item in items]
+    assert states == [
+        "Final Report",
+        "Preliminary Report",
+        "Final Report",
+        "Final Report [Re]",
+    ]
+
+
+async def test_reports_are_stored_when_one_fails_to_render(pipeline):
+    samples, calls = pipeline
+    for uid in ["a", "bad", "c"]:
+        samples[uid] = _sample(uid)
+
+    impressed = await utils.impress_samples(
+        [{"uid": uid, "action": "publish"} for uid in ["a", "bad", "c"]], USER
+    )
+
+    assert [s.uid for s in impressed] == ["a", "c"]
+    assert [item.sample_uid for item in calls["bulk_create"][0]] == ["a", "c"]
+    assert [(u["object_name"], u["data"]) for u in calls["uploads"]] == [
+        ("S-a.pdf", b"pdf S-a"),
+        ("S-c.pdf", b"pdf S-c"),
+    ]
+    assert [u["metadata"]["impress_meta_uid"] for u in calls["uploads"]] == [
+        "ri-a",
+        "ri-c",
+    ]
+    assert calls["publish"] == [["a", "c"]]
+
+
+async def test_publish_many_posts_each_published_sample_once(monkeypatch):
+    posted = []
+    saves = []
+
+    async def save_all(self, samples):
+        saves.append(list(samples))
+        return samples
+
+    async def stream(self, *args, **kwargs):
+        pass
+
+    monkeypatch.setattr(analysis.BaseService, "save_all", save_all)
+    monkeypatch.setattr(ActivityStreamService, "stream", stream)
+    monkeypatch.setattr(
+        analysis, "post_event", lambda event, **kwargs: posted.append((event, kwargs))
+    )
+
+    samples = [_sample("a"), _sample("b", internal_use=True), _sample("c")]
+    published = await SampleService().publish_many(samples, published_by=USER)
+
+    assert len(saves) == 1 and published == samples
+    assert {s.status for s in published} == {SampleState.PUBLISHED}
+    assert {s.published_by_uid for s in published} == {"u1"}
+    assert len({s.date_published for s in published}) == 1
+    # internal use samples are not reported on
+    assert posted == [
+        ("sample-published", {"uid": "a"}),
+        ("sample-published", {"uid": "c"}),
+    ]
+    assert await SampleService().publish_many([], published_by=USER) == []
+    assert len(saves) == 1
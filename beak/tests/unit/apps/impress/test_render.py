@@ -0,0 +1,62 @@
+from beak.apps.impress.barcode.schema import BarCode, BarCodeMeta
+from beak.apps.impress.render import PDFRenderer
+from beak.apps.impress.sample.schemas import SampleImpressMetadata
+
+USER = {"username": "admin", "first_name": "Lab", "last_name": "Admin"}
+
+
+def _sample(sample_id: str) -> SampleImpressMetadata:
+    return SampleImpressMetadata(
+        sample_id=sample_id,
+        status="approved",
+        laboratory={"name": "Beak Laboratory", "address": "1 Main Road"},
+        sample_type={"name": "Whole Blood"},
+        analysis_request={
+            "patient": {"first_name": "Jane", "last_name": "Doe", "age": "42"},
+            "client": {"name": "Clinic"},
+        },
+        analysis_results=[
+            {
+                "uid": "r1",
+                "analysis": {"name": "Glucose", "unit": {"name": "mmol/L"}},
+                "result": "5.4",
+                "status": "approved",
+                "reportable": True,
+                "unit": {"name": "mmol/L"},
+                "method": {"name": "Enzymatic"},
+                "laboratory_instrument": {"name": "Analyser"},
+                "submitted_by": USER,
+                "verified_by": USER,
+            }
+        ],
+        created_by=USER,
+        received_by=USER,
+        submitted_by=USER,
+        verified_by=USER,
+        published_by=USER,
+    )
+
+
+async def test_samples_render_in_worker_processes_in_order():
+    renderer = PDFRenderer(workers=2)
+    try:
+        pdfs = await renderer.samples(
+            [(_sample("S-1"), "Final Report"), (_sample("S-2"), "Preliminary")]
+        )
+    finally:
+        renderer.shutdown()
+
+    assert len(pdfs) == 2
+    assert all(isinstance(pdf, bytes) and pdf.startswith(b"%PDF") for pdf in pdfs)
+
+
+async def test_barcodes_render_without_a_pool():
+    renderer = PDFRenderer(workers=0)
+    barcode = BarCode(
+        barcode="S-1", metadata=[BarCodeMeta(label="Client", value="Clinic")]
+    )
+
+    pdf = await renderer.barcodes([barcode])
+
+    assert renderer._executor is None
+    assert pdf.startswith(b"%PDF")
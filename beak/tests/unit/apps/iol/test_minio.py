@@ -0,0 +1,91 @@
+import io
+import os
+import uuid
+
+import pytest
+
+from beak.apps.iol.minio import MinioClient
+from beak.apps.iol.minio import client as minio_client
+from beak.apps.iol.minio.client import PART_SIZE
+
+
+class _Response(io.BytesIO):
+    def release_conn(self):
+        pass
+
+
+class LocalS3:
+    """In memory stand-in for the parts of the minio SDK the client uses"""
+
+    def __init__(self):
+        self.buckets: dict[str, dict[str, bytes]] = {}
+        self.calls: list[str] = []
+
+    def bucket_exists(self, bucket):
+        self.calls.append("bucket_exists")
+        return bucket in self.buckets
+
+    def make_bucket(self, bucket):
+        self.calls.append("make_bucket")
+        self.buckets[bucket] = {}
+
+    def put_object(self, bucket_name, object_name, data, length, part_size=0, **kw):
+        self.calls.append(f"put_object:{length}:{part_size}")
+        self.buckets[bucket_name][object_name] = data.read()
+
+    def get_object(self, bucket, object_name):
+        return _Response(self.buckets[bucket][object_name])
+
+    def remove_object(self, bucket, object_name):
+        del self.buckets[bucket][object_name]
+
+
+@pytest.fixture
+def storage():
+    # MINIO_TEST_SERVER=localhost:9000 runs these against a real S3 server
+    server = os.getenv("MINIO_TEST_SERVER")
+    if server:
+        return MinioClient(endpoint=server)
+    return MinioClient(client=LocalS3())
+
+
+async def test_bucket_is_checked_once(storage):
+    bucket = f"beak-{uuid.uuid4().hex[:8]}"
+    for i in range(3):
+        await storage.put_object(bucket, f"{i}.pdf", b"%PDF-1.4")
+
+    assert await storage.get_object(bucket, ["2.pdf", "0.pdf"]) == [b"%PDF-1.4"] * 2
+    if isinstance(storage.client, LocalS3):
+        assert storage.client.calls.count("bucket_exists") == 1
+
+
+async def test_streams_of_unknown_length_go_multipart(storage):
+    bucket = f"beak-{uuid.uuid4().hex[:8]}"
+    payload = os.urandom(1024) * 64
+
+    await storage.put_object(bucket, "report.csv", io.BytesIO(payload))
+    chunks = [
+        chunk
+        async for chunk in storage.stream_object(bucket, "report.csv", chunk_size=4096)
+    ]
+
+    assert b"".join(chunks) == payload
+    assert len(chunks) == len(payload) // 4096
+    if isinstance(storage.client, LocalS3):
+        assert f"put_object:-1:{PART_SIZE}" in storage.client.calls
+
+    await storage.remove_object(bucket, "report.csv")
+
+
+async def test_clients_share_one_thread_pool():
+    clients = [MinioClient(client=LocalS3()) for _ in range(3)]
+    bucket = f"beak-{uuid.uuid4().hex[:8]}"
+    for client in clients:
+        await client.put_object(bucket, "0.pdf", b"%PDF-1.4")
+    assert minio_client._executor is not None
+
+    minio_client.close_clients()
+    assert minio_client._executor is None
+    # a client used after shutdown starts a new pool
+    assert await clients[0].get_object(bucket, ["0.pdf"]) == [b"%PDF-1.4"]
+    minio_client.close_clients()
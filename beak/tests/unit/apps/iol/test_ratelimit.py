@@ -0,0 +1,107 @@
+from ipaddress import ip_network
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from redis.exceptions import ConnectionError
+from starlette.requests import Request
+
+from beak.apps.iol.redis.ratelimit import Limit, LocalRateLimiter, RateLimiter
+from beak.lims import boot
+from beak.lims.middleware.ratelimit import client_address
+
+NOW = 1_700_000_010.0  # 30s into a minute
+
+
+def _limits(user_minute=3):
+    return [
+        Limit("IP", "10.0.0.1", "Minute", 100),
+        Limit("User", "u1", "Minute", user_minute),
+    ]
+
+
+def test_denied_request_is_not_counted_in_any_scope():
+    limiter = LocalRateLimiter()
+    for _ in range(3):
+        assert limiter.hit(_limits(), NOW).allowed
+
+    decision = limiter.hit(_limits(), NOW)
+    assert not decision.allowed
+    assert decision.denied.limit.scope == "User"
+    # the IP window kept counting only the allowed requests
+    assert [usage.used for usage in decision.usages] == [3, 3]
+
+    headers = decision.headers()
+    assert headers["X-RateLimit-IP-Remaining-Minute"] == "97"
+    assert headers["X-RateLimit-User-Limit-Minute"] == "3"
+    assert headers["X-RateLimit-Type"] == "User-Minute"
+    assert headers["Retry-After"] == "30"
+
+
+def test_previous_window_is_weighted_by_its_overlap():
+    limiter = LocalRateLimiter()
+    for _ in range(3):
+        limiter.hit(_limits(), NOW)
+
+    # half way through the next minute, half of the previous 3 still count
+    decision = limiter.hit(_limits(), NOW + 60)
+    assert decision.allowed
+    assert decision.usages[1].used == 1 + 1
+
+
+class _DownRedis:
+    def register_script(self, script):
+        async def run(keys, args):
+            raise ConnectionError("Connection refused")
+
+        return run
+
+
+async def test_falls_back_to_local_limits_without_redis():
+    limiter = RateLimiter(_DownRedis())
+    decisions = [await limiter.hit(_limits(user_minute=2)) for _ in range(3)]
+    assert [decision.allowed for decision in decisions] == [True, True, False]
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_forwarded_address_is_only_believed_from_trusted_proxies():
+    proxies = [ip_network("10.0.0.0/8")]
+
+    # a client cannot pick its own address
+    assert client_address(_request("203.0.113.9", "1.2.3.4"), proxies) == "203.0.113.9"
+    assert client_address(_request("10.0.0.2", "1.2.3.4"), []) == "10.0.0.2"
+    # the last address before the trusted proxies, whatever the client sent
+    request = _request("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.5")
+    assert client_address(request, proxies) == "198.51.100.7"
+    assert client_address(_request("10.0.0.2"), proxies) == "10.0.0.2"
+
+
+def test_user_limits_apply_through_the_registered_middlewares(monkeypatch):
+    monkeypatch.setattr(boot.settings, "RATE_LIMIT_MIDDLEWARE", True)
+    monkeypatch.setattr(boot.settings, "REDIS_SERVER", None)
+    monkeypatch.setattr(boot.settings, "RATE_LIMIT_PER_MINUTE", 100)
+    monkeypatch.setattr(boot.settings, "RATE_LIMIT_USER_PER_MINUTE", 2)
+    app = FastAPI()
+    boot.register_middlewares(app)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    token = jwt.encode(
+        {"sub": "u1"}, boot.settings.SECRET_KEY, algorithm=boot.settings.ALGORITHM
+    )
+    client = TestClient(app)
+    responses = [
+        client.get("/ping", headers={"Authorization": f"Bearer {token}"})
+        for _ in range(3)
+    ]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[2].text.startswith("User rate limit exceeded")
+    # anonymous requests from the same address are only held to the IP limit
+    assert client.get("/ping").status_code == 200
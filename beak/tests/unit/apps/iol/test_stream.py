@@ -0,0 +1,87 @@
+from beak.apps.iol.analyzer.link.fsocket.astm import ASTMProtocolHandler
+from beak.apps.iol.analyzer.link.fsocket.hl7 import HL7ProtocolHandler
+from beak.apps.iol.analyzer.link.fsocket.stream import (
+    ASTMStreamParser,
+    StreamEventKind,
+)
+from beak.apps.iol.analyzer.link.utils import make_checksum
+from beak.apps.iol.analyzer.services.transformer import MessageTransformer
+
+ASTM_MESSAGE = (
+    b"H|\\^&|||COBAS^1.0|||||||P|1\r"
+    b"P|1||PAT-1\r"
+    b"O|1|SMP-001||^^^HIV\r"
+    b"R|1|^^^HIV|1200|cp/mL||N||F||||20251027\r"
+    b"L|1|N\r"
+)
+
+
+def _frame(number: int, text: bytes, end: bytes = b"\x03") -> bytes:
+    body = str(number).encode() + text + end
+    return b"\x02" + body + make_checksum(body) + b"\r\n"
+
+
+def _session() -> bytes:
+    # split mid record so the R record spans an ETB frame
+    return (
+        b"\x05"
+        + _frame(1, ASTM_MESSAGE[:70], b"\x17")
+        + _frame(2, ASTM_MESSAGE[70:])
+        + b"\x04"
+    )
+
+
+def test_astm_parser_emits_records_across_frames_and_reads():
+    parser = ASTMStreamParser()
+    events = []
+    session = _session()
+    for i in range(len(session)):
+        events.extend(parser.feed(session[i : i + 1]))
+
+    records = [e.data for e in events if e.kind == StreamEventKind.RECORD]
+    assert records == ASTM_MESSAGE.rstrip(b"\r").split(b"\r")
+    assert [e.frame_number for e in events if e.kind == StreamEventKind.FRAME] == [
+        1,
+        2,
+    ]
+    assert parser.pending == 0
+
+
+def test_astm_parser_rejects_bad_checksum_and_sequence():
+    bad = bytearray(_frame(1, b"H|\\^&\r"))
+    bad[-4:-2] = b"00"
+    events = ASTMStreamParser().feed(b"\x05" + bytes(bad))
+    assert events[-1] == (StreamEventKind.ERROR, b"invalid checksum", None)
+
+    parser = ASTMStreamParser()
+    parser.feed(_frame(1, b"H|\\^&\r"))
+    events = parser.feed(_frame(3, b"L|1|N\r"))
+    assert events[-1].kind == StreamEventKind.ERROR
+
+
+async def test_astm_handler_assembles_parsed_message():
+    handler = ASTMProtocolHandler(1, "cobas")
+    responses = []
+    for chunk in (b"\x05", *_session()[1:].partition(b"\x04")[:2]):
+        responses.append(await handler.process_data(chunk))
+
+    assert responses == ["ACK", "ACK", "ACK"]
+    [message] = handler.pop_messages()
+    assert message.raw == ASTM_MESSAGE
+    assert message.records == 5
+    parsed, separators = MessageTransformer().parse_message(ASTM_MESSAGE.decode())
+    assert message.parsed == parsed
+    assert message.separators == separators
+
+
+async def test_hl7_handler_acks_each_message():
+    block = b"\x0bMSH|^~\\&|A|B|C|D|20251027||ORU^R01|42|P|2.5\rPID|1\r\x1c\r"
+    handler = HL7ProtocolHandler(1, "hl7")
+
+    response, ack = await handler.process_data(block[:20])
+    assert (response, ack) == (None, None)
+
+    response, ack = await handler.process_data(block[20:] + block)
+    assert response == "ACK"
+    assert ack.count(b"MSA|AA|42") == 2
+    assert [m.records for m in handler.pop_messages()] == [2, 2]
@@ -0,0 +1,145 @@
+import asyncio
+from types import SimpleNamespace
+
+from beak.apps.iol.analyzer import tasks
+from beak.apps.iol.analyzer.link.fsocket.conn import SocketLink
+from beak.apps.iol.analyzer.link.schema import InstrumentConfig
+from beak.apps.iol.analyzer.services.transformer import driver_cache
+from beak.apps.iol.analyzer.tasks import InstrumentTaskManager, LinkState
+from beak.tests.unit.apps.iol.test_stream import ASTM_MESSAGE, _session
+from beak.tests.unit.apps.iol.test_transformer import DRIVER
+
+
+class FlakyLink(SocketLink):
+    def __init__(self, uid, port=4000, crash=True):
+        super().__init__(
+            InstrumentConfig(uid=uid, name=f"inst-{uid}", port=port, is_active=True),
+            emit_events=False,
+        )
+        self.crash = crash
+        self.starts = 0
+
+    async def start_server(self, trials: int = 1):
+        self.starts += 1
+        if self.crash:
+            raise ConnectionError("boom")
+        await asyncio.Event().wait()
+
+
+class FakeConnectionService:
+    def __init__(self, links):
+        self.links = links
+
+    async def get_links(self, on_message=None):
+        return list(self.links)
+
+
+async def test_crashed_link_is_restarted_with_backoff():
+    link = FlakyLink(1)
+    manager = InstrumentTaskManager(
+        FakeConnectionService([link]), restart_delay=0.01, max_restart_delay=0.02
+    )
+    await manager.refresh()
+    await asyncio.sleep(0.1)
+
+    [status] = manager.status()
+    assert link.starts > 2
+    assert status["restarts"] >= 2
+    assert status["last_error"] == "boom"
+
+    await manager.stop()
+    assert manager.status() == []
+
+
+async def test_refresh_adds_removes_and_restarts_changed_links():
+    service = FakeConnectionService(
+        [FlakyLink(1, crash=False), FlakyLink(2, crash=False)]
+    )
+    manager = InstrumentTaskManager(service)
+    await manager.refresh()
+    await asyncio.sleep(0)
+    first = manager.links["1"]
+    assert {s["uid"] for s in manager.status()} == {"1", "2"}
+    assert all(s["state"] == LinkState.RUNNING for s in manager.status())
+
+    # 2 removed, 1 unchanged, 3 added
+    service.links = [FlakyLink(1, crash=False), FlakyLink(3, crash=False)]
+    await manager.refresh()
+    assert set(manager.links) == {"1", "3"}
+    assert manager.links["1"] is first
+
+    # port of 1 changed
+    service.links = [FlakyLink(1, port=4001, crash=False), FlakyLink(3, crash=False)]
+    await manager.refresh()
+    assert manager.links["1"] is not first
+    assert first.task.cancelled()
+
+    await manager.stop()
+
+
+async def test_link_metrics_count_reads_and_nacks():
+    link = FlakyLink(1)
+    link.protocol_type = "astm"
+    await link.process(b"\x05")
+    await link.process(b"garbage\r")
+
+    metrics = link.metrics.as_dict()
+    assert metrics["reads"] == 2
+    assert metrics["bytes"] == 9
+    assert metrics["nacks"] == 1
+    assert metrics["error_rate"] == 0.5
+
+
+async def test_received_messages_are_transformed_and_stored(monkeypatch):
+    stored = []
+
+    class LabInstrumentService:
+        driver = DRIVER
+
+        async def get(self, **kwargs):
+            return SimpleNamespace(
+                uid=kwargs["uid"],
+                instrument_uid="inst-1",
+                instrument=SimpleNamespace(driver_mapping=self.driver),
+            )
+
+    class RawDataService:
+        async def create(self, values):
+            stored.append(values)
+
+    monkeypatch.setattr(tasks, "LaboratoryInstrumentService", LabInstrumentService)
+    monkeypatch.setattr(tasks, "InstrumentRawDataService", RawDataService)
+    driver_cache.clear()
+
+    link = SocketLink(
+        InstrumentConfig(
+            uid=1,
+            laboratory_instrument_uid="lab-inst-1",
+            name="cobas",
+            port=4000,
+            is_active=True,
+        ),
+        emit_events=False,
+        on_message=tasks.instrument_manager.on_message,
+    )
+    session = _session()
+    for chunk in (session[:1], session[1:-1], session[-1:]):
+        await link.process(chunk)
+
+    [values] = stored
+    assert values["laboratory_instrument_uid"] == "lab-inst-1"
+    assert values["content"] == ASTM_MESSAGE.decode()
+    assert values["is_transformed"] is True
+    assert values["transformation_error"] is None
+    assert values["transformation_attempts"] == 1
+    assert link.metrics.handler_errors == 0
+
+    # no driver: the raw message is kept with the reason it was not transformed
+    driver_cache.clear()
+    LabInstrumentService.driver = None
+    for chunk in (session[:1], session[1:-1], session[-1:]):
+        await link.process(chunk)
+
+    assert stored[-1]["is_transformed"] is False
+    assert "No driver found" in stored[-1]["transformation_error"]
+    driver_cache.clear()
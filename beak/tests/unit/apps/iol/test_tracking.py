@@ -0,0 +1,137 @@
+from beak.apps.iol.redis import tracking
+from beak.apps.iol.redis.enum import TrackableObject
+from beak.apps.iol.redis.tracking import TaskGuard
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value, ex))
+
+    def ttl(self, key):
+        self.commands.append(("ttl", key))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        replies = []
+        for command, key, *args in self.commands:
+            if command == "set":
+                self.redis.ttls[key] = args[1]
+                replies.append(True)
+            else:
+                replies.append(self.redis.ttls.get(key, -2))
+        return replies
+
+
+class _Redis:
+    def __init__(self):
+        self.ttls = {}
+        self.hashes = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        deleted = 0
+        for key in keys:
+            found = [self.ttls.pop(key, None), self.hashes.pop(key, None)]
+            deleted += found != [None, None]
+        return deleted
+
+    async def scan_iter(self, count=None, _type=None):
+        for key in list(self.hashes):
+            yield key
+
+    async def ttl(self, key):
+        return self.ttls.get(key, -1 if key in self.hashes else -2)
+
+    async def hgetall(self, key):
+        return self.hashes.get(key, {})
+
+
+def _published(monkeypatch) -> list:
+    published = []
+
+    async def publish(channel, message):
+        published.append(message)
+
+    monkeypatch.setattr(tracking.broadcast, "publish", publish)
+    return published
+
+
+async def test_many_guards_take_one_round_trip(monkeypatch):
+    published = _published(monkeypatch)
+    redis = _Redis()
+    monkeypatch.setattr(tracking.settings, "REDIS_SERVER", "redis://test")
+    monkeypatch.setattr(TaskGuard, "connect", staticmethod(lambda: redis))
+    guard = TaskGuard(ttl=60)
+
+    uids = [f"r{i}" for i in range(96)]
+    await guard.process_many(uids + ["r0"], TrackableObject.RESULT)
+    assert redis.round_trips == 1
+    assert set(redis.ttls.values()) == {60}
+    assert len(published) == 96
+
+    await guard.release_many(uids[:95], TrackableObject.RESULT)
+    assert redis.round_trips == 2
+    assert await guard.remaining(["r0", "r95"]) == {"r0": None, "r95": 60}
+
+
+async def test_guards_expire_without_redis(monkeypatch):
+    _published(monkeypatch)
+    monkeypatch.setattr(tracking.settings, "REDIS_SERVER", None)
+    now = [1000.0]
+    monkeypatch.setattr(tracking.time, "monotonic", lambda: now[0])
+    guard = TaskGuard(ttl=60)
+
+    await guard.process("w1", TrackableObject.WORKSHEET)
+    assert await guard.is_processing("w1", TrackableObject.WORKSHEET)
+    assert (await guard.remaining(["w1"]))["w1"] == 60
+
+    # the job crashed before releasing it
+    now[0] += 61
+    assert not await guard.is_processing("w1", TrackableObject.WORKSHEET)
+    assert guard._store == {}
+
+
+async def test_guarding_again_restarts_the_ttl(monkeypatch):
+    _published(monkeypatch)
+    monkeypatch.setattr(tracking.settings, "REDIS_SERVER", None)
+    now = [1000.0]
+    monkeypatch.setattr(tracking.time, "monotonic", lambda: now[0])
+    guard = TaskGuard(ttl=60)
+
+    # queued, then picked up by a job 50s later
+    await guard.process_many(["r1", "r2"], TrackableObject.RESULT)
+    now[0] += 50
+    await guard.process_many(["r1", "r2"], TrackableObject.RESULT)
+    now[0] += 50
+    assert await guard.remaining(["r1", "r2"]) == {"r1": 10, "r2": 10}
+
+
+async def test_legacy_guards_are_cleared(monkeypatch):
+    redis = _Redis()
+    monkeypatch.setattr(tracking.settings, "REDIS_SERVER", "redis://test")
+    monkeypatch.setattr(TaskGuard, "connect", staticmethod(lambda: redis))
+    redis.hashes = {
+        "r1": {"status": "processing"},
+        "s1": {"status": "processing"},
+        "other": {"status": "processing", "by": "u1"},
+        "expiring": {"status": "processing"},
+    }
+    redis.ttls = {"expiring": 30, "task-guard:r2": 60}
+
+    assert await TaskGuard().clear_legacy() == 2
+    assert set(redis.hashes) == {"other", "expiring"}
+    assert "task-guard:r2" in redis.ttls
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+from beak.apps.iol.analyzer.services.transformer import (
+    DriverCache,
+    MessageTransformer,
+    compile_driver,
+    driver_cache,
+)
+
+ASTM_MESSAGE = "\r".join(
+    [
+        "H|\\^&|||COBAS^1.0|||||||P|1",
+        "P|1||PAT-1",
+        "O|1|SMP-001||^^^HIV",
+        "R|1|^^^HIV|1200|cp/mL||N||F||||20251027",
+        "R|2|^^^HBV|Target Not Detected|||N||P||||20251027",
+        "L|1|N",
+    ]
+)
+
+DRIVER = {
+    "sample_id": {"segment": "O", "field": 2},
+    "instrument": {"segment": "H", "field": 4, "component": 1},
+    "keyword": {"segment": "R", "field": 2, "component": 4},
+    "result": {"segment": "R", "field": 3},
+    "units": {"segment": "R", "field": 4},
+    "result_date": {"segment": "R", "field": 12},
+    "result_status": {"segment": "R", "field": 8, "final_value": "F"},
+}
+
+
+def test_compiled_driver_extracts_message():
+    parsed, _ = MessageTransformer().parse_message(ASTM_MESSAGE)
+
+    extracted = compile_driver(DRIVER).extract(parsed)
+
+    assert extracted["sample_id"] == "SMP-001"
+    assert extracted["instrument"] == "COBAS"
+    assert extracted["results"] == [
+        {
+            "keyword": "HIV",
+            "result": "1200",
+            "units": "cp/mL",
+            "result_date": "20251027",
+            "is_final": True,
+        },
+        {
+            "keyword": "HBV",
+            "result": "Target Not Detected",
+            "units": None,
+            "result_date": "20251027",
+            "is_final": False,
+        },
+    ]
+    # same mapping, same compiled driver
+    assert compile_driver(dict(DRIVER)) is compile_driver(DRIVER)
+
+
+@pytest.mark.asyncio
+async def test_transform_message_resolves_driver_once():
+    calls = []
+
+    class LabInstrumentService:
+        async def get(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(
+                uid=kwargs["uid"],
+                instrument_uid="inst-1",
+                instrument=SimpleNamespace(driver_mapping=DRIVER),
+            )
+
+    driver_cache.clear()
+    transformer = MessageTransformer()
+    for _ in range(3):
+        result = await transformer.transform_message(
+            ASTM_MESSAGE,
+            "lab-inst-1",
+            lab_instrument_service=LabInstrumentService(),
+            instrument_service=object(),
+        )
+        assert result["success"] is True
+        assert result["sample_id"] == "SMP-001"
+    assert calls == [{"uid": "lab-inst-1"}]
+
+    driver_cache.on_entity_change(
+        "after-update", "instrument", {"state_after": {"driver_mapping": {}}}
+    )
+    assert driver_cache.get("lab-inst-1") is None
+
+
+def test_driver_cache_ignores_unrelated_changes():
+    cache = DriverCache()
+    cache.set("lab-inst-1", compile_driver(DRIVER))
+
+    cache.on_entity_change("after-update", "instrument", {"state_after": {"name": "x"}})
+    cache.on_entity_change("after-delete", "sample", {"uid": "s1"})
+    assert cache.get("lab-inst-1") is not None
+
+    cache.on_entity_change("after-delete", "laboratory_instrument", {"uid": "x"})
+    assert cache.get("lab-inst-1") is None
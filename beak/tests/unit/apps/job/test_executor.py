@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from beak.apps.job.enum import JobPriority, JobState
+from beak.apps.job.executor import JobExecutor, Lane
+from beak.apps.job.repository import JobRepository
+from beak.apps.job.services import JobService
+
+
+class QueueRepository:
+    """In-memory stand-in for JobRepository.claim/release."""
+
+    def __init__(self, jobs):
+        # (uid, category, action, priority)
+        self.pending = list(jobs)
+        self.released = []
+
+    async def claim(self, category, worker, limit, min_priority=None):
+        eligible = [
+            job
+            for job in self.pending
+            if job[1] == category and (min_priority is None or job[3] >= min_priority)
+        ]
+        eligible.sort(key=lambda job: -job[3])
+        claimed = eligible[:limit]
+        for job in claimed:
+            self.pending.remove(job)
+        return [(uid, action) for uid, _, action, _ in claimed]
+
+    async def release(self, uid, worker):
+        self.released.append(uid)
+
+
+@pytest.mark.asyncio
+async def test_slow_category_does_not_block_others():
+    finished = []
+    running = {"report": 0, "result": 0}
+    peak = {"report": 0, "result": 0}
+    report_gate = asyncio.Event()
+
+    def handler(category, gate=None):
+        async def run(uid):
+            running[category] += 1
+            peak[category] = max(peak[category], running[category])
+            if gate:
+                await gate.wait()
+            else:
+                await asyncio.sleep(0.01)
+            running[category] -= 1
+            finished.append(uid)
+
+        return run
+
+    jobs = [(f"rep{i}", "report", "generate", 0) for i in range(3)] + [
+        (f"res{i}", "result", "submit", 0) for i in range(6)
+    ] + [("urgent", "result", "submit", JobPriority.HIGH)]
+
+    executor = JobExecutor(
+        {
+            "report": {"generate": handler("report", report_gate)},
+            "result": {"submit": handler("result")},
+        },
+        lanes={
+            "report": Lane(slots=1, reserved=0),
+            "result": Lane(slots=2, reserved=1),
+        },
+        poll_interval=0.01,
+    )
+    executor.repository = QueueRepository(jobs)
+    executor._listen = _noop
+    executor._unlisten = _noop
+
+    await executor.start()
+    for _ in range(100):
+        if sum(uid.startswith("res") for uid in finished) == 6:
+            break
+        await asyncio.sleep(0.01)
+
+    # every result job finished while the reports were still stuck
+    assert {uid for uid in finished if uid.startswith("res")} == {
+        f"res{i}" for i in range(6)
+    }
+    assert "urgent" in finished
+    assert peak["report"] == 1
+    assert peak["result"] <= 3
+
+    report_gate.set()
+    await asyncio.sleep(0.1)
+    await executor.stop()
+    assert len(finished) == len(jobs)
+    assert sorted(executor.repository.released) == sorted(job[0] for job in jobs)
+
+
+async def _noop():
+    pass
+
+
+
+@pytest.mark.asyncio
+async def test_inline_run_and_executor_never_both_run_a_job(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE job (uid VARCHAR PRIMARY KEY, status VARCHAR,"
+                " claimed_by VARCHAR, claimed_at DATETIME, next_try DATETIME,"
+                " updated_at DATETIME)"
+            )
+        )
+        await conn.execute(
+            text("INSERT INTO job (uid, status) VALUES ('j1', :s), ('j2', :s)"),
+            {"s": JobState.PENDING},
+        )
+    monkeypatch.setattr(JobRepository, "async_session", async_sessionmaker(engine))
+    ran = []
+
+    async def handler(uid):
+        async with engine.begin() as conn:
+            claimed_by = (
+                await conn.execute(
+                    text("SELECT claimed_by FROM job WHERE uid = :uid"), {"uid": uid}
+                )
+            ).scalar()
+            await conn.execute(
+                text("UPDATE job SET status = :s WHERE uid = :uid"),
+                {"s": JobState.FINISHED, "uid": uid},
+            )
+        ran.append((uid, claimed_by.split(":")[0]))
+
+    service = JobService()
+    try:
+        # the executor claimed j1 as soon as it was committed
+        assert await service.repository.claim_one("j1", "executor")
+        assert not await service.run_inline("j1", handler)
+        # j2 is run inline, under its claim, and is not up for grabs afterwards
+        assert await service.run_inline("j2", handler)
+        assert not await service.repository.claim_one("j2", "executor")
+    finally:
+        await engine.dispose()
+
+    assert ran == [("j2", "inline")]
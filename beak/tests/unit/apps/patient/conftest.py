@@ -0,0 +1,87 @@
+import pytest_asyncio
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+import beak.lims  # noqa
+from beak.apps.abstract.repository import BaseRepository
+from beak.apps.patient.entities import Identification, Patient, PatientIdentification
+from beak.apps.patient.search_indices import (
+    DateSearchIndex,
+    PatientSearchIndex,
+    PhoneSearchIndex,
+)
+from beak.apps.patient.search_service import (
+    SearchableEncryptionService,
+    patient_index_values,
+)
+from beak.apps.setup.entities import Laboratory
+from beak.core.tenant_context import (
+    TenantContext,
+    clear_tenant_context,
+    set_tenant_context,
+)
+
+LAB_UID = "lab-1"
+TABLES = (
+    Laboratory,
+    Patient,
+    Identification,
+    PatientIdentification,
+    PatientSearchIndex,
+    PhoneSearchIndex,
+    DateSearchIndex,
+)
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class PatientDB:
+    """The patient and search index tables in an in-memory sqlite database"""
+
+    def __init__(self, session_factory):
+        self.session = session_factory
+
+    async def add(self, *patients: dict) -> list[Patient]:
+        """Insert patients (column values) and index them like PatientService"""
+        entities = [
+            Patient(
+                **{
+                    "laboratory_uid": LAB_UID,
+                    "gender": "f",
+                    "active": True,
+                    "client_patient_id": values["uid"],
+                    **values,
+                }
+            )
+            for values in patients
+        ]
+        async with self.session() as session:
+            session.add_all(entities)
+            await session.commit()
+        await SearchableEncryptionService().bulk_create_indices(
+            [patient_index_values(patient) for patient in entities]
+        )
+        return entities
+
+
+@pytest_asyncio.fixture
+async def patient_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda sync_conn: Patient.metadata.create_all(
+                    sync_conn, tables=[entity.__table__ for entity in TABLES]
+                )
+            )
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(BaseRepository, "async_session", session_factory)
+        set_tenant_context(TenantContext(laboratory_uid=LAB_UID))
+        yield PatientDB(session_factory)
+    finally:
+        clear_tenant_context()
+        await engine.dispose()
@@ -0,0 +1,101 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from beak.apps.patient import search_service
+from beak.apps.patient.repository import PatientRepository, _row_matches
+
+ROW = SimpleNamespace(
+    uid="p1",
+    first_name="Johnathan",
+    last_name="Doe",
+    email=None,
+    phone_mobile="+263 77 123 4567",
+    date_of_birth=datetime(1990, 1, 2),
+)
+
+
+def test_substring_matching():
+    assert _row_matches(ROW, {"first_name": "nath", "phone_mobile": "1234"}, False)
+    # no email to contradict the term
+    assert _row_matches(ROW, {"last_name": "doe", "email": "x@y"}, False)
+    assert not _row_matches(ROW, {"first_name": "nath", "last_name": "smith"}, False)
+    assert _row_matches(ROW, {"first_name": "nath", "last_name": "smith"}, True)
+    # text has no digits to look for in a phone number
+    assert not _row_matches(ROW, {"last_name": "zed", "phone_mobile": "zed"}, True)
+    assert _row_matches(ROW, {"date_of_birth": "1990-01"}, False)
+
+
+async def test_index_failures_do_not_fall_back_to_a_scan(monkeypatch):
+    asked = {}
+
+    async def search_ranked(self, limit=None, **kwargs):
+        asked["limit"] = limit
+        raise RuntimeError("indices missing")
+
+    async def get_all(self, **kwargs):
+        raise AssertionError("loaded every patient")
+
+    monkeypatch.setattr(
+        search_service.SearchableEncryptionService, "search_ranked", search_ranked
+    )
+    monkeypatch.setattr(PatientRepository, "get_all", get_all)
+
+    found = await PatientRepository().search_by_encrypted_fields(first_name="john")
+    assert found == []
+    assert asked["limit"] == 100
+
+
+async def _scan(text, **kwargs):
+    patients, after_uid = await PatientRepository().scan_encrypted_fields(
+        first_name=text, last_name=text, match_any=True, **kwargs
+    )
+    return [patient.uid for patient in patients], after_uid
+
+
+async def test_scan_pages_resume_after_the_last_patient(patient_db):
+    await patient_db.add(
+        *[
+            {"uid": f"p{i:02d}", "first_name": name, "last_name": "Moyo"}
+            for i, name in enumerate(
+                ["Nathan", "Ruth", "Jonathan", "Tendai", "Nathaniel", "Nat"]
+            )
+        ],
+        {
+            "uid": "p06",
+            "first_name": "Nathalie",
+            "last_name": "Moyo",
+            "active": False,
+        },
+    )
+
+    assert await _scan("nath", limit=2, batch_size=2) == (["p00", "p02"], "p02")
+    # a page ending exactly on the last patient still hands back a cursor
+    assert await _scan("nath", limit=1, after_uid="p02") == (["p04"], "p04")
+    # inactive patients are never returned
+    assert await _scan("nath", after_uid="p04") == ([], None)
+    assert await _scan("nath", batch_size=4) == (["p00", "p02", "p04"], None)
+
+
+async def test_scan_stops_after_max_rows(patient_db):
+    await patient_db.add(
+        *[
+            {"uid": f"p{i:02d}", "first_name": "Ruth", "last_name": "Moyo"}
+            for i in range(5)
+        ],
+        {"uid": "p05", "first_name": "Nathan", "last_name": "Moyo"},
+        {
+            "uid": "p06",
+            "first_name": "Ruth",
+            "last_name": "Moyo",
+            "laboratory_uid": "lab-2",
+        },
+    )
+
+    # nothing found in the budget: resume from the last patient read
+    assert await _scan("nath", max_rows=3, batch_size=2) == ([], "p02")
+    # the budget ran out on the last patient, only the next call can tell
+    assert await _scan("nath", max_rows=3, after_uid="p02") == (["p05"], "p05")
+    assert await _scan("nath", max_rows=3, after_uid="p05") == ([], None)
+    # patients of another laboratory are not read
+    ruths = ["p00", "p01", "p02", "p03", "p04"]
+    assert await _scan("ruth", max_rows=7) == (ruths, None)
@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from beak.apps.patient import search_service
+from beak.apps.patient.search_service import (
+    INDEX_HASH_COLUMNS,
+    SearchableEncryptionService,
+    build_index_rows_batch,
+)
+
+KEY = b"test-search-key"
+
+
+def _payload(i: int) -> dict:
+    return {
+        "uid": f"p{i:05d}",
+        "first_name": f"John{i}",
+        "middle_name": None,
+        "last_name": "Doe",
+        "email": f"john{i}@example.com",
+        "phone_mobile": "+263 77 123 4567",
+        "phone_home": "12",
+        "date_of_birth": "1990-01-02",
+    }
+
+
+def test_build_index_rows_shapes():
+    rows = SearchableEncryptionService(search_key=KEY).build_index_rows(_payload(1))
+
+    text_rows = rows["patient_search_index"]
+    assert [r["field_name"] for r in text_rows] == ["first_name", "last_name", "email"]
+    # every row carries all hash columns so they can go in one multi-row INSERT
+    for name, table_rows in rows.items():
+        for row in table_rows:
+            assert set(INDEX_HASH_COLUMNS[name]) <= set(row)
+            assert row["patient_uid"] == "p00001"
+
+    # too short to normalize, skipped instead of failing the insert
+    assert [r["field_name"] for r in rows["phone_search_index"]] == ["phone_mobile"]
+    assert len(rows["date_search_index"]) == 1
+
+
+def test_hashes_follow_search_key():
+    a = SearchableEncryptionService(search_key=KEY).build_index_rows(_payload(1))
+    b = SearchableEncryptionService(search_key=b"rotated").build_index_rows(
+        _payload(1)
+    )
+    assert (
+        a["patient_search_index"][0]["search_hash"]
+        != b["patient_search_index"][0]["search_hash"]
+    )
+
+
+def test_pool_matches_inline(monkeypatch):
+    monkeypatch.setattr(search_service, "POOL_MIN_BATCH", 1)
+    payloads = [_payload(i) for i in range(20)]
+    service = SearchableEncryptionService(search_key=KEY)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        pooled = asyncio.run(service.compute_index_rows(payloads, executor))
+
+    assert pooled == build_index_rows_batch(KEY, payloads)
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from beak.apps.patient.search_service import SearchableEncryptionService
+
+TERMS = {
+    "first_name": "Johnathan",
+    "phone": "077 123 4567",
+    "date_of_birth": "1990-01-02",
+}
+
+
+async def _add_patients(patient_db):
+    await patient_db.add(
+        # exact (10) + 5/4/3 prefixes + phonetic (2)
+        {"uid": "p1", "first_name": "Johnathan", "last_name": "Moyo"},
+        # 3/4 prefixes + normalized phone (10), last four (4) and area code (1)
+        {
+            "uid": "p2",
+            "first_name": "Johnny",
+            "last_name": "Moyo",
+            "phone_mobile": "+0771234567",
+        },
+        # phonetic only (2) + date of birth (8)
+        {
+            "uid": "p3",
+            "first_name": "Jonathan",
+            "last_name": "Moyo",
+            "date_of_birth": datetime(1990, 1, 2),
+        },
+        # the search name in another field is no first name match
+        {"uid": "p4", "first_name": "Mary", "last_name": "Johnathan"},
+        # last four digits only (4)
+        {
+            "uid": "p5",
+            "first_name": "Ruth",
+            "last_name": "Moyo",
+            "phone_mobile": "0999994567",
+        },
+        {
+            "uid": "p6",
+            "first_name": "Tendai",
+            "last_name": "Moyo",
+            "phone_home": "0889994567",
+        },
+    )
+
+
+async def test_candidates_are_ranked_by_summed_weight(patient_db):
+    await _add_patients(patient_db)
+    service = SearchableEncryptionService()
+
+    ranked = await service.search_ranked(**TERMS, fuzzy_match=True)
+    # one row per patient however many terms it matched, ties by uid
+    assert ranked == [("p1", 24), ("p2", 22), ("p3", 10), ("p5", 4), ("p6", 4)]
+
+    ranked = await service.search_ranked(**TERMS)
+    assert ranked == [("p1", 22), ("p2", 22), ("p3", 8), ("p5", 4), ("p6", 4)]
+
+    assert await service.search_ranked(first_name="johnathan ") == [
+        ("p1", 22),
+        ("p2", 7),
+    ]
+    assert await service.search_ranked(last_name="Johnathan") == [("p4", 22)]
+    assert await service.search_ranked(first_name="Zed") == []
+    assert await service.search_ranked() == []
+
+
+async def test_limit_keeps_the_best_candidates(patient_db):
+    await _add_patients(patient_db)
+    service = SearchableEncryptionService()
+
+    assert await service.search_ranked(**TERMS, fuzzy_match=True, limit=2) == [
+        ("p1", 24),
+        ("p2", 22),
+    ]
+    ranked = await service.search_ranked(phone="0771234567", limit=2)
+    assert ranked == [("p2", 15), ("p5", 4)]
+
+
+async def test_search_by_indices_returns_the_matched_uids(patient_db):
+    await _add_patients(patient_db)
+    service = SearchableEncryptionService()
+
+    uids = await service.search_by_indices(**TERMS, fuzzy_match=True)
+    assert uids == {"p1", "p2", "p3", "p5", "p6"}
+    assert await service.search_by_indices(first_name="Jonathan") == {"p3"}
+    assert await service.search_by_indices(date_of_birth="02/01/1990") == set()
@@ -0,0 +1,48 @@
+import pytest
+
+from beak.apps.user import caches
+from beak.apps.user.caches import (
+    LabAccess,
+    get_lab_access,
+    lab_access_tracker,
+    lab_membership_tracker,
+)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    async def _load(user_uid, laboratory_uid):
+        calls.append((user_uid, laboratory_uid))
+        return LabAccess(organization_uid="org-1")
+
+    monkeypatch.setattr(caches, "_load_lab_access", _load)
+    monkeypatch.setattr(caches, "_LAB_ACCESS_CACHE", {})
+    return calls
+
+
+async def test_access_is_loaded_once_per_user_and_lab(loads):
+    for _ in range(3):
+        access = await get_lab_access("user-1", "lab-1")
+    await get_lab_access("user-1", "lab-2")
+
+    assert access.denied is None and access.organization_uid == "org-1"
+    assert loads == [("user-1", "lab-1"), ("user-1", "lab-2")]
+
+
+async def test_changes_drop_cached_access(loads):
+    await get_lab_access("user-1", "lab-1")
+    await get_lab_access("user-2", "lab-2")
+
+    lab_access_tracker("after-update", "user", {"uid": "user-1"})
+    lab_access_tracker("after-update", "sample", {"uid": "lab-2"})
+    await get_lab_access("user-1", "lab-1")
+    await get_lab_access("user-2", "lab-2")
+    assert len(loads) == 3
+
+    lab_access_tracker("after-update", "laboratory", {"uid": "lab-2"})
+    lab_membership_tracker(user_uid="user-1", laboratory_uid="lab-1")
+    await get_lab_access("user-1", "lab-1")
+    await get_lab_access("user-2", "lab-2")
+    assert len(loads) == 5
@@ -0,0 +1,16 @@
+from beak.apps.worksheet.population import plan_positions
+
+
+def test_fresh_plate_skips_reserved_positions():
+    assert plan_positions(5, reserved=[1, 2]) == [3, 4, 5, 6, 7]
+
+
+def test_partially_filled_plate_fills_gaps_up_to_limit():
+    positions = plan_positions(10, reserved=[1], occupied=[2, 4, None], limit=6)
+    assert positions == [3, 5, 6]
+
+
+def test_full_384_plate():
+    reserved = list(range(1, 9))
+    positions = plan_positions(376, reserved=reserved, limit=384)
+    assert positions == list(range(9, 385))
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+
+from beak.utils import encryption
+from beak.utils.encryption import BulkDecryptor, encrypt_pii, plaintext_cache
+from beak.utils.hipaa_fields import EncryptedPII, bulk_decryption
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Person(Base):
+    __tablename__ = "person"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(EncryptedPII(500))
+    born = Column(EncryptedPII(500, value_type=datetime))
+
+
+def _count_decryptions(monkeypatch) -> list:
+    decrypted = []
+    decrypt_pii = encryption.hipaa_encryption.decrypt_pii
+
+    def counting(value):
+        decrypted.append(value)
+        return decrypt_pii(value)
+
+    monkeypatch.setattr(encryption.hipaa_encryption, "decrypt_pii", counting)
+    return decrypted
+
+
+async def test_entities_are_decrypted_in_one_batch(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                Person(id=1, name="2021-03-04", born=datetime(1990, 1, 2)),
+                Person(id=2, name="Jane", born=None),
+            ]
+        )
+        await session.commit()
+        # rows written before encryption came in
+        await session.execute(text("INSERT INTO person (id, name) VALUES (3, 'Old')"))
+        await session.commit()
+
+    chunks = []
+    decrypt_pii_chunk = encryption.decrypt_pii_chunk
+
+    def counting(values):
+        chunks.append(values)
+        return decrypt_pii_chunk(values)
+
+    monkeypatch.setattr(encryption, "decrypt_pii_chunk", counting)
+    async with AsyncSession(engine) as session:
+        async with bulk_decryption(session):
+            people = (await session.execute(select(Person).order_by(Person.id))).all()
+    await engine.dispose()
+
+    # "Old" is not a ciphertext, it is not decrypted
+    assert len(chunks) == 1 and len(chunks[0]) == 3
+    (one,), (two,), (old,) = people
+    # a date looking name stays a string, the date column is a datetime
+    assert one.name == "2021-03-04"
+    assert one.born == datetime(1990, 1, 2)
+    assert (two.name, two.born) == ("Jane", None)
+    assert old.name == "Old"
+
+
+async def test_batches_are_split_and_cached(monkeypatch):
+    decrypted = _count_decryptions(monkeypatch)
+    values = [encrypt_pii(f"name {i}") for i in range(5)]
+    decryptor = BulkDecryptor(workers=0, chunk_size=2)
+
+    with plaintext_cache():
+        plaintexts = await decryptor.decrypt(values + values[:2] + [None])
+        assert plaintexts == {v: f"name {i}" for i, v in enumerate(values)}
+        assert len(decrypted) == 5
+
+        again = await decryptor.decrypt(values[:3])
+        assert encryption.decrypt_pii(values[4]) == "name 4"
+    assert len(decrypted) == 5
+    assert again == {v: f"name {i}" for i, v in enumerate(values[:3])}
+
+    encryption.decrypt_pii(values[0])
+    assert len(decrypted) == 6
@@ -0,0 +1,271 @@
+import asyncio
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+
+from beak.apps.abstract.entity import EventListenable
+from beak.core import events
+from beak.core.events import EventBus, coalesce
+from beak.core.tenant_context import (
+    TenantContext,
+    get_current_lab_uid,
+    set_tenant_context,
+)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Specimen(Base, EventListenable):
+    __tablename__ = "specimen"
+
+    uid = Column(String, primary_key=True)
+    status = Column(String)
+    volume = Column(Integer)
+
+
+def _update(uid, before, after):
+    metadata = {"uid": uid, "state_before": before, "state_after": after}
+    return (
+        "entity-tracker",
+        {"action": "after-update", "table_name": "specimen", "metadata": metadata},
+    )
+
+
+def test_repeated_updates_of_a_row_are_coalesced():
+    coalesced = coalesce(
+        [
+            _update("s1", {"status": "due"}, {"status": "received"}),
+            _update("s2", {"status": "due"}, {"status": "received"}),
+            _update("s1", {"status": "received", "volume": 1}, {"volume": 2}),
+            ("sample-published", {"uid": "s1"}),
+        ]
+    )
+
+    assert [kwargs.get("metadata", {}).get("uid") for _, kwargs in coalesced] == [
+        "s1",
+        "s2",
+        None,
+    ]
+    first = coalesced[0][1]["metadata"]
+    assert first["state_before"] == {"status": "due", "volume": 1}
+    assert first["state_after"] == {"status": "received", "volume": 2}
+
+
+async def test_subscribers_run_off_the_poster(monkeypatch):
+    monkeypatch.setattr(events, "subscribers", {})
+    bus = EventBus(max_queued=2)
+    seen = []
+
+    async def on_async(uid):
+        seen.append(("async", uid))
+
+    def on_sync(uid):
+        seen.append(("sync", uid))
+
+    events.subscribe("sample-published", on_async)
+    events.subscribe("sample-published", on_sync)
+
+    bus.post([("sample-published", {"uid": "s1"})])
+    bus.post([("sample-published", {"uid": "s2"})])
+    # the dispatcher has not had a turn yet, the queue is full
+    bus.post([("sample-published", {"uid": "s3"})])
+    assert seen == []
+    await bus.stop()
+
+    assert sorted(seen) == [
+        ("async", "s1"),
+        ("async", "s2"),
+        ("sync", "s1"),
+        ("sync", "s2"),
+    ]
+    metrics = bus.metrics()
+    assert metrics["dropped"] == 1 and metrics["max_depth"] == 2
+    assert {stats["calls"] for stats in metrics["handlers"].values()} == {2}
+
+
+async def test_batch_subscribers_get_queued_transactions_at_once(monkeypatch):
+    monkeypatch.setattr(events, "batch_subscribers", {})
+    bus = EventBus()
+    calls = []
+
+    async def on_batch(events):
+        calls.append([e["metadata"]["uid"] for e in events])
+
+    events.subscribe_batch("entity-tracker", on_batch)
+    bus.post([_update("s1", {"status": "due"}, {"status": "received"})])
+    bus.post(
+        [
+            _update("s1", {"status": "received"}, {"status": "verified"}),
+            _update("s2", {"status": "due"}, {"status": "received"}),
+        ]
+    )
+    await bus.stop()
+
+    # separate transactions are not folded into each other
+    assert calls == [["s1", "s1", "s2"]]
+
+
+async def test_subscribers_run_in_the_posters_context(monkeypatch):
+    monkeypatch.setattr(events, "subscribers", {})
+    monkeypatch.setattr(events, "batch_subscribers", {})
+    bus = EventBus()
+    labs = []
+
+    async def on_async(uid):
+        labs.append(("async", uid, get_current_lab_uid()))
+
+    def on_sync(uid):
+        labs.append(("sync", uid, get_current_lab_uid()))
+
+    async def on_batch(events):
+        labs.append(("batch", [e["uid"] for e in events], get_current_lab_uid()))
+
+    events.subscribe("sample-published", on_async)
+    events.subscribe("sample-published", on_sync)
+    events.subscribe_batch("sample-published", on_batch)
+
+    async def request(lab_uid, uid):
+        set_tenant_context(TenantContext(laboratory_uid=lab_uid))
+        bus.post([("sample-published", {"uid": uid})])
+
+    await asyncio.gather(
+        asyncio.create_task(request("lab-1", "s1")),
+        asyncio.create_task(request("lab-1", "s2")),
+        asyncio.create_task(request("lab-2", "s3")),
+    )
+    await bus.stop()
+
+    assert sorted(labs, key=str) == sorted(
+        [
+            ("async", "s1", "lab-1"),
+            ("async", "s2", "lab-1"),
+            ("async", "s3", "lab-2"),
+            ("sync", "s1", "lab-1"),
+            ("sync", "s2", "lab-1"),
+            ("sync", "s3", "lab-2"),
+            # queued together, batched per tenant
+            ("batch", ["s1", "s2"], "lab-1"),
+            ("batch", ["s3"], "lab-2"),
+        ],
+        key=str,
+    )
+
+
+async def test_a_slow_subscriber_holds_up_no_one(monkeypatch):
+    monkeypatch.setattr(events, "subscribers", {})
+    monkeypatch.setattr(events, "event_bus", EventBus())
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(uid):
+        await release.wait()
+        seen.append(("slow", uid))
+
+    async def fast(uid):
+        seen.append(("fast", uid))
+
+    events.subscribe("sample-published", slow)
+    events.subscribe("sample-published", fast)
+
+    # apost_event returns once queued, without waiting for subscribers
+    await events.apost_event("sample-published", uid="s1")
+    await events.apost_event("sample-published", uid="s2")
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert seen == [("fast", "s1"), ("fast", "s2")]
+    assert events.event_bus.metrics()["running_handlers"] == 2
+
+    release.set()
+    await events.event_bus.stop()
+    assert sorted(seen) == [
+        ("fast", "s1"),
+        ("fast", "s2"),
+        ("slow", "s1"),
+        ("slow", "s2"),
+    ]
+
+
+async def test_entity_events_are_posted_once_committed(monkeypatch):
+    posted = []
+    monkeypatch.setattr(
+        "beak.apps.abstract.entity.listenable.post_events", posted.append
+    )
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        specimen = Specimen(uid="s1", status="due", volume=1)
+        session.add(specimen)
+        await session.flush()
+        specimen.status = "received"
+        await session.flush()
+        assert posted == []
+        await session.commit()
+
+        session.add(Specimen(uid="s2", status="due"))
+        await session.flush()
+        await session.rollback()
+    await engine.dispose()
+
+    assert len(posted) == 1
+    actions = [kwargs["action"] for _, kwargs in posted[0]]
+    assert actions == ["after-insert", "after-update"]
+    # only the attribute that was set is diffed
+    update = posted[0][1][1]["metadata"]
+    assert update["state_before"] == {"status": "due"}
+    assert update["state_after"] == {"status": "received"}
+
+
+async def test_entity_changes_are_not_dropped_when_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(events, "batch_subscribers", {})
+    monkeypatch.setattr(events, "subscribers", {})
+    bus = EventBus(max_queued=1)
+    audited, published = [], []
+
+    async def on_batch(events):
+        audited.extend(e["metadata"]["uid"] for e in events)
+
+    async def on_published(uid):
+        published.append(uid)
+
+    events.subscribe_batch("entity-tracker", on_batch)
+    events.subscribe("sample-published", on_published)
+
+    # as a subscriber committing would: the queue cannot be waited on
+    token = events._dispatching.set(True)
+    try:
+        for uid in ["s1", "s2", "s3"]:
+            bus.post([_update(uid, {"status": "due"}, {"status": "received"})])
+        bus.post([("sample-published", {"uid": "s4"})])
+    finally:
+        events._dispatching.reset(token)
+    await bus.stop()
+
+    assert sorted(audited) == ["s1", "s2", "s3"]
+    assert published == []
+    metrics = bus.metrics()
+    assert metrics["overflowed"] == 2 and metrics["dropped"] == 1
+
+
+async def test_stop_gives_up_on_stuck_subscribers(monkeypatch):
+    monkeypatch.setattr(events, "subscribers", {})
+    bus = EventBus()
+    cancelled = []
+
+    async def stuck(uid):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(uid)
+            raise
+
+    events.subscribe("sample-published", stuck)
+    bus.post([("sample-published", {"uid": "s1"})])
+    await asyncio.wait_for(bus.stop(timeout=0.1), 5)
+
+    assert cancelled == ["s1"]
+    assert not bus.running
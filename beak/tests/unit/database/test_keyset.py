@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, String, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase
+
+from beak.database.keyset import (
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    keyset_names,
+    keyset_predicate,
+    parse_keyset_order,
+)
+
+
+class KeysetBase(DeclarativeBase):
+    pass
+
+
+class KeysetModel(KeysetBase):
+    __tablename__ = "keyset_model"
+    uid = Column(String, primary_key=True)
+    name = Column(String)
+    created_at = Column(DateTime)
+
+
+def test_order_appends_uid_tiebreaker():
+    order = parse_keyset_order(KeysetModel, ["-created_at", "name"])
+    assert keyset_names(order) == ["-created_at", "name", "-uid"]
+    assert keyset_names(parse_keyset_order(KeysetModel, None)) == ["uid"]
+
+
+def test_order_rejects_related_attributes():
+    assert parse_keyset_order(KeysetModel, ["analysis___name"]) is None
+    assert parse_keyset_order(KeysetModel, ["not_a_column"]) is None
+
+
+def test_cursor_round_trip():
+    order = parse_keyset_order(KeysetModel, ["-created_at", "name"])
+    values = [datetime(2024, 5, 1, 8, 30), None, "1234"]
+    cursor = encode_keyset_cursor(order, values)
+    assert decode_keyset_cursor(order, cursor) == values
+
+
+def test_legacy_uid_cursor_is_not_decoded():
+    order = parse_keyset_order(KeysetModel, ["uid"])
+    assert decode_keyset_cursor(order, "7123456789012") is None
+
+
+def test_cursor_for_other_sort_is_rejected():
+    cursor = encode_keyset_cursor(parse_keyset_order(KeysetModel, ["name"]), ["a", "1"])
+    with pytest.raises(ValueError):
+        decode_keyset_cursor(parse_keyset_order(KeysetModel, ["-name"]), cursor)
+
+
+def test_predicate_seeks_on_full_tuple():
+    order = parse_keyset_order(KeysetModel, ["name"])
+    stmt = select(KeysetModel).where(keyset_predicate(order, ["abc", "42"]))
+    sql = str(
+        stmt.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    assert "keyset_model.name > 'abc'" in sql
+    assert "keyset_model.name = 'abc' AND keyset_model.uid > '42'" in sql
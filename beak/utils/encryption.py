@@ -1,7 +1,14 @@
+import asyncio
 import base64
 import hashlib
+import logging
+import multiprocessing
 import os
-from typing import Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional, Union
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
@@ -10,6 +17,21 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from beak.core.config import settings
 from beak.utils.exception_logger import log_exception
 
+logger = logging.getLogger(__name__)
+
+# ciphertexts per pool job, smaller batches are decrypted in place
+DECRYPT_CHUNK_SIZE = 250
+# most plaintexts a plaintext_cache holds before starting over
+PLAINTEXT_CACHE_SIZE = 20_000
+
+# what encrypt_pii output starts with: a Fernet token ("gAAAAA", its version
+# byte and the high bytes of its timestamp) base64 encoded once more
+TOKEN_PREFIX = base64.urlsafe_b64encode(b"gAAAAA").decode()
+
+_plaintexts: ContextVar[Optional[dict[str, Optional[str]]]] = ContextVar(
+    "hipaa_plaintexts", default=None
+)
+
 
 def derive_key(secret_key):
     # Use a key derivation function to get a suitable encryption key
@@ -64,6 +86,7 @@ class HIPAAEncryption:
                      will use environment variable HIPAA_ENCRYPTION_KEY or
                      generate a new key.
         """
+        self._key: bytes = b""
         self._fernet = self._initialize_fernet(password)
 
     def _initialize_fernet(self, password: Optional[str] = None) -> Fernet:
@@ -96,6 +119,7 @@ class HIPAAEncryption:
                 # Environment key is already base64url-encoded, use as bytes
                 key = env_key.encode("utf-8")
 
+        self._key = key
         return Fernet(key)
 
     def encrypt_pii(self, data: Union[str, bytes, None]) -> Optional[str]:
@@ -196,7 +220,14 @@ def decrypt_pii(encrypted_data: Optional[str]) -> Optional[str]:
     Returns:
         Decrypted data as string, or None if input is None
     """
-    return hipaa_encryption.decrypt_pii(encrypted_data)
+    cache = _plaintexts.get()
+    if cache is None or encrypted_data is None:
+        return hipaa_encryption.decrypt_pii(encrypted_data)
+    if encrypted_data not in cache:
+        if len(cache) >= PLAINTEXT_CACHE_SIZE:
+            cache.clear()
+        cache[encrypted_data] = hipaa_encryption.decrypt_pii(encrypted_data)
+    return cache[encrypted_data]
 
 
 def encrypt_phi(data: Union[str, bytes, None]) -> Optional[str]:
@@ -222,4 +253,128 @@ def decrypt_phi(encrypted_data: Optional[str]) -> Optional[str]:
     Returns:
         Decrypted data as string, or None if input is None
     """
-    return hipaa_encryption.decrypt_phi(encrypted_data)
+    return decrypt_pii(encrypted_data)  # Same decryption method for both PII and PHI
+
+
+def is_encrypted(value) -> bool:
+    """Whether value looks like encrypt_pii output, without decrypting it"""
+    return isinstance(value, str) and value.startswith(TOKEN_PREFIX)
+
+
+@contextmanager
+def plaintext_cache() -> Iterator[dict[str, Optional[str]]]:
+    """
+    Decrypt each ciphertext at most once within the block.
+
+    Plaintexts are kept by ciphertext, so a changed value (new ciphertext) is
+    never served stale. Meant for one request or job, not to outlive it:
+    nested blocks share the outermost cache.
+    """
+    cache = _plaintexts.get()
+    if cache is not None:
+        yield cache
+        return
+    token = _plaintexts.set({})
+    try:
+        yield _plaintexts.get()
+    finally:
+        _plaintexts.reset(token)
+
+
+# Worker entry points: module level so they can be pickled by reference
+
+
+def _start_worker(key: bytes) -> None:
+    # SECRET_KEY may be generated per process, use the parent's key
+    hipaa_encryption._key = key
+    hipaa_encryption._fernet = Fernet(key)
+
+
+def decrypt_pii_chunk(values: list[str]) -> list[Optional[str]]:
+    return [hipaa_encryption.decrypt_pii(value) for value in values]
+
+
+class BulkDecryptor:
+    """
+    Decrypts the ciphertexts of a result set as one batch.
+
+    Each distinct ciphertext is decrypted once, skipping those already in
+    the plaintext_cache. Values that are not ciphertexts (stored before
+    encryption came in) are not decrypted at all. Batches larger than a chunk are split over a pool
+    of worker processes, started on first use. With workers=0 the chunks run
+    on the default thread pool instead: the event loop stays free but they
+    share the GIL.
+    """
+
+    def __init__(
+        self, workers: Optional[int] = None, chunk_size: int = DECRYPT_CHUNK_SIZE
+    ):
+        if workers is None:
+            workers = settings.HIPAA_DECRYPT_WORKERS
+        self.workers = max(int(workers), 0)
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_start_worker,
+                initargs=(hipaa_encryption._key,),
+            )
+            logger.info(f"Decryption pool started ({self.workers} workers)")
+        return self._executor
+
+    async def decrypt(
+        self, values: Iterable[Optional[str]]
+    ) -> dict[str, Optional[str]]:
+        """Plaintexts by ciphertext, None for those that do not decrypt"""
+        cache = _plaintexts.get()
+        plaintexts: dict[str, Optional[str]] = {}
+        todo = []
+        for value in set(values):
+            if value is None:
+                continue
+            if not is_encrypted(value):
+                plaintexts[value] = None
+            elif cache is not None and value in cache:
+                plaintexts[value] = cache[value]
+            else:
+                todo.append(value)
+
+        if len(todo) <= self.chunk_size:
+            decrypted = decrypt_pii_chunk(todo)
+        else:
+            loop = asyncio.get_running_loop()
+            chunks = [
+                todo[i : i + self.chunk_size]
+                for i in range(0, len(todo), self.chunk_size)
+            ]
+            try:
+                results = await asyncio.gather(
+                    *(
+                        loop.run_in_executor(self._pool(), decrypt_pii_chunk, chunk)
+                        for chunk in chunks
+                    )
+                )
+            except BrokenProcessPool:
+                logger.error("Decryption pool broke, it will be restarted")
+                self.shutdown(wait=False)
+                raise
+            decrypted = [plaintext for result in results for plaintext in result]
+
+        plaintexts.update(zip(todo, decrypted))
+        if cache is not None:
+            if len(cache) + len(todo) > PLAINTEXT_CACHE_SIZE:
+                cache.clear()
+            cache.update(zip(todo, decrypted))
+        return plaintexts
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+bulk_decryptor = BulkDecryptor()
@@ -3,14 +3,32 @@ HIPAA-compliant encrypted database fields for SQLAlchemy
 
 This module provides custom SQLAlchemy column types that automatically
 encrypt and decrypt sensitive data to ensure HIPAA compliance for data at rest.
+
+Loading many rows decrypts PII column by column, row by row. Repositories
+load entities inside bulk_decryption instead, which decrypts the whole
+result set in one batch off the event loop.
 """
 
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, Union
-from sqlalchemy import String, TypeDecorator
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Union
+from sqlalchemy import String, TypeDecorator, inspect
 from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from beak.utils.encryption import (
+    bulk_decryptor,
+    decrypt_phi,
+    decrypt_pii,
+    encrypt_phi,
+    encrypt_pii,
+)
 
-from beak.utils.encryption import encrypt_pii, decrypt_pii, encrypt_phi, decrypt_phi
+# ciphertexts left for bulk_decryption to decrypt, None outside of it
+_deferred: ContextVar[Optional[set[str]]] = ContextVar("deferred_pii", default=None)
 
 
 class EncryptedPIIType(TypeDecorator):
@@ -19,11 +37,18 @@ class EncryptedPIIType(TypeDecorator):
 
     Automatically encrypts data when storing to database and decrypts when retrieving.
     Uses HIPAA-compliant AES-256 encryption.
+
+    value_type is what the column holds, str or datetime: datetimes are stored
+    in ISO format and parsed back, strings are returned as they are.
     """
 
     impl = String
     cache_ok = True
 
+    def __init__(self, *args, value_type: type = str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value_type = value_type
+
     def process_bind_param(
         self, value: Optional[Union[str, datetime]], dialect: Dialect
     ) -> Optional[str]:
@@ -59,20 +84,36 @@ class EncryptedPIIType(TypeDecorator):
         Returns:
             Decrypted plaintext value (string or datetime) or None
         """
-        if value is not None:
-            decrypted_value = decrypt_pii(value)
-            if decrypted_value:
-                # Try to parse as datetime if it looks like an ISO format
-                try:
-                    if "T" in decrypted_value or "-" in decrypted_value:
-                        return datetime.fromisoformat(
-                            decrypted_value.replace("Z", "+00:00")
-                        )
-                except (ValueError, TypeError):
-                    pass
-                # Return as string if not a datetime
-                return decrypted_value
-        return value
+        if value is None:
+            return value
+        pending = _deferred.get()
+        if pending is not None:
+            # bulk_decryption decrypts it with the rest of the result set
+            pending.add(value)
+            return value
+        return self.from_plaintext(value, decrypt_pii(value))
+
+    def from_plaintext(
+        self, value: str, plaintext: Optional[str]
+    ) -> Union[str, datetime]:
+        """
+        The column value for a decrypted value.
+
+        Args:
+            value: The encrypted value from database
+            plaintext: Its decryption, None if it did not decrypt
+
+        Returns:
+            The plaintext as value_type, or value as stored if it did not decrypt
+        """
+        if plaintext is None:
+            return value
+        if self.value_type is datetime and plaintext:
+            try:
+                return datetime.fromisoformat(plaintext.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+        return plaintext
 
 
 class EncryptedPHIType(TypeDecorator):
@@ -121,6 +162,54 @@ class EncryptedPHIType(TypeDecorator):
         return value
 
 
+@lru_cache(maxsize=None)
+def _encrypted_columns(entity_class: type) -> tuple[tuple[str, EncryptedPIIType], ...]:
+    mapper = inspect(entity_class, raiseerr=False)
+    if mapper is None:
+        return ()
+    return tuple(
+        (attr.key, attr.columns[0].type)
+        for attr in mapper.column_attrs
+        if isinstance(attr.columns[0].type, EncryptedPIIType)
+    )
+
+
+@asynccontextmanager
+async def bulk_decryption(session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Decrypt the PII of the entities loaded in the block as one batch.
+
+    Inside the block EncryptedPIIType collects the values it loads instead of
+    decrypting them; on the way out bulk_decryptor decrypts them together and
+    they are set on the session's entities as if loaded decrypted. Only for
+    loading entities: plain columns selected in the block stay encrypted.
+
+        async with bulk_decryption(session):
+            patients = (await session.execute(stmt)).scalars().all()
+    """
+    if _deferred.get() is not None:
+        # the outer block decrypts
+        yield
+        return
+    pending: set[str] = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    if not pending:
+        return
+
+    plaintexts = await bulk_decryptor.decrypt(pending)
+    for entity in list(session.identity_map.values()):
+        for key, column_type in _encrypted_columns(type(entity)):
+            value = entity.__dict__.get(key)
+            if isinstance(value, str) and value in pending:
+                set_committed_value(
+                    entity, key, column_type.from_plaintext(value, plaintexts[value])
+                )
+
+
 # Convenience functions for creating encrypted columns
 def EncryptedPII(length: int = 255, **kwargs) -> EncryptedPIIType:
     """
@@ -128,7 +217,7 @@ def EncryptedPII(length: int = 255, **kwargs) -> EncryptedPIIType:
 
     Args:
         length: Maximum length of the encrypted data (default: 255)
-        **kwargs: Additional column arguments
+        **kwargs: Additional column arguments, value_type=datetime for dates
 
     Returns:
         EncryptedPIIType column
@@ -0,0 +1,115 @@
+"""
+Benchmark sample report rendering: inline on the event loop vs the render pool
+
+    PYTHONPATH=. python scripts/benchmark_impress.py --reports 200 --results 12 --workers 4
+
+"Inline" renders one report after the other on the event loop, as
+impress_samples used to. "Pool" renders through beak.apps.impress.render.
+Besides reports/second, the longest event loop stall seen by a 10ms ticker
+is reported: that is how long any other request would have waited.
+"""
+
+import argparse
+import asyncio
+import time
+
+from beak.apps.impress.render import PDFRenderer
+from beak.apps.impress.sample.engine import BeakImpress
+from beak.apps.impress.sample.schemas import SampleImpressMetadata
+
+TICK = 0.01
+
+
+def make_metadata(index: int, results: int) -> SampleImpressMetadata:
+    user = {"username": "bench", "first_name": "Bench", "last_name": "Mark"}
+    return SampleImpressMetadata(
+        sample_id=f"BNC{index:06d}",
+        status="approved",
+        laboratory={
+            "name": "Benchmark Laboratory",
+            "address": "1 Test Street",
+            "business_phone": "000",
+            "email": "lab@example.com",
+            "quality_statement": "Benchmark",
+        },
+        profiles=[{"name": "Panel"}],
+        analyses=[{"name": f"Analyte {i}", "unit": {}} for i in range(results)],
+        sample_type={"name": "Whole Blood"},
+        analysis_request={
+            "patient": {"first_name": "Jane", "last_name": "Doe", "age": "42"},
+            "client": {"name": "Benchmark Clinic"},
+            "client_request_id": f"CRID{index}",
+        },
+        analysis_results=[
+            {
+                "uid": f"{index}-{i}",
+                "analysis": {"name": f"Analyte {i}", "unit": {"name": "mg/dL"}},
+                "result": str(i * 1.5),
+                "status": "approved",
+                "reportable": True,
+                "unit": {"name": "mg/dL"},
+                "method": {"name": "Method"},
+                "laboratory_instrument": {"name": "Analyser", "lab_name": "A1"},
+                "submitted_by": user,
+                "verified_by": user,
+            }
+            for i in range(results)
+        ],
+        created_by=user,
+        received_by=user,
+        submitted_by=user,
+        verified_by=user,
+        published_by=user,
+    )
+
+
+async def _ticker(ticks: list[float]) -> None:
+    while True:
+        ticks.append(time.perf_counter())
+        await asyncio.sleep(TICK)
+
+
+async def _measure(render, reports) -> tuple[float, float]:
+    ticks: list[float] = []
+    ticker = asyncio.create_task(_ticker(ticks))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    await render(reports)
+    elapsed = time.perf_counter() - started
+    ticks.append(time.perf_counter())
+    ticker.cancel()
+    await asyncio.gather(ticker, return_exceptions=True)
+    stall = max(b - a - TICK for a, b in zip(ticks, ticks[1:]))
+    return len(reports) / elapsed, stall
+
+
+async def inline(reports) -> None:
+    for meta, state in reports:
+        BeakImpress().generate(meta, state)
+
+
+async def main(count: int, results: int, workers: int) -> None:
+    reports = [(make_metadata(i, results), "Final Report") for i in range(count)]
+
+    renderer = PDFRenderer(workers=workers)
+    # start the workers outside the measured run
+    await renderer.samples(reports[: max(workers, 1)])
+    try:
+        before = await _measure(inline, reports)
+        after = await _measure(renderer.samples, reports)
+    finally:
+        renderer.shutdown()
+
+    print(f"{count} reports, {results} results each, {workers} workers")
+    for name, (rate, stall) in (("inline", before), ("pool", after)):
+        print(f"{name:>8}: {rate:8.1f} reports/s, max loop stall {stall:8.3f}s")
+    print(f" speedup: {after[0] / before[0]:8.2f}x")
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--reports", type=int, default=200)
+    args.add_argument("--results", type=int, default=12)
+    args.add_argument("--workers", type=int, default=4)
+    opts = args.parse_args()
+    asyncio.run(main(opts.reports, opts.results, opts.workers))
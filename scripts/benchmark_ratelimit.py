@@ -0,0 +1,104 @@
+"""
+Benchmark rate limiting: per scope GET/INCR pipelines vs the sliding window script
+
+    PYTHONPATH=. python scripts/benchmark_ratelimit.py --redis redis://localhost:6379
+
+"Pipelines" replays what RateLimitMiddleware used to do for an authenticated
+request with a lab and an organization: a read pipeline then an increment
+pipeline per scope, and one more read for the response headers. "Script" is
+beak.apps.iol.redis.ratelimit.RateLimiter. Round trips are counted with
+Redis' own command statistics.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from redis import asyncio as aioredis
+
+from beak.apps.iol.redis.ratelimit import Limit, RateLimiter
+
+SCOPES = [("ip", 60, 3600), ("user", 60, 3600), ("lab", 60, 3600), ("org", 3600, 86400)]
+
+
+async def pipelines(redis, run: str, limit: int = 10**9) -> None:
+    for scope, short, long in SCOPES:
+        short_key, long_key = f"{run}:{scope}:{short}", f"{run}:{scope}:{long}"
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.get(short_key)
+            await pipe.get(long_key)
+            counts = await pipe.execute()
+        if any(int(count or 0) >= limit for count in counts):
+            return
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.incrby(short_key, 1)
+            await pipe.expire(short_key, short)
+            await pipe.incrby(long_key, 1)
+            await pipe.expire(long_key, long)
+            await pipe.execute()
+    async with redis.pipeline(transaction=True) as pipe:
+        await pipe.get(f"{run}:ip:60")
+        await pipe.get(f"{run}:ip:3600")
+        await pipe.execute()
+
+
+def script(limiter: RateLimiter, run: str, limit: int = 10**9):
+    limits = [
+        Limit(scope, run, period, limit)
+        for scope, periods in (
+            ("IP", ("Minute", "Hour")),
+            ("User", ("Minute", "Hour")),
+            ("Lab", ("Minute", "Hour")),
+            ("Org", ("Hour", "Day")),
+        )
+        for period in periods
+    ]
+    return lambda redis, _: limiter.hit(limits)
+
+
+async def _round_trips(redis) -> int:
+    stats = await redis.info("commandstats")
+    # MULTI/EXEC pipelines and EVALSHA each cost one round trip
+    return sum(
+        stats.get(f"cmdstat_{name}", {}).get("calls", 0)
+        for name in ("exec", "evalsha", "eval")
+    )
+
+
+async def _measure(redis, check, run: str, requests: int, concurrency: int):
+    await redis.config_resetstat()
+    started = time.perf_counter()
+    for offset in range(0, requests, concurrency):
+        batch = min(concurrency, requests - offset)
+        await asyncio.gather(*(check(redis, run) for _ in range(batch)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, await _round_trips(redis) / requests
+
+
+async def main(url: str, requests: int, concurrency: int) -> None:
+    redis = aioredis.from_url(url)
+    run = f"bench:{uuid.uuid4().hex[:8]}"
+    limiter = RateLimiter(redis)
+    try:
+        before = await _measure(redis, pipelines, run, requests, concurrency)
+        after = await _measure(redis, script(limiter, run), run, requests, concurrency)
+    finally:
+        keys = [key async for key in redis.scan_iter(f"*{run}*")]
+        if keys:
+            await redis.delete(*keys)
+        await redis.aclose()
+
+    print(f"{requests} requests, {concurrency} concurrent, 4 scopes")
+    for name, (rate, trips) in (("pipeline", before), ("script", after)):
+        print(f"{name:>9}: {rate:8.1f} requests/s, {trips:5.1f} round trips/request")
+    print(f"  speedup: {after[0] / before[0]:8.2f}x")
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--redis", default="redis://localhost:6379")
+    args.add_argument("--requests", type=int, default=5000)
+    args.add_argument("--concurrency", type=int, default=50)
+    opts = args.parse_args()
+    asyncio.run(main(opts.redis, opts.requests, opts.concurrency))
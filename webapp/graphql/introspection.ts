@@ -38545,18 +38545,29 @@ export default {
             "type": {
               "kind": "NON_NULL",
               "ofType": {
-                "kind": "LIST",
-                "ofType": {
+                "kind": "OBJECT",
+                "name": "PatientCursorPage",
+                "ofType": null
+              }
+            },
+            "args": [
+              {
+                "name": "afterUid",
+                "type": {
+                  "kind": "SCALAR",
+                  "name": "Any"
+                }
+              },
+              {
+                "name": "limit",
+                "type": {
                   "kind": "NON_NULL",
                   "ofType": {
-                    "kind": "OBJECT",
-                    "name": "PatientType",
-                    "ofType": null
+                    "kind": "SCALAR",
+                    "name": "Any"
                   }
                 }
-              }
-            },
-            "args": [
+              },
               {
                 "name": "queryString",
                 "type": {
@@ -38566,6 +38577,16 @@ export default {
                     "name": "Any"
                   }
                 }
+              },
+              {
+                "name": "substring",
+                "type": {
+                  "kind": "NON_NULL",
+                  "ofType": {
+                    "kind": "SCALAR",
+                    "name": "Any"
+                  }
+                }
               }
             ]
           },
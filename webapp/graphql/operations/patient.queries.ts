@@ -95,67 +95,79 @@ export type GetAllPatientsQuery = (
 
 export type SearchPatientsQueryVariables = Types.Exact<{
   queryString: Types.Scalars['String']['input'];
+  substring?: Types.InputMaybe<Types.Scalars['Boolean']['input']>;
+  limit?: Types.InputMaybe<Types.Scalars['Int']['input']>;
+  afterUid?: Types.InputMaybe<Types.Scalars['String']['input']>;
 }>;
 
 
 export type SearchPatientsQuery = (
   { __typename?: 'Query' }
-  & { patientSearch: Array<(
-    { __typename?: 'PatientType' }
-    & Pick<
-      Types.PatientType,
-      | 'uid'
-      | 'clientPatientId'
-      | 'patientId'
-      | 'firstName'
-      | 'middleName'
-      | 'lastName'
-      | 'age'
-      | 'gender'
-      | 'dateOfBirth'
-      | 'ageDobEstimated'
-      | 'phoneHome'
-      | 'phoneMobile'
-      | 'consentSms'
-      | 'countryUid'
-      | 'provinceUid'
-      | 'districtUid'
-    >
+  & { patientSearch: (
+    { __typename?: 'PatientCursorPage' }
     & {
-      client?: Types.Maybe<(
-        { __typename?: 'ClientType' }
-        & Pick<Types.ClientType, 'uid' | 'name'>
-        & { district?: Types.Maybe<(
-          { __typename?: 'DistrictType' }
-          & Pick<Types.DistrictType, 'name'>
-          & { province?: Types.Maybe<(
+      pageInfo: (
+        { __typename?: 'PageInfo' }
+        & Pick<Types.PageInfo, 'hasNextPage' | 'endCursor'>
+      ),
+      items?: Types.Maybe<Array<(
+        { __typename?: 'PatientType' }
+        & Pick<
+          Types.PatientType,
+          | 'uid'
+          | 'clientPatientId'
+          | 'patientId'
+          | 'firstName'
+          | 'middleName'
+          | 'lastName'
+          | 'age'
+          | 'gender'
+          | 'dateOfBirth'
+          | 'ageDobEstimated'
+          | 'phoneHome'
+          | 'phoneMobile'
+          | 'consentSms'
+          | 'countryUid'
+          | 'provinceUid'
+          | 'districtUid'
+        >
+        & {
+          client?: Types.Maybe<(
+            { __typename?: 'ClientType' }
+            & Pick<Types.ClientType, 'uid' | 'name'>
+            & { district?: Types.Maybe<(
+              { __typename?: 'DistrictType' }
+              & Pick<Types.DistrictType, 'name'>
+              & { province?: Types.Maybe<(
+                { __typename?: 'ProvinceType' }
+                & Pick<Types.ProvinceType, 'name'>
+              )> }
+            )> }
+          )>,
+          identifications?: Types.Maybe<Array<(
+            { __typename?: 'PatientIdentificationType' }
+            & Pick<Types.PatientIdentificationType, 'uid' | 'value' | 'identificationUid'>
+            & { identification?: Types.Maybe<(
+              { __typename?: 'IdentificationType' }
+              & Pick<Types.IdentificationType, 'uid' | 'name'>
+            )> }
+          )>>,
+          country?: Types.Maybe<(
+            { __typename?: 'CountryType' }
+            & Pick<Types.CountryType, 'uid' | 'name'>
+          )>,
+          province?: Types.Maybe<(
             { __typename?: 'ProvinceType' }
-            & Pick<Types.ProvinceType, 'name'>
-          )> }
-        )> }
-      )>,
-      identifications?: Types.Maybe<Array<(
-        { __typename?: 'PatientIdentificationType' }
-        & Pick<Types.PatientIdentificationType, 'uid' | 'value' | 'identificationUid'>
-        & { identification?: Types.Maybe<(
-          { __typename?: 'IdentificationType' }
-          & Pick<Types.IdentificationType, 'uid' | 'name'>
-        )> }
+            & Pick<Types.ProvinceType, 'uid' | 'name'>
+          )>,
+          district?: Types.Maybe<(
+            { __typename?: 'DistrictType' }
+            & Pick<Types.DistrictType, 'uid' | 'name'>
+          )>,
+        }
       )>>,
-      country?: Types.Maybe<(
-        { __typename?: 'CountryType' }
-        & Pick<Types.CountryType, 'uid' | 'name'>
-      )>,
-      province?: Types.Maybe<(
-        { __typename?: 'ProvinceType' }
-        & Pick<Types.ProvinceType, 'uid' | 'name'>
-      )>,
-      district?: Types.Maybe<(
-        { __typename?: 'DistrictType' }
-        & Pick<Types.DistrictType, 'uid' | 'name'>
-      )>,
     }
-  )> }
+  ) }
 );
 
 export type GetPatientByUidQueryVariables = Types.Exact<{
@@ -315,54 +327,65 @@ export function useGetAllPatientsQuery(options?: Omit<Urql.UseQueryArgs<never, G
   return Urql.useQuery<GetAllPatientsQuery, GetAllPatientsQueryVariables | undefined>({ query: GetAllPatientsDocument, variables: undefined, ...options });
 };
 export const SearchPatientsDocument = gql`
-    query searchPatients($queryString: String!) {
-  patientSearch(queryString: $queryString) {
-    uid
-    clientPatientId
-    patientId
-    firstName
-    middleName
-    lastName
-    age
-    gender
-    dateOfBirth
-    ageDobEstimated
-    client {
+    query searchPatients($queryString: String!, $substring: Boolean = false, $limit: Int = 50, $afterUid: String) {
+  patientSearch(
+    queryString: $queryString
+    substring: $substring
+    limit: $limit
+    afterUid: $afterUid
+  ) {
+    items {
       uid
-      name
-      district {
+      clientPatientId
+      patientId
+      firstName
+      middleName
+      lastName
+      age
+      gender
+      dateOfBirth
+      ageDobEstimated
+      client {
+        uid
         name
-        province {
+        district {
           name
+          province {
+            name
+          }
         }
       }
-    }
-    phoneHome
-    phoneMobile
-    consentSms
-    identifications {
-      uid
-      value
-      identificationUid
-      identification {
+      phoneHome
+      phoneMobile
+      consentSms
+      identifications {
+        uid
+        value
+        identificationUid
+        identification {
+          uid
+          name
+        }
+      }
+      countryUid
+      country {
+        uid
+        name
+      }
+      provinceUid
+      province {
+        uid
+        name
+      }
+      districtUid
+      district {
         uid
         name
       }
     }
-    countryUid
-    country {
-      uid
-      name
-    }
-    provinceUid
-    province {
-      uid
-      name
-    }
-    districtUid
-    district {
-      uid
-      name
+    pageInfo {
+      hasNextPage
+      endCursor
     }
   }
 }
@@ -6640,7 +6640,7 @@ export type Query = {
   patientAll: PatientCursorPage;
   patientByPatientId?: Maybe<PatientType>;
   patientByUid?: Maybe<PatientType>;
-  patientSearch: Array<PatientType>;
+  patientSearch: PatientCursorPage;
   permissionAll: Array<PermissionType>;
   permissionByUid?: Maybe<PermissionType>;
   permissionSearch: Array<PermissionType>;
@@ -7848,7 +7848,10 @@ export type QueryPatientByUidArgs = {
 
 
 export type QueryPatientSearchArgs = {
+  afterUid?: InputMaybe<Scalars['String']['input']>;
+  limit?: Scalars['Int']['input'];
   queryString: Scalars['String']['input'];
+  substring?: Scalars['Boolean']['input'];
 };
 
 
@@ -10749,7 +10752,7 @@ export type GraphCacheResolvers = {
     patientAll?: GraphCacheResolver<WithTypename<Query>, QueryPatientAllArgs, WithTypename<PatientCursorPage> | string>,
     patientByPatientId?: GraphCacheResolver<WithTypename<Query>, QueryPatientByPatientIdArgs, WithTypename<PatientType> | string>,
     patientByUid?: GraphCacheResolver<WithTypename<Query>, QueryPatientByUidArgs, WithTypename<PatientType> | string>,
-    patientSearch?: GraphCacheResolver<WithTypename<Query>, QueryPatientSearchArgs, Array<WithTypename<PatientType> | string>>,
+    patientSearch?: GraphCacheResolver<WithTypename<Query>, QueryPatientSearchArgs, WithTypename<PatientCursorPage> | string>,
     permissionAll?: GraphCacheResolver<WithTypename<Query>, Record<string, never>, Array<WithTypename<PermissionType> | string>>,
     permissionByUid?: GraphCacheResolver<WithTypename<Query>, QueryPermissionByUidArgs, WithTypename<PermissionType> | string>,
     permissionSearch?: GraphCacheResolver<WithTypename<Query>, QueryPermissionSearchArgs, Array<WithTypename<PermissionType> | string>>,
@@ -15132,7 +15135,7 @@ export type GraphCacheUpdaters = {
     patientAll?: GraphCacheUpdateResolver<{ patientAll: WithTypename<PatientCursorPage> }, QueryPatientAllArgs>,
     patientByPatientId?: GraphCacheUpdateResolver<{ patientByPatientId: Maybe<WithTypename<PatientType>> }, QueryPatientByPatientIdArgs>,
     patientByUid?: GraphCacheUpdateResolver<{ patientByUid: Maybe<WithTypename<PatientType>> }, QueryPatientByUidArgs>,
-    patientSearch?: GraphCacheUpdateResolver<{ patientSearch: Array<WithTypename<PatientType>> }, QueryPatientSearchArgs>,
+    patientSearch?: GraphCacheUpdateResolver<{ patientSearch: WithTypename<PatientCursorPage> }, QueryPatientSearchArgs>,
     permissionAll?: GraphCacheUpdateResolver<{ permissionAll: Array<WithTypename<PermissionType>> }, Record<string, never>>,
     permissionByUid?: GraphCacheUpdateResolver<{ permissionByUid: Maybe<WithTypename<PermissionType>> }, QueryPermissionByUidArgs>,
     permissionSearch?: GraphCacheUpdateResolver<{ permissionSearch: Array<WithTypename<PermissionType>> }, QueryPermissionSearchArgs>,
@@ -184,7 +184,7 @@ export const usePatientStore = defineStore('patient', {
             this.patient = undefined;
         },
 
-        async searchPatients(queryString: string): Promise<void> {
+        async searchPatients(queryString: string, substring = false, afterUid?: string): Promise<void> {
             if (!queryString) {
                 return;
             }
@@ -193,12 +193,19 @@ export const usePatientStore = defineStore('patient', {
                 this.searchQuery = queryString;
                 const result = await withClientQuery<SearchPatientsQuery, SearchPatientsQueryVariables>(
                     SearchPatientsDocument,
-                    { queryString },
+                    { queryString, substring, afterUid },
                     'patientSearch'
                 );
 
-                if (result && Array.isArray(result)) {
-                    this.patients = result as PatientType[];
+                if (result && typeof result === 'object' && 'items' in result) {
+                    const page = result as SearchPatientsQuery['patientSearch'];
+                    const patients = (page.items || []) as PatientType[];
+                    if (afterUid) {
+                        this.patients = addListsUnique(this.patients, patients, 'uid');
+                    } else {
+                        this.patients = patients;
+                    }
+                    this.patientPageInfo = page.pageInfo as PageInfo;
                 } else {
                 }
             } catch {}
@@ -6637,7 +6637,7 @@ export type Query = {
   patientAll: PatientCursorPage;
   patientByPatientId?: Maybe<PatientType>;
   patientByUid?: Maybe<PatientType>;
-  patientSearch: Array<PatientType>;
+  patientSearch: PatientCursorPage;
   permissionAll: Array<PermissionType>;
   permissionByUid?: Maybe<PermissionType>;
   permissionSearch: Array<PermissionType>;
@@ -7845,7 +7845,10 @@ export type QueryPatientByUidArgs = {
 
 
 export type QueryPatientSearchArgs = {
+  afterUid?: InputMaybe<Scalars['String']['input']>;
+  limit?: Scalars['Int']['input'];
   queryString: Scalars['String']['input'];
+  substring?: Scalars['Boolean']['input'];
 };
 
 
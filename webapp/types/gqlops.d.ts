@@ -3317,10 +3317,13 @@ export type GetAllPatientsQuery = { __typename?: 'Query', patientAll: { __typena
 
 export type SearchPatientsQueryVariables = Exact<{
   queryString: Scalars['String']['input'];
+  substring?: InputMaybe<Scalars['Boolean']['input']>;
+  limit?: InputMaybe<Scalars['Int']['input']>;
+  afterUid?: InputMaybe<Scalars['String']['input']>;
 }>;
 
 
-export type SearchPatientsQuery = { __typename?: 'Query', patientSearch: Array<{ __typename?: 'PatientType', uid: string, clientPatientId: string, patientId: string, firstName?: string | null, middleName?: string | null, lastName?: string | null, age?: number | null, gender?: string | null, dateOfBirth?: never | null, ageDobEstimated: boolean, phoneHome?: string | null, phoneMobile?: string | null, consentSms: boolean, countryUid?: string | null, provinceUid?: string | null, districtUid?: string | null, client?: { __typename?: 'ClientType', uid: string, name: string, district?: { __typename?: 'DistrictType', name?: string | null, province?: { __typename?: 'ProvinceType', name?: string | null } | null } | null } | null, identifications?: Array<{ __typename?: 'PatientIdentificationType', uid: string, value: string, identificationUid: string, identification?: { __typename?: 'IdentificationType', uid: string, name: string } | null }> | null, country?: { __typename?: 'CountryType', uid: string, name?: string | null } | null, province?: { __typename?: 'ProvinceType', uid: string, name?: string | null } | null, district?: { __typename?: 'DistrictType', uid: string, name?: string | null } | null }> };
+export type SearchPatientsQuery = { __typename?: 'Query', patientSearch: { __typename?: 'PatientCursorPage', pageInfo: { __typename?: 'PageInfo', hasNextPage: boolean, endCursor?: string | null }, items?: Array<{ __typename?: 'PatientType', uid: string, clientPatientId: string, patientId: string, firstName?: string | null, middleName?: string | null, lastName?: string | null, age?: number | null, gender?: string | null, dateOfBirth?: never | null, ageDobEstimated: boolean, phoneHome?: string | null, phoneMobile?: string | null, consentSms: boolean, countryUid?: string | null, provinceUid?: string | null, districtUid?: string | null, client?: { __typename?: 'ClientType', uid: string, name: string, district?: { __typename?: 'DistrictType', name?: string | null, province?: { __typename?: 'ProvinceType', name?: string | null } | null } | null } | null, identifications?: Array<{ __typename?: 'PatientIdentificationType', uid: string, value: string, identificationUid: string, identification?: { __typename?: 'IdentificationType', uid: string, name: string } | null }> | null, country?: { __typename?: 'CountryType', uid: string, name?: string | null } | null, province?: { __typename?: 'ProvinceType', uid: string, name?: string | null } | null, district?: { __typename?: 'DistrictType', uid: string, name?: string | null } | null }> | null } };
 
 export type GetPatientByUidQueryVariables = Exact<{
   uid: Scalars['String']['input'];